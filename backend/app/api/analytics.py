@@ -594,3 +594,58 @@ def get_erosionmap(
         headers={"Content-Length": str(len(data))}
     )
 
+
+
+@router.get("/render/population")
+def get_population_map(species_code: str | None = None):
+    """获取种群分布（二进制 Float32Array，读取张量快照，不查询数据库）
+    
+    返回每个地块的种群数量，按地块ID顺序排列；指定 species_code 时只返回该物种。
+    尚未发布快照（或物种不在快照中）时返回空内容。
+    """
+    import numpy as np
+    from starlette.responses import Response
+    from ..tensor.snapshot import get_snapshot_reader
+    
+    snapshot = get_snapshot_reader().latest()
+    if snapshot is None:
+        return Response(content=b"", media_type="application/octet-stream")
+    
+    grid = snapshot.total_population if species_code is None else snapshot.population_slice(species_code)
+    data = b"" if grid is None else snapshot.per_tile(grid).astype(np.float32, copy=False).tobytes()
+    
+    return Response(
+        content=data,
+        media_type="application/octet-stream",
+        headers={
+            "Content-Length": str(len(data)),
+            "X-Snapshot-Version": str(snapshot.version),
+            "X-Turn-Index": str(snapshot.turn_index),
+        },
+    )
+
+
+@router.get("/render/biodiversity")
+def get_biodiversity_map():
+    """获取物种丰富度（二进制 Int32Array，读取张量快照，不查询数据库）
+    
+    返回每个地块上种群 > 0 的物种数，按地块ID顺序排列。
+    """
+    from starlette.responses import Response
+    from ..tensor.snapshot import get_snapshot_reader
+    
+    snapshot = get_snapshot_reader().latest()
+    if snapshot is None:
+        return Response(content=b"", media_type="application/octet-stream")
+    
+    data = snapshot.per_tile(snapshot.richness).tobytes()
+    
+    return Response(
+        content=data,
+        media_type="application/octet-stream",
+        headers={
+            "Content-Length": str(len(data)),
+            "X-Snapshot-Version": str(snapshot.version),
+            "X-Turn-Index": str(snapshot.turn_index),
+        },
+    )
@@ -1192,6 +1192,7 @@ async def create_save(request: CreateSaveRequest) -> dict:
         # 繁荣生态剧本从150回合开始，其他剧本从0开始
         initial_turn = 150 if request.scenario == "繁荣生态" else 0
         simulation_engine.turn_counter = initial_turn
+        simulation_engine.reset_tensor_state()
         logger.debug(f"[存档API] 回合计数器已设置为 {initial_turn}")
         
         # 【重置游戏服务状态】
@@ -1497,6 +1498,7 @@ async def load_game(request: LoadGameRequest) -> dict:
         
         # 【关键修复】更新 simulation_engine 的回合计数器
         simulation_engine.turn_counter = turn_index
+        simulation_engine.reset_tensor_state()
         logger.info(f"[存档加载] 已恢复回合计数器: {turn_index}")
         
         # 【新增】恢复 Embedding 集成数据
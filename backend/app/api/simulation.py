@@ -483,6 +483,7 @@ async def create_save(
         # 繁荣生态剧本从150回合开始，其他剧本从0开始
         initial_turn = 150 if request.scenario == "繁荣生态" else 0
         engine.turn_counter = initial_turn
+        engine.reset_tensor_state()
         energy_service.reset()
         divine_progression_service.reset()
         achievement_service.reset()
@@ -747,6 +748,7 @@ async def load_game(
         
         # 恢复回合计数器
         engine.turn_counter = result.get("turn_index", 0)
+        engine.reset_tensor_state()
         
         # 设置会话状态
         session.set_save_name(request.save_name)
@@ -121,7 +121,10 @@ class TestNewRouterIntegration:
         """测试健康检查端点"""
         response = client.get("/health")
         assert response.status_code == 200
-        assert response.json()["status"] == "ok"
+        data = response.json()
+        assert data["status"] == "ok"
+        assert isinstance(data["tensor_ready"], bool)
+        assert data["kernels"]["warmup"] in ("idle", "running", "ready", "failed")
     
     def test_api_health_check(self, client, mock_session):
         """测试 API 健康检查端点"""
@@ -130,6 +133,7 @@ class TestNewRouterIntegration:
         data = response.json()
         assert data["status"] == "ok"
         assert "session_id" in data
+        assert "tensor_ready" in data
     
     def test_species_list(self, client, mock_container):
         """测试物种列表端点"""
@@ -74,6 +74,37 @@ class Settings(BaseSettings):
     use_auto_tradeoff: bool = Field(default=True, alias="USE_AUTO_TRADEOFF")
     # 代价/增益比例 (0.5-1.0)
     tradeoff_ratio: float = Field(default=0.7, alias="TRADEOFF_RATIO")
+    # 张量内核计算后端：auto（GPU→CPU→NumPy）/ gpu / cpu（Taichi ti.cpu）/ numpy
+    tensor_compute_backend: str = Field(default="auto", alias="TENSOR_COMPUTE_BACKEND")
+    # API 启动后在后台线程初始化内核并预编译（关闭则在首次内核调用时同步初始化）
+    tensor_kernel_warmup: bool = Field(default=True, alias="TENSOR_KERNEL_WARMUP")
+    # Taichi 内核分析器：逐内核设备耗时导出到 /metrics（每次内核调用后同步设备，有额外开销）
+    tensor_kernel_profiler: bool = Field(default=False, alias="TENSOR_KERNEL_PROFILER")
+    # 生态计算步进模式：staged 逐阶段调用内核；fused 回合内数组常驻设备（GPU 后端省去主机↔设备拷贝）
+    tensor_ecology_stepping: str = Field(default="staged", alias="TENSOR_ECOLOGY_STEPPING")
+    # 生态计算多进程物种分片的工作进程数（0/1 = 进程内计算，-1 = 全部可用 CPU；仅 NumPy / Taichi CPU 后端）
+    tensor_ecology_shard_workers: int = Field(default=0, alias="TENSOR_ECOLOGY_SHARD_WORKERS")
+    # 背景层物种的降采样倍数（1 = 关闭，全部物种全分辨率计算）
+    tensor_ecology_lod_factor: int = Field(default=1, alias="TENSOR_ECOLOGY_LOD_FACTOR")
+    # 流水线调度：serial 按 order 串行；dag 按阶段依赖声明并发执行无读写冲突的阶段
+    pipeline_scheduler: str = Field(default="serial", alias="PIPELINE_SCHEDULER")
+    # 按阶段执行策略把阻塞阶段移出事件循环（Taichi 阶段统一在 tensor-compute 线程执行）
+    pipeline_offload_stages: bool = Field(default=False, alias="PIPELINE_OFFLOAD_STAGES")
+    # 只把 compute 阶段（Taichi 内核）放到 tensor-compute 线程，其余阶段仍在事件循环上执行
+    pipeline_compute_thread: bool = Field(default=False, alias="PIPELINE_COMPUTE_THREAD")
+    # thread 策略阶段（数据库/文件 I/O）的线程池大小
+    pipeline_stage_threads: int = Field(default=2, alias="PIPELINE_STAGE_THREADS")
+    # 多回合推演时把报告阶段（LLM 叙事、历史、导出）推迟到下一回合模拟期间执行，报告经事件流推送
+    pipeline_overlap_reports: bool = Field(default=False, alias="PIPELINE_OVERLAP_REPORTS")
+    # 报告叠加模式下报告最多落后的回合数
+    pipeline_report_backlog: int = Field(default=1, alias="PIPELINE_REPORT_BACKLOG")
+    # 阶段采样分析：每回合写出折叠栈（火焰图）与 Top-N 函数表（debug 模式始终开启）
+    pipeline_profile: bool = Field(default=False, alias="PIPELINE_PROFILE")
+    pipeline_profile_dir: str = Field(default=str(PROJECT_ROOT / "data/profiles"), alias="PIPELINE_PROFILE_DIR")
+    # 采样间隔（毫秒）
+    pipeline_profile_interval_ms: float = Field(default=5.0, alias="PIPELINE_PROFILE_INTERVAL_MS")
+    # 同时记录 tracemalloc 分配汇总（开销较大）
+    pipeline_profile_memory: bool = Field(default=False, alias="PIPELINE_PROFILE_MEMORY")
     
     # ========== 物种分化平衡参数 ==========
     # 分化冷却期（回合数）：分化后多少回合内不能再次分化
@@ -85,6 +116,14 @@ class Settings(BaseSettings):
     base_speciation_rate: float = Field(default=0.50, alias="BASE_SPECIATION_RATE")
     # 最大子种数量
     max_offspring_count: int = Field(default=6, alias="MAX_OFFSPRING_COUNT")
+    # 存活物种预算：超过后合并近乎相同的姊妹谱系（0 = 关闭）
+    species_budget: int = Field(default=0, alias="SPECIES_BUDGET")
+    # 每回合最多合并对数
+    species_merge_max_per_turn: int = Field(default=5, alias="SPECIES_MERGE_MAX_PER_TURN")
+    # 合并的遗传距离上限 / 特质距离上限 / 地块重叠下限
+    species_merge_genetic_distance: float = Field(default=0.12, alias="SPECIES_MERGE_GENETIC_DISTANCE")
+    species_merge_trait_distance: float = Field(default=0.08, alias="SPECIES_MERGE_TRAIT_DISTANCE")
+    species_merge_min_overlap: float = Field(default=0.6, alias="SPECIES_MERGE_MIN_OVERLAP")
     
     # ========== 遗传距离与基因交流平衡参数 ==========
     # 时间分化分母（N回合达到最大时间距离）：30表示30回合(1500万年)完全分化
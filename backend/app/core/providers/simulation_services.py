@@ -147,6 +147,16 @@ class SimulationServiceProvider:
             "tradeoff_ratio": getattr(speciation_config, "tradeoff_ratio",
                                       getattr(settings, "tradeoff_ratio", 0.7)),
             "tensor_balance_path": getattr(settings, "tensor_balance_path", None),
+            "pipeline_scheduler": getattr(settings, "pipeline_scheduler", "serial"),
+            "pipeline_offload_stages": getattr(settings, "pipeline_offload_stages", False),
+            "pipeline_compute_thread": getattr(settings, "pipeline_compute_thread", False),
+            "pipeline_stage_threads": getattr(settings, "pipeline_stage_threads", 2),
+            "pipeline_overlap_reports": getattr(settings, "pipeline_overlap_reports", False),
+            "pipeline_report_backlog": getattr(settings, "pipeline_report_backlog", 1),
+            "pipeline_profile": getattr(settings, "pipeline_profile", False),
+            "pipeline_profile_dir": getattr(settings, "pipeline_profile_dir", None),
+            "pipeline_profile_interval_ms": getattr(settings, "pipeline_profile_interval_ms", 5.0),
+            "pipeline_profile_memory": getattr(settings, "pipeline_profile_memory", False),
         }
     
     @cached_property
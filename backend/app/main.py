@@ -27,7 +27,8 @@ import time
 from contextlib import asynccontextmanager
 from typing import AsyncGenerator, Callable
 
-from fastapi import FastAPI, Request, Response
+from fastapi import FastAPI, Query, Request, Response
+from fastapi.responses import PlainTextResponse
 from starlette.middleware.base import BaseHTTPMiddleware
 
 from .core.config import get_settings, setup_logging
@@ -45,6 +46,7 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
         "/api/hints",
         "/api/health",
         "/health",
+        "/metrics",
     }
     
     async def dispatch(self, request: Request, call_next: Callable) -> Response:
@@ -175,6 +177,14 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     
     logger.info("[启动] 服务容器初始化完成")
     
+    # 张量内核在后台线程初始化 + 预编译，不阻塞启动和首个请求
+    if settings.tensor_kernel_warmup:
+        from .tensor.compute_backend import start_kernel_warmup
+        # compute 阶段在 tensor-compute 线程执行时，Taichi 也在该线程初始化
+        start_kernel_warmup(
+            on_compute_thread=settings.pipeline_offload_stages or settings.pipeline_compute_thread,
+        )
+    
     yield  # 应用在此运行
     
     # 关闭时清理（如需要）
@@ -189,17 +199,47 @@ app.add_middleware(RequestLoggingMiddleware)
 
 
 @app.get("/health", tags=["system"])
-def healthcheck() -> dict[str, str]:
-    """基础健康检查"""
-    return {"status": "ok"}
+def healthcheck() -> dict:
+    """基础健康检查
+    
+    tensor_ready 表示张量内核是否已完成初始化/预编译（后台预热），
+    为 False 时服务可用，但首次模拟回合可能需要等待编译。
+    """
+    from .tensor.compute_backend import get_kernel_status
+    kernels = get_kernel_status()
+    return {
+        "status": "ok",
+        "tensor_ready": kernels["ready"],
+        "kernels": kernels,
+    }
+
+
+@app.get("/metrics", tags=["system"], response_class=PlainTextResponse)
+def prometheus_metrics() -> str:
+    """张量层逐内核计量（Prometheus 文本格式）"""
+    from .tensor.kernel_metrics import get_kernel_profiler
+    return get_kernel_profiler().to_prometheus()
+
+
+@app.get("/api/metrics/kernels", tags=["system"])
+def kernel_metrics_history(limit: int = Query(20, ge=0, le=1000)) -> dict:
+    """最近若干回合的逐内核计量（旧 → 新）"""
+    from .tensor.kernel_metrics import get_kernel_profiler
+    profiler = get_kernel_profiler()
+    return {
+        "turns": profiler.turns,
+        "device_profiler": profiler.device_profiler,
+        "history": profiler.get_history(limit),
+    }
 
 
 @app.get("/api/health", tags=["system"])
-def api_healthcheck(request: Request) -> dict[str, str]:
+def api_healthcheck(request: Request) -> dict:
     """API 健康检查（带会话信息）
     
     使用 app.state.session 获取 lifespan 管理的实例。
     """
+    from .tensor.compute_backend import get_kernel_status
     session_id = ""
     if hasattr(request.app.state, 'session'):
         session = request.app.state.session
@@ -208,6 +248,7 @@ def api_healthcheck(request: Request) -> dict[str, str]:
     return {
         "status": "ok",
         "session_id": session_id,
+        "tensor_ready": get_kernel_status()["ready"],
     }
 
 
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import logging
+import threading
 import time
 from collections.abc import Iterable
 from typing import Generator
@@ -24,6 +25,49 @@ from ..models.environment import (
 from ..models.config import UIConfig, ProviderConfig
 
 
+class TileChangeLog:
+    """地块写入日志：记录自上次 take() 以来写回数据库的地块
+
+    张量状态初始化阶段据此只更新本回合变化的地块，无需每回合对全图做差分。
+    所有仓储实例共享同一份日志（模块级 tile_change_log）。
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._tiles: dict[int, MapTile] = {}
+        self._unknown = True  # 启动时尚未记录过任何写入，视为未知
+
+    def record(self, tiles: Iterable[MapTile]) -> None:
+        """记录写入的地块（同一地块以最后一次写入为准）"""
+        with self._lock:
+            for tile in tiles:
+                if tile.id is None:
+                    self._unknown = True
+                else:
+                    self._tiles[tile.id] = tile
+
+    def invalidate(self) -> None:
+        """标记变化未知（清表、读档等无法逐块记录的写入）"""
+        with self._lock:
+            self._tiles.clear()
+            self._unknown = True
+
+    def take(self) -> list[MapTile] | None:
+        """取出并清空已记录的地块
+
+        Returns:
+            变化地块列表；None 表示变化未知，调用方需全量重建
+        """
+        with self._lock:
+            tiles = None if self._unknown else list(self._tiles.values())
+            self._tiles = {}
+            self._unknown = False
+            return tiles
+
+
+tile_change_log = TileChangeLog()
+
+
 class EnvironmentRepository:
     """环境数据仓储
     
@@ -35,9 +79,11 @@ class EnvironmentRepository:
     5. 分块迭代器（iter_habitats_chunked）- 降低内存峰值
     """
     def upsert_tiles(self, tiles: Iterable[MapTile]) -> None:
+        tiles = list(tiles)
         with session_scope() as session:
             for tile in tiles:
                 session.merge(tile)
+        tile_change_log.record(tiles)
 
     def list_tiles(self, limit: int | None = None) -> list[MapTile]:
         with session_scope() as session:
@@ -73,6 +119,7 @@ class EnvironmentRepository:
             # 再删除主表
             session.exec(text("DELETE FROM map_tiles"))
             session.exec(text("DELETE FROM map_state"))
+        tile_change_log.invalidate()
 
     def ensure_tile_columns(self) -> None:
         with session_scope() as session:
@@ -607,6 +654,7 @@ class EnvironmentRepository:
         
         total = 0
         start_time = time.time()
+        written: list[MapTile] = []
         
         with session_scope() as session:
             for i in range(0, len(tiles_data), chunk_size):
@@ -616,9 +664,11 @@ class EnvironmentRepository:
                     # 使用 merge 实现 upsert
                     tile = MapTile(**tile_data)
                     session.merge(tile)
+                    written.append(tile)
                     total += 1
                 
                 session.commit()
+        tile_change_log.record(written)
         
         elapsed = time.time() - start_time
         logger.info(
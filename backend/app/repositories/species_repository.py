@@ -105,6 +105,19 @@ class SpeciesRepository:
             session.refresh(merged)
             return merged
 
+    def upsert_many(self, species_list: Iterable[Species]) -> int:
+        """批量 upsert（单个事务，不逐个 refresh）
+        
+        Returns:
+            写入的物种数
+        """
+        count = 0
+        with session_scope() as session:
+            for species in species_list:
+                session.merge(species)
+                count += 1
+        return count
+
     def add_population_snapshots(
         self, snapshots: Iterable[PopulationSnapshot]
     ) -> None:
@@ -12,6 +12,7 @@ from typing import Sequence, TYPE_CHECKING
 import numpy as np
 
 from ...models.species import Species
+from ...tensor.phylogeny import get_phylogeny_index
 
 logger = logging.getLogger(__name__)
 
@@ -154,36 +155,12 @@ class GeneticDistanceCalculator:
         return time_distance
     
     def _find_common_ancestor_turn(self, sp1: Species, sp2: Species) -> int:
-        """查找共同祖先的回合数"""
-        codes1 = self._get_lineage_path(sp1.lineage_code)
-        codes2 = self._get_lineage_path(sp2.lineage_code)
-        
-        for i, (c1, c2) in enumerate(zip(codes1, codes2)):
-            if c1 != c2:
-                if i == 0:
-                    return 0
-                return min(sp1.created_turn, sp2.created_turn)
-        
-        return min(sp1.created_turn, sp2.created_turn)
-    
-    def _get_lineage_path(self, lineage_code: str) -> list[str]:
-        """获取谱系路径
-        
-        例如: "A1a1b" -> ["A", "A1", "A1a", "A1a1", "A1a1b"]
-        """
-        path = []
-        current = ""
-        
-        for char in lineage_code:
-            current += char
-            if char.isalpha() and len(current) == 1:
-                path.append(current)
-            elif char.isdigit():
-                path.append(current)
-            elif char.isalpha() and len(current) > 1:
-                path.append(current)
-        
-        return path
+        """查找共同祖先的回合数（无共同祖先时为 0）"""
+        index = get_phylogeny_index()
+        index.add_species((sp1, sp2))
+        if index.lca_code(sp1.lineage_code, sp2.lineage_code):
+            return min(sp1.created_turn, sp2.created_turn)
+        return 0
     
     def batch_calculate(
         self, 
@@ -276,7 +253,9 @@ class GeneticDistanceCalculator:
         
         # 时间信息
         created_turns = np.array([sp.created_turn for sp in species_list], dtype=float)
-        lineage_paths = [self._get_lineage_path(sp.lineage_code) for sp in species_list]
+        index = get_phylogeny_index()
+        index.add_species(species_list)
+        related = index.related_matrix([sp.lineage_code for sp in species_list])
         
         # ============ 向量化计算形态差异 ============
         length_min = np.minimum.outer(lengths, lengths)
@@ -308,22 +287,16 @@ class GeneticDistanceCalculator:
                     organ_diff_matrix[i, j] = len(symmetric) / len(union)
                 organ_diff_matrix[j, i] = organ_diff_matrix[i, j]
         
-        # ============ 计算时间差异（需要逐对）============
+        # ============ 计算时间差异（谱系索引向量化）============
         from ...core.config import get_settings
         _settings = get_settings()
         time_scale = _settings.time_divergence_scale  # 默认40，原本是500
         
-        time_diff_matrix = np.zeros((n, n))
-        for i in range(n):
-            for j in range(i + 1, n):
-                common_turn = self._find_common_ancestor_turn_by_paths(
-                    lineage_paths[i], lineage_paths[j],
-                    int(created_turns[i]), int(created_turns[j])
-                )
-                current_turn = max(created_turns[i], created_turns[j])
-                divergence = current_turn - common_turn
-                time_diff_matrix[i, j] = min(1.0, divergence / time_scale)
-                time_diff_matrix[j, i] = time_diff_matrix[i, j]
+        # 有共同祖先时以较早的创建回合作为分化起点，否则从第 0 回合算起
+        common_turn = np.where(related, np.minimum.outer(created_turns, created_turns), 0.0)
+        current_turn = np.maximum.outer(created_turns, created_turns)
+        time_diff_matrix = np.minimum(1.0, (current_turn - common_turn) / time_scale)
+        np.fill_diagonal(time_diff_matrix, 0.0)
         
         # ============ 组合距离（根据是否有embedding调整权重）============
         if embedding_matrix is not None:
@@ -424,18 +397,6 @@ class GeneticDistanceCalculator:
             logger.warning(f"[遗传距离] Embedding计算失败: {e}")
             return np.zeros((n, n))
     
-    def _find_common_ancestor_turn_by_paths(
-        self, path1: list[str], path2: list[str],
-        turn1: int, turn2: int
-    ) -> int:
-        """使用预计算的谱系路径查找共同祖先回合"""
-        for i, (c1, c2) in enumerate(zip(path1, path2)):
-            if c1 != c2:
-                if i == 0:
-                    return 0
-                return min(turn1, turn2)
-        return min(turn1, turn2)
-    
     def get_distance_matrix(self, species_list: Sequence[Species]) -> tuple[np.ndarray, list[str]]:
         """返回完整的距离矩阵和物种代码列表
         
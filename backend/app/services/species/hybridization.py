@@ -23,6 +23,7 @@ from typing import Sequence, TYPE_CHECKING
 
 from ...core.config import get_settings
 from ...models.species import Species
+from ...tensor.phylogeny import get_phylogeny_index
 from .genetic_distance import GeneticDistanceCalculator
 from .gene_diversity import GeneDiversityService
 
@@ -447,38 +448,7 @@ class HybridizationService:
         - A1a1, A1b -> A1（公共祖先）
         - A1, B1 -> ""（无公共祖先，不同属）
         """
-        # 解析谱系路径
-        path1 = self._get_lineage_path(code1)
-        path2 = self._get_lineage_path(code2)
-        
-        # 找到最长公共前缀
-        common = ""
-        for p1, p2 in zip(path1, path2):
-            if p1 == p2:
-                common = p1
-            else:
-                break
-        
-        return common
-    
-    def _get_lineage_path(self, lineage_code: str) -> list[str]:
-        """获取谱系路径
-        
-        例如: "A1a1b" -> ["A", "A1", "A1a", "A1a1", "A1a1b"]
-        """
-        path = []
-        current = ""
-        
-        for char in lineage_code:
-            current += char
-            if char.isalpha() and len(current) == 1:
-                path.append(current)
-            elif char.isdigit():
-                path.append(current)
-            elif char.isalpha() and len(current) > 1:
-                path.append(current)
-        
-        return path
+        return get_phylogeny_index().lca_code(code1, code2)
     
     def _generate_hybrid_code(self, parent_code: str, existing_codes: set[str]) -> str:
         """生成杂交种的编码
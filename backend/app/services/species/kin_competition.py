@@ -19,6 +19,8 @@ from typing import TYPE_CHECKING, Sequence
 
 import numpy as np
 
+from ...tensor.phylogeny import get_phylogeny_index
+
 if TYPE_CHECKING:
     from ...models.species import Species
     from ...models.config import EcologyBalanceConfig
@@ -50,10 +52,6 @@ class KinCompetitionCalculator:
     
     def __init__(self, config: EcologyBalanceConfig | None = None):
         self._config = config
-        # 缓存：物种谱系路径 {lineage_code: [ancestor_codes]}
-        self._lineage_cache: dict[str, list[str]] = {}
-        # 缓存：物种间亲缘代数 {(code1, code2): generations}
-        self._kinship_cache: dict[tuple[str, str], int] = {}
     
     def reload_config(self, config: EcologyBalanceConfig) -> None:
         self._config = config
@@ -285,13 +283,19 @@ class KinCompetitionCalculator:
                 fitness_score=fitness_scores.get(sp.lineage_code, 0.5),
             )
         
+        # 亲缘代数矩阵（共享谱系索引，一次向量化 LCA 查询）
+        index = get_phylogeny_index()
+        index.add_species(group)
+        kinship = index.kinship_matrix([sp.lineage_code for sp in group])
+        
         # 两两比较
         for i, sp1 in enumerate(group):
-            for sp2 in group[i+1:]:
+            for j in range(i + 1, len(group)):
+                sp2 = group[j]
                 code1, code2 = sp1.lineage_code, sp2.lineage_code
                 
-                # 计算亲缘代数
-                kin_generations = self._get_kinship_generations(sp1, sp2)
+                # 亲缘代数
+                kin_generations = int(kinship[i, j])
                 is_kin = kin_generations <= cfg.kin_generation_threshold
                 
                 # 获取生态位重叠度
@@ -450,85 +454,15 @@ class KinCompetitionCalculator:
         - N: 需要追溯N代才能找到共同祖先
         - 999: 无共同祖先（不同属）
         """
-        code1, code2 = sp1.lineage_code, sp2.lineage_code
-        
-        # 检查缓存
-        cache_key = (min(code1, code2), max(code1, code2))
-        if cache_key in self._kinship_cache:
-            return self._kinship_cache[cache_key]
-        
-        # 构建祖先链
-        ancestors1 = self._get_ancestor_chain(sp1)
-        ancestors2 = self._get_ancestor_chain(sp2)
-        
-        # 查找共同祖先
-        for gen1, anc1 in enumerate(ancestors1):
-            if anc1 in ancestors2:
-                gen2 = ancestors2.index(anc1)
-                result = max(gen1, gen2)
-                self._kinship_cache[cache_key] = result
-                return result
-        
-        # 无共同祖先
-        self._kinship_cache[cache_key] = 999
-        return 999
+        index = get_phylogeny_index()
+        index.add_species((sp1, sp2))
+        return index.kinship(sp1.lineage_code, sp2.lineage_code)
     
-    def _get_ancestor_chain(self, sp: Species) -> list[str]:
-        """获取物种的祖先链 [self, parent, grandparent, ...]"""
-        code = sp.lineage_code
-        if code in self._lineage_cache:
-            return self._lineage_cache[code]
-        
-        chain = [code]
-        current = sp
-        
-        # 追溯最多10代
-        for _ in range(10):
-            parent_code = getattr(current, 'parent_code', None)
-            if not parent_code:
-                break
-            chain.append(parent_code)
-            # 尝试获取父代物种对象（如果有的话）
-            # 这里简化处理，只使用 lineage_code 前缀判断
-            current = None
-            break
-        
-        # 备用方案：使用 lineage_code 前缀推断
-        # 例如 "A1B2C1" 的祖先链是 ["A1B2C1", "A1B2", "A1", "A"]
-        if len(chain) == 1:
-            chain = self._infer_ancestors_from_code(code)
-        
-        self._lineage_cache[code] = chain
-        return chain
-    
-    def _infer_ancestors_from_code(self, code: str) -> list[str]:
-        """从 lineage_code 推断祖先链
+    def clear_cache(self) -> None:
+        """清除缓存（新回合时调用）
         
-        例如 "A1B2C1" → ["A1B2C1", "A1B2", "A1", "A"]
+        亲缘关系由共享谱系索引维护，无需按回合清空。
         """
-        chain = [code]
-        
-        # lineage_code 格式: 字母+数字 重复
-        # 逐步去掉最后一个"字母+数字"组合
-        import re
-        pattern = re.compile(r'^(.+?)([A-Z]\d+)$')
-        
-        current = code
-        for _ in range(10):
-            match = pattern.match(current)
-            if match:
-                current = match.group(1)
-                if current:
-                    chain.append(current)
-            else:
-                break
-        
-        return chain
-    
-    def clear_cache(self) -> None:
-        """清除缓存（新回合时调用）"""
-        self._lineage_cache.clear()
-        self._kinship_cache.clear()
 
 
 # 单例
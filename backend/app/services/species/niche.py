@@ -433,57 +433,23 @@ class NicheAnalyzer:
         return False
     
     def _compute_lineage_bonus_matrix(self, lineage_codes: list[str]) -> np.ndarray:
-        """【张量化优化】计算谱系前缀匹配的bonus矩阵
+        """【张量化优化】计算同属谱系的bonus矩阵
         
-        如果两个物种共享>=2个前缀字符，bonus=0.15
+        如果两个物种有共同祖先（同一属），bonus=0.15
         """
         n = len(lineage_codes)
         if n <= 1:
             return np.zeros((n, n))
         
-        # 【张量化】使用 NicheTensorCompute 进行批量计算
-        try:
-            from ...tensor.niche_tensor import get_niche_tensor_compute
-            
-            tensor_compute = get_niche_tensor_compute()
-            bonus, time_ms = tensor_compute.compute_lineage_bonus_matrix(
-                lineage_codes=lineage_codes,
-                min_common_prefix=2,
-                bonus_value=0.15,
-            )
-            
-            if time_ms > 5:
-                logger.debug(f"[生态位-谱系bonus] 张量计算: {n}物种, {time_ms:.1f}ms")
-            
-            return bonus
-            
-        except ImportError:
-            logger.debug("[生态位-谱系bonus] 张量模块不可用，使用原循环方法")
-            return self._compute_lineage_bonus_matrix_loop(lineage_codes)
-    
-    def _compute_lineage_bonus_matrix_loop(self, lineage_codes: list[str]) -> np.ndarray:
-        """【后备方法】使用循环计算谱系bonus矩阵"""
-        n = len(lineage_codes)
-        bonus = np.zeros((n, n))
+        from ...tensor.niche_tensor import get_niche_tensor_compute
         
-        for i in range(n):
-            code_i = lineage_codes[i]
-            if len(code_i) < 2:
-                continue
-            for j in range(i + 1, n):
-                code_j = lineage_codes[j]
-                if len(code_j) < 2:
-                    continue
-                
-                common_len = 0
-                for ci, cj in zip(code_i, code_j):
-                    if ci == cj:
-                        common_len += 1
-                    else:
-                        break
-                
-                if common_len >= 2:
-                    bonus[i, j] = 0.15
-                    bonus[j, i] = 0.15
+        tensor_compute = get_niche_tensor_compute()
+        bonus, time_ms = tensor_compute.compute_lineage_bonus_matrix(
+            lineage_codes=lineage_codes,
+            bonus_value=0.15,
+        )
+        
+        if time_ms > 5:
+            logger.debug(f"[生态位-谱系bonus] 张量计算: {n}物种, {time_ms:.1f}ms")
         
         return bonus
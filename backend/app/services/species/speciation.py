@@ -28,6 +28,8 @@ from .description_enhancer import DescriptionEnhancerService  # 【描述增强
 from .gene_diversity import GeneDiversityService
 from .naming_hints import NamingHintGenerator
 from .organ_evolution_service import OrganEvolutionService, get_organ_evolution_service
+from ...tensor.phylogeny import get_phylogeny_index, reset_phylogeny_index
+from ...tensor.regions import tile_clusters
 from ...tensor.tradeoff import TradeoffCalculator
 from ...core.config import get_settings
 from ...simulation.constants import get_time_config
@@ -192,6 +194,7 @@ class SpeciationService:
         self.clear_tile_cache()
         self._deferred_requests.clear()
         self._tile_adjacency.clear()
+        reset_phylogeny_index()
     
     def set_evolution_hints(self, hints: dict[str, dict]) -> None:
         """设置演化提示（由 EmbeddingIntegrationService 提供）
@@ -1482,6 +1485,7 @@ class SpeciationService:
             )
             logger.info(f"[分化] 新物种 {new_species.common_name} created_turn={new_species.created_turn} (传入的turn_index={turn_index})")
             new_species = species_repository.upsert(new_species)
+            get_phylogeny_index().add(new_species.lineage_code, new_species.parent_code)
             # 记录本回合亲本子代计数（与杂交共享上限）
             parent_code = ctx["parent"].lineage_code
             try:
@@ -1658,6 +1662,7 @@ class SpeciationService:
             
             logger.info(f"[规则分化] 新背景物种 {new_species.common_name} created_turn={new_species.created_turn}")
             new_species = species_repository.upsert(new_species)
+            get_phylogeny_index().add(new_species.lineage_code, new_species.parent_code)
             
             # 将背景物种加入增强队列（用于模板描述和向量遗传）
             self._rule_fallback_species.append((new_species, ctx["parent"], ctx["speciation_type"]))
@@ -3835,7 +3840,7 @@ class SpeciationService:
         return result
     
     def _find_connected_clusters(self, tile_ids: set[int]) -> list[set[int]]:
-        """使用并查集找出连通的地块群
+        """找出连通的地块群（张量地块网格优先，否则对邻接表做并查集）
         
         Args:
             tile_ids: 物种占据的地块ID集合
@@ -3846,6 +3851,16 @@ class SpeciationService:
         if not tile_ids:
             return []
         
+        # 优先使用张量状态的地块网格：与 SpeciationMonitor 共用六边形批量标记
+        tile_grid = None
+        if self._tensor_state is not None:
+            tile_grid = (getattr(self._tensor_state, "masks", None) or {}).get("tile_ids")
+        if tile_grid is not None:
+            clusters = tile_clusters(tile_grid, tile_ids)
+            if sum(len(c) for c in clusters) == len(tile_ids):
+                return clusters
+            # 部分地块不在网格中（地图已变化），回退到邻接表
+        
         if not self._tile_adjacency:
             # 没有邻接信息，假设所有地块连通
             return [tile_ids]
@@ -0,0 +1,286 @@
+"""物种数量调控服务
+
+回合耗时随存活物种数超线性增长：生态位重叠、竞争、亲缘、杂交、植物竞争
+每回合都要构建 O(S²) 矩阵，而分化没有与性能挂钩的总量上限。
+存活物种数超过预算（Settings.species_budget）时，调控器把几乎无法区分的
+姊妹谱系合并为一个代表物种：
+- 候选只在同一亲本的姊妹谱系间产生（按 parent_code 分组，不做全体两两比较）
+- 依次过滤：栖息地/食性/营养级一致 → 特质向量距离 → 地块重叠（Jaccard）→
+  GeneticDistanceCalculator 遗传距离；按遗传距离从小到大贪心选取不相交的对
+- 代表物种取种群较大者，种群相加（张量种群行逐格相加），被并入物种标记为灭绝
+  并记录并入对象；捕食/共生引用改指代表物种
+- 每次合并写一条 event_type="merge" 的 LineageEvent
+"""
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass, field
+from typing import Sequence
+
+import numpy as np
+
+from ...models.species import LineageEvent, Species
+from .genetic_distance import STANDARD_TRAITS, GeneticDistanceCalculator
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class GovernorConfig:
+    species_budget: int                 # 存活物种预算（0 = 关闭）
+    max_merges_per_turn: int = 5
+    max_genetic_distance: float = 0.12  # 遗传距离上限
+    max_trait_distance: float = 0.08    # 特质距离上限（与 GeneticDistanceCalculator 的属性差异同尺度）
+    min_tile_overlap: float = 0.6       # 地块重叠（Jaccard）下限
+    max_trophic_gap: float = 0.25       # 营养级差上限
+
+
+@dataclass(slots=True)
+class LineageMerge:
+    survivor_code: str
+    absorbed_code: str
+    genetic_distance: float
+    trait_distance: float
+    tile_overlap: float
+    population_transferred: int = 0
+
+    def to_dict(self) -> dict:
+        return {
+            "survivor": self.survivor_code,
+            "absorbed": self.absorbed_code,
+            "genetic_distance": round(self.genetic_distance, 4),
+            "trait_distance": round(self.trait_distance, 4),
+            "tile_overlap": round(self.tile_overlap, 4),
+            "population_transferred": self.population_transferred,
+        }
+
+
+@dataclass(slots=True)
+class GovernorReport:
+    alive_before: int
+    budget: int
+    merges: list[LineageMerge] = field(default_factory=list)
+    candidates_checked: int = 0
+    # 本次被修改（需要持久化）的物种
+    touched: list[Species] = field(default_factory=list)
+
+    @property
+    def alive_after(self) -> int:
+        return self.alive_before - len(self.merges)
+
+
+class SpeciesGovernor:
+    """存活物种超出预算时合并近乎相同的姊妹谱系"""
+
+    def __init__(
+        self,
+        config: GovernorConfig,
+        distance_calculator: GeneticDistanceCalculator | None = None,
+    ) -> None:
+        self.config = config
+        self.distance_calculator = distance_calculator or GeneticDistanceCalculator()
+
+    def govern(
+        self,
+        species_list: Sequence[Species],
+        turn_index: int,
+        pop: np.ndarray | None = None,
+        species_map: dict[str, int] | None = None,
+        watchlist: set[str] | None = None,
+    ) -> GovernorReport:
+        """超出预算时寻找并执行合并
+
+        Args:
+            species_list: 本回合物种
+            turn_index: 当前回合
+            pop: 张量种群 (S, H, W)，用于地块重叠并在合并时逐格相加（原地修改）
+            species_map: lineage_code → pop 行号
+            watchlist: 玩家关注的物种（不参与合并）
+        """
+        alive = [sp for sp in species_list if sp.status == "alive"]
+        report = GovernorReport(alive_before=len(alive), budget=self.config.species_budget)
+        excess = len(alive) - self.config.species_budget
+        if self.config.species_budget <= 0 or excess <= 0:
+            return report
+
+        limit = min(excess, self.config.max_merges_per_turn)
+        merges = self.find_merges(alive, pop, species_map, watchlist or set(), limit, report)
+        by_code = {sp.lineage_code: sp for sp in alive}
+        touched: dict[str, Species] = {}
+        for merge in merges:
+            for sp in self._apply(merge, by_code, alive, turn_index, pop, species_map):
+                touched[sp.lineage_code] = sp
+        report.merges = merges
+        report.touched = list(touched.values())
+        if merges:
+            logger.info(
+                f"[物种调控] 存活 {report.alive_before} > 预算 {report.budget}，"
+                f"合并 {len(merges)} 对姊妹谱系（检查 {report.candidates_checked} 对）"
+            )
+        return report
+
+    # ------------------------------------------------------------------
+    # 候选
+    # ------------------------------------------------------------------
+
+    def find_merges(
+        self,
+        alive: Sequence[Species],
+        pop: np.ndarray | None,
+        species_map: dict[str, int] | None,
+        watchlist: set[str],
+        limit: int,
+        report: GovernorReport | None = None,
+    ) -> list[LineageMerge]:
+        """按遗传距离从小到大选取至多 limit 对不相交的姊妹谱系"""
+        if pop is None or species_map is None:
+            logger.debug("[物种调控] 无张量种群，无法计算地块重叠，跳过")
+            return []
+        cfg = self.config
+        occupancy = pop.reshape(pop.shape[0], -1) > 0
+
+        siblings: dict[str, list[Species]] = {}
+        for sp in alive:
+            if (
+                sp.parent_code
+                and sp.lineage_code not in watchlist
+                and not sp.is_protected
+                and sp.lineage_code in species_map
+            ):
+                siblings.setdefault(sp.parent_code, []).append(sp)
+
+        candidates: list[LineageMerge] = []
+        checked = 0
+        for group in siblings.values():
+            if len(group) < 2:
+                continue
+            traits = np.array(
+                [[sp.abstract_traits.get(name, 5.0) for name in STANDARD_TRAITS] for sp in group],
+                dtype=np.float64,
+            )
+            diff = (traits[:, None, :] - traits[None, :, :]) / 15.0
+            trait_distance = np.sqrt((diff ** 2).mean(axis=2))
+            for i in range(len(group)):
+                for j in range(i + 1, len(group)):
+                    a, b = group[i], group[j]
+                    checked += 1
+                    if not self._compatible(a, b) or trait_distance[i, j] > cfg.max_trait_distance:
+                        continue
+                    rows = occupancy[species_map[a.lineage_code]], occupancy[species_map[b.lineage_code]]
+                    union = np.count_nonzero(rows[0] | rows[1])
+                    overlap = np.count_nonzero(rows[0] & rows[1]) / union if union else 0.0
+                    if overlap < cfg.min_tile_overlap:
+                        continue
+                    distance = self.distance_calculator.calculate_distance(a, b)
+                    if distance > cfg.max_genetic_distance:
+                        continue
+                    survivor, absorbed = self._rank(a, b)
+                    candidates.append(LineageMerge(
+                        survivor_code=survivor.lineage_code,
+                        absorbed_code=absorbed.lineage_code,
+                        genetic_distance=float(distance),
+                        trait_distance=float(trait_distance[i, j]),
+                        tile_overlap=float(overlap),
+                    ))
+        if report is not None:
+            report.candidates_checked = checked
+
+        candidates.sort(key=lambda m: (m.genetic_distance, m.trait_distance, m.absorbed_code))
+        used: set[str] = set()
+        selected: list[LineageMerge] = []
+        for merge in candidates:
+            if len(selected) >= limit:
+                break
+            if merge.survivor_code in used or merge.absorbed_code in used:
+                continue
+            used.update((merge.survivor_code, merge.absorbed_code))
+            selected.append(merge)
+        return selected
+
+    def _compatible(self, a: Species, b: Species) -> bool:
+        return (
+            a.habitat_type == b.habitat_type
+            and a.diet_type == b.diet_type
+            and abs(a.trophic_level - b.trophic_level) <= self.config.max_trophic_gap
+        )
+
+    @staticmethod
+    def _rank(a: Species, b: Species) -> tuple[Species, Species]:
+        """(代表物种, 被并入物种)：种群大者保留，相同则保留较早出现者"""
+        def key(sp: Species):
+            return (-_population(sp), sp.created_turn, sp.lineage_code)
+        return (a, b) if key(a) <= key(b) else (b, a)
+
+    # ------------------------------------------------------------------
+    # 合并
+    # ------------------------------------------------------------------
+
+    def _apply(
+        self,
+        merge: LineageMerge,
+        by_code: dict[str, Species],
+        alive: Sequence[Species],
+        turn_index: int,
+        pop: np.ndarray | None,
+        species_map: dict[str, int] | None,
+    ) -> list[Species]:
+        survivor = by_code[merge.survivor_code]
+        absorbed = by_code[merge.absorbed_code]
+        transferred = _population(absorbed)
+        merge.population_transferred = transferred
+
+        survivor.morphology_stats["population"] = _population(survivor) + transferred
+        survivor.history_highlights = list(survivor.history_highlights or []) + [
+            f"回合{turn_index}：与姊妹谱系 {absorbed.common_name}({absorbed.lineage_code}) 合并"
+        ]
+        absorbed.status = "extinct"
+        absorbed.morphology_stats["population"] = 0
+        absorbed.morphology_stats["extinction_turn"] = turn_index
+        absorbed.morphology_stats["extinction_reason"] = f"谱系合并：并入 {survivor.lineage_code}"
+        absorbed.morphology_stats["merged_into"] = survivor.lineage_code
+
+        if pop is not None and species_map is not None:
+            s, a = species_map[survivor.lineage_code], species_map[absorbed.lineage_code]
+            pop[s] += pop[a]
+            pop[a] = 0.0
+
+        touched = [survivor, absorbed]
+        for sp in alive:
+            if sp is not absorbed and _redirect(sp, absorbed.lineage_code, survivor.lineage_code):
+                touched.append(sp)
+        return touched
+
+    @staticmethod
+    def lineage_event(merge: LineageMerge, turn_index: int) -> LineageEvent:
+        return LineageEvent(
+            lineage_code=merge.survivor_code,
+            event_type="merge",
+            payload={**merge.to_dict(), "turn": turn_index},
+        )
+
+
+def _population(sp: Species) -> int:
+    return int(sp.morphology_stats.get("population", 0) or 0)
+
+
+def _redirect(sp: Species, old: str, new: str) -> bool:
+    """把捕食/共生引用从被并入物种改指代表物种，返回是否修改"""
+    changed = False
+    if old in (sp.prey_species or []):
+        prey = [code for code in sp.prey_species if code != old]
+        if new not in prey and new != sp.lineage_code:
+            prey.append(new)
+        sp.prey_species = prey
+        prefs = dict(sp.prey_preferences or {})
+        share = prefs.pop(old, 0.0)
+        if new != sp.lineage_code:
+            prefs[new] = prefs.get(new, 0.0) + share
+        sp.prey_preferences = prefs
+        changed = True
+    if old in (sp.symbiotic_dependencies or []):
+        deps = [code for code in sp.symbiotic_dependencies if code != old]
+        if new not in deps and new != sp.lineage_code:
+            deps.append(new)
+        sp.symbiotic_dependencies = deps
+        changed = True
+    return changed
@@ -0,0 +1 @@
+"""物种服务测试模块"""
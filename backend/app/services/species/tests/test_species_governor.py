@@ -0,0 +1,121 @@
+"""物种数量调控测试"""
+
+import numpy as np
+import pytest
+
+from app.models.species import Species
+from app.services.species.species_governor import GovernorConfig, SpeciesGovernor
+
+
+class _FixedDistance:
+    """按物种对返回预设遗传距离"""
+
+    def __init__(self, distances: dict[frozenset, float], default: float = 0.05):
+        self.distances = distances
+        self.default = default
+
+    def calculate_distance(self, sp1, sp2, embedding_distance=None):
+        return self.distances.get(frozenset((sp1.lineage_code, sp2.lineage_code)), self.default)
+
+
+def _species(code, parent="A", population=1000, traits=None, **kwargs):
+    return Species(
+        lineage_code=code,
+        latin_name=code,
+        common_name=f"物种{code}",
+        description="",
+        morphology_stats={"population": population},
+        abstract_traits=traits or {"耐寒性": 5.0, "耐热性": 5.0},
+        hidden_traits={},
+        ecological_vector=[],
+        parent_code=parent,
+        **kwargs,
+    )
+
+
+def _world(species, H=4, W=4):
+    """每个物种占据左半边地图"""
+    pop = np.zeros((len(species), H, W), dtype=np.float32)
+    pop[:, :, : W // 2] = 10.0
+    return pop, {sp.lineage_code: i for i, sp in enumerate(species)}
+
+
+@pytest.fixture
+def config():
+    return GovernorConfig(species_budget=2, max_merges_per_turn=5)
+
+
+class TestSpeciesGovernor:
+    def test_under_budget_noop(self, config):
+        species = [_species("A1"), _species("A2")]
+        pop, species_map = _world(species)
+        report = SpeciesGovernor(config, _FixedDistance({})).govern(species, 10, pop, species_map)
+        assert report.merges == [] and report.alive_after == 2
+
+    def test_merges_closest_sisters(self, config):
+        species = [
+            _species("A1", population=500),
+            _species("A2", population=2000, prey_species=[]),
+            _species("A3", population=800),
+            _species("B1", parent="B"),
+            _species("P1", parent="X", prey_species=["A1"], prey_preferences={"A1": 1.0}),
+        ]
+        pop, species_map = _world(species)
+        before = pop.sum()
+        distances = {frozenset(("A1", "A2")): 0.01, frozenset(("A2", "A3")): 0.05, frozenset(("A1", "A3")): 0.04}
+        governor = SpeciesGovernor(config, _FixedDistance(distances))
+
+        report = governor.govern(species, 12, pop, species_map)
+
+        # A1-A2 最接近；A3 只能与已使用的物种配对，不再合并
+        assert [(m.survivor_code, m.absorbed_code) for m in report.merges] == [("A2", "A1")]
+        merge = report.merges[0]
+        assert merge.population_transferred == 500 and merge.tile_overlap == 1.0
+        a1, a2 = species[0], species[1]
+        assert a2.morphology_stats["population"] == 2500
+        assert a1.status == "extinct" and a1.morphology_stats["merged_into"] == "A2"
+        assert pop[species_map["A1"]].sum() == 0 and pop.sum() == pytest.approx(before)
+        # 捕食引用改指代表物种
+        predator = species[4]
+        assert predator.prey_species == ["A2"] and predator.prey_preferences == {"A2": 1.0}
+        assert {sp.lineage_code for sp in report.touched} == {"A1", "A2", "P1"}
+
+        event = governor.lineage_event(merge, 12)
+        assert event.event_type == "merge" and event.lineage_code == "A2"
+        assert event.payload["absorbed"] == "A1" and event.payload["turn"] == 12
+
+    def test_filters(self, config):
+        far_traits = {"耐寒性": 12.0, "耐热性": 1.0}
+        species = [
+            _species("A1"),
+            _species("A2", traits=far_traits),                # 特质差异过大
+            _species("A3", habitat_type="marine"),             # 栖息地不同
+            _species("A4", is_protected=True),                 # 受保护
+            _species("A5"),                                    # 遗传距离过大
+            _species("A6"),                                    # 关注列表
+        ]
+        pop, species_map = _world(species)
+        distances = {frozenset(("A1", "A5")): 0.5}
+        report = SpeciesGovernor(config, _FixedDistance(distances)).govern(
+            species, 3, pop, species_map, watchlist={"A6"},
+        )
+        assert report.merges == []
+        assert report.candidates_checked > 0
+
+    def test_requires_tile_overlap(self, config):
+        species = [_species("A1"), _species("A2"), _species("A3")]
+        pop, species_map = _world(species)
+        pop[1] = 0.0
+        pop[1, :, -1] = 10.0                                   # A2 与其他物种不重叠
+        pop[2] = 0.0
+        pop[2, :, -1] = 10.0
+        report = SpeciesGovernor(config, _FixedDistance({})).govern(species, 3, pop, species_map)
+        assert [(m.survivor_code, m.absorbed_code) for m in report.merges] == [("A2", "A3")]
+
+    def test_limit_by_excess(self):
+        species = [_species(f"A{i}") for i in range(6)]
+        pop, species_map = _world(species)
+        governor = SpeciesGovernor(GovernorConfig(species_budget=5), _FixedDistance({}))
+        assert len(governor.govern(species, 3, pop, species_map).merges) == 1
+        # 无张量种群时不合并
+        assert governor.govern([_species(f"B{i}", parent="B") for i in range(6)], 3).merges == []
@@ -7,12 +7,16 @@ Simulation Package - 模拟引擎核心模块
 - context: SimulationContext 回合上下文
 - stages: 流水线阶段定义
 - pipeline: 流水线执行器
+- scheduler: 阶段依赖图（DAG 并发调度）
+- stage_executor: 阶段执行策略（把阻塞阶段移出事件循环）
+- report_queue: 报告阶段叠加执行（多回合推演）
 - stage_config: 阶段配置和注册表
 - plugin_stages: 插件阶段示例
 - regression_test: 回归测试框架
 - snapshot: 快照与回滚系统
 - logging_config: 日志配置与标签化
 - cli: 命令行接口
+- ensemble: 多种子集成运行（并行工作进程 + 结果汇总）
 - species: 死亡率引擎
 - tile_based_mortality: 地块级死亡率引擎
 - environment: 环境系统
@@ -34,6 +38,10 @@ from .pipeline import (
     PipelineMetrics,
     StageMetrics,
 )
+from .scheduler import StageGraph, SCHEDULER_MODES, split_deferred_stages
+from .report_queue import ReportQueue
+from .stage_profiler import StageProfiler
+from .stage_executor import ExecutionPolicy, StageExecutor
 from .stage_config import (
     StageConfig,
     PipelineStageConfig,
@@ -79,6 +87,7 @@ from .stages import (
     # AI 阶段
     SpeciationStage,
     # 后处理阶段
+    SpeciesGovernorStage,
     BackgroundManagementStage,
     BuildReportStage,
     SaveMapSnapshotStage,
@@ -143,6 +152,13 @@ __all__ = [
     "PipelineResult",
     "PipelineMetrics",
     "StageMetrics",
+    "StageGraph",
+    "SCHEDULER_MODES",
+    "ExecutionPolicy",
+    "StageExecutor",
+    "split_deferred_stages",
+    "ReportQueue",
+    "StageProfiler",
     # 阶段
     "Stage",
     "BaseStage",
@@ -152,6 +168,7 @@ __all__ = [
     "StageDependencyValidator",
     "DependencyError",
     "get_default_stages",
+    "SpeciesGovernorStage",
     # 配置与模式
     "StageConfig",
     "PipelineStageConfig",
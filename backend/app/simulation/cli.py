@@ -8,6 +8,7 @@ Simulation CLI - 命令行接口
     python -m app.simulation.cli --mode standard --turns 10
     python -m app.simulation.cli --mode debug --turns 5 --seed 42
     python -m app.simulation.cli --config scenario.yaml --output results/
+    python -m app.simulation.cli --mode standard --turns 20 --ensemble 32 --workers 8 --no-llm --output results/
 """
 
 from __future__ import annotations
@@ -65,6 +66,9 @@ class SimulationResult:
     avg_turn_duration_ms: float = 0.0
     slowest_stage: str = ""
     slowest_stage_time_ms: float = 0.0
+    # 逐回合耗时与各阶段累计耗时（集成运行汇总分位数/最慢阶段）
+    turn_durations_ms: List[float] = None
+    stage_durations_ms: Dict[str, float] = None
     
     # 错误信息
     errors: List[str] = None
@@ -72,6 +76,15 @@ class SimulationResult:
     def __post_init__(self):
         if self.errors is None:
             self.errors = []
+        if self.turn_durations_ms is None:
+            self.turn_durations_ms = []
+        if self.stage_durations_ms is None:
+            self.stage_durations_ms = {}
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SimulationResult":
+        known = {f for f in cls.__dataclass_fields__}
+        return cls(**{k: v for k, v in data.items() if k in known})
     
     def to_dict(self) -> Dict[str, Any]:
         return asdict(self)
@@ -157,9 +170,13 @@ async def run_simulation(
     scenario_file: str | None = None,
     output_dir: str | None = None,
     param_overrides: Dict[str, Any] | None = None,
+    no_llm: bool = False,
+    result_file: str | None = None,
 ) -> SimulationResult:
     """运行模拟
     
+    使用 DATABASE_URL 指向的数据库；数据库为空时自动初始化新世界。
+    
     Args:
         mode: 模式名称
         turns: 回合数
@@ -168,6 +185,8 @@ async def run_simulation(
         scenario_file: 场景文件路径（预留）
         output_dir: 输出目录
         param_overrides: 参数覆盖
+        no_llm: 禁用所有 LLM 调用（清空模型路由凭据，回合报告使用简单模式）
+        result_file: 结果 JSON 的固定输出路径（集成运行的工作进程使用）
     
     Returns:
         模拟结果
@@ -193,6 +212,11 @@ async def run_simulation(
     if seed == 0:
         seed = random.randint(1, 999999)
     random.seed(seed)
+    try:
+        import numpy as np
+        np.random.seed(seed)
+    except ImportError:
+        pass
     
     # 加载模式配置和参数
     stages, params = load_mode_with_parameters(
@@ -206,6 +230,7 @@ async def run_simulation(
     start_time = time.perf_counter()
     errors = []
     turn_durations = []
+    stage_durations: Dict[str, float] = {}
     total_migrations = 0
     total_speciations = 0
     slowest_stage = ""
@@ -221,13 +246,20 @@ async def run_simulation(
     
     try:
         # 尝试导入引擎
-        from .engine import SimulationEngine
+        from ..core.container import ServiceContainer
+        from ..core.database import init_db
         from ..schemas.requests import TurnCommand
         from ..repositories.species_repository import species_repository
         from ..repositories.environment_repository import environment_repository
         
-        # 创建引擎
-        engine = SimulationEngine()
+        # 创建引擎（与 API 启动流程一致：空数据库会自动初始化新世界）
+        init_db()
+        container = ServiceContainer()
+        container.initialize()
+        engine = container.simulation_engine
+        engine.set_mode(mode)
+        if no_llm:
+            _disable_llm(container.model_router)
         
         # 获取初始物种数
         try:
@@ -245,7 +277,7 @@ async def run_simulation(
             
             try:
                 # 执行一个回合
-                single_cmd = TurnCommand(pressures=[], rounds=1)
+                single_cmd = TurnCommand(pressures=[], rounds=1, auto_reports=not no_llm)
                 result = await engine.run_turns_async(single_cmd)
                 
                 # 收集统计
@@ -253,14 +285,16 @@ async def run_simulation(
                     report = result[0]
                     total_migrations += getattr(report, "migration_count", 0)
                     total_speciations += len(getattr(report, "branching_events", []))
-                    
-                    # 更新最慢阶段（如果有 pipeline metrics）
-                    if hasattr(engine, "_last_pipeline_metrics"):
-                        metrics = engine._last_pipeline_metrics
-                        for stage_metrics in getattr(metrics, "stage_metrics", []):
-                            if stage_metrics.duration_ms > slowest_stage_time:
-                                slowest_stage_time = stage_metrics.duration_ms
-                                slowest_stage = stage_metrics.stage_name
+                
+                # 更新最慢阶段与阶段累计耗时（如果有 pipeline metrics）
+                metrics = engine.get_pipeline_metrics()
+                for stage_metrics in getattr(metrics, "stage_metrics", []):
+                    stage_durations[stage_metrics.stage_name] = (
+                        stage_durations.get(stage_metrics.stage_name, 0.0) + stage_metrics.duration_ms
+                    )
+                    if stage_metrics.duration_ms > slowest_stage_time:
+                        slowest_stage_time = stage_metrics.duration_ms
+                        slowest_stage = stage_metrics.stage_name
                 
             except Exception as e:
                 errors.append(f"回合 {turn} 失败: {str(e)}")
@@ -313,11 +347,16 @@ async def run_simulation(
         avg_turn_duration_ms=avg_turn_duration,
         slowest_stage=slowest_stage,
         slowest_stage_time_ms=slowest_stage_time,
+        turn_durations_ms=turn_durations,
+        stage_durations_ms=stage_durations,
         errors=errors,
     )
     
     # 保存结果
-    if output_dir:
+    if result_file:
+        Path(result_file).parent.mkdir(parents=True, exist_ok=True)
+        Path(result_file).write_text(result.to_json(), encoding="utf-8")
+    elif output_dir:
         output_path = Path(output_dir)
         output_path.mkdir(parents=True, exist_ok=True)
         
@@ -332,6 +371,15 @@ async def run_simulation(
     return result
 
 
+def _disable_llm(router) -> None:
+    """清空模型路由的凭据与负载均衡，所有 AI 能力回退到本地/规则模式"""
+    router.overrides = {}
+    router.api_base_url = None
+    router.api_key = None
+    router.configure_load_balance(False)
+    logger.info("已禁用 LLM 调用（--no-llm）")
+
+
 def create_parser() -> argparse.ArgumentParser:
     """创建参数解析器"""
     parser = argparse.ArgumentParser(
@@ -349,6 +397,10 @@ def create_parser() -> argparse.ArgumentParser:
     # 指定输出目录
     python -m app.simulation.cli --mode full --turns 20 --output results/
     
+    # 集成运行：32 个种子、8 个并行工作进程、禁用 LLM，输出 JSON + CSV
+    python -m app.simulation.cli --mode standard --turns 20 \\
+        --ensemble 32 --workers 8 --no-llm --output results/
+    
     # 覆盖默认参数
     python -m app.simulation.cli --mode standard --turns 10 \\
         --param pressure_scale=1.5 --param max_species_count=200
@@ -436,6 +488,47 @@ def create_parser() -> argparse.ArgumentParser:
         help="覆盖模式参数 (格式: key=value)",
     )
     
+    # 集成运行
+    parser.add_argument(
+        "--ensemble",
+        type=int,
+        default=0,
+        help="集成运行的种子数（从 --seed 起连续编号；0=单次运行）",
+    )
+    
+    parser.add_argument(
+        "--seeds",
+        type=str,
+        default=None,
+        help="集成运行的种子列表（逗号分隔，优先于 --ensemble）",
+    )
+    
+    parser.add_argument(
+        "-w", "--workers",
+        type=int,
+        default=0,
+        help="集成运行的并行工作进程数 (0=CPU 核数)",
+    )
+    
+    parser.add_argument(
+        "--no-llm",
+        action="store_true",
+        help="禁用所有 LLM 调用（规则模式 + 简单回合报告）",
+    )
+    
+    parser.add_argument(
+        "--keep-db",
+        action="store_true",
+        help="集成运行结束后保留各工作进程的数据库（写入输出目录）",
+    )
+    
+    parser.add_argument(
+        "--result-file",
+        type=str,
+        default=None,
+        help=argparse.SUPPRESS,  # 集成运行工作进程内部使用
+    )
+    
     # 其他选项
     parser.add_argument(
         "--list-modes",
@@ -487,6 +580,16 @@ def parse_param_overrides(param_list: List[str]) -> Dict[str, Any]:
     return overrides
 
 
+def parse_seed_list(seeds: str | None, count: int, base_seed: int) -> List[int]:
+    """解析集成运行的种子列表（--seeds 优先；否则从 base_seed 起连续 count 个）"""
+    if seeds:
+        return [int(s) for s in seeds.split(",") if s.strip()]
+    if count <= 0:
+        return []
+    start = base_seed or 1
+    return list(range(start, start + count))
+
+
 def main():
     """主入口"""
     parser = create_parser()
@@ -525,6 +628,24 @@ def main():
     # 解析参数覆盖
     param_overrides = parse_param_overrides(args.param)
     
+    # 集成运行
+    seeds = parse_seed_list(args.seeds, args.ensemble, args.seed)
+    if seeds:
+        from .ensemble import run_ensemble
+        ensemble = run_ensemble(
+            mode=args.mode,
+            turns=args.turns,
+            seeds=seeds,
+            workers=args.workers or None,
+            output_dir=args.output,
+            config_file=args.config,
+            param_list=args.param,
+            no_llm=args.no_llm,
+            keep_db=args.keep_db,
+        )
+        print(ensemble.format_summary())
+        return 0 if ensemble.failed_count == 0 else 1
+    
     # 运行模拟
     result = asyncio.run(run_simulation(
         mode=args.mode,
@@ -534,6 +655,8 @@ def main():
         scenario_file=args.scenario,
         output_dir=args.output,
         param_overrides=param_overrides,
+        no_llm=args.no_llm,
+        result_file=args.result_file,
     ))
     
     # 输出结果
@@ -107,6 +107,7 @@ class SimulationContext:
         auto_hybrids: 自动杂交产生的新物种
         adaptation_events: 适应性演化事件列表
         branching_events: 分化事件列表
+        lineage_merges: 物种数量调控合并的姊妹谱系 [{survivor, absorbed, ...}]
         
         # === 背景物种管理 ===
         background_summary: 背景物种汇总
@@ -187,6 +188,7 @@ class SimulationContext:
     auto_hybrids: list[Species] = field(default_factory=list)
     adaptation_events: list[dict] = field(default_factory=list)
     branching_events: list[BranchingEvent] = field(default_factory=list)
+    lineage_merges: list[dict] = field(default_factory=list)
     
     # === 背景物种管理 ===
     background_summary: list[BackgroundSummary] = field(default_factory=list)
@@ -20,6 +20,7 @@ from dataclasses import dataclass, field
 from typing import TYPE_CHECKING
 
 from .stages import BaseStage, StageDependency, StageOrder
+from .stage_executor import ExecutionPolicy
 
 if TYPE_CHECKING:
     from .context import SimulationContext
@@ -69,6 +70,8 @@ class EcologicalRealismStage(BaseStage):
     在每回合的死亡率计算之前执行，计算各种生态学修正因子。
     """
     
+    execution_policy = ExecutionPolicy.COMPUTE
+    
     def __init__(self):
         # 在 tiering_and_niche (StageOrder.TIERING_AND_NICHE=180) 之后
         # 在 preliminary_mortality (StageOrder.PRELIMINARY_MORTALITY=200) 之前
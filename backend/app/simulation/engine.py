@@ -5,6 +5,8 @@ SimulationEngine 是模拟系统的核心调度器，负责：
 1. 依赖注入：在构造函数中注入各类 service / repository / 配置
 2. 模式管理：初始化 Pipeline、切换运行模式、加载 Stage
 3. 回合调度：通过 run_turns_async() 驱动 Pipeline 执行回合
+   （报告叠加模式下，回合 N 的报告阶段与回合 N+1 的模拟阶段并发，见 report_queue.py）
+4. 阶段采样分析：PIPELINE_PROFILE 或 debug 模式下挂载 StageProfiler，每回合写出火焰图数据
 
 设计原则：
 - 不承载具体业务逻辑，所有业务逻辑在 Stage 和 Service 中
@@ -22,8 +24,6 @@ import logging
 import sys
 from typing import TYPE_CHECKING
 
-import taichi as ti
-
 if sys.stdout and hasattr(sys.stdout, "reconfigure"):
     try:
         sys.stdout.reconfigure(encoding="utf-8", errors="ignore")
@@ -34,6 +34,7 @@ logger = logging.getLogger(__name__)
 
 # 核心依赖
 from .context import SimulationContext
+from .report_queue import ReportQueue
 from ..schemas.requests import TurnCommand
 from ..schemas.responses import TurnReport
 
@@ -67,6 +68,7 @@ from ..services.analytics.embedding_integration import EmbeddingIntegrationServi
 from ..services.tectonic import TectonicIntegration, create_tectonic_integration
 from ..services.species.gene_diversity import GeneDiversityService
 from ..tensor.config import TensorConfig
+from ..tensor.state import TensorState
 from pathlib import Path
 
 
@@ -119,12 +121,18 @@ class SimulationEngine:
         # Config injection (must be provided by caller, no internal container access)
         configs: dict | None = None,
     ) -> None:
-        # 强制 GPU Taichi 初始化（使用统一初始化函数）
-        from ..tensor.taichi_hybrid_kernels import _ensure_taichi_init
-        try:
-            _ensure_taichi_init()
-        except Exception as e:
-            raise RuntimeError("Taichi GPU 初始化失败，要求GPU/驱动/taichi-gpu安装") from e
+        self.configs = configs or {}
+        tensor_balance_path = self.configs.get("tensor_balance_path")
+        self.tensor_config = TensorConfig.from_yaml(
+            tensor_balance_path or (Path(__file__).resolve().parent.parent / "config" / "tensor_balance.yaml")
+        )
+        
+        # 张量计算后端（GPU → Taichi CPU → NumPy，可由 tensor_balance.yaml / TENSOR_COMPUTE_BACKEND 指定）
+        # 这里只记录偏好；设备在首次内核调用或后台预热时才初始化
+        from ..tensor.compute_backend import get_default_compute_backend, set_default_compute_backend
+        if self.tensor_config.compute_backend != "auto":
+            set_default_compute_backend(self.tensor_config.compute_backend)
+        logger.info(f"[引擎] 张量计算后端偏好: {get_default_compute_backend()}")
         
         # === 注入的服务 ===
         self.environment = environment
@@ -147,11 +155,6 @@ class SimulationEngine:
         self.gene_flow_service = gene_flow_service
         self.resource_manager = resource_manager
         self.ecological_realism_service = ecological_realism_service
-        self.configs = configs or {}
-        tensor_balance_path = self.configs.get("tensor_balance_path")
-        self.tensor_config = TensorConfig.from_yaml(
-            tensor_balance_path or (Path(__file__).resolve().parent.parent / "config" / "tensor_balance.yaml")
-        )
         
         # === 内部创建的服务 ===
         self.gene_diversity_service = GeneDiversityService(embedding_service=embeddings)
@@ -181,6 +184,8 @@ class SimulationEngine:
         self.turn_counter = 0
         self.watchlist: set[str] = set()
         self._event_callback = None
+        # 跨回合复用的张量状态（TensorStateInitStage 增量更新）
+        self.tensor_state: TensorState | None = None
         
         # === 功能开关 ===
         self._use_tile_based_mortality = True
@@ -222,7 +227,9 @@ class SimulationEngine:
     def _init_pipeline(self, mode: str = "standard") -> None:
         """初始化流水线"""
         from .pipeline import Pipeline, PipelineConfig
-        from .stage_config import StageLoader
+        from .scheduler import split_deferred_stages
+        from .stage_config import StageLoader, get_mode_parameters
+        from .stage_profiler import create_stage_profiler
         
         try:
             loader = StageLoader()
@@ -239,9 +246,39 @@ class SimulationEngine:
                 validate_dependencies=False,
                 stage_timeout=stage_timeout,
                 debug_mode=(mode == "debug"),
+                scheduler=self.configs.get("pipeline_scheduler", "serial"),
+                offload_stages=self.configs.get("pipeline_offload_stages", False),
+                compute_thread_stages=self.configs.get("pipeline_compute_thread", False),
+                stage_threads=self.configs.get("pipeline_stage_threads", 2),
             )
             
+            for old in (getattr(self, "_pipeline", None), getattr(self, "_report_pipeline", None)):
+                if old is not None:
+                    old.shutdown()
+            if getattr(self, "_profiler", None) is not None:
+                self._profiler.close()
+                self._profiler = None
+            
+            # 报告叠加模式：报告阶段拆到单独的流水线，推迟到下一回合模拟期间执行
+            self._report_pipeline = None
+            if self.configs.get("pipeline_overlap_reports", False):
+                stages, deferred = split_deferred_stages(stages)
+                if deferred:
+                    self._report_pipeline = Pipeline(deferred, config)
+                    logger.info(
+                        f"[Pipeline] 报告叠加模式，推迟阶段: {', '.join(s.name for s in deferred)}"
+                    )
+            
             self._pipeline = Pipeline(stages, config)
+            
+            # 阶段采样分析：折叠栈与函数表按回合写出
+            if self.configs.get("pipeline_profile", False) or get_mode_parameters(mode).enable_profiling:
+                self._profiler = create_stage_profiler(self.configs)
+                for pipeline in (self._pipeline, self._report_pipeline):
+                    if pipeline is not None:
+                        self._profiler.attach(pipeline)
+                logger.info(f"[Pipeline] 阶段采样分析已开启，输出目录: {self._profiler.output_dir}")
+            
             self._pipeline_mode = mode
             self._last_pipeline_metrics = None
             
@@ -249,6 +286,7 @@ class SimulationEngine:
         except Exception as e:
             logger.error(f"[Pipeline] 初始化失败: {e}")
             self._pipeline = None
+            self._report_pipeline = None
             self._pipeline_mode = None
             raise RuntimeError(f"Pipeline 初始化失败: {e}") from e
     
@@ -267,7 +305,21 @@ class SimulationEngine:
         command: TurnCommand,
         mode: str | None = None,
     ) -> TurnReport | None:
-        """使用 Pipeline 执行单个回合"""
+        """使用 Pipeline 执行单个回合（报告叠加模式下也会等待本回合报告完成）"""
+        ctx = await self._simulate_turn(command, mode)
+        report_pipeline = getattr(self, "_report_pipeline", None)
+        if report_pipeline is not None:
+            queue = ReportQueue(self, after_turn=self._flush_profile)
+            queue.submit(report_pipeline, ctx)
+            await queue.drain()
+        return ctx.report
+    
+    async def _simulate_turn(
+        self,
+        command: TurnCommand,
+        mode: str | None = None,
+    ) -> SimulationContext:
+        """执行回合的模拟阶段并推进回合计数器（报告叠加模式下不含推迟的报告阶段）"""
         from .pipeline import PipelineResult
         
         # 初始化 Pipeline（如果需要）
@@ -300,6 +352,7 @@ class SimulationEngine:
         
         # 保存性能指标
         self._last_pipeline_metrics = result.metrics
+        self._flush_profile(ctx)
         
         # 处理结果
         if not result.success:
@@ -310,7 +363,7 @@ class SimulationEngine:
         # 增加回合计数器（无论成功失败都要推进）
         self.turn_counter += 1
         
-        return ctx.report
+        return ctx
     
     async def run_turns_async(
         self,
@@ -329,6 +382,9 @@ class SimulationEngine:
                 "如需使用遗留逻辑进行回归测试，请使用 LegacyTurnRunner。"
             )
         
+        if getattr(self, "_report_pipeline", None) is not None and command.rounds > 1:
+            return await self._run_turns_overlapped(command, mode)
+        
         reports: list[TurnReport] = []
         for turn_num in range(command.rounds):
             logger.info(f"[Pipeline] 执行第 {turn_num + 1}/{command.rounds} 回合")
@@ -337,10 +393,47 @@ class SimulationEngine:
                 reports.append(report)
         return reports
     
+    async def _run_turns_overlapped(
+        self,
+        command: TurnCommand,
+        mode: str | None = None,
+    ) -> list[TurnReport]:
+        """报告叠加模式：回合 N 的报告阶段在回合 N+1 的模拟阶段期间后台执行"""
+        queue = ReportQueue(
+            self,
+            max_backlog=self.configs.get("pipeline_report_backlog", 1),
+            after_turn=self._flush_profile,
+        )
+        try:
+            for turn_num in range(command.rounds):
+                logger.info(f"[Pipeline] 执行第 {turn_num + 1}/{command.rounds} 回合（报告叠加）")
+                ctx = await self._simulate_turn(command, mode)
+                queue.submit(self._report_pipeline, ctx)
+                if turn_num + 1 < command.rounds:
+                    await queue.wait_for_capacity()
+        finally:
+            reports = await queue.drain()
+        return reports
+    
+    def _flush_profile(self, ctx: SimulationContext) -> None:
+        """写出回合的阶段采样结果（未开启采样分析时无操作）"""
+        profiler = getattr(self, "_profiler", None)
+        if profiler is not None:
+            profiler.flush(ctx.turn_index)
+    
     def run_turns(self, *args, **kwargs):
         """同步版本已废弃"""
         raise NotImplementedError("Use run_turns_async instead")
     
+    def reset_tensor_state(self) -> None:
+        """丢弃跨回合缓存的张量状态（新游戏/读档后调用，下一回合全量重建）"""
+        self.tensor_state = None
+        try:
+            from ..tensor.snapshot import get_snapshot_publisher
+            get_snapshot_publisher().clear()
+        except Exception as e:
+            logger.warning(f"[SimulationEngine] 撤销张量快照失败: {e}")
+    
     def get_pipeline_metrics(self):
         """获取最近一次流水线执行的性能指标"""
         return getattr(self, '_last_pipeline_metrics', None)
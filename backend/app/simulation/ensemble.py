@@ -0,0 +1,379 @@
+"""
+Ensemble Runner - 多种子集成运行
+
+平衡调整与回归验证需要对同一配置跑几十个种子。集成运行为每个种子启动一个
+独立的 CLI 工作进程（python -m app.simulation.cli --result-file ...），
+并行数默认等于 CPU 核数：
+
+- 每个工作进程有自己的 SQLite 文件与报告/导出/存档/缓存目录（通过环境变量注入），
+  互不影响，也不触碰全局数据库
+- --no-llm 时清空模型路由凭据并关闭 LLM 回合报告，结果只取决于种子与配置
+- 汇总各种子的 SimulationResult：物种数、灭绝数等指标的均值/标准差/极值，
+  全部回合耗时的分位数，平均每回合最慢的阶段
+- 输出 JSON（汇总 + 每个种子的完整结果）与 CSV（每个种子一行）
+
+用法：
+    python -m app.simulation.cli --mode standard --turns 20 --ensemble 32 --workers 8 --no-llm -o results/
+"""
+
+from __future__ import annotations
+
+import csv
+import json
+import logging
+import math
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from .cli import SimulationResult
+
+logger = logging.getLogger(__name__)
+
+BACKEND_ROOT = Path(__file__).resolve().parents[2]
+
+# 汇总统计的结果指标
+METRIC_FIELDS = (
+    "final_species_count",
+    "extinct_species_count",
+    "new_species_count",
+    "total_speciations",
+    "total_migrations",
+    "final_temperature",
+    "final_sea_level",
+    "avg_turn_duration_ms",
+    "total_duration_s",
+)
+
+# CSV 每行（每个种子）的列
+CSV_FIELDS = (
+    "random_seed",
+    "success",
+    "turns_completed",
+    "initial_species_count",
+    *METRIC_FIELDS,
+    "slowest_stage",
+    "slowest_stage_time_ms",
+    "errors",
+)
+
+TURN_PERCENTILES = (50, 90, 99)
+
+
+def percentile(values: List[float], q: float) -> float:
+    """线性插值分位数（q 取 0-100）"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * q / 100
+    low = math.floor(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+@dataclass
+class EnsembleResult:
+    """集成运行结果"""
+    mode: str
+    turns: int
+    results: List[SimulationResult] = field(default_factory=list)
+    workers: int = 1
+    no_llm: bool = False
+    total_duration_s: float = 0.0
+
+    @property
+    def succeeded(self) -> List[SimulationResult]:
+        return [r for r in self.results if r.success]
+
+    @property
+    def failed_count(self) -> int:
+        return len(self.results) - len(self.succeeded)
+
+    def metric_stats(self) -> Dict[str, Dict[str, float]]:
+        """成功运行的指标统计：均值 / 标准差 / 最小 / 最大"""
+        runs = self.succeeded
+        stats: Dict[str, Dict[str, float]] = {}
+        for name in METRIC_FIELDS:
+            values = [float(getattr(r, name)) for r in runs]
+            if not values:
+                continue
+            mean = sum(values) / len(values)
+            var = sum((v - mean) ** 2 for v in values) / len(values)
+            stats[name] = {
+                "mean": mean,
+                "std": math.sqrt(var),
+                "min": min(values),
+                "max": max(values),
+            }
+        return stats
+
+    def turn_duration_percentiles(self) -> Dict[str, float]:
+        """全部种子、全部回合的耗时分位数（ms）"""
+        durations = [d for r in self.results for d in r.turn_durations_ms]
+        summary = {f"p{q}": percentile(durations, q) for q in TURN_PERCENTILES}
+        summary["max"] = max(durations, default=0.0)
+        summary["count"] = len(durations)
+        return summary
+
+    def slowest_stages(self, n: int = 5) -> List[Tuple[str, float]]:
+        """平均每回合耗时最长的 N 个阶段（ms）"""
+        totals: Dict[str, float] = {}
+        turns = sum(r.turns_completed for r in self.results)
+        for r in self.results:
+            for stage, ms in r.stage_durations_ms.items():
+                totals[stage] = totals.get(stage, 0.0) + ms
+        per_turn = {stage: ms / max(1, turns) for stage, ms in totals.items()}
+        return sorted(per_turn.items(), key=lambda item: item[1], reverse=True)[:n]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "turns": self.turns,
+            "seeds": [r.random_seed for r in self.results],
+            "workers": self.workers,
+            "no_llm": self.no_llm,
+            "total_duration_s": self.total_duration_s,
+            "succeeded": len(self.succeeded),
+            "failed": self.failed_count,
+            "metrics": self.metric_stats(),
+            "turn_duration_ms": self.turn_duration_percentiles(),
+            "slowest_stages": [
+                {"stage": stage, "avg_ms_per_turn": ms} for stage, ms in self.slowest_stages()
+            ],
+            "runs": [r.to_dict() for r in self.results],
+        }
+
+    def to_json(self, indent: int = 2) -> str:
+        return json.dumps(self.to_dict(), indent=indent, ensure_ascii=False)
+
+    def write_csv(self, path: str | Path) -> None:
+        """每个种子一行"""
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+            writer.writeheader()
+            for r in self.results:
+                row = {name: getattr(r, name) for name in CSV_FIELDS}
+                row["errors"] = "; ".join(r.errors)
+                writer.writerow(row)
+
+    def format_summary(self) -> str:
+        """格式化为可读摘要"""
+        lines = [
+            "=" * 60,
+            "集成运行结果",
+            "=" * 60,
+            "",
+            f"模式: {self.mode}",
+            f"回合: {self.turns}",
+            f"种子数: {len(self.results)}（成功 {len(self.succeeded)}，失败 {self.failed_count}）",
+            f"工作进程: {self.workers}{'（已禁用 LLM）' if self.no_llm else ''}",
+            f"总耗时: {self.total_duration_s:.2f}s",
+            "",
+            "指标（均值 ± 标准差 [最小, 最大]）:",
+        ]
+        for name, s in self.metric_stats().items():
+            lines.append(
+                f"  {name}: {s['mean']:.2f} ± {s['std']:.2f} [{s['min']:.2f}, {s['max']:.2f}]"
+            )
+
+        pct = self.turn_duration_percentiles()
+        lines.extend([
+            "",
+            f"回合耗时（{pct['count']} 个回合）:",
+            "  " + "  ".join(f"p{q}={pct[f'p{q}']:.1f}ms" for q in TURN_PERCENTILES)
+            + f"  max={pct['max']:.1f}ms",
+            "",
+            "最慢阶段（平均每回合）:",
+        ])
+        for stage, ms in self.slowest_stages():
+            lines.append(f"  {stage}: {ms:.1f}ms")
+
+        failed = [r for r in self.results if not r.success]
+        if failed:
+            lines.append("")
+            lines.append("失败的种子:")
+            for r in failed:
+                lines.append(f"  - {r.random_seed}: {'; '.join(r.errors)[:200]}")
+
+        lines.append("")
+        lines.append("=" * 60)
+        return "\n".join(lines)
+
+
+def worker_env(work_dir: Path, no_llm: bool = False) -> Dict[str, str]:
+    """工作进程环境变量：独立的数据库与数据目录"""
+    env = dict(os.environ)
+    env.update({
+        "DATABASE_URL": f"sqlite:///{(work_dir / 'egame.db').as_posix()}",
+        "REPORTS_DIR": str(work_dir / "reports"),
+        "EXPORTS_DIR": str(work_dir / "exports"),
+        "SAVES_DIR": str(work_dir / "saves"),
+        "CACHE_DIR": str(work_dir / "cache"),
+        "PIPELINE_PROFILE_DIR": str(work_dir / "profiles"),
+        "LOG_TO_FILE": "false",
+    })
+    if no_llm:
+        env.update({
+            "AI_BASE_URL": "",
+            "AI_API_KEY": "",
+            "ENABLE_TURN_REPORT_LLM": "false",
+        })
+    return env
+
+
+def worker_command(
+    seed: int,
+    mode: str,
+    turns: int,
+    result_file: Path,
+    config_file: str | None = None,
+    param_list: List[str] | None = None,
+    no_llm: bool = False,
+) -> List[str]:
+    """单个种子的 CLI 命令行"""
+    cmd = [
+        sys.executable, "-m", "app.simulation.cli",
+        "--mode", mode,
+        "--turns", str(turns),
+        "--seed", str(seed),
+        "--result-file", str(result_file),
+        "--quiet",
+    ]
+    if config_file:
+        cmd += ["--config", config_file]
+    for param in param_list or []:
+        cmd += ["--param", param]
+    if no_llm:
+        cmd.append("--no-llm")
+    return cmd
+
+
+def _run_worker(
+    seed: int,
+    work_dir: Path,
+    mode: str,
+    turns: int,
+    config_file: str | None,
+    param_list: List[str] | None,
+    no_llm: bool,
+    timeout: float | None,
+) -> SimulationResult:
+    """在独立进程中运行一个种子，读取其结果文件"""
+    work_dir.mkdir(parents=True, exist_ok=True)
+    result_file = work_dir / "result.json"
+    cmd = worker_command(seed, mode, turns, result_file, config_file, param_list, no_llm)
+    start = time.perf_counter()
+    error = ""
+    try:
+        proc = subprocess.run(
+            cmd,
+            cwd=BACKEND_ROOT,
+            env=worker_env(work_dir, no_llm),
+            capture_output=True,
+            text=True,
+            encoding="utf-8",
+            errors="replace",
+            timeout=timeout,
+        )
+        if proc.returncode not in (0, 1):
+            error = (proc.stderr or "").strip()[-500:] or f"退出码 {proc.returncode}"
+    except subprocess.TimeoutExpired:
+        error = f"超时（{timeout}s）"
+
+    if result_file.exists():
+        result = SimulationResult.from_dict(json.loads(result_file.read_text(encoding="utf-8")))
+    else:
+        result = SimulationResult(
+            success=False,
+            mode=mode,
+            turns_completed=0,
+            total_duration_s=time.perf_counter() - start,
+            random_seed=seed,
+            errors=[error or "工作进程未产生结果文件"],
+        )
+    logger.info(
+        f"[集成] 种子 {seed}: {'成功' if result.success else '失败'}，"
+        f"{result.turns_completed} 回合，{result.total_duration_s:.1f}s"
+    )
+    return result
+
+
+def run_ensemble(
+    mode: str,
+    turns: int,
+    seeds: List[int],
+    workers: int | None = None,
+    output_dir: str | None = None,
+    config_file: str | None = None,
+    param_list: List[str] | None = None,
+    no_llm: bool = False,
+    keep_db: bool = False,
+    timeout: float | None = None,
+) -> EnsembleResult:
+    """并行运行多个种子并汇总结果
+
+    Args:
+        mode: 模式名称
+        turns: 每个种子的回合数
+        seeds: 种子列表
+        workers: 并行工作进程数（None = CPU 核数）
+        output_dir: 输出目录（写入汇总 JSON 与 CSV）
+        config_file: 阶段配置文件路径
+        param_list: 参数覆盖（key=value，原样传给工作进程）
+        no_llm: 禁用所有 LLM 调用
+        keep_db: 保留各工作进程的数据库（需要 output_dir，否则使用临时目录并在结束后删除）
+        timeout: 单个种子的超时（秒）
+
+    Returns:
+        集成运行结果（按种子顺序）
+    """
+    workers = max(1, min(workers or os.cpu_count() or 1, len(seeds) or 1))
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    if keep_db and output_dir:
+        work_root = Path(output_dir) / f"ensemble_{timestamp}_{mode}"
+        work_root.mkdir(parents=True, exist_ok=True)
+    else:
+        work_root = Path(tempfile.mkdtemp(prefix="ensemble_"))
+
+    logger.info(f"[集成] 模式={mode}，回合={turns}，种子数={len(seeds)}，工作进程={workers}")
+    start = time.perf_counter()
+    try:
+        # 线程只负责等待子进程，计算在各自的工作进程中并行
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(
+                lambda seed: _run_worker(
+                    seed, work_root / f"seed_{seed}", mode, turns,
+                    config_file, param_list, no_llm, timeout,
+                ),
+                seeds,
+            ))
+    finally:
+        if not (keep_db and output_dir):
+            shutil.rmtree(work_root, ignore_errors=True)
+
+    ensemble = EnsembleResult(
+        mode=mode,
+        turns=turns,
+        results=results,
+        workers=workers,
+        no_llm=no_llm,
+        total_duration_s=time.perf_counter() - start,
+    )
+
+    if output_dir:
+        output_path = Path(output_dir)
+        output_path.mkdir(parents=True, exist_ok=True)
+        stem = output_path / f"ensemble_{timestamp}_{mode}"
+        stem.with_suffix(".json").write_text(ensemble.to_json(), encoding="utf-8")
+        ensemble.write_csv(stem.with_suffix(".csv"))
+        logger.info(f"[集成] 结果已保存到: {stem}.json / {stem}.csv")
+
+    return ensemble
@@ -4,6 +4,10 @@ Pipeline Executor - 流水线执行器
 该模块实现了按顺序执行 Stage 的流水线组件。
 支持同步和异步阶段的混合执行，以及统一的错误处理。
 包含健康监控与时间统计功能。
+PipelineConfig.scheduler="dag" 时按阶段依赖声明构建 DAG，无读写冲突的阶段并发执行
+（见 scheduler.py），并在 PipelineMetrics 中报告关键路径。
+PipelineConfig.offload_stages=True 时按阶段 execution_policy 把阻塞阶段移出事件循环
+（见 stage_executor.py），每个阶段执行期间的事件循环延迟记入 StageMetrics。
 
 【张量化重构】
 - 集成 TensorMetricsCollector 自动采集张量系统性能数据
@@ -19,6 +23,8 @@ import time
 from dataclasses import dataclass, field
 from typing import TYPE_CHECKING, Callable, Any
 
+from .stage_executor import EventLoopLagMonitor
+
 if TYPE_CHECKING:
     from .context import SimulationContext
     from .engine import SimulationEngine
@@ -58,7 +64,7 @@ KEY_CONTEXT_FIELDS = [
     "ai_status_evals", "emergency_responses", "new_populations",
     "reproduction_results", "activation_events", "gene_flow_count",
     "genetic_drift_count", "auto_hybrids", "promotion_count",
-    "adaptation_events", "branching_events", "narrative_results",
+    "adaptation_events", "branching_events", "lineage_merges", "narrative_results",
     "background_summary", "mass_extinction", "reemergence_events",
     "report", "species_snapshots", "ecosystem_metrics",
 ]
@@ -139,6 +145,9 @@ class StageMetrics:
     extinction_count: int = 0
     speciation_count: int = 0
     ai_adjustments: int = 0
+    # 执行位置与执行期间的最大事件循环延迟
+    execution_policy: str = "inline"
+    loop_lag_ms: float = 0.0
     custom_metrics: dict[str, Any] = field(default_factory=dict)
     # Context 变化摘要
     context_changes: dict[str, str] = field(default_factory=dict)
@@ -154,6 +163,8 @@ class StageMetrics:
             "extinction_count": self.extinction_count,
             "speciation_count": self.speciation_count,
             "ai_adjustments": self.ai_adjustments,
+            "execution_policy": self.execution_policy,
+            "loop_lag_ms": round(self.loop_lag_ms, 2),
             "custom": self.custom_metrics,
         }
 
@@ -164,6 +175,13 @@ class PipelineMetrics:
     total_duration_ms: float = 0.0
     stage_metrics: list[StageMetrics] = field(default_factory=list)
     failed_stages: list[str] = field(default_factory=list)
+    # 调度模式与关键路径（仅 DAG 模式计算）
+    scheduler: str = "serial"
+    critical_path: list[str] = field(default_factory=list)
+    critical_path_ms: float = 0.0
+    max_concurrency: int = 1
+    # 整个回合的最大事件循环延迟（ms）
+    max_loop_lag_ms: float = 0.0
     
     def get_performance_table(self) -> str:
         """生成性能表格（按耗时排序）"""
@@ -194,10 +212,27 @@ class PipelineMetrics:
         lines.append(
             "│ {:38} │ {:>10.2f} │        │".format("TOTAL", self.total_duration_ms)
         )
+        if self.critical_path:
+            lines.append(
+                "│ {:38} │ {:>10.2f} │        │".format("CRITICAL PATH", self.critical_path_ms)
+            )
+        if self.max_loop_lag_ms > 0:
+            lines.append(
+                "│ {:38} │ {:>10.2f} │        │".format("MAX LOOP LAG", self.max_loop_lag_ms)
+            )
         lines.append("└" + "─" * 40 + "┴" + "─" * 12 + "┴" + "─" * 8 + "┘")
         
         return "\n".join(lines)
     
+    def get_laggiest_stages(self, n: int = 5) -> list[tuple[str, float]]:
+        """获取阻塞事件循环最久的 N 个阶段"""
+        sorted_metrics = sorted(
+            self.stage_metrics,
+            key=lambda m: m.loop_lag_ms,
+            reverse=True
+        )
+        return [(m.stage_name, m.loop_lag_ms) for m in sorted_metrics[:n]]
+    
     def get_slowest_stages(self, n: int = 5) -> list[tuple[str, float]]:
         """获取最慢的 N 个阶段"""
         sorted_metrics = sorted(
@@ -214,6 +249,11 @@ class PipelineMetrics:
             "failed_count": len(self.failed_stages),
             "stages": [m.to_dict() for m in self.stage_metrics],
             "failed_stages": self.failed_stages,
+            "scheduler": self.scheduler,
+            "critical_path": self.critical_path,
+            "critical_path_ms": round(self.critical_path_ms, 2),
+            "max_concurrency": self.max_concurrency,
+            "max_loop_lag_ms": round(self.max_loop_lag_ms, 2),
         }
 
 
@@ -237,6 +277,16 @@ class PipelineConfig:
     stop_stage: str | None = None
     # 只执行单个阶段
     only_stage: str | None = None
+    # 调度模式："serial" 按 order 逐个执行；"dag" 按依赖声明并发执行无冲突阶段
+    scheduler: str = "serial"
+    # 是否按阶段 execution_policy 把阻塞阶段移出事件循环（False 时全部在事件循环上执行）
+    offload_stages: bool = False
+    # 只把 compute 阶段提交到 tensor-compute 线程（offload_stages=True 时已包含）
+    compute_thread_stages: bool = False
+    # thread 策略阶段的线程池大小
+    stage_threads: int = 2
+    # 事件循环延迟探针间隔（秒），0 表示不测量
+    loop_lag_interval: float = 0.05
 
 
 @dataclass
@@ -286,9 +336,17 @@ class Pipeline:
             DependencyError: 当依赖验证失败时
         """
         from .stages import StageDependencyValidator, DependencyError
+        from .scheduler import SCHEDULER_MODES
+        from .stage_executor import StageExecutor
         
         self.stages = sorted(stages, key=lambda s: s.order)
         self.config = config or PipelineConfig()
+        self._executor = StageExecutor(
+            offload=self.config.offload_stages,
+            max_threads=self.config.stage_threads,
+            compute_thread=self.config.compute_thread_stages,
+        )
+        self._lag_monitor: EventLoopLagMonitor | None = None
         self._before_stage_callbacks: list[Callable] = []
         self._after_stage_callbacks: list[Callable] = []
         self._stage_map = {s.name: s for s in self.stages}
@@ -299,6 +357,18 @@ class Pipeline:
         
         # 应用部分执行配置
         self._effective_stages = self._filter_stages()
+        
+        # DAG 调度：依赖图只在构建时计算一次
+        if self.config.scheduler not in SCHEDULER_MODES:
+            raise ValueError(
+                f"未知调度模式 '{self.config.scheduler}'，可选: {', '.join(SCHEDULER_MODES)}"
+            )
+        self._stage_graph = None
+        if self.config.scheduler == "dag":
+            from .scheduler import StageGraph
+            self._stage_graph = StageGraph.build(self._effective_stages)
+            if self.config.debug_mode:
+                logger.info(self._stage_graph.describe())
     
     def _validate_dependencies(self) -> None:
         """验证阶段依赖关系"""
@@ -374,6 +444,10 @@ class Pipeline:
         result = validator.validate()
         return result.dependency_graph
     
+    def shutdown(self) -> None:
+        """释放阶段线程池（流水线被替换时调用）"""
+        self._executor.shutdown()
+    
     def add_before_stage_callback(self, callback: Callable[[Stage, SimulationContext], None]) -> None:
         """添加阶段执行前回调"""
         self._before_stage_callbacks.append(callback)
@@ -396,13 +470,7 @@ class Pipeline:
         Returns:
             流水线执行结果
         """
-        from .stages import StageResult
-        
         start_time = time.perf_counter()
-        stage_results: list[StageResult] = []
-        failed_stages: list[str] = []
-        stage_metrics: list[StageMetrics] = []
-        overall_success = True
         
         # 【张量监控】重置当前回合指标
         tensor_collector = _get_tensor_collector()
@@ -417,86 +485,20 @@ class Pipeline:
             for s in stages_to_execute:
                 logger.info(f"  [{s.order:3d}] {s.name}")
         
-        for stage in stages_to_execute:
-            logger.info(f"[Pipeline] -> 开始阶段: {stage.name} (order={stage.order})")
-            # 执行前回调
-            for callback in self._before_stage_callbacks:
-                try:
-                    callback(stage, ctx)
-                except Exception as e:
-                    logger.warning(f"[Pipeline] 前置回调失败: {e}")
-            
-            # 发送阶段开始事件
-            if self.config.emit_stage_events:
-                ctx.emit_event("pipeline_stage_start", f"开始: {stage.name}", "流水线")
-            
-            # 捕获阶段前的状态（用于计算变化量）
-            pre_migration = ctx.migration_count
-            pre_extinctions = len([r for r in ctx.combined_results if r.species.status == "extinct"]) if ctx.combined_results else 0
-            
-            # 在 debug 模式下捕获完整的 context 状态
-            pre_context_state = capture_context_state(ctx) if self.config.debug_mode else {}
-            
-            # 执行阶段
-            stage_start = time.perf_counter()
-            result = await self._execute_stage(stage, ctx, engine)
-            stage_duration = (time.perf_counter() - stage_start) * 1000
-            
-            result.duration_ms = stage_duration
-            stage_results.append(result)
-            
-            # 计算 context 变化
-            context_changes = {}
-            if self.config.debug_mode:
-                post_context_state = capture_context_state(ctx)
-                context_changes = compute_context_diff(pre_context_state, post_context_state)
-                if context_changes:
-                    logger.debug(f"[Pipeline] [{stage.name}] Context 变化:")
-                    logger.debug(format_context_diff(context_changes))
-            
-            # 构建阶段监控指标
-            metrics = StageMetrics(
-                stage_name=stage.name,
-                duration_ms=stage_duration,
-                success=result.success,
-                error_message=str(result.error) if result.error else "",
-                species_count=len(ctx.species_batch) if ctx.species_batch else 0,
-                migration_count=ctx.migration_count - pre_migration,
-                extinction_count=len([r for r in ctx.combined_results if r.species.status == "extinct"]) - pre_extinctions if ctx.combined_results else 0,
-                speciation_count=len(ctx.branching_events) if ctx.branching_events else 0,
-                ai_adjustments=len(ctx.ai_status_evals) if ctx.ai_status_evals else 0,
-                context_changes=context_changes,
-            )
-            stage_metrics.append(metrics)
-            
-            if not result.success:
-                failed_stages.append(stage.name)
-                overall_success = False
-                
-                if not self.config.continue_on_error:
-                    logger.error(f"[Pipeline] 阶段 '{stage.name}' 失败，终止流水线")
-                    break
-            
-            # 记录时间
-            if self.config.log_timing:
-                status_icon = "✅" if result.success else "❌"
-                logger.info(f"[Pipeline] <- {status_icon} {stage.name}: {stage_duration:.1f}ms")
-            
-            # 发送阶段结束事件
-            if self.config.emit_stage_events:
-                status = "✅" if result.success else "❌"
-                ctx.emit_event(
-                    "pipeline_stage_end",
-                    f"{status} {stage.name}: {stage_duration:.1f}ms",
-                    "流水线"
-                )
-            
-            # 执行后回调
-            for callback in self._after_stage_callbacks:
-                try:
-                    callback(stage, ctx, result)
-                except Exception as e:
-                    logger.warning(f"[Pipeline] 后置回调失败: {e}")
+        self._lag_monitor = EventLoopLagMonitor(self.config.loop_lag_interval)
+        self._lag_monitor.start()
+        try:
+            if self._stage_graph is not None:
+                outcomes, max_concurrency = await self._execute_graph(ctx, engine)
+            else:
+                outcomes, max_concurrency = await self._execute_serial(ctx, engine), 1
+        finally:
+            await self._lag_monitor.stop()
+        
+        stage_results = [result for result, _ in outcomes]
+        stage_metrics = [metrics for _, metrics in outcomes]
+        failed_stages = [result.stage_name for result in stage_results if not result.success]
+        overall_success = not failed_stages
         
         total_duration = (time.perf_counter() - start_time) * 1000
         
@@ -516,7 +518,21 @@ class Pipeline:
             total_duration_ms=total_duration,
             stage_metrics=stage_metrics,
             failed_stages=failed_stages,
+            scheduler=self.config.scheduler,
+            max_concurrency=max_concurrency,
+            max_loop_lag_ms=self._lag_monitor.max_lag_ms,
         )
+        if self._stage_graph is not None:
+            path, path_ms = self._stage_graph.critical_path(
+                {m.stage_name: m.duration_ms for m in stage_metrics}
+            )
+            pipeline_metrics.critical_path = path
+            pipeline_metrics.critical_path_ms = path_ms
+            if self.config.log_timing:
+                logger.info(
+                    f"[Pipeline] DAG 调度: 总耗时 {total_duration:.1f}ms，"
+                    f"关键路径 {path_ms:.1f}ms（{' → '.join(path)}），最大并发 {max_concurrency}"
+                )
         
         return PipelineResult(
             success=overall_success,
@@ -526,6 +542,155 @@ class Pipeline:
             metrics=pipeline_metrics,
         )
     
+    async def _execute_serial(
+        self,
+        ctx: SimulationContext,
+        engine: SimulationEngine,
+    ) -> list[tuple[StageResult, StageMetrics]]:
+        """按 order 逐个执行阶段"""
+        outcomes: list[tuple[StageResult, StageMetrics]] = []
+        for stage in self._effective_stages:
+            result, metrics = await self._run_stage(stage, ctx, engine)
+            outcomes.append((result, metrics))
+            if not result.success and not self.config.continue_on_error:
+                logger.error(f"[Pipeline] 阶段 '{stage.name}' 失败，终止流水线")
+                break
+        return outcomes
+    
+    async def _execute_graph(
+        self,
+        ctx: SimulationContext,
+        engine: SimulationEngine,
+    ) -> tuple[list[tuple[StageResult, StageMetrics]], int]:
+        """按依赖图执行：前驱全部完成的阶段立即启动
+        
+        失败的阶段同样视为已完成（与串行模式的 continue_on_error 语义一致）；
+        continue_on_error=False 时不再启动新阶段，等待已启动的阶段结束后返回。
+        
+        Returns:
+            (按 order 排列的 (结果, 指标) 列表, 最大并发数)
+        """
+        graph = self._stage_graph
+        position = {s.name: i for i, s in enumerate(self._effective_stages)}
+        waiting = list(self._effective_stages)
+        running: dict[asyncio.Task, Stage] = {}
+        completed: set[str] = set()
+        outcomes: list[tuple[StageResult, StageMetrics]] = []
+        max_concurrency = 0
+        stopped = False
+        
+        while waiting or running:
+            if not stopped:
+                ready = [s for s in waiting if graph.predecessors[s.name] <= completed]
+                for stage in ready:
+                    waiting.remove(stage)
+                    running[asyncio.create_task(self._run_stage(stage, ctx, engine))] = stage
+                max_concurrency = max(max_concurrency, len(running))
+            if not running:
+                break
+            
+            finished, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in sorted(finished, key=lambda t: position[running[t].name]):
+                stage = running.pop(task)
+                result, metrics = task.result()
+                outcomes.append((result, metrics))
+                completed.add(stage.name)
+                if not result.success and not self.config.continue_on_error and not stopped:
+                    logger.error(f"[Pipeline] 阶段 '{stage.name}' 失败，停止调度新阶段")
+                    stopped = True
+        
+        outcomes.sort(key=lambda item: position[item[0].stage_name])
+        return outcomes, max(max_concurrency, 1)
+    
+    async def _run_stage(
+        self,
+        stage: Stage,
+        ctx: SimulationContext,
+        engine: SimulationEngine,
+    ) -> tuple[StageResult, StageMetrics]:
+        """执行单个阶段并收集回调、事件与监控指标
+        
+        DAG 模式下并发阶段的变化量（迁徙数、灭绝数）与事件循环延迟可能相互计入。
+        """
+        logger.info(f"[Pipeline] -> 开始阶段: {stage.name} (order={stage.order})")
+        # 执行前回调
+        for callback in self._before_stage_callbacks:
+            try:
+                callback(stage, ctx)
+            except Exception as e:
+                logger.warning(f"[Pipeline] 前置回调失败: {e}")
+        
+        # 发送阶段开始事件
+        if self.config.emit_stage_events:
+            ctx.emit_event("pipeline_stage_start", f"开始: {stage.name}", "流水线")
+        
+        # 捕获阶段前的状态（用于计算变化量）
+        pre_migration = ctx.migration_count
+        pre_extinctions = len([r for r in ctx.combined_results if r.species.status == "extinct"]) if ctx.combined_results else 0
+        
+        # 在 debug 模式下捕获完整的 context 状态
+        pre_context_state = capture_context_state(ctx) if self.config.debug_mode else {}
+        
+        # 执行阶段
+        lag_window = self._lag_monitor.open() if self._lag_monitor else None
+        stage_start = time.perf_counter()
+        result = await self._execute_stage(stage, ctx, engine)
+        stage_duration = (time.perf_counter() - stage_start) * 1000
+        loop_lag_ms = self._lag_monitor.close(lag_window) if lag_window else 0.0
+        
+        result.duration_ms = stage_duration
+        
+        # 计算 context 变化
+        context_changes = {}
+        if self.config.debug_mode:
+            post_context_state = capture_context_state(ctx)
+            context_changes = compute_context_diff(pre_context_state, post_context_state)
+            if context_changes:
+                logger.debug(f"[Pipeline] [{stage.name}] Context 变化:")
+                logger.debug(format_context_diff(context_changes))
+        
+        # 构建阶段监控指标
+        metrics = StageMetrics(
+            stage_name=stage.name,
+            duration_ms=stage_duration,
+            success=result.success,
+            error_message=str(result.error) if result.error else "",
+            species_count=len(ctx.species_batch) if ctx.species_batch else 0,
+            migration_count=ctx.migration_count - pre_migration,
+            extinction_count=len([r for r in ctx.combined_results if r.species.status == "extinct"]) - pre_extinctions if ctx.combined_results else 0,
+            speciation_count=len(ctx.branching_events) if ctx.branching_events else 0,
+            ai_adjustments=len(ctx.ai_status_evals) if ctx.ai_status_evals else 0,
+            execution_policy=self._executor.policy_for(stage).value,
+            loop_lag_ms=loop_lag_ms,
+            context_changes=context_changes,
+        )
+        
+        # 记录时间
+        if self.config.log_timing:
+            status_icon = "✅" if result.success else "❌"
+            logger.info(
+                f"[Pipeline] <- {status_icon} {stage.name}: {stage_duration:.1f}ms "
+                f"[{metrics.execution_policy}, 事件循环延迟 {loop_lag_ms:.1f}ms]"
+            )
+        
+        # 发送阶段结束事件
+        if self.config.emit_stage_events:
+            status = "✅" if result.success else "❌"
+            ctx.emit_event(
+                "pipeline_stage_end",
+                f"{status} {stage.name}: {stage_duration:.1f}ms",
+                "流水线"
+            )
+        
+        # 执行后回调
+        for callback in self._after_stage_callbacks:
+            try:
+                callback(stage, ctx, result)
+            except Exception as e:
+                logger.warning(f"[Pipeline] 后置回调失败: {e}")
+        
+        return result, metrics
+    
     async def _execute_stage(
         self,
         stage: Stage,
@@ -547,11 +712,11 @@ class Pipeline:
         try:
             if self.config.stage_timeout > 0:
                 await asyncio.wait_for(
-                    stage.execute(ctx, engine),
+                    self._executor.run(stage, ctx, engine),
                     timeout=self.config.stage_timeout
                 )
             else:
-                await stage.execute(ctx, engine)
+                await self._executor.run(stage, ctx, engine)
             
             return StageResult(
                 stage_name=stage.name,
@@ -623,6 +788,17 @@ class PipelineBuilder:
         self._config.emit_stage_events = value
         return self
     
+    def offload_stages(self, value: bool = True, threads: int = 2) -> "PipelineBuilder":
+        """设置是否按执行策略把阻塞阶段移出事件循环"""
+        self._config.offload_stages = value
+        self._config.stage_threads = threads
+        return self
+    
+    def scheduler(self, mode: str) -> "PipelineBuilder":
+        """设置调度模式（serial / dag）"""
+        self._config.scheduler = mode
+        return self
+    
     def build(self) -> Pipeline:
         """构建流水线"""
         return Pipeline(self._stages, self._config)
@@ -0,0 +1,111 @@
+"""
+Report Queue - 报告阶段叠加执行
+
+多回合推演时，构建报告（LLM 叙事）往往比下一回合的板块、资源、张量生态计算还慢，
+而后者并不依赖叙事文本。报告叠加模式（PIPELINE_OVERLAP_REPORTS）下，引擎把流水线拆成
+两段（见 scheduler.split_deferred_stages）：
+
+    回合 N:   [模拟阶段 ... 最终化] ──┐
+    回合 N+1:                        [模拟阶段 ... 最终化] ──┐
+    报告:                            [回合 N 报告/历史/导出]  [回合 N+1 报告 ...]
+
+- 推迟的报告阶段按回合顺序逐个执行（回合 N 的历史记录写入后才开始回合 N+1 的报告）
+- 报告最多落后 max_backlog 个回合，积压超过上限时模拟等待最早的报告完成
+- 报告完成后通过 turn_report 事件推送到事件流，run_turns_async 返回前等待全部报告
+
+回合 N 的报告阶段只读取回合 N 的 SimulationContext；物种对象由 FetchSpeciesStage
+每回合重新加载，下一回合的模拟不会修改它们。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import TYPE_CHECKING, Callable
+
+if TYPE_CHECKING:
+    from ..schemas.responses import TurnReport
+    from .context import SimulationContext
+    from .engine import SimulationEngine
+    from .pipeline import Pipeline
+
+logger = logging.getLogger(__name__)
+
+
+class ReportQueue:
+    """推迟执行的报告阶段队列
+
+    Args:
+        engine: 模拟引擎（传给阶段的 execute）
+        max_backlog: 报告最多落后的回合数（至少 1）
+        after_turn: 每个回合的报告阶段结束后调用（例如写出阶段采样结果）
+    """
+
+    def __init__(
+        self,
+        engine: SimulationEngine,
+        max_backlog: int = 1,
+        after_turn: Callable[[SimulationContext], None] | None = None,
+    ):
+        self.engine = engine
+        self.max_backlog = max(1, max_backlog)
+        self.after_turn = after_turn
+        self._tasks: list[asyncio.Task] = []
+
+    @property
+    def pending(self) -> int:
+        """尚未完成的报告回合数"""
+        return sum(1 for task in self._tasks if not task.done())
+
+    def submit(self, pipeline: Pipeline, ctx: SimulationContext) -> asyncio.Task:
+        """提交回合的报告阶段，排在之前提交的回合之后执行"""
+        previous = self._tasks[-1] if self._tasks else None
+        task = asyncio.create_task(self._run(pipeline, ctx, previous))
+        self._tasks.append(task)
+        return task
+
+    async def wait_for_capacity(self) -> None:
+        """积压超过上限时等待最早的报告完成（当前回合的报告与下一回合的模拟可以并发）"""
+        while self.pending > self.max_backlog:
+            oldest = next(task for task in self._tasks if not task.done())
+            await asyncio.wait([oldest])
+
+    async def drain(self) -> list[TurnReport]:
+        """等待全部报告完成，按回合顺序返回（失败或跳过的回合不含报告）"""
+        tasks, self._tasks = self._tasks, []
+        reports = await asyncio.gather(*tasks)
+        return [report for report in reports if report]
+
+    async def _run(
+        self,
+        pipeline: Pipeline,
+        ctx: SimulationContext,
+        previous: asyncio.Task | None,
+    ) -> TurnReport | None:
+        if previous is not None:
+            await asyncio.wait([previous])
+
+        try:
+            result = await pipeline.execute(ctx, self.engine)
+        except Exception as e:
+            logger.error(f"[报告叠加] 回合 {ctx.turn_index} 报告阶段失败: {e}")
+            return None
+        finally:
+            if self.after_turn is not None:
+                self.after_turn(ctx)
+
+        if not result.success:
+            logger.warning(
+                f"[报告叠加] 回合 {ctx.turn_index} 有 {len(result.failed_stages)} 个报告阶段失败"
+            )
+
+        report = ctx.report
+        if report is not None:
+            ctx.emit_event(
+                "turn_report",
+                f"📝 回合 {ctx.turn_index} 报告已生成",
+                "报告",
+                turn_index=ctx.turn_index,
+                report=report.model_dump(mode="json"),
+            )
+        return report
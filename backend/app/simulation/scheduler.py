@@ -0,0 +1,165 @@
+"""
+Stage Scheduler - 阶段依赖图调度
+
+Pipeline 默认按 order 逐个串行执行阶段。DAG 模式（PipelineConfig.scheduler="dag"）
+根据各阶段 get_dependency() 的声明构建依赖图，没有读写冲突的阶段并发执行。
+
+对 order 在前的阶段 A 与在后的阶段 B，存在边 A → B 当且仅当：
+- 任一方在 requires_stages / optional_stages 中声明了另一方
+- A 写入 B 读取或写入的字段（写后读 / 写后写）
+- A 读取 B 写入的字段（读后写）
+其中"读取" = requires_fields ∪ reads_fields，原地修改字段中的对象也算写入。
+
+未声明依赖的阶段（get_dependency 返回空声明或不提供该方法）视为屏障：
+依赖所有在前阶段，所有在后阶段都依赖它，即在该处退回串行。
+边始终从 order 小的阶段指向 order 大的阶段，因此图无环，且任一拓扑序都与
+串行执行的结果一致——前提是声明如实反映了 Context 读写。
+声明之外的副作用（数据库、文件）不受保护，需要先后关系的阶段应通过
+optional_stages 显式声明。
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Sequence
+
+if TYPE_CHECKING:
+    from .stages import Stage, StageDependency
+
+
+SCHEDULER_MODES = ("serial", "dag")
+
+
+def _dependency_of(stage: Stage) -> StageDependency | None:
+    """获取阶段依赖声明，未声明时返回 None"""
+    get_dependency = getattr(stage, "get_dependency", None)
+    if get_dependency is None:
+        return None
+    dep = get_dependency()
+    return dep if dep.is_declared else None
+
+
+def _conflicts(earlier: Stage, dep_a: StageDependency, later: Stage, dep_b: StageDependency) -> bool:
+    """两个已声明阶段之间是否必须保持先后顺序"""
+    if earlier.name in dep_b.requires_stages | dep_b.optional_stages:
+        return True
+    if later.name in dep_a.requires_stages | dep_a.optional_stages:
+        return True
+    if dep_a.writes_fields & (dep_b.all_reads | dep_b.writes_fields):
+        return True
+    return bool(dep_a.all_reads & dep_b.writes_fields)
+
+
+@dataclass
+class StageGraph:
+    """阶段依赖图
+
+    Attributes:
+        stages: 按 order 排序的阶段
+        predecessors: 阶段名 → 必须先完成的阶段名集合
+        barriers: 未声明依赖、按串行屏障处理的阶段名
+    """
+    stages: list[Stage]
+    predecessors: dict[str, set[str]] = field(default_factory=dict)
+    barriers: set[str] = field(default_factory=set)
+
+    @classmethod
+    def build(cls, stages: Sequence[Stage]) -> StageGraph:
+        """根据依赖声明构建依赖图"""
+        ordered = sorted(stages, key=lambda s: s.order)
+        deps = {s.name: _dependency_of(s) for s in ordered}
+        graph = cls(
+            stages=ordered,
+            predecessors={s.name: set() for s in ordered},
+            barriers={name for name, dep in deps.items() if dep is None},
+        )
+        for j, later in enumerate(ordered):
+            dep_b = deps[later.name]
+            for earlier in ordered[:j]:
+                dep_a = deps[earlier.name]
+                if dep_a is None or dep_b is None or _conflicts(earlier, dep_a, later, dep_b):
+                    graph.predecessors[later.name].add(earlier.name)
+        return graph
+
+    def levels(self) -> list[list[str]]:
+        """按最长前驱链分层：同一层内的阶段互不依赖，可同时执行"""
+        depth: dict[str, int] = {}
+        for stage in self.stages:
+            preds = self.predecessors[stage.name]
+            depth[stage.name] = 1 + max((depth[p] for p in preds), default=-1)
+        levels: list[list[str]] = [[] for _ in range(max(depth.values(), default=-1) + 1)]
+        for stage in self.stages:
+            levels[depth[stage.name]].append(stage.name)
+        return levels
+
+    def critical_path(self, durations: dict[str, float]) -> tuple[list[str], float]:
+        """按实际耗时计算关键路径（耗时之和最大的依赖链）
+
+        Args:
+            durations: 阶段名 → 耗时（ms），未执行的阶段不计入
+
+        Returns:
+            (关键路径上的阶段名, 关键路径总耗时 ms)
+        """
+        finish: dict[str, float] = {}
+        via: dict[str, str | None] = {}
+        for stage in self.stages:
+            name = stage.name
+            if name not in durations:
+                continue
+            best, prev = 0.0, None
+            for pred in self.predecessors[name]:
+                if pred in finish and finish[pred] > best:
+                    best, prev = finish[pred], pred
+            finish[name] = best + durations[name]
+            via[name] = prev
+        if not finish:
+            return [], 0.0
+
+        tail = max(finish, key=finish.__getitem__)
+        path: list[str] = []
+        node: str | None = tail
+        while node is not None:
+            path.append(node)
+            node = via[node]
+        return path[::-1], finish[tail]
+
+    def describe(self) -> str:
+        """文本形式的并发分层（debug 输出）"""
+        lines = ["Stage 调度分层:", "=" * 50]
+        for i, level in enumerate(self.levels()):
+            names = ", ".join(
+                f"{name}{' [屏障]' if name in self.barriers else ''}" for name in level
+            )
+            lines.append(f"  L{i:02d} ({len(level)}): {names}")
+        lines.append("=" * 50)
+        return "\n".join(lines)
+
+
+def split_deferred_stages(stages: Sequence[Stage]) -> tuple[list[Stage], list[Stage]]:
+    """拆分出可推迟到下一回合模拟期间执行的报告阶段
+
+    声明 deferrable 的阶段及其硬性下游（requires_stages 指向它们，或读取它们写入的字段）
+    一起推迟；optional_stages 只约束先后顺序，不会把阶段拖入推迟组。
+
+    Returns:
+        (本回合内执行的阶段, 推迟执行的阶段)，均按 order 排序
+    """
+    ordered = sorted(stages, key=lambda s: s.order)
+    deferred: list[Stage] = []
+    deferred_names: set[str] = set()
+    deferred_writes: set[str] = set()
+    foreground: list[Stage] = []
+    for stage in ordered:
+        dep = _dependency_of(stage)
+        follows = dep is not None and bool(
+            dep.requires_stages & deferred_names or dep.all_reads & deferred_writes
+        )
+        if getattr(stage, "deferrable", False) or follows:
+            deferred.append(stage)
+            deferred_names.add(stage.name)
+            if dep is not None:
+                deferred_writes |= dep.writes_fields
+        else:
+            foreground.append(stage)
+    return foreground, deferred
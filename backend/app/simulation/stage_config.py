@@ -374,13 +374,13 @@ def create_stage_config_from_engine_flags(
 
 def load_stage_config_from_yaml(
     yaml_path: str | Path | None = None,
-    mode: str = "standard",
+    mode: str | None = None,
 ) -> list[StageConfig]:
     """从 YAML 文件加载阶段配置
     
     Args:
         yaml_path: YAML 配置文件路径，为 None 时使用默认路径
-        mode: 使用的模式名称 (minimal/standard/full/debug)
+        mode: 使用的模式名称 (minimal/standard/full/debug)，为 None 时使用 YAML 中的 mode
     
     Returns:
         启用的阶段配置列表（按顺序排列）
@@ -410,8 +410,8 @@ def load_stage_config_from_yaml(
         return [StageConfig.from_dict({"name": s.name, "enabled": s.enabled, "order": s.order})
                 for s in DEFAULT_STAGE_CONFIG.get_enabled_stages()]
     
-    # 获取当前模式
-    current_mode = config_data.get("mode", mode)
+    # 获取当前模式：显式指定的模式优先，YAML 的 mode 只作为默认值
+    current_mode = mode or config_data.get("mode", "standard")
     if current_mode not in AVAILABLE_MODES:
         logger.warning(f"Unknown mode '{current_mode}', using 'standard'")
         current_mode = "standard"
@@ -646,13 +646,13 @@ class StageLoader:
     
     def load_stages_for_mode(
         self,
-        mode: str = "standard",
+        mode: str | None = None,
         validate: bool = True,
     ) -> list[BaseStage]:
         """根据模式加载阶段列表
         
         Args:
-            mode: 模式名称 (minimal/standard/full/debug)
+            mode: 模式名称 (minimal/standard/full/debug)，为 None 时使用 YAML 中的 mode
             validate: 是否验证依赖关系
         
         Returns:
@@ -800,6 +800,7 @@ def _register_default_stages() -> None:
         SubspeciesPromotionStage,
         SpeciationDataTransferStage,  # 分化数据传递
         SpeciationStage,
+        SpeciesGovernorStage,
         BackgroundManagementStage,
         BuildReportStage,
         SaveMapSnapshotStage,
@@ -838,6 +839,7 @@ def _register_default_stages() -> None:
     stage_registry.register("subspecies_promotion", SubspeciesPromotionStage)
     stage_registry.register("speciation_data_transfer", SpeciationDataTransferStage)
     stage_registry.register("speciation", SpeciationStage)
+    stage_registry.register("species_governor", SpeciesGovernorStage)
     stage_registry.register("background_management", BackgroundManagementStage)
     stage_registry.register("build_report", BuildReportStage)
     stage_registry.register("save_map_snapshot", SaveMapSnapshotStage)
@@ -0,0 +1,193 @@
+"""
+Stage Executor - 阶段执行策略
+
+所有阶段的 execute() 都是 async，但多数阶段在其中直接做阻塞的 NumPy / SQLite 工作，
+回合运行期间 /events/stream、/queue、/map 等请求会被卡住。
+PipelineConfig.offload_stages=True 时，按阶段声明的 execution_policy 决定在哪里执行：
+
+┌──────────┬─────────────────────────────────────────────────────────┐
+│ 策略      │ 说明                                                     │
+├──────────┼─────────────────────────────────────────────────────────┤
+│ inline   │ 在事件循环上直接 await（需要 await 网络 I/O 的 AI 阶段）      │
+│ thread   │ 共享线程池（纯数据库/文件 I/O，不触碰 Taichi）                 │
+│ compute  │ 常驻计算线程 tensor-compute（可能调用 Taichi 的计算阶段）       │
+└──────────┴─────────────────────────────────────────────────────────┘
+
+Taichi/CUDA 上下文是线程绑定的，所以 compute 阶段不进线程池，而是统一提交到
+app.tensor.compute_thread 的单一线程（此时内核预热也在该线程执行）。
+PipelineConfig.compute_thread_stages=True 时只把 compute 阶段提交到该线程，
+其余阶段仍在事件循环上执行；两个开关都关闭时（默认）所有阶段都在事件循环上执行。
+移出事件循环的阶段在工作线程自己的事件循环中运行 execute()，因此不能 await
+绑定在主事件循环上的对象；ctx.emit_event 经由线程安全的 queue.Queue 推送。
+
+EventLoopLagMonitor 在主事件循环上周期性休眠并测量超时唤醒的延迟，
+按阶段执行窗口记录最大延迟（StageMetrics.loop_lag_ms）。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from enum import Enum
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .context import SimulationContext
+    from .engine import SimulationEngine
+    from .stages import Stage
+
+logger = logging.getLogger(__name__)
+
+
+class ExecutionPolicy(str, Enum):
+    """阶段执行位置"""
+    INLINE = "inline"
+    THREAD = "thread"
+    COMPUTE = "compute"
+
+
+def stage_policy(stage: Stage) -> ExecutionPolicy:
+    """阶段声明的执行策略（未声明时为 inline）"""
+    return ExecutionPolicy(getattr(stage, "execution_policy", ExecutionPolicy.INLINE))
+
+
+# 工作线程各自持有一个事件循环，重复运行阶段协程
+_thread_loops = threading.local()
+
+
+def _run_stage_coroutine(stage: Stage, ctx: SimulationContext, engine: SimulationEngine) -> None:
+    loop = getattr(_thread_loops, "loop", None)
+    if loop is None or loop.is_closed():
+        loop = asyncio.new_event_loop()
+        _thread_loops.loop = loop
+    loop.run_until_complete(stage.execute(ctx, engine))
+
+
+class StageExecutor:
+    """按执行策略运行阶段
+
+    Args:
+        offload: False 时所有阶段都在事件循环上执行（与旧行为一致）
+        max_threads: thread 策略的线程池大小
+        compute_thread: offload 关闭时仍把 compute 阶段提交到计算线程
+    """
+
+    def __init__(self, offload: bool = False, max_threads: int = 2, compute_thread: bool = False):
+        self.offload = offload
+        self.max_threads = max(1, max_threads)
+        self.compute_thread = compute_thread
+        self._pool: ThreadPoolExecutor | None = None
+
+    def policy_for(self, stage: Stage) -> ExecutionPolicy:
+        policy = stage_policy(stage)
+        if self.offload or (self.compute_thread and policy is ExecutionPolicy.COMPUTE):
+            return policy
+        return ExecutionPolicy.INLINE
+
+    async def run(self, stage: Stage, ctx: SimulationContext, engine: SimulationEngine) -> None:
+        """执行阶段；超时取消只能停止等待，已在工作线程运行的阶段会继续执行到结束"""
+        policy = self.policy_for(stage)
+        if policy is ExecutionPolicy.INLINE:
+            await stage.execute(ctx, engine)
+        elif policy is ExecutionPolicy.COMPUTE:
+            from ..tensor.compute_thread import get_compute_thread
+            await get_compute_thread().run(_run_stage_coroutine, stage, ctx, engine)
+        else:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(self._thread_pool(), _run_stage_coroutine, stage, ctx, engine)
+
+    def _thread_pool(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(
+                max_workers=self.max_threads,
+                thread_name_prefix="pipeline-stage",
+            )
+        return self._pool
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
+
+
+class LagWindow:
+    """一个阶段执行期间观测到的最大事件循环延迟"""
+
+    __slots__ = ("max_lag",)
+
+    def __init__(self):
+        self.max_lag = 0.0
+
+    def observe(self, lag: float) -> None:
+        if lag > self.max_lag:
+            self.max_lag = lag
+
+    @property
+    def max_lag_ms(self) -> float:
+        return self.max_lag * 1000
+
+
+class EventLoopLagMonitor:
+    """事件循环延迟探针
+
+    探针每 interval 秒休眠一次，实际唤醒时间与预期之差即事件循环被阻塞的时长。
+    关闭窗口时把尚未唤醒的探针已超出的时间也计入，阶段在循环上阻塞期间
+    探针无法运行，否则这段延迟会在窗口关闭后才被观测到。
+    """
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.max_lag = 0.0
+        self._windows: set[LagWindow] = set()
+        self._task: asyncio.Task | None = None
+        self._due: float | None = None
+
+    def start(self) -> None:
+        if self.interval > 0 and self._task is None:
+            loop = asyncio.get_running_loop()
+            # 首个探针的预期唤醒时间立即设定：任务尚未被调度时就阻塞循环的阶段也能被测到
+            self._due = loop.time() + self.interval
+            self._task = loop.create_task(self._probe())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self._due = None
+
+    async def _probe(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(max(0.0, self._due - loop.time()))
+            self._record(loop.time() - self._due)
+            self._due = loop.time() + self.interval
+
+    def _record(self, lag: float) -> None:
+        lag = max(0.0, lag)
+        if lag > self.max_lag:
+            self.max_lag = lag
+        for window in self._windows:
+            window.observe(lag)
+
+    def open(self) -> LagWindow:
+        window = LagWindow()
+        self._windows.add(window)
+        return window
+
+    def close(self, window: LagWindow) -> float:
+        """关闭窗口并返回其最大延迟（ms）"""
+        if self._task is not None and self._due is not None:
+            self._record(asyncio.get_running_loop().time() - self._due)
+        self._windows.discard(window)
+        return window.max_lag_ms
+
+    @property
+    def max_lag_ms(self) -> float:
+        return self.max_lag * 1000
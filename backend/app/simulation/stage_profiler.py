@@ -0,0 +1,329 @@
+"""
+Stage Profiler - 流水线阶段采样分析器
+
+PipelineMetrics 只给出每个阶段的墙钟耗时，回答不了"慢回合的时间花在哪些函数上"。
+本模块是纯标准库实现的统计采样分析器，可以在生产存档上直接开启，不需要挂调试器：
+
+- attach(pipeline) 通过 add_before_stage_callback / add_after_stage_callback 挂到流水线
+- 后台线程 stage-profiler 每 interval 秒读取一次 sys._current_frames()，
+  在各线程调用栈中找到正在执行的阶段（execute 帧的 self），把调用栈计入该阶段；
+  inline、thread、compute 三种执行策略以及 DAG 并发阶段都能正确归属
+- 只统计正在 CPU 上运行的栈：阶段 await（LLM 请求、asyncio.sleep）期间没有帧，不计样本
+- 可选 tracemalloc（trace_memory=True）：阶段前后各取一次快照，按代码行汇总分配增量。
+  快照覆盖整个进程，并发阶段的分配会互相计入
+- flush(turn_index) 把该回合的数据写入 output_dir：
+    turn_00012.folded    折叠栈（flamegraph.pl / speedscope / inferno 可直接读取）
+    turn_00012_top.txt   阶段样本数 + 自身/累计样本 Top-N 函数表 + 内存分配汇总
+
+开启方式：PIPELINE_PROFILE=true（任意模式），或 debug 模式（ModeParameters.enable_profiling）。
+报告叠加模式下推迟的报告阶段稍后完成，同一回合会再写一组 turn_00012.report.* 文件。
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Tuple
+
+if TYPE_CHECKING:
+    from .context import SimulationContext
+    from .pipeline import Pipeline
+    from .stages import Stage
+
+logger = logging.getLogger(__name__)
+
+SAMPLER_THREAD_NAME = "stage-profiler"
+
+
+def frame_label(code) -> str:
+    """折叠栈中的帧名：函数限定名 (文件名:首行号)，不含折叠格式的分隔符"""
+    name = getattr(code, "co_qualname", code.co_name)
+    label = f"{name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+    return label.replace(";", ":")
+
+
+@dataclass
+class StageSamples:
+    """单个阶段在一个回合内的采样数据"""
+    samples: int = 0
+    sampled_ms: float = 0.0                                    # 样本按实际采样间隔加权的耗时
+    wall_ms: float = 0.0
+    stacks: Counter = field(default_factory=Counter)           # 折叠栈 -> 样本数
+    self_counts: Counter = field(default_factory=Counter)      # 栈顶函数 -> 样本数
+    total_counts: Counter = field(default_factory=Counter)     # 出现在栈中的函数 -> 样本数
+    memory_peak_kb: float = 0.0
+    top_allocations: List[Tuple[str, float, int]] = field(default_factory=list)  # (位置, KB, 次数)
+
+
+@dataclass
+class TurnProfile:
+    """一个回合（或回合中一段流水线）的采样结果"""
+    turn_index: int
+    interval: float
+    stages: Dict[str, StageSamples] = field(default_factory=dict)
+
+    @property
+    def total_samples(self) -> int:
+        return sum(s.samples for s in self.stages.values())
+
+    def folded(self) -> List[str]:
+        """折叠栈文本行：stage;outer;...;leaf count"""
+        lines = []
+        for stage_name, data in self.stages.items():
+            for stack, count in data.stacks.items():
+                lines.append(f"{stage_name};{stack} {count}" if stack else f"{stage_name} {count}")
+        return sorted(lines)
+
+    def top_functions(self, n: int = 30) -> List[Tuple[str, int, int]]:
+        """按自身样本数排序的函数表 [(函数, 自身样本, 累计样本)]"""
+        self_counts: Counter = Counter()
+        total_counts: Counter = Counter()
+        for data in self.stages.values():
+            self_counts.update(data.self_counts)
+            total_counts.update(data.total_counts)
+        ranked = sorted(total_counts, key=lambda f: (self_counts[f], total_counts[f]), reverse=True)
+        return [(func, self_counts[func], total_counts[func]) for func in ranked[:n]]
+
+    def format_table(self, top_n: int = 30) -> str:
+        """阶段样本表 + Top-N 函数表 + 内存分配汇总"""
+        total = self.total_samples or 1
+        lines = [
+            f"回合 {self.turn_index} 采样分析（间隔 {self.interval * 1000:.1f}ms，样本 {self.total_samples}）",
+            "",
+            f"{'阶段':<24} {'墙钟(ms)':>10} {'样本':>8} {'CPU(ms)':>10} {'占比':>7}",
+            "-" * 64,
+        ]
+        for name, data in sorted(self.stages.items(), key=lambda kv: kv[1].samples, reverse=True):
+            lines.append(
+                f"{name:<24} {data.wall_ms:>10.1f} {data.samples:>8} "
+                f"{data.sampled_ms:>10.1f} {data.samples / total:>6.1%}"
+            )
+
+        lines += [
+            "",
+            f"Top {top_n} 函数（自身 = 位于栈顶，累计 = 出现在栈中）",
+            f"{'自身':>7} {'自身%':>7} {'累计':>7} {'累计%':>7}  函数",
+            "-" * 64,
+        ]
+        for func, self_samples, total_samples in self.top_functions(top_n):
+            lines.append(
+                f"{self_samples:>7} {self_samples / total:>6.1%} "
+                f"{total_samples:>7} {total_samples / total:>6.1%}  {func}"
+            )
+
+        memory = [(name, data) for name, data in self.stages.items() if data.top_allocations]
+        if memory:
+            lines += ["", "内存分配（tracemalloc 快照差，按代码行）", "-" * 64]
+            for name, data in memory:
+                lines.append(f"[{name}] 峰值 {data.memory_peak_kb:.1f} KB")
+                for where, size_kb, count in data.top_allocations:
+                    lines.append(f"  {size_kb:>+10.1f} KB {count:>+8}  {where}")
+        return "\n".join(lines) + "\n"
+
+
+class StageProfiler:
+    """按阶段归属的统计采样分析器
+
+    Args:
+        output_dir: 折叠栈与函数表的输出目录
+        interval: 采样间隔（秒）
+        top_n: 函数表行数
+        trace_memory: 是否记录 tracemalloc 分配汇总（有明显开销）
+        memory_top_n: 每个阶段列出的分配位置数
+    """
+
+    def __init__(
+        self,
+        output_dir: str | Path,
+        interval: float = 0.005,
+        top_n: int = 30,
+        trace_memory: bool = False,
+        memory_top_n: int = 10,
+    ):
+        self.output_dir = Path(output_dir)
+        self.interval = max(0.001, interval)
+        self.top_n = top_n
+        self.trace_memory = trace_memory
+        self.memory_top_n = memory_top_n
+
+        self._lock = threading.Lock()
+        self._active: Dict[int, Tuple[int, str]] = {}       # id(stage) -> (回合, 阶段名)
+        self._started_at: Dict[int, float] = {}
+        self._snapshots: Dict[int, tracemalloc.Snapshot] = {}
+        self._turns: Dict[int, TurnProfile] = {}
+        self._flushed: Counter = Counter()                   # 回合 -> 已写出次数
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._last_sample = 0.0
+        self._owns_tracemalloc = False
+
+    # ------------------------------------------------------------------
+    # 流水线挂接
+    # ------------------------------------------------------------------
+
+    def attach(self, pipeline: Pipeline) -> "StageProfiler":
+        """把采样回调挂到流水线（可以挂多个流水线，例如报告叠加模式的两段）"""
+        pipeline.add_before_stage_callback(self.before_stage)
+        pipeline.add_after_stage_callback(self.after_stage)
+        return self
+
+    def before_stage(self, stage: Stage, ctx: SimulationContext) -> None:
+        self._ensure_started()
+        key = id(stage)
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            self._snapshots[key] = tracemalloc.take_snapshot()
+        self._started_at[key] = time.perf_counter()
+        with self._lock:
+            self._stage_samples(ctx.turn_index, stage.name)
+            self._active[key] = (ctx.turn_index, stage.name)
+        self._wake.set()
+
+    def after_stage(self, stage: Stage, ctx: SimulationContext, result: Any) -> None:
+        key = id(stage)
+        with self._lock:
+            self._active.pop(key, None)
+            if not self._active:
+                self._wake.clear()
+            data = self._stage_samples(ctx.turn_index, stage.name)
+        started = self._started_at.pop(key, None)
+        if started is not None:
+            data.wall_ms += (time.perf_counter() - started) * 1000
+
+        before = self._snapshots.pop(key, None)
+        if before is not None and tracemalloc.is_tracing():
+            data.memory_peak_kb = max(data.memory_peak_kb, tracemalloc.get_traced_memory()[1] / 1024)
+            diff = tracemalloc.take_snapshot().compare_to(before, "lineno")
+            data.top_allocations = [
+                (str(stat.traceback[0]), stat.size_diff / 1024, stat.count_diff)
+                for stat in diff[: self.memory_top_n]
+                if stat.size_diff
+            ]
+
+    # ------------------------------------------------------------------
+    # 输出
+    # ------------------------------------------------------------------
+
+    def flush(self, turn_index: int) -> TurnProfile | None:
+        """写出回合的折叠栈与函数表（同一回合再次写出时带 .report 后缀）"""
+        with self._lock:
+            profile = self._turns.pop(turn_index, None)
+        if profile is None or not profile.stages:
+            return None
+
+        part = self._flushed[turn_index]
+        self._flushed[turn_index] += 1
+        stem = f"turn_{turn_index:05d}" + (".report" if part == 1 else f".part{part}" if part else "")
+        try:
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+            (self.output_dir / f"{stem}.folded").write_text(
+                "\n".join(profile.folded()) + "\n", encoding="utf-8"
+            )
+            (self.output_dir / f"{stem}_top.txt").write_text(
+                profile.format_table(self.top_n), encoding="utf-8"
+            )
+        except OSError as e:
+            logger.warning(f"[StageProfiler] 写出回合 {turn_index} 采样结果失败: {e}")
+        else:
+            logger.info(
+                f"[StageProfiler] 回合 {turn_index}: {profile.total_samples} 个样本 -> {self.output_dir / stem}.*"
+            )
+        return profile
+
+    def close(self) -> None:
+        """停止采样线程（未写出的回合数据丢弃）"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        if self._owns_tracemalloc and tracemalloc.is_tracing():
+            tracemalloc.stop()
+            self._owns_tracemalloc = False
+
+    # ------------------------------------------------------------------
+    # 采样线程
+    # ------------------------------------------------------------------
+
+    def _ensure_started(self) -> None:
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._owns_tracemalloc = True
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._sample_loop, name=SAMPLER_THREAD_NAME, daemon=True)
+            self._thread.start()
+
+    def _stage_samples(self, turn_index: int, stage_name: str) -> StageSamples:
+        # 调用方持有 self._lock
+        profile = self._turns.get(turn_index)
+        if profile is None:
+            profile = self._turns[turn_index] = TurnProfile(turn_index, self.interval)
+        return profile.stages.setdefault(stage_name, StageSamples())
+
+    def _sample_loop(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.is_set():
+            if not self._wake.wait(0.5):
+                self._last_sample = 0.0
+                continue
+            self._sample(own)
+            time.sleep(self.interval)
+
+    def _sample(self, own_ident: int) -> None:
+        # 采样线程与阶段线程竞争 GIL，实际间隔往往大于 interval，按实际间隔加权
+        now = time.perf_counter()
+        elapsed = now - self._last_sample
+        self._last_sample = now
+        weight_ms = (elapsed if elapsed < self.interval * 20 else self.interval) * 1000
+
+        with self._lock:
+            if not self._active:
+                return
+            active = dict(self._active)
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+                found = self._attribute(frame, active)
+                if found is None:
+                    continue
+                key, labels = found
+                data = self._stage_samples(*key)
+                data.samples += 1
+                data.sampled_ms += weight_ms
+                data.stacks[";".join(labels)] += 1
+                if labels:
+                    data.self_counts[labels[-1]] += 1
+                    data.total_counts.update(set(labels))
+
+    @staticmethod
+    def _attribute(frame, active: Dict[int, Tuple[int, str]]) -> Tuple[Tuple[int, str], List[str]] | None:
+        """从栈顶向下找到正在执行的阶段，返回 ((回合, 阶段名), 阶段 execute 到栈顶的帧名)"""
+        codes = []
+        while frame is not None:
+            code = frame.f_code
+            codes.append(code)
+            if code.co_name == "execute":
+                key = active.get(id(frame.f_locals.get("self")))
+                if key is not None:
+                    return key, [frame_label(c) for c in reversed(codes)]
+            frame = frame.f_back
+        return None
+
+
+def create_stage_profiler(configs: Dict[str, Any]) -> StageProfiler:
+    """按引擎配置创建分析器"""
+    return StageProfiler(
+        output_dir=configs.get("pipeline_profile_dir") or "data/profiles",
+        interval=configs.get("pipeline_profile_interval_ms", 5) / 1000,
+        top_n=configs.get("pipeline_profile_top_n", 30),
+        trace_memory=configs.get("pipeline_profile_memory", False),
+    )
@@ -34,7 +34,9 @@ from ..services.species.extinction_checker import ExtinctionChecker
 from ..services.species.reemergence import ReemergenceService
 from ..services.analytics.turn_report import TurnReportService
 from ..services.analytics.population_snapshot import PopulationSnapshotService
+from ..tensor.phylogeny import get_phylogeny_index
 from ..tensor.speciation_monitor import SpeciationMonitor
+from .stage_executor import ExecutionPolicy
 
 logger = logging.getLogger(__name__)
 
@@ -50,13 +52,15 @@ class StageDependency:
     Attributes:
         requires_stages: 必须先执行的阶段名称集合
         requires_fields: 必须已填充的 Context 字段集合
-        writes_fields: 本阶段会写入的 Context 字段集合
+        writes_fields: 本阶段会写入的 Context 字段集合（含原地修改其中的对象）
         optional_stages: 可选的前置阶段（如果存在则依赖）
+        reads_fields: 存在时才读取的 Context 字段（不做验证，仅供 DAG 调度判断读写冲突）
     """
     requires_stages: Set[str] = field(default_factory=set)
     requires_fields: Set[str] = field(default_factory=set)
     writes_fields: Set[str] = field(default_factory=set)
     optional_stages: Set[str] = field(default_factory=set)
+    reads_fields: Set[str] = field(default_factory=set)
     
     def __post_init__(self):
         # 转换为 set 以防传入 list
@@ -64,6 +68,19 @@ class StageDependency:
         self.requires_fields = set(self.requires_fields)
         self.writes_fields = set(self.writes_fields)
         self.optional_stages = set(self.optional_stages)
+        self.reads_fields = set(self.reads_fields)
+    
+    @property
+    def is_declared(self) -> bool:
+        """是否声明了任何依赖（未声明的阶段在 DAG 调度中按串行屏障处理）"""
+        return bool(
+            self.requires_stages or self.requires_fields or self.writes_fields
+            or self.optional_stages or self.reads_fields
+        )
+    
+    @property
+    def all_reads(self) -> Set[str]:
+        return self.requires_fields | self.reads_fields
 
 
 class DependencyError(Exception):
@@ -124,6 +141,7 @@ class StageDependencyValidator:
         "auto_hybrids",
         "adaptation_events",
         "branching_events",
+        "lineage_merges",
         "background_summary",
         "mass_extinction",
         "reemergence_events",
@@ -217,6 +235,8 @@ class StageDependencyValidator:
                 lines.append(f"      ← 依赖阶段: {', '.join(sorted(dep.requires_stages))}")
             if dep.requires_fields:
                 lines.append(f"      ← 需要字段: {', '.join(sorted(dep.requires_fields))}")
+            if dep.reads_fields:
+                lines.append(f"      ← 读取字段: {', '.join(sorted(dep.reads_fields))}")
             if dep.writes_fields:
                 lines.append(f"      → 输出字段: {', '.join(sorted(dep.writes_fields))}")
         
@@ -251,6 +271,7 @@ class StageOrder(Enum):
     AUTO_HYBRIDIZATION = 110
     SUBSPECIES_PROMOTION = 115
     SPECIATION = 125
+    SPECIES_GOVERNOR = 127
     BACKGROUND_MANAGEMENT = 130
     BUILD_REPORT = 140
     SAVE_MAP_SNAPSHOT = 150
@@ -307,8 +328,17 @@ class BaseStage(ABC):
     """阶段基类，提供通用功能
     
     子类应该重写 `get_dependency()` 方法来声明依赖关系。
+    阻塞的计算/I/O 阶段通过 `execution_policy` 声明在 offload 模式下移出事件循环
+    （见 stage_executor.py）。
+    只生成或消费回合报告的阶段通过 `deferrable` 声明可在报告叠加模式下推迟执行
+    （见 report_queue.py）。
     """
     
+    # offload 模式下的执行位置：inline（事件循环）/ thread（线程池）/ compute（Taichi 计算线程）
+    execution_policy: ExecutionPolicy = ExecutionPolicy.INLINE
+    # 报告叠加模式下是否推迟到下一回合模拟期间执行（下一回合不得依赖其输出）
+    deferrable: bool = False
+    
     def __init__(self, order: int, name: str, is_async: bool = False):
         self._order = order
         self._name = name
@@ -739,6 +769,8 @@ class ResourceCalcStage(BaseStage):
     生成 resource_snapshot 供后续阶段（死亡率、繁殖、迁徙）使用。
     """
     
+    execution_policy = ExecutionPolicy.COMPUTE
+    
     def __init__(self):
         super().__init__(StageOrder.RESOURCE_CALC.value, "资源计算")
     
@@ -855,6 +887,8 @@ class FoodWebStage(BaseStage):
     4. 生成 trophic_interactions 反馈信号
     """
     
+    execution_policy = ExecutionPolicy.COMPUTE
+    
     def __init__(self):
         super().__init__(StageOrder.FOOD_WEB.value, "食物网维护")
         self._previous_species_codes: set[str] | None = None
@@ -956,6 +990,8 @@ class FoodWebStage(BaseStage):
 class TieringAndNicheStage(BaseStage):
     """物种分层与生态位分析阶段"""
     
+    execution_policy = ExecutionPolicy.COMPUTE
+    
     def __init__(self):
         super().__init__(StageOrder.TIERING_AND_NICHE.value, "物种分层与生态位")
     
@@ -978,6 +1014,8 @@ class TieringAndNicheStage(BaseStage):
 class PreliminaryMortalityStage(BaseStage):
     """初步死亡率评估阶段（迁徙前）"""
     
+    execution_policy = ExecutionPolicy.COMPUTE
+    
     def __init__(self):
         super().__init__(StageOrder.PRELIMINARY_MORTALITY.value, "初步死亡率评估")
     
@@ -1055,6 +1093,8 @@ class PreliminaryMortalityStage(BaseStage):
 class FinalMortalityStage(BaseStage):
     """最终死亡率评估阶段（迁徙后）"""
     
+    execution_policy = ExecutionPolicy.COMPUTE
+    
     def __init__(self):
         super().__init__(StageOrder.FINAL_MORTALITY.value, "最终死亡率评估")
     
@@ -1134,6 +1174,8 @@ class PopulationUpdateStage(BaseStage):
     - carrying_capacity: 承载力修正 (K)
     """
     
+    execution_policy = ExecutionPolicy.COMPUTE
+    
     def __init__(self):
         super().__init__(StageOrder.POPULATION_UPDATE.value, "种群更新")
     
@@ -1142,7 +1184,8 @@ class PopulationUpdateStage(BaseStage):
             requires_stages=set(),  # 无强制依赖
             optional_stages={"统一张量生态计算"},  # 张量计算可选
             requires_fields={"species_batch"},
-            writes_fields={"new_populations", "reproduction_results"},
+            reads_fields={"combined_results", "niche_metrics", "current_map_state", "plugin_data"},
+            writes_fields={"new_populations", "reproduction_results", "species_batch", "tensor_state"},
         )
     
     async def execute(self, ctx: SimulationContext, engine: SimulationEngine) -> None:
@@ -1328,15 +1371,25 @@ class PopulationUpdateStage(BaseStage):
                 
                 species_map = t_state.species_map
                 # 以当前张量总数为基准，按新的 final_population 重分配
-                final_totals = t_state.pop.sum(axis=(1, 2), dtype=np.float32)
+                if hasattr(t_state, "species_totals"):
+                    current_totals = t_state.species_totals()
+                else:
+                    current_totals = t_state.pop.sum(axis=(1, 2), dtype=np.float64)
+                final_totals = current_totals.astype(np.float32)
                 for item in ctx.combined_results:
                     idx = species_map.get(item.species.lineage_code)
                     if idx is not None and idx < final_totals.shape[0]:
                         final_totals[idx] = float(item.final_population)
                 
                 # 使用 HybridCompute 的 Taichi 内核（可用时）进行重分配 + 裁剪
-                t_state.pop = compute.redistribute_population(t_state.pop, final_totals)
-                t_state.pop = compute.clip_population(t_state.pop, min_val=0)
+                new_pop = compute.redistribute_population(t_state.pop, final_totals)
+                new_pop = compute.clip_population(new_pop, min_val=0)
+                if hasattr(t_state, "set_population"):
+                    # 无分布（总数为 0）的物种重分配后仍为 0
+                    new_totals = np.where(current_totals > 0, np.maximum(final_totals, 0), 0)
+                    t_state.set_population(new_pop, totals=new_totals)
+                else:
+                    t_state.pop = new_pop
                 ctx.tensor_state = t_state
                 logger.debug(f"[种群更新] 已将新种群写回张量影子状态 (后端={compute.backend})")
             except Exception as e:
@@ -1456,6 +1509,8 @@ class PopulationUpdateStage(BaseStage):
 class PostMigrationNicheStage(BaseStage):
     """迁徙后生态位重新分析阶段"""
     
+    execution_policy = ExecutionPolicy.COMPUTE
+    
     def __init__(self):
         super().__init__(StageOrder.POST_MIGRATION_NICHE.value, "后迁徙生态位")
     
@@ -1464,7 +1519,8 @@ class PostMigrationNicheStage(BaseStage):
             requires_stages=set(),  # 无强制依赖
             optional_stages={"统一张量生态计算"},
             requires_fields={"species_batch"},
-            writes_fields={"niche_metrics"},
+            reads_fields={"migration_count"},
+            writes_fields={"niche_metrics", "all_habitats"},
         )
     
     async def execute(self, ctx: SimulationContext, engine: SimulationEngine) -> None:
@@ -1490,7 +1546,7 @@ class SpeciationDataTransferStage(BaseStage):
             requires_stages=set(),  # 无强依赖
             optional_stages={"AI状态评估"},  # AI状态评估可选
             requires_fields={"combined_results", "modifiers"},
-            writes_fields=set(),
+            writes_fields={"tensor_state", "tensor_trigger_codes"},
         )
     
     async def execute(self, ctx: SimulationContext, engine: SimulationEngine) -> None:
@@ -1502,6 +1558,7 @@ class SpeciationDataTransferStage(BaseStage):
         if hasattr(engine, 'speciation') and combined_results is not None:
             tensor_state = getattr(ctx, "tensor_state", None)
             candidates = {}
+            regions = None  # 连通区域标记结果，候选生成与 SpeciationMonitor 共用
             
             # 【张量优先】直接使用张量状态生成候选
             # TileBasedMortalityEngine 已被 TensorEcologyStage 替代
@@ -1512,7 +1569,7 @@ class SpeciationDataTransferStage(BaseStage):
             if tensor_state is not None:
                 try:
                     import numpy as np
-                    from scipy.ndimage import label as scipy_label
+                    from ..tensor.regions import label_regions
                 except Exception as e:
                     logger.warning(f"[分化数据传递] 张量候选生成失败(依赖缺失): {e}")
                 else:
@@ -1526,20 +1583,14 @@ class SpeciationDataTransferStage(BaseStage):
                     else:
                         pop = tensor_state.pop
                         H, W = pop.shape[1], pop.shape[2]
+                        # 所有物种一次批量标记连通区域（六边形邻接、x 方向环绕）
+                        regions = label_regions(pop > 0, weights=pop)
                         for lineage, idx in tensor_state.species_map.items():
                             layer = pop[idx]
                             presence = layer > 0
                             if not presence.any():
                                 continue
-                            labeled, num_regions = scipy_label(presence)
-                            clusters: list[set[int]] = []
-                            for reg in range(1, num_regions + 1):
-                                ys, xs = np.where(labeled == reg)
-                                if ys.size == 0:
-                                    continue
-                                cluster_ids = set(int(tile_ids[y, x]) for y, x in zip(ys, xs) if tile_ids[y, x] >= 0)
-                                if cluster_ids:
-                                    clusters.append(cluster_ids)
+                            clusters = regions.species(idx).tile_clusters(tile_ids)
 
                             candidate_tiles: set[int] = set()
                             tile_populations: dict[int, float] = {}
@@ -1595,7 +1646,8 @@ class SpeciationDataTransferStage(BaseStage):
                             monitor = SpeciationMonitor(species_map=tensor_state.species_map)
                             triggers = monitor.get_speciation_triggers(
                                 tensor_state,
-                                threshold=tensor_config.divergence_threshold
+                                threshold=tensor_config.divergence_threshold,
+                                regions=regions,
                             )
                         
                         # 统计触发类型
@@ -1637,7 +1689,8 @@ class GeneActivationStage(BaseStage):
             requires_stages=set(),  # 无强制依赖
             optional_stages={"统一张量生态计算"},  # 张量计算可选
             requires_fields={"species_batch", "modifiers"},
-            writes_fields={"activation_events"},
+            reads_fields={"combined_results"},
+            writes_fields={"activation_events", "species_batch"},
         )
     
     async def execute(self, ctx: SimulationContext, engine: SimulationEngine) -> None:
@@ -1674,7 +1727,8 @@ class GeneDiversityStage(BaseStage):
             requires_stages=set(),  # 无强制依赖
             optional_stages={"统一张量生态计算"},  # 张量计算可选
             requires_fields={"species_batch"},
-            writes_fields={"gene_diversity_events"},
+            reads_fields={"combined_results", "plugin_data"},
+            writes_fields={"gene_diversity_events", "species_batch"},
         )
 
     async def execute(self, ctx: SimulationContext, engine: SimulationEngine) -> None:
@@ -1726,7 +1780,7 @@ class GeneFlowStage(BaseStage):
             requires_stages=set(),  # 无强制依赖
             optional_stages={"基因激活"},
             requires_fields={"species_batch"},
-            writes_fields={"gene_flow_count"},
+            writes_fields={"gene_flow_count", "species_batch"},
         )
     
     async def execute(self, ctx: SimulationContext, engine: SimulationEngine) -> None:
@@ -1778,7 +1832,7 @@ class GeneticDriftStage(BaseStage):
             requires_stages=set(),  # 无强制依赖
             optional_stages={"基因流动"},
             requires_fields={"species_batch"},
-            writes_fields={"genetic_drift_count"},
+            writes_fields={"genetic_drift_count", "species_batch"},
         )
     
     async def execute(self, ctx: SimulationContext, engine: SimulationEngine) -> None:
@@ -1840,7 +1894,8 @@ class AutoHybridizationStage(BaseStage):
             requires_stages=set(),  # 无强制依赖
             optional_stages={"遗传漂变"},
             requires_fields={"species_batch"},
-            writes_fields={"auto_hybrids"},
+            reads_fields={"all_habitats"},
+            writes_fields={"auto_hybrids", "species_batch", "turn_offspring_counts"},
         )
     
     async def execute(self, ctx: SimulationContext, engine: SimulationEngine) -> None:
@@ -2023,6 +2078,7 @@ class AutoHybridizationStage(BaseStage):
             species_repository.upsert(hybrid)
             species_repository.upsert(sp1)
             species_repository.upsert(sp2)
+            get_phylogeny_index().add(hybrid.lineage_code, hybrid.parent_code)
             
             ctx.auto_hybrids.append(hybrid)
             existing_codes.add(hybrid.lineage_code)
@@ -2180,7 +2236,7 @@ class SubspeciesPromotionStage(BaseStage):
             requires_stages=set(),  # 无强制依赖
             optional_stages={"遗传漂变", "自动杂交"},
             requires_fields={"species_batch"},
-            writes_fields={"promotion_count"},
+            writes_fields={"promotion_count", "species_batch"},
         )
     
     async def execute(self, ctx: SimulationContext, engine: SimulationEngine) -> None:
@@ -2229,7 +2285,11 @@ class SpeciationStage(BaseStage):
             requires_stages=set(),  # 无强制依赖
             optional_stages={"统一张量生态计算"},  # 张量计算可选
             requires_fields={"species_batch", "modifiers"},
-            writes_fields={"branching_events"},
+            reads_fields={
+                "combined_results", "critical_results", "focus_results", "major_events",
+                "map_changes", "pressures", "trophic_interactions", "tensor_trigger_codes",
+            },
+            writes_fields={"branching_events", "species_batch"},
         )
     
     async def execute(self, ctx: SimulationContext, engine: SimulationEngine) -> None:
@@ -2460,6 +2520,67 @@ class SpeciationStage(BaseStage):
             logger.warning(f"[分化-食物网] 集成失败: {e}")
 
 
+class SpeciesGovernorStage(BaseStage):
+    """物种数量调控阶段
+    
+    存活物种超过 Settings.species_budget 时合并近乎相同的姊妹谱系
+    （SpeciesGovernor），张量种群行逐格相加，合并记录写入 ctx.lineage_merges。
+    """
+    
+    execution_policy = ExecutionPolicy.COMPUTE
+    
+    def __init__(self):
+        super().__init__(StageOrder.SPECIES_GOVERNOR.value, "物种数量调控")
+    
+    def get_dependency(self) -> StageDependency:
+        return StageDependency(
+            requires_stages=set(),
+            optional_stages={"物种分化", "统一张量生态计算"},
+            requires_fields={"species_batch"},
+            writes_fields={"species_batch", "lineage_merges"},
+        )
+    
+    async def execute(self, ctx: SimulationContext, engine: SimulationEngine) -> None:
+        from ..core.config import get_settings
+        from ..repositories.species_repository import species_repository
+        from ..services.species.species_governor import GovernorConfig, SpeciesGovernor
+        
+        settings = get_settings()
+        if settings.species_budget <= 0 or len(ctx.species_batch) <= settings.species_budget:
+            return
+        
+        governor = SpeciesGovernor(GovernorConfig(
+            species_budget=settings.species_budget,
+            max_merges_per_turn=settings.species_merge_max_per_turn,
+            max_genetic_distance=settings.species_merge_genetic_distance,
+            max_trait_distance=settings.species_merge_trait_distance,
+            min_tile_overlap=settings.species_merge_min_overlap,
+        ))
+        tensor_state = getattr(ctx, "tensor_state", None)
+        report = governor.govern(
+            ctx.species_batch,
+            ctx.turn_index,
+            pop=tensor_state.pop if tensor_state is not None else None,
+            species_map=tensor_state.species_map if tensor_state is not None else None,
+            watchlist=engine.watchlist,
+        )
+        if not report.merges:
+            return
+        
+        species_repository.upsert_many(report.touched)
+        for merge in report.merges:
+            species_repository.log_event(governor.lineage_event(merge, ctx.turn_index))
+        absorbed = {merge.absorbed_code for merge in report.merges}
+        ctx.species_batch = [sp for sp in ctx.species_batch if sp.lineage_code not in absorbed]
+        ctx.lineage_merges = [merge.to_dict() for merge in report.merges]
+        ctx.emit_event(
+            "info",
+            f"🔗 物种数量调控：存活 {report.alive_before} 超过预算 {report.budget}，"
+            f"合并 {len(report.merges)} 对姊妹谱系",
+            "生态",
+        )
+
+
 class BackgroundManagementStage(BaseStage):
     """背景物种管理阶段"""
     
@@ -2471,6 +2592,7 @@ class BackgroundManagementStage(BaseStage):
             requires_stages=set(),  # 无强制依赖
             optional_stages={"物种分化", "统一张量生态计算"},  # 可选阶段
             requires_fields=set(),  # 字段可能未初始化
+            reads_fields={"background_results", "combined_results", "modifiers"},
             writes_fields={"background_summary", "mass_extinction", "reemergence_events"},
         )
     
@@ -2496,6 +2618,8 @@ class BackgroundManagementStage(BaseStage):
 class BuildReportStage(BaseStage):
     """构建报告阶段"""
     
+    deferrable = True
+    
     def __init__(self):
         super().__init__(StageOrder.BUILD_REPORT.value, "构建报告", is_async=True)
     
@@ -2504,6 +2628,11 @@ class BuildReportStage(BaseStage):
             requires_stages=set(),  # 无强制依赖，按 order 执行
             optional_stages={"背景物种管理", "统一张量生态计算"},
             requires_fields={"pressures"},
+            reads_fields={
+                "all_species", "species_batch", "combined_results", "branching_events",
+                "background_summary", "reemergence_events", "migration_events",
+                "major_events", "map_changes", "modifiers", "plugin_data",
+            },
             writes_fields={"report", "species_snapshots"},
         )
     
@@ -2537,7 +2666,7 @@ class BuildReportStage(BaseStage):
         try:
             # 定义流式回调
             async def on_narrative_chunk(chunk: str):
-                ctx.emit_event("narrative_token", chunk, "报告")
+                ctx.emit_event("narrative_token", chunk, "报告", turn_index=ctx.turn_index)
             
             # 使用 TurnReportService 构建报告
             turn_report_service = TurnReportService(
@@ -2717,6 +2846,8 @@ class BuildReportStage(BaseStage):
 class SaveMapSnapshotStage(BaseStage):
     """保存地图快照阶段"""
     
+    execution_policy = ExecutionPolicy.COMPUTE
+    
     def __init__(self):
         super().__init__(StageOrder.SAVE_MAP_SNAPSHOT.value, "保存地图快照")
     
@@ -2725,6 +2856,7 @@ class SaveMapSnapshotStage(BaseStage):
             requires_stages=set(),  # 无强制依赖，按 order 执行
             optional_stages={"构建报告"},
             requires_fields={"species_batch"},
+            reads_fields={"all_tiles"},
             writes_fields=set(),
         )
     
@@ -2754,6 +2886,8 @@ class SaveMapSnapshotStage(BaseStage):
 class VegetationCoverStage(BaseStage):
     """植被覆盖更新阶段"""
     
+    execution_policy = ExecutionPolicy.THREAD
+    
     def __init__(self):
         super().__init__(StageOrder.VEGETATION_COVER.value, "植被覆盖更新")
     
@@ -2792,6 +2926,8 @@ class VegetationCoverStage(BaseStage):
 class SavePopulationSnapshotStage(BaseStage):
     """保存种群快照阶段"""
     
+    execution_policy = ExecutionPolicy.THREAD
+    
     def __init__(self):
         super().__init__(StageOrder.SAVE_POPULATION_SNAPSHOT.value, "保存种群快照")
     
@@ -2824,8 +2960,9 @@ class EmbeddingStage(BaseStage):
     def get_dependency(self) -> StageDependency:
         return StageDependency(
             requires_stages=set(),  # 无强制依赖
-            optional_stages={"保存种群快照"},
+            optional_stages=set(),  # 只读取本回合物种，与快照/导出无先后关系
             requires_fields={"species_batch"},
+            reads_fields={"combined_results"},
             writes_fields={"embedding_turn_data"},
         )
     
@@ -2891,6 +3028,7 @@ class EmbeddingPluginsStage(BaseStage):
             requires_stages=set(),  # 无强制依赖
             optional_stages={"Embedding集成", "保存种群快照"},
             requires_fields=set(),
+            reads_fields={"tensor_state"},
             writes_fields=set(),  # 插件数据存储在各自的索引中
         )
     
@@ -3010,14 +3148,18 @@ class EmbeddingPluginsStage(BaseStage):
 class SaveHistoryStage(BaseStage):
     """保存历史记录阶段"""
     
+    execution_policy = ExecutionPolicy.THREAD
+    deferrable = True
+    
     def __init__(self):
         super().__init__(StageOrder.SAVE_HISTORY.value, "保存历史记录")
     
     def get_dependency(self) -> StageDependency:
         return StageDependency(
             requires_stages=set(),  # 无强制依赖
-            optional_stages={"保存种群快照", "Embedding集成"},
+            optional_stages={"Embedding集成"},
             requires_fields=set(),  # report 可能不存在
+            reads_fields={"report", "embedding_turn_data"},
             writes_fields=set(),
         )
     
@@ -3054,14 +3196,18 @@ class SaveHistoryStage(BaseStage):
 class ExportDataStage(BaseStage):
     """导出数据阶段"""
     
+    execution_policy = ExecutionPolicy.THREAD
+    deferrable = True
+    
     def __init__(self):
         super().__init__(StageOrder.EXPORT_DATA.value, "导出数据")
     
     def get_dependency(self) -> StageDependency:
         return StageDependency(
             requires_stages=set(),  # 无强制依赖
-            optional_stages={"保存历史记录"},
+            optional_stages=set(),  # 只写导出文件，不依赖历史记录
             requires_fields=set(),
+            reads_fields={"report", "species_batch"},
             writes_fields=set(),
         )
     
@@ -3085,7 +3231,11 @@ class FinalizeStage(BaseStage):
     def get_dependency(self) -> StageDependency:
         return StageDependency(
             requires_stages=set(),  # 无强制依赖
-            optional_stages={"导出数据", "保存历史记录"},
+            # 回合收尾：等待所有报告后的持久化阶段
+            optional_stages={
+                "保存地图快照", "植被覆盖更新", "保存种群快照", "Embedding集成",
+                "Embedding扩展插件", "保存历史记录", "导出数据",
+            },
             requires_fields=set(),
             writes_fields=set(),
         )
@@ -3121,6 +3271,8 @@ class DatabaseMaintenanceStage(BaseStage):
     - enable_vacuum: 是否执行 VACUUM（较慢但可回收空间）
     """
     
+    execution_policy = ExecutionPolicy.THREAD
+    
     # 默认配置
     DEFAULT_MAINTENANCE_INTERVAL = 10  # 每 10 回合执行一次
     DEFAULT_KEEP_HABITAT_TURNS = 5     # 保留最近 5 回合的栖息地数据
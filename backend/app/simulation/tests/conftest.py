@@ -7,7 +7,9 @@ Test Fixtures - 测试夹具
 import pytest
 import pytest_asyncio
 import random
+import re
 from dataclasses import dataclass, field
+from pathlib import Path
 from typing import Any
 from unittest.mock import MagicMock, AsyncMock
 
@@ -296,3 +298,28 @@ def mock_tiering_result(mock_species_list):
         background=mock_species_list[3:],
     )
 
+
+# ============================================================================
+# Stage Config
+# ============================================================================
+
+@pytest.fixture
+def stage_config_yaml(tmp_path):
+    """生成 stage_config.yaml 副本的工厂：顶层 mode 改为给定模式"""
+    source = Path(__file__).resolve().parents[1] / "stage_config.yaml"
+
+    def make(mode: str) -> Path:
+        text = re.sub(r"(?m)^mode: \w+", f"mode: {mode}", source.read_text(encoding="utf-8"), count=1)
+        path = tmp_path / f"stage_config_{mode}.yaml"
+        path.write_text(text, encoding="utf-8")
+        return path
+
+    return make
+
+
+@pytest.fixture
+def full_mode_stages(stage_config_yaml):
+    """full 模式的阶段列表（YAML 默认模式同样设为 full）"""
+    from ..stage_config import StageLoader
+
+    return StageLoader(yaml_path=stage_config_yaml("full")).load_stages_for_mode("full", validate=False)
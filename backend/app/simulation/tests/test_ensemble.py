@@ -0,0 +1,114 @@
+"""
+Ensemble Tests - 集成运行测试
+
+- 分位数、指标统计、最慢阶段汇总
+- CSV / JSON 输出
+- 工作进程隔离：每个种子独立的数据库与数据目录，--no-llm 传递到工作进程
+"""
+
+import csv
+import json
+from pathlib import Path
+
+import pytest
+
+from ..cli import SimulationResult, parse_seed_list
+from ..ensemble import EnsembleResult, percentile, worker_command, worker_env
+
+
+def _result(seed, species, turn_ms, stages, success=True):
+    return SimulationResult(
+        success=success,
+        mode="standard",
+        turns_completed=len(turn_ms),
+        total_duration_s=sum(turn_ms) / 1000,
+        random_seed=seed,
+        final_species_count=species,
+        extinct_species_count=seed,
+        turn_durations_ms=list(turn_ms),
+        stage_durations_ms=dict(stages),
+        errors=[] if success else ["回合 0 失败: boom"],
+    )
+
+
+@pytest.fixture
+def ensemble():
+    return EnsembleResult(
+        mode="standard",
+        turns=2,
+        results=[
+            _result(1, 10, [100.0, 300.0], {"死亡率": 200.0, "报告": 50.0}),
+            _result(2, 20, [200.0, 400.0], {"死亡率": 300.0, "报告": 150.0}),
+            _result(3, 99, [1000.0], {"报告": 1000.0}, success=False),
+        ],
+    )
+
+
+def test_percentile():
+    assert percentile([], 50) == 0.0
+    assert percentile([5.0], 99) == 5.0
+    assert percentile([1.0, 2.0, 3.0, 4.0], 50) == 2.5
+    assert percentile([4.0, 1.0, 3.0, 2.0], 100) == 4.0
+
+
+def test_metric_stats_use_successful_runs(ensemble):
+    stats = ensemble.metric_stats()["final_species_count"]
+    assert stats == {"mean": 15.0, "std": 5.0, "min": 10.0, "max": 20.0}
+    assert ensemble.failed_count == 1
+
+
+def test_turn_percentiles_and_slowest_stages(ensemble):
+    pct = ensemble.turn_duration_percentiles()
+    assert pct["count"] == 5
+    assert pct["p50"] == 300.0
+    assert pct["max"] == 1000.0
+
+    # 报告: (50 + 150 + 1000) / 5 回合；死亡率: 500 / 5 回合
+    assert ensemble.slowest_stages() == [("报告", 240.0), ("死亡率", 100.0)]
+
+
+def test_outputs(ensemble, tmp_path):
+    data = json.loads(ensemble.to_json())
+    assert data["seeds"] == [1, 2, 3]
+    assert data["failed"] == 1
+    assert data["slowest_stages"][0]["stage"] == "报告"
+    assert len(data["runs"]) == 3
+
+    path = tmp_path / "ensemble.csv"
+    ensemble.write_csv(path)
+    with open(path, encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    assert [row["random_seed"] for row in rows] == ["1", "2", "3"]
+    assert rows[2]["success"] == "False" and "boom" in rows[2]["errors"]
+
+    assert "集成运行结果" in ensemble.format_summary()
+
+
+def test_result_roundtrip():
+    original = _result(7, 12, [10.0], {"死亡率": 10.0})
+    data = original.to_dict()
+    data["unknown_field"] = 1
+    assert SimulationResult.from_dict(data) == original
+
+
+def test_worker_isolation(tmp_path):
+    env_a = worker_env(tmp_path / "seed_1")
+    env_b = worker_env(tmp_path / "seed_2", no_llm=True)
+
+    assert env_a["DATABASE_URL"] != env_b["DATABASE_URL"]
+    assert env_a["DATABASE_URL"].endswith("seed_1/egame.db")
+    assert Path(env_b["EXPORTS_DIR"]).parent == tmp_path / "seed_2"
+    assert env_b["ENABLE_TURN_REPORT_LLM"] == "false" and env_b["AI_API_KEY"] == ""
+
+    cmd = worker_command(42, "full", 5, tmp_path / "r.json", param_list=["a=1"], no_llm=True)
+    assert cmd[1:3] == ["-m", "app.simulation.cli"]
+    assert cmd[cmd.index("--seed") + 1] == "42"
+    assert cmd[cmd.index("--param") + 1] == "a=1"
+    assert "--no-llm" in cmd
+
+
+def test_parse_seed_list():
+    assert parse_seed_list("3, 5,8", 10, 0) == [3, 5, 8]
+    assert parse_seed_list(None, 3, 100) == [100, 101, 102]
+    assert parse_seed_list(None, 2, 0) == [1, 2]
+    assert parse_seed_list(None, 0, 42) == []
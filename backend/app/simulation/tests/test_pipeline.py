@@ -242,6 +242,26 @@ class TestStageLoader:
             except Exception as e:
                 pytest.fail(f"加载模式 {mode} 失败: {e}")
     
+    def test_yaml_mode_is_default(self, stage_config_yaml):
+        """未指定模式时使用 stage_config.yaml 的 mode 字段"""
+        loader = StageLoader(yaml_path=stage_config_yaml("minimal"))
+        default = [s.name for s in loader.load_stages_for_mode(validate=False)]
+        minimal = [s.name for s in loader.load_stages_for_mode("minimal", validate=False)]
+        standard = [s.name for s in StageLoader().load_stages_for_mode(validate=False)]
+        
+        assert default == minimal and len(minimal) < len(standard)
+    
+    def test_explicit_mode_overrides_yaml_default(self, stage_config_yaml):
+        """显式指定的模式优先于 stage_config.yaml 的 mode 字段（engine.set_mode 依赖此行为）"""
+        loader = StageLoader(yaml_path=stage_config_yaml("minimal"))
+        loaded = {
+            mode: {s.name for s in loader.load_stages_for_mode(mode, validate=False)}
+            for mode in ("minimal", "standard", "full")
+        }
+        
+        assert len(loaded["minimal"]) < len(loaded["standard"]) < len(loaded["full"])
+        assert "导出数据" in loaded["full"] and "导出数据" not in loaded["minimal"]
+    
     def test_get_dependency_graph(self):
         """测试获取依赖图"""
         loader = StageLoader()
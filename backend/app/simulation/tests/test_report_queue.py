@@ -0,0 +1,146 @@
+"""
+Report Queue Tests - 报告叠加执行测试
+
+- 报告阶段及其硬性下游被拆出，最终化等回合收尾阶段留在模拟流水线
+- 回合 N 的报告与回合 N+1 的模拟并发，报告按回合顺序逐个执行
+- 积压超过 max_backlog 时模拟等待最早的报告
+- 报告完成后推送 turn_report 事件
+"""
+
+import asyncio
+
+import pytest
+
+from ..context import SimulationContext
+from ..pipeline import Pipeline, PipelineConfig
+from ..report_queue import ReportQueue
+from ..scheduler import split_deferred_stages
+from ..stages import BaseStage, StageDependency
+
+
+class FakeReport:
+    def __init__(self, turn_index):
+        self.turn_index = turn_index
+
+    def model_dump(self, mode="python"):
+        return {"turn_index": self.turn_index}
+
+
+class ReportStage(BaseStage):
+    """模拟慢速 LLM 报告"""
+
+    deferrable = True
+
+    def __init__(self, log, delay=0.05):
+        super().__init__(order=140, name="报告", is_async=True)
+        self.log = log
+        self.delay = delay
+
+    def get_dependency(self) -> StageDependency:
+        return StageDependency(writes_fields={"report"})
+
+    async def execute(self, ctx, engine):
+        self.log.append(("report_start", ctx.turn_index))
+        await asyncio.sleep(self.delay)
+        ctx.report = FakeReport(ctx.turn_index)
+        self.log.append(("report_end", ctx.turn_index))
+
+
+class PlainStage(BaseStage):
+    def __init__(self, order, name, deferrable=False, **dependency):
+        super().__init__(order=order, name=name)
+        self.deferrable = deferrable
+        self.dependency = StageDependency(**dependency)
+
+    def get_dependency(self) -> StageDependency:
+        return self.dependency
+
+    async def execute(self, ctx, engine):
+        pass
+
+
+def _report_pipeline(log, delay=0.05):
+    return Pipeline([ReportStage(log, delay)], PipelineConfig(validate_dependencies=False))
+
+
+async def _simulate(log, turn, events, delay=0.03):
+    """模拟一个回合的模拟阶段"""
+    log.append(("sim_start", turn))
+    await asyncio.sleep(delay)
+    log.append(("sim_end", turn))
+    return SimulationContext(
+        turn_index=turn,
+        event_callback=lambda *args, **extra: events.append((args[0], extra)),
+    )
+
+
+class TestSplitDeferredStages:
+    def test_full_mode(self, full_mode_stages):
+        stages = full_mode_stages
+        foreground, deferred = split_deferred_stages(stages)
+
+        assert deferred, "full 模式应有推迟的报告阶段"
+        assert [s.name for s in deferred] == ["构建报告", "保存历史记录", "导出数据"]
+        names = [s.name for s in foreground]
+        assert "最终化" in names and "保存种群快照" in names and "Embedding集成" in names
+        assert len(foreground) + len(deferred) == len(stages)
+
+    def test_hard_downstream_follows(self):
+        stages = [
+            PlainStage(10, "模拟", writes_fields={"species_batch"}),
+            PlainStage(20, "报告", deferrable=True, writes_fields={"report"}),
+            PlainStage(30, "读报告", reads_fields={"report"}, writes_fields={"summary"}),
+            PlainStage(40, "读摘要", requires_fields={"summary"}),
+            PlainStage(50, "收尾", optional_stages={"报告", "读报告"}),
+        ]
+        foreground, deferred = split_deferred_stages(stages)
+        assert [s.name for s in deferred] == ["报告", "读报告", "读摘要"]
+        assert [s.name for s in foreground] == ["模拟", "收尾"]
+
+
+@pytest.mark.asyncio
+class TestReportQueue:
+    async def test_overlaps_next_turn(self):
+        log, events = [], []
+        pipeline = _report_pipeline(log)
+        queue = ReportQueue(engine=None, max_backlog=1)
+
+        for turn in range(3):
+            ctx = await _simulate(log, turn, events)
+            queue.submit(pipeline, ctx)
+            await queue.wait_for_capacity()
+        reports = await queue.drain()
+
+        assert [r.turn_index for r in reports] == [0, 1, 2]
+        index = {event: i for i, event in enumerate(log)}
+        # 回合 0 的报告在回合 1 模拟期间执行
+        assert index[("report_start", 0)] < index[("sim_end", 1)]
+        # 报告按回合顺序逐个执行
+        assert index[("report_end", 0)] < index[("report_start", 1)] < index[("report_end", 1)]
+        assert [extra["turn_index"] for kind, extra in events if kind == "turn_report"] == [0, 1, 2]
+
+    async def test_backlog_limit(self):
+        log, events = [], []
+        pipeline = _report_pipeline(log, delay=0.1)
+        queue = ReportQueue(engine=None, max_backlog=1)
+
+        for turn in range(3):
+            ctx = await _simulate(log, turn, events, delay=0.01)
+            queue.submit(pipeline, ctx)
+            await queue.wait_for_capacity()
+            assert queue.pending <= 1
+        await queue.drain()
+
+        index = {event: i for i, event in enumerate(log)}
+        # 模拟最多领先报告一个回合：回合 2 的模拟在回合 0 报告完成之后才开始
+        assert index[("report_end", 0)] < index[("sim_start", 2)]
+
+    async def test_failed_report_is_skipped(self):
+        class FailingReport(ReportStage):
+            async def execute(self, ctx, engine):
+                raise RuntimeError("LLM 不可用")
+
+        pipeline = Pipeline([FailingReport([])], PipelineConfig(validate_dependencies=False))
+        queue = ReportQueue(engine=None)
+        queue.submit(pipeline, SimulationContext(turn_index=0))
+        assert await queue.drain() == []
@@ -0,0 +1,167 @@
+"""
+Scheduler Tests - DAG 调度测试
+
+- 依赖图：声明阶段 / 字段读写冲突产生边，未声明阶段为串行屏障
+- DAG 模式并发执行无冲突阶段，结果按 order 排列，关键路径写入 PipelineMetrics
+- continue_on_error=False 时停止调度新阶段
+- 报告后的持久化阶段可以并发
+"""
+
+import asyncio
+
+import pytest
+
+from ..context import SimulationContext
+from ..pipeline import Pipeline, PipelineConfig
+from ..scheduler import StageGraph
+from ..stages import BaseStage, StageDependency
+
+
+class DeclaredStage(BaseStage):
+    """带依赖声明、可记录并发情况的测试阶段"""
+
+    def __init__(self, order, name, log, delay=0.0, fail=False, **dependency):
+        super().__init__(order=order, name=name, is_async=True)
+        self.log = log
+        self.delay = delay
+        self.fail = fail
+        self.dependency = StageDependency(**dependency) if dependency else None
+
+    def get_dependency(self) -> StageDependency:
+        return self.dependency or StageDependency()
+
+    async def execute(self, ctx, engine):
+        self.log.append(("start", self.name))
+        await asyncio.sleep(self.delay)
+        self.log.append(("end", self.name))
+        if self.fail:
+            raise RuntimeError("故意失败")
+
+
+def _overlapped(log, a, b):
+    """a 与 b 的执行区间是否重叠"""
+    index = {event: i for i, event in enumerate(log)}
+    return index[("start", a)] < index[("end", b)] and index[("start", b)] < index[("end", a)]
+
+
+def _ancestors(preds, name):
+    seen, stack = set(), list(preds[name])
+    while stack:
+        node = stack.pop()
+        if node not in seen:
+            seen.add(node)
+            stack.extend(preds[node])
+    return seen
+
+
+@pytest.fixture
+def ctx():
+    return SimulationContext(turn_index=0)
+
+
+class TestStageGraph:
+    def test_edges(self):
+        log = []
+        stages = [
+            DeclaredStage(10, "生产", log, writes_fields={"report"}),
+            DeclaredStage(20, "读取", log, reads_fields={"report"}),
+            DeclaredStage(30, "独立", log, writes_fields={"other"}),
+            DeclaredStage(40, "改写", log, writes_fields={"report"}),
+            DeclaredStage(50, "显式", log, optional_stages={"独立"}),
+        ]
+        graph = StageGraph.build(stages)
+
+        assert graph.predecessors["读取"] == {"生产"}
+        assert graph.predecessors["独立"] == set()
+        assert graph.predecessors["改写"] == {"生产", "读取"}   # 写后写 + 读后写
+        assert graph.predecessors["显式"] == {"独立"}
+        assert graph.levels() == [["生产", "独立"], ["读取", "显式"], ["改写"]]
+
+    def test_undeclared_is_barrier(self):
+        log = []
+        stages = [
+            DeclaredStage(10, "A", log, writes_fields={"a"}),
+            DeclaredStage(20, "屏障", log),
+            DeclaredStage(30, "B", log, writes_fields={"b"}),
+        ]
+        graph = StageGraph.build(stages)
+        assert graph.barriers == {"屏障"}
+        assert graph.predecessors["屏障"] == {"A"}
+        # 屏障之后的阶段经由屏障间接依赖其之前的所有阶段
+        assert "屏障" in graph.predecessors["B"]
+        assert _ancestors(graph.predecessors, "B") == {"A", "屏障"}
+
+    def test_critical_path(self):
+        log = []
+        stages = [
+            DeclaredStage(10, "A", log, writes_fields={"x"}),
+            DeclaredStage(20, "B", log, reads_fields={"x"}),
+            DeclaredStage(30, "C", log, writes_fields={"y"}),
+        ]
+        path, total = StageGraph.build(stages).critical_path({"A": 5.0, "B": 10.0, "C": 12.0})
+        assert path == ["A", "B"] and total == 15.0
+
+    def test_report_stages_run_concurrently(self, full_mode_stages):
+        stages = full_mode_stages
+        assert "导出数据" in {s.name for s in stages}   # 确实加载了 full 模式
+        graph = StageGraph.build(stages)
+        preds = graph.predecessors
+        independent = ["植被覆盖更新", "保存种群快照", "Embedding集成", "导出数据"]
+        for a in independent:
+            assert "构建报告" in _ancestors(preds, a)
+            for b in independent:
+                assert a not in preds[b], f"{b} 不应依赖 {a}"
+        assert set(independent) <= preds["最终化"]
+
+
+@pytest.mark.asyncio
+class TestDagPipeline:
+    async def test_parallel_execution(self, ctx):
+        log = []
+        stages = [
+            DeclaredStage(10, "源", log, writes_fields={"x"}),
+            DeclaredStage(20, "甲", log, delay=0.05, reads_fields={"x"}, writes_fields={"a"}),
+            DeclaredStage(30, "乙", log, delay=0.05, reads_fields={"x"}, writes_fields={"b"}),
+            DeclaredStage(40, "汇", log, reads_fields={"a", "b"}),
+        ]
+        pipeline = Pipeline(stages, PipelineConfig(validate_dependencies=False, scheduler="dag"))
+        result = await pipeline.execute(ctx, None)
+
+        assert result.success
+        assert _overlapped(log, "甲", "乙")
+        assert log[0] == ("start", "源") and log[-1] == ("end", "汇")
+        assert [r.stage_name for r in result.stage_results] == ["源", "甲", "乙", "汇"]
+
+        metrics = result.metrics
+        assert metrics.scheduler == "dag" and metrics.max_concurrency == 2
+        assert metrics.critical_path[0] == "源" and metrics.critical_path[-1] == "汇"
+        assert metrics.critical_path_ms <= sum(m.duration_ms for m in metrics.stage_metrics)
+        assert metrics.to_dict()["critical_path"] == metrics.critical_path
+
+    async def test_serial_default(self, ctx):
+        log = []
+        stages = [
+            DeclaredStage(10, "甲", log, delay=0.01, writes_fields={"a"}),
+            DeclaredStage(20, "乙", log, delay=0.01, writes_fields={"b"}),
+        ]
+        result = await Pipeline(stages, PipelineConfig(validate_dependencies=False)).execute(ctx, None)
+        assert not _overlapped(log, "甲", "乙")
+        assert result.metrics.scheduler == "serial" and result.metrics.critical_path == []
+
+    async def test_stop_on_error(self, ctx):
+        log = []
+        stages = [
+            DeclaredStage(10, "失败", log, fail=True, writes_fields={"a"}),
+            DeclaredStage(20, "并发", log, delay=0.02, writes_fields={"b"}),
+            DeclaredStage(30, "后续", log, reads_fields={"a"}),
+        ]
+        config = PipelineConfig(validate_dependencies=False, continue_on_error=False, scheduler="dag")
+        result = await Pipeline(stages, config).execute(ctx, None)
+
+        assert result.failed_stages == ["失败"]
+        # 已启动的并发阶段执行完毕，后续阶段不再启动
+        assert ("end", "并发") in log and ("start", "后续") not in log
+
+    async def test_unknown_mode(self):
+        with pytest.raises(ValueError):
+            Pipeline([], PipelineConfig(validate_dependencies=False, scheduler="parallel"))
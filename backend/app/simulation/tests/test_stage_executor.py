@@ -0,0 +1,185 @@
+"""
+Stage Executor Tests - 阶段执行策略测试
+
+- 默认配置下所有阶段（包括声明 compute 的张量阶段）在事件循环线程执行
+- compute_thread_stages 只把 compute 阶段放到 tensor-compute 线程，内核预热与其同线程
+- compute 阶段在 tensor-compute 线程执行，thread 阶段在 pipeline-stage 线程池执行
+- 计算线程上再次提交任务直接执行，不会自我等待
+- 阻塞事件循环的阶段记录到事件循环延迟，移出事件循环后延迟下降
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from ...tensor import compute_backend
+from ...tensor.compute_thread import COMPUTE_THREAD_NAME, get_compute_thread, reset_compute_thread
+from ..context import SimulationContext
+from ..pipeline import Pipeline, PipelineConfig
+from ..stage_executor import EventLoopLagMonitor, ExecutionPolicy, StageExecutor, stage_policy
+from ..stages import BaseStage, get_default_stages
+
+
+class ThreadRecordingStage(BaseStage):
+    """记录执行线程名，可选地阻塞一段时间"""
+
+    def __init__(self, order, name, policy, seen, block=0.0):
+        super().__init__(order=order, name=name, is_async=False)
+        self.execution_policy = policy
+        self.seen = seen
+        self.block = block
+
+    async def execute(self, ctx, engine):
+        self.seen[self.name] = threading.current_thread().name
+        if self.block:
+            time.sleep(self.block)
+
+
+@pytest.fixture(autouse=True)
+def _reset_compute_thread():
+    reset_compute_thread()
+    yield
+    reset_compute_thread()
+
+
+@pytest.fixture
+def ctx():
+    return SimulationContext(turn_index=0)
+
+
+def _stages(seen, block=0.0):
+    return [
+        ThreadRecordingStage(10, "内联", ExecutionPolicy.INLINE, seen),
+        ThreadRecordingStage(20, "线程池", ExecutionPolicy.THREAD, seen, block=block),
+        ThreadRecordingStage(30, "计算", ExecutionPolicy.COMPUTE, seen, block=block),
+    ]
+
+
+@pytest.mark.asyncio
+class TestStageExecutor:
+    async def test_inline_when_disabled(self, ctx):
+        seen = {}
+        result = await Pipeline(_stages(seen), PipelineConfig(validate_dependencies=False)).execute(ctx, None)
+
+        assert result.success
+        main = threading.current_thread().name
+        assert set(seen.values()) == {main}
+        assert {m.execution_policy for m in result.metrics.stage_metrics} == {"inline"}
+
+    async def test_compute_thread_only(self, ctx):
+        seen = {}
+        config = PipelineConfig(validate_dependencies=False, compute_thread_stages=True)
+        result = await Pipeline(_stages(seen), config).execute(ctx, None)
+
+        assert result.success
+        main = threading.current_thread().name
+        assert seen["内联"] == seen["线程池"] == main
+        assert seen["计算"].startswith(COMPUTE_THREAD_NAME)
+        policies = {m.stage_name: m.execution_policy for m in result.metrics.stage_metrics}
+        assert policies == {"内联": "inline", "线程池": "inline", "计算": "compute"}
+
+    async def test_compute_thread_warmup_same_thread(self, ctx, monkeypatch):
+        warmup_threads, kernel_threads = [], []
+        monkeypatch.setattr(
+            compute_backend, "_run_warmup", lambda requested: warmup_threads.append(threading.get_ident())
+        )
+
+        class KernelStage(BaseStage):
+            execution_policy = ExecutionPolicy.COMPUTE
+
+            async def execute(self, ctx, engine):
+                kernel_threads.append(threading.get_ident())
+
+        compute_backend.reset_kernel_warmup()
+        try:
+            compute_backend.start_kernel_warmup(on_compute_thread=True).join(timeout=10)
+        finally:
+            compute_backend.reset_kernel_warmup()
+        config = PipelineConfig(validate_dependencies=False, compute_thread_stages=True)
+        result = await Pipeline([KernelStage(10, "内核")], config).execute(ctx, None)
+
+        assert result.success
+        assert warmup_threads == kernel_threads
+        assert warmup_threads[0] != threading.get_ident()
+
+    async def test_policy_routing(self, ctx):
+        seen = {}
+        config = PipelineConfig(validate_dependencies=False, offload_stages=True)
+        result = await Pipeline(_stages(seen), config).execute(ctx, None)
+
+        assert result.success
+        assert seen["内联"] == threading.current_thread().name
+        assert seen["线程池"].startswith("pipeline-stage")
+        assert seen["计算"].startswith(COMPUTE_THREAD_NAME)
+        policies = {m.stage_name: m.execution_policy for m in result.metrics.stage_metrics}
+        assert policies == {"内联": "inline", "线程池": "thread", "计算": "compute"}
+
+    async def test_stage_error_propagates(self, ctx):
+        class FailingStage(BaseStage):
+            execution_policy = ExecutionPolicy.COMPUTE
+
+            async def execute(self, ctx, engine):
+                raise RuntimeError("计算失败")
+
+        config = PipelineConfig(validate_dependencies=False, offload_stages=True)
+        result = await Pipeline([FailingStage(10, "失败")], config).execute(ctx, None)
+        assert result.failed_stages == ["失败"]
+        assert "计算失败" in str(result.stage_results[0].error)
+
+    async def test_loop_lag(self, ctx):
+        seen = {}
+        stages = [ThreadRecordingStage(10, "阻塞", ExecutionPolicy.COMPUTE, seen, block=0.2)]
+
+        blocking = await Pipeline(
+            stages, PipelineConfig(validate_dependencies=False, loop_lag_interval=0.01)
+        ).execute(ctx, None)
+        offloaded = await Pipeline(
+            stages, PipelineConfig(validate_dependencies=False, offload_stages=True, loop_lag_interval=0.01)
+        ).execute(ctx, None)
+
+        assert blocking.metrics.stage_metrics[0].loop_lag_ms >= 150
+        assert offloaded.metrics.stage_metrics[0].loop_lag_ms < 100
+        assert blocking.metrics.max_loop_lag_ms >= blocking.metrics.stage_metrics[0].loop_lag_ms
+        assert blocking.metrics.to_dict()["max_loop_lag_ms"] > 0
+
+    async def test_lag_monitor_disabled(self):
+        monitor = EventLoopLagMonitor(interval=0)
+        monitor.start()
+        window = monitor.open()
+        time.sleep(0.02)
+        assert monitor.close(window) == 0.0
+        await monitor.stop()
+
+
+def test_default_config_keeps_compute_stages_inline():
+    # 默认配置不改变执行位置：声明 compute 的张量阶段仍在事件循环上执行
+    config = PipelineConfig()
+    executor = StageExecutor(offload=config.offload_stages, compute_thread=config.compute_thread_stages)
+    compute_stages = [s for s in get_default_stages() if stage_policy(s) is ExecutionPolicy.COMPUTE]
+    assert compute_stages
+    assert {executor.policy_for(s) for s in compute_stages} == {ExecutionPolicy.INLINE}
+
+
+class TestComputeThread:
+    def test_single_thread(self):
+        compute = get_compute_thread()
+        idents = {compute.call(threading.get_ident) for _ in range(5)}
+        assert len(idents) == 1
+        assert threading.get_ident() not in idents
+
+    def test_reentrant_submit(self):
+        compute = get_compute_thread()
+
+        def outer():
+            # 已在计算线程上：直接执行而不是排队等待自己
+            return compute.call(lambda: compute.is_current())
+
+        assert compute.call(outer) is True
+        assert not compute.is_current()
+
+    def test_async_run(self):
+        compute = get_compute_thread()
+        name = asyncio.run(compute.run(lambda: threading.current_thread().name))
+        assert name.startswith(COMPUTE_THREAD_NAME)
@@ -0,0 +1,128 @@
+"""
+Stage Profiler Tests - 阶段采样分析测试
+
+- CPU 繁忙的阶段获得样本，await 中的阶段不计样本
+- 移出事件循环（compute 线程）的阶段同样归属到该阶段
+- 每回合写出折叠栈与 Top-N 函数表；同一回合再次写出带 .report 后缀
+- 可选 tracemalloc 分配汇总
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from ...tensor.compute_thread import reset_compute_thread
+from ..context import SimulationContext
+from ..pipeline import Pipeline, PipelineConfig
+from ..stage_executor import ExecutionPolicy
+from ..stage_profiler import StageProfiler, StageSamples, TurnProfile
+from ..stages import BaseStage
+
+
+def busy_loop(seconds):
+    deadline = time.perf_counter() + seconds
+    total = 0
+    while time.perf_counter() < deadline:
+        total += sum(range(200))
+    return total
+
+
+class BusyStage(BaseStage):
+    def __init__(self, order, name, seconds=0.15, policy=ExecutionPolicy.INLINE):
+        super().__init__(order=order, name=name, is_async=False)
+        self.seconds = seconds
+        self.execution_policy = policy
+
+    async def execute(self, ctx, engine):
+        busy_loop(self.seconds)
+
+
+class AllocatingStage(BaseStage):
+    async def execute(self, ctx, engine):
+        self.blob = [bytes(1024) for _ in range(2000)]
+
+
+class WaitingStage(BaseStage):
+    async def execute(self, ctx, engine):
+        await asyncio.sleep(0.1)
+
+
+@pytest.fixture(autouse=True)
+def _reset_compute_thread():
+    reset_compute_thread()
+    yield
+    reset_compute_thread()
+
+
+async def _run(profiler, stages, turn=0, **config):
+    pipeline = Pipeline(stages, PipelineConfig(validate_dependencies=False, **config))
+    profiler.attach(pipeline)
+    ctx = SimulationContext(turn_index=turn)
+    result = await pipeline.execute(ctx, None)
+    pipeline.shutdown()
+    return result
+
+
+@pytest.mark.asyncio
+class TestStageProfiler:
+    async def test_samples_attributed_to_busy_stage(self, tmp_path):
+        profiler = StageProfiler(tmp_path, interval=0.002)
+        try:
+            await _run(profiler, [BusyStage(10, "繁忙"), WaitingStage(20, "等待")], turn=3)
+            profile = profiler.flush(3)
+        finally:
+            profiler.close()
+
+        busy = profile.stages["繁忙"]
+        assert busy.samples >= 5
+        assert 50 <= busy.sampled_ms <= busy.wall_ms + 50
+        assert profile.stages["等待"].samples <= 2
+        assert profile.stages["等待"].wall_ms >= 90
+        assert any("busy_loop" in stack for stack in busy.stacks)
+
+        folded = (tmp_path / "turn_00003.folded").read_text(encoding="utf-8").splitlines()
+        assert all(line.rsplit(" ", 1)[1].isdigit() for line in folded)
+        assert any(line.startswith("繁忙;") and "busy_loop" in line for line in folded)
+
+        table = (tmp_path / "turn_00003_top.txt").read_text(encoding="utf-8")
+        assert "繁忙" in table and "busy_loop" in table
+
+    async def test_offloaded_stage(self, tmp_path):
+        profiler = StageProfiler(tmp_path, interval=0.002)
+        try:
+            await _run(
+                profiler,
+                [BusyStage(10, "计算", policy=ExecutionPolicy.COMPUTE)],
+                offload_stages=True,
+            )
+            profile = profiler.flush(0)
+        finally:
+            profiler.close()
+        assert profile.stages["计算"].samples >= 5
+
+    async def test_report_part_and_memory(self, tmp_path):
+        profiler = StageProfiler(tmp_path, interval=0.002, trace_memory=True)
+        try:
+            await _run(profiler, [BusyStage(10, "模拟", seconds=0.02)], turn=1)
+            profiler.flush(1)
+            await _run(profiler, [AllocatingStage(140, "报告")], turn=1)
+            profile = profiler.flush(1)
+        finally:
+            profiler.close()
+
+        assert (tmp_path / "turn_00001.folded").exists()
+        assert (tmp_path / "turn_00001.report_top.txt").exists()
+        allocations = profile.stages["报告"].top_allocations
+        assert allocations and allocations[0][1] > 1000
+        assert profiler.flush(1) is None
+
+
+def test_top_functions():
+    data = StageSamples(samples=4)
+    data.self_counts.update({"leaf": 3, "outer": 1})
+    data.total_counts.update({"outer": 4, "leaf": 3})
+    profile = TurnProfile(turn_index=0, interval=0.005, stages={"阶段": data})
+
+    assert profile.top_functions(1) == [("leaf", 3, 3)]
+    assert profile.top_functions() == [("leaf", 3, 3), ("outer", 1, 4)]
@@ -14,12 +14,14 @@ pytestmark = pytest.mark.asyncio
 from ..tensor_stages import (
     PressureTensorStage,
     TensorEcologyStage,
+    TensorStateInitStage,
     TensorStateSyncStage,
     TensorMetricsStage,
     get_tensor_stages,
     get_minimal_tensor_stages,
 )
 from ..context import SimulationContext
+from ...repositories.environment_repository import tile_change_log
 from ...tensor import TensorState, TensorMetrics, TensorConfig, TensorBalanceConfig
 
 
@@ -160,6 +162,127 @@ class TestTensorMetricsStage:
         assert mock_context.tensor_metrics is not None
 
 
+def _make_tiles(H: int, W: int) -> list:
+    from types import SimpleNamespace
+    return [
+        SimpleNamespace(
+            id=r * W + c + 1, x=c, y=r, temperature=20.0, humidity=0.5,
+            elevation=100.0, resources=100.0 + c, biome="ocean" if c == 0 else "grassland",
+        )
+        for r in range(H) for c in range(W)
+    ]
+
+
+def _make_species(code: str, population: int, tile_ids: list[int]) -> MagicMock:
+    from types import SimpleNamespace
+    sp = MagicMock()
+    sp.lineage_code = code
+    sp.morphology_stats = {"population": population}
+    sp.habitats = [SimpleNamespace(tile_id=t) for t in tile_ids]
+    sp.habitat_type = "terrestrial"
+    return sp
+
+
+class TestTensorStateInitStage:
+    """TensorStateInitStage 跨回合增量更新测试"""
+    
+    @pytest.fixture
+    def init_ctx(self):
+        ctx = SimulationContext()
+        ctx.turn_index = 1
+        ctx.current_map_state = None
+        ctx.all_tiles = _make_tiles(4, 6)
+        ctx.species_batch = [
+            _make_species("A1", 1200, [2, 3, 8]),
+            _make_species("B1", 600, [10]),
+        ]
+        return ctx
+    
+    @pytest.fixture
+    def init_engine(self):
+        engine = MagicMock()
+        engine.tensor_state = None
+        return engine
+    
+    async def test_full_build(self, init_ctx, init_engine):
+        """首回合全量构建并保存到引擎"""
+        await TensorStateInitStage().execute(init_ctx, init_engine)
+        
+        state = init_ctx.tensor_state
+        assert init_engine.tensor_state is state
+        assert state.pop.shape == (2, 4, 6)
+        assert state.pop[state.species_map["A1"]].sum() == pytest.approx(1200)
+        assert state.pop[state.species_map["A1"], 0, 1] == pytest.approx(400)
+        assert state.masks["tile_ids"][1, 3] == 10
+        assert state.env[5, 0, 0] == 1.0
+    
+    async def test_incremental_update(self, init_ctx, init_engine):
+        """下一回合复用状态：保留分布、增删物种、只修补变化地块"""
+        stage = TensorStateInitStage()
+        await stage.execute(init_ctx, init_engine)
+        state = init_ctx.tensor_state
+        # 模拟生态计算后的空间分布
+        a_idx = state.species_map["A1"]
+        state.pop[a_idx] = 0
+        state.pop[a_idx, 2, 2] = 1200
+        env_ref = state.env
+        
+        ctx2 = SimulationContext()
+        ctx2.turn_index = 2
+        ctx2.current_map_state = None
+        ctx2.all_tiles = _make_tiles(4, 6)
+        ctx2.all_tiles[5].temperature = 35.0
+        tile_change_log.record([ctx2.all_tiles[5]])
+        species_a = init_ctx.species_batch[0]
+        species_a.morphology_stats["population"] = 600
+        ctx2.species_batch = [species_a, _make_species("C1", 300, [1])]
+        
+        await stage.execute(ctx2, init_engine)
+        
+        new_state = ctx2.tensor_state
+        assert new_state is state
+        assert new_state.env is env_ref
+        assert set(new_state.species_map) == {"A1", "C1"}
+        a_row = new_state.population_slice("A1")
+        assert a_row[2, 2] == pytest.approx(600)
+        assert a_row.sum() == pytest.approx(600)
+        assert new_state.population_slice("C1")[0, 0] == pytest.approx(300)
+        assert new_state.masks["env_dirty"].sum() == 1
+        assert new_state.env[0].ravel()[5] == pytest.approx(35.0 / 50.0)
+        assert new_state.species_params.shape[0] == 2
+    
+    async def test_rebuild_when_tile_changes_unknown(self, init_ctx, init_engine):
+        """写入日志未知（清表、读档）或地块不在原位置时全量重建"""
+        stage = TensorStateInitStage()
+        await stage.execute(init_ctx, init_engine)
+        first = init_ctx.tensor_state
+        
+        tile_change_log.invalidate()
+        init_ctx.turn_index = 2
+        await stage.execute(init_ctx, init_engine)
+        second = init_ctx.tensor_state
+        assert second is not first
+        
+        moved = init_ctx.all_tiles[3]
+        moved.id = 99
+        tile_change_log.record([moved])
+        init_ctx.turn_index = 3
+        await stage.execute(init_ctx, init_engine)
+        assert init_ctx.tensor_state is not second
+        assert init_ctx.tensor_state.masks["tile_ids"].ravel()[3] == 99
+    
+    async def test_rebuild_when_turn_not_contiguous(self, init_ctx, init_engine):
+        """回合不连续（读档）时全量重建"""
+        stage = TensorStateInitStage()
+        await stage.execute(init_ctx, init_engine)
+        first = init_ctx.tensor_state
+        
+        init_ctx.turn_index = 10
+        await stage.execute(init_ctx, init_engine)
+        
+        assert init_ctx.tensor_state is not first
+
+
 class TestTensorStateSyncStage:
     """TensorStateSyncStage 测试"""
     
@@ -178,6 +301,50 @@ class TestTensorStateSyncStage:
         # 应该更新 new_populations
         assert "SP001" in mock_context.new_populations
         assert mock_context.new_populations["SP001"] >= 0
+    
+    def test_build_habitat_records(self):
+        """列式生成栖息地记录（截断取整、跳过无地块格子）"""
+        pop = np.zeros((3, 2, 3), dtype=np.float32)
+        pop[0, 0, 0] = 10.7
+        pop[0, 1, 2] = 0.5   # 取整为 0，跳过
+        pop[2, 1, 1] = 40.0
+        pop[2, 0, 1] = 5.0   # 该格子无地块
+        tile_ids = np.array([[100, -1, 102], [103, 104, 105]])
+        
+        records = TensorStateSyncStage._build_habitat_records(
+            pop, [0, 2], [11, 33], tile_ids, turn_index=7
+        )
+        
+        by_key = {(r["species_id"], r["tile_id"]): r for r in records}
+        assert set(by_key) == {(11, 100), (33, 104)}
+        assert by_key[(11, 100)]["population"] == 10
+        assert by_key[(33, 104)]["turn_index"] == 7
+        assert by_key[(33, 104)]["suitability"] == pytest.approx(min(1.0, 40 / (45 / 10 + 1)))
+    
+    async def test_execute_bulk_writes(self, mock_context, mock_engine):
+        """栖息地批量写入 + 物种单事务 upsert"""
+        species = []
+        for i, code in enumerate(["SP001", "SP002", "SP003"]):
+            sp = MagicMock()
+            sp.id = i + 1
+            sp.lineage_code = code
+            sp.status = "alive"
+            sp.morphology_stats = {"population": 1}
+            species.append(sp)
+        mock_context.species_batch = species
+        mock_context.tensor_state.pop[1] = 0  # SP002 灭绝
+        mock_context.tensor_state.masks["tile_ids"] = np.arange(10).reshape(1, 10)
+        
+        with patch("app.repositories.environment_repository.environment_repository") as env_repo, \
+                patch("app.repositories.species_repository.species_repository") as sp_repo:
+            sp_repo.upsert_many.return_value = 3
+            await TensorStateSyncStage().execute(mock_context, mock_engine)
+        
+        records = env_repo.write_habitats_bulk.call_args[0][0]
+        assert {r["species_id"] for r in records} == {1, 3}
+        sp_repo.upsert_many.assert_called_once()
+        sp_repo.upsert.assert_not_called()
+        assert species[1].status == "extinct"
 
 
 class TestGetTensorStages:
@@ -5,11 +5,17 @@ Tensor utilities and state containers.
 - TensorState: 统一的张量状态容器
 - SpeciationMonitor: 张量分化信号检测器
 - SpeciationTrigger: 分化触发信号数据结构
+- label_regions: 批量六边形连通区域标记（地理隔离检测共用）
+- PhylogenyIndex: 共享谱系索引（欧拉序 LCA，亲缘矩阵向量化）
+- TensorSnapshotPublisher/Reader: 回合末发布版本化只读张量快照（API 零拷贝读取）
 - TradeoffCalculator: 自动代价计算器
 - TensorConfig: 张量系统配置
 - TensorMetrics: 性能监控指标
 - TensorMetricsCollector: 指标收集器
+- KernelProfiler: 逐内核调用次数/耗时/传输量计量（/metrics 导出）
 - HybridCompute: NumPy + Taichi 混合计算引擎
+- compute_backend: 计算后端选择（Taichi GPU / Taichi CPU / NumPy），延迟初始化 + 后台预热
+- ComputeThread: 常驻计算线程（Taichi 工作固定在同一线程，移出事件循环）
 - PressureToTensorBridge: 压力→张量桥接器
 - MultiFactorMortality: 多因子死亡率计算器
 - TensorMigrationEngine: GPU 加速的张量迁徙引擎
@@ -37,10 +43,28 @@ from .metrics import (
     get_global_collector,
     reset_global_collector,
 )
+from .kernel_metrics import (
+    KernelProfiler,
+    KernelStats,
+    KernelTurnProfile,
+    get_kernel_profiler,
+    reset_kernel_profiler,
+)
 from .speciation_monitor import SpeciationMonitor, SpeciationTrigger
 from .state import TensorState
 from .tradeoff import TradeoffCalculator
 
+# 计算后端选择（Taichi GPU / Taichi CPU / NumPy）
+from .compute_backend import (
+    COMPUTE_BACKENDS,
+    get_default_compute_backend,
+    get_kernel_status,
+    resolve_compute_backend,
+    set_default_compute_backend,
+    start_kernel_warmup,
+)
+from .compute_thread import ComputeThread, get_compute_thread, reset_compute_thread
+
 # 混合计算引擎（NumPy + Taichi）
 from .hybrid import HybridCompute, get_compute, reset_compute
 
@@ -89,6 +113,38 @@ from .ecology import (
     extract_trophic_levels,
 )
 
+# 稀疏种群布局（低占用率时只在占用格子上计算）
+from .sparse_pop import (
+    SparseDomain,
+    SparsePopulation,
+    select_layout,
+)
+
+# 批量连通区域标记（SpeciationMonitor 与分化候选生成共用）
+from .regions import (
+    RegionLabels,
+    SpeciesRegions,
+    label_regions,
+    tile_clusters,
+)
+
+# 共享谱系索引（亲缘/遗传距离/杂交/生态位共用）
+from .phylogeny import (
+    PhylogenyIndex,
+    get_phylogeny_index,
+    reset_phylogeny_index,
+)
+
+# 版本化张量快照（地图/热力图 API 与其他工作进程零拷贝读取）
+from .snapshot import (
+    TensorSnapshot,
+    TensorSnapshotPublisher,
+    TensorSnapshotReader,
+    get_snapshot_publisher,
+    get_snapshot_reader,
+    reset_snapshot_store,
+)
+
 # 张量化竞争计算（Taichi GPU加速）
 from .competition import (
     TensorCompetitionCalculator,
@@ -106,6 +162,7 @@ from .suitability import (
     reset_tensor_suitability_calculator,
     compute_enhanced_suitability,
 )
+from .suitability_cache import IncrementalSuitability, SuitabilityCacheStats
 
 __all__ = [
     # 核心数据结构
@@ -123,6 +180,21 @@ __all__ = [
     "TensorMetricsCollector",
     "get_global_collector",
     "reset_global_collector",
+    "KernelProfiler",
+    "KernelStats",
+    "KernelTurnProfile",
+    "get_kernel_profiler",
+    "reset_kernel_profiler",
+    # 计算后端选择
+    "COMPUTE_BACKENDS",
+    "get_default_compute_backend",
+    "get_kernel_status",
+    "resolve_compute_backend",
+    "set_default_compute_backend",
+    "start_kernel_warmup",
+    "ComputeThread",
+    "get_compute_thread",
+    "reset_compute_thread",
     # 混合计算引擎（推荐使用）
     "HybridCompute",
     "get_compute",
@@ -160,6 +232,26 @@ __all__ = [
     "extract_species_prefs",
     "extract_species_traits",
     "extract_trophic_levels",
+    # 稀疏种群布局
+    "SparseDomain",
+    "SparsePopulation",
+    "select_layout",
+    # 连通区域标记
+    "RegionLabels",
+    "SpeciesRegions",
+    "label_regions",
+    "tile_clusters",
+    # 谱系索引
+    "PhylogenyIndex",
+    "get_phylogeny_index",
+    "reset_phylogeny_index",
+    # 张量快照
+    "TensorSnapshot",
+    "TensorSnapshotPublisher",
+    "TensorSnapshotReader",
+    "get_snapshot_publisher",
+    "get_snapshot_reader",
+    "reset_snapshot_store",
     # 张量化竞争计算
     "TensorCompetitionCalculator",
     "TensorCompetitionResult",
@@ -172,4 +264,6 @@ __all__ = [
     "get_tensor_suitability_calculator",
     "reset_tensor_suitability_calculator",
     "compute_enhanced_suitability",
+    "IncrementalSuitability",
+    "SuitabilityCacheStats",
 ]
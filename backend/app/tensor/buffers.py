@@ -0,0 +1,221 @@
+"""
+张量缓冲区复用 - 跨回合复用生态计算的中间数组
+
+TensorEcologyEngine 每回合都要为宜居度、死亡率、扩散、迁徙、繁殖、竞争
+分配若干 (S, H, W) float32 数组。物种数每回合都会因分化/灭绝小幅变化，
+按精确形状缓存会频繁失效，因此 BufferArena 按名称保存一段一维后备存储，
+返回其前缀的 C 连续视图：
+- 所需元素数不超过容量时直接复用（物种减少、地图缩小均不重新分配）
+- 超过容量时按 1.25 倍余量扩容
+
+缓冲区内容在下一次同名请求时被覆盖，调用方不得把它们作为结果返回给外部。
+同一个 arena 不支持多线程并发使用（每个引擎实例一个）。
+
+DeviceArena 是设备端的对应物：Taichi 后端下按名称保存 ti.ndarray，
+数组在一个回合的各阶段之间常驻设备，只在 upload/download 时与主机交换；
+NumPy 后端下"设备数组"就是主机数组，upload 零拷贝。
+
+available_memory_bytes 提供当前可用物理内存，供生态引擎按内存预算选择物种分块大小。
+"""
+
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass
+from types import ModuleType
+from typing import Any
+
+import numpy as np
+
+# 扩容余量：避免物种数逐回合增长时每次都重新分配
+GROWTH_FACTOR = 1.25
+
+
+@dataclass
+class ArenaStats:
+    """缓冲区统计（累计值，相减得到单次调用的增量）"""
+    allocations: int = 0        # 新分配/扩容次数
+    reuses: int = 0             # 复用已有后备存储次数
+    input_copies: int = 0       # as_float32 因类型/布局不符产生的拷贝次数
+    allocated_bytes: int = 0    # 新分配的字节数
+    copied_bytes: int = 0       # 输入拷贝的字节数
+
+    def since(self, earlier: "ArenaStats") -> "ArenaStats":
+        return ArenaStats(
+            allocations=self.allocations - earlier.allocations,
+            reuses=self.reuses - earlier.reuses,
+            input_copies=self.input_copies - earlier.input_copies,
+            allocated_bytes=self.allocated_bytes - earlier.allocated_bytes,
+            copied_bytes=self.copied_bytes - earlier.copied_bytes,
+        )
+
+
+class BufferArena:
+    """按名称复用的预分配缓冲区"""
+
+    def __init__(self) -> None:
+        self._buffers: dict[str, np.ndarray] = {}
+        self._stats = ArenaStats()
+
+    @property
+    def stats(self) -> ArenaStats:
+        """当前累计统计（副本）"""
+        s = self._stats
+        return ArenaStats(s.allocations, s.reuses, s.input_copies, s.allocated_bytes, s.copied_bytes)
+
+    @property
+    def nbytes(self) -> int:
+        """后备存储总字节数"""
+        return sum(buf.nbytes for buf in self._buffers.values())
+
+    def empty(self, name: str, shape: tuple[int, ...], dtype=np.float32) -> np.ndarray:
+        """取名为 name 的缓冲区（内容未初始化）"""
+        dtype = np.dtype(dtype)
+        size = int(np.prod(shape))
+        backing = self._buffers.get(name)
+        if backing is not None and backing.dtype == dtype and backing.size >= size:
+            self._stats.reuses += 1
+        else:
+            capacity = size
+            if backing is not None and backing.dtype == dtype:
+                # 余量按本次所需大小计算，刚好涨到上次余量边界时下一次增长仍可复用
+                capacity = max(size, int(size * GROWTH_FACTOR))
+            backing = np.empty(capacity, dtype=dtype)
+            self._buffers[name] = backing
+            self._stats.allocations += 1
+            self._stats.allocated_bytes += backing.nbytes
+        return backing[:size].reshape(shape)
+
+    def zeros(self, name: str, shape: tuple[int, ...], dtype=np.float32) -> np.ndarray:
+        """取名为 name 的缓冲区并清零"""
+        buf = self.empty(name, shape, dtype)
+        buf.fill(0)
+        return buf
+
+    def as_float32(self, array) -> np.ndarray:
+        """转为 C 连续 float32；已满足时零拷贝直接返回"""
+        if isinstance(array, np.ndarray) and array.dtype == np.float32 and array.flags.c_contiguous:
+            return array
+        result = np.ascontiguousarray(array, dtype=np.float32)
+        self._stats.input_copies += 1
+        self._stats.copied_bytes += result.nbytes
+        return result
+
+    def clear(self) -> None:
+        """释放全部缓冲区（统计保留）"""
+        self._buffers.clear()
+
+
+@dataclass
+class TransferStats:
+    """主机 ↔ 设备传输统计（累计值）"""
+    allocations: int = 0        # 设备数组新分配次数
+    reuses: int = 0             # 设备数组复用次数
+    uploads: int = 0            # 主机 → 设备拷贝次数
+    downloads: int = 0          # 设备 → 主机拷贝次数
+    upload_bytes: int = 0
+    download_bytes: int = 0
+
+    def since(self, earlier: "TransferStats") -> "TransferStats":
+        return TransferStats(
+            allocations=self.allocations - earlier.allocations,
+            reuses=self.reuses - earlier.reuses,
+            uploads=self.uploads - earlier.uploads,
+            downloads=self.downloads - earlier.downloads,
+            upload_bytes=self.upload_bytes - earlier.upload_bytes,
+            download_bytes=self.download_bytes - earlier.download_bytes,
+        )
+
+
+class DeviceArena:
+    """按名称复用的设备端数组
+
+    Taichi 后端返回 ti.ndarray（形状变化时重新分配，ti.ndarray 不支持前缀视图），
+    NumPy 后端委托给 BufferArena。两种数组都可直接作为内核参数。
+    """
+
+    def __init__(self, kernels: ModuleType) -> None:
+        self._ti = getattr(kernels, "ti", None)
+        self._host = BufferArena() if self._ti is None else None
+        self._arrays: dict[str, Any] = {}
+        self._stats = TransferStats()
+
+    @property
+    def on_device(self) -> bool:
+        """数组是否位于独立于 NumPy 的设备内存（Taichi 后端）"""
+        return self._ti is not None
+
+    @property
+    def stats(self) -> TransferStats:
+        s = self._stats
+        return TransferStats(
+            s.allocations, s.reuses, s.uploads, s.downloads, s.upload_bytes, s.download_bytes
+        )
+
+    def empty(self, name: str, shape: tuple[int, ...]) -> Any:
+        """取名为 name 的 float32 设备数组（内容未初始化）"""
+        shape = tuple(int(d) for d in shape)
+        if self._host is not None:
+            return self._host.empty(name, shape)
+        array = self._arrays.get(name)
+        if array is not None and tuple(array.shape) == shape:
+            self._stats.reuses += 1
+            return array
+        array = self._ti.ndarray(dtype=self._ti.f32, shape=shape)
+        self._arrays[name] = array
+        self._stats.allocations += 1
+        return array
+
+    def full(self, name: str, shape: tuple[int, ...], value: float) -> Any:
+        """取名为 name 的设备数组并填充 value"""
+        array = self.empty(name, shape)
+        array.fill(value)
+        return array
+
+    def zeros(self, name: str, shape: tuple[int, ...]) -> Any:
+        return self.full(name, shape, 0.0)
+
+    def upload(self, name: str, array: np.ndarray) -> Any:
+        """主机数组 → 名为 name 的设备数组（NumPy 后端零拷贝透传 float32 C 连续输入）"""
+        if self._host is not None:
+            return self._host.as_float32(array)
+        array = np.ascontiguousarray(array, dtype=np.float32)
+        device = self.empty(name, array.shape)
+        device.from_numpy(array)
+        self._stats.uploads += 1
+        self._stats.upload_bytes += array.nbytes
+        return device
+
+    def download(self, array: Any) -> np.ndarray:
+        """设备数组 → 新的主机数组（调用方可长期持有）"""
+        if isinstance(array, np.ndarray):
+            return array.copy()
+        result = array.to_numpy()
+        self._stats.downloads += 1
+        self._stats.download_bytes += result.nbytes
+        return result
+
+    def clear(self) -> None:
+        """释放全部设备数组（统计保留）"""
+        self._arrays.clear()
+        if self._host is not None:
+            self._host.clear()
+
+
+def available_memory_bytes() -> int | None:
+    """当前可用物理内存（字节），无法测得时返回 None
+
+    优先读取 /proc/meminfo 的 MemAvailable（含可回收的页缓存），
+    其他平台退回 sysconf 的空闲物理页数。
+    """
+    try:
+        with open("/proc/meminfo", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        return int(os.sysconf("SC_AVPHYS_PAGES")) * int(os.sysconf("SC_PAGE_SIZE"))
+    except (AttributeError, OSError, ValueError):
+        return None
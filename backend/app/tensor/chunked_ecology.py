@@ -0,0 +1,524 @@
+"""
+分块生态内核 - 按物种块流式计算稠密布局，峰值内存不随物种数成倍增长
+
+稠密内核一次处理全部 (S, H, W)，每个内核内部还会产生数十个同形状的临时数组，
+物种多、地图大时工作集超出可用内存。分块模式把物种切成 [a, b) 块逐块计算，
+只有少数 (S, H, W) 结果数组常驻，块内临时数组为 (b - a, H, W)：
+- 物种独立的阶段（宜居度、死亡、多轮扩散、迁徙执行、繁殖）逐块完成
+- 跨物种项由调用方先汇总：地块总种群 pop.sum(0)、全局拥挤度
+- 猎物密度按目标物种分块：prey_matrix[a:b] @ pop
+- 竞争压力按目标物种分块，竞争者逐个累加（与 kernel_apply_trait_competition 相同的循环）
+- 坐标伪随机扰动按全局物种下标生成，与整体计算逐元素一致
+
+与 numpy_kernels 共用逐元素公式（_trait_mortality / _trait_diffusion /
+_migration_decision_v2 / _reproduction_v2 / ...），结果与稠密 NumPy 内核一致。
+
+回合被拆成四个阶段函数（phase_survival / phase_migration / phase_reproduction /
+phase_competition），阶段之间由调用方汇总跨物种量。阶段函数只通过 arrays 读写数组，
+可由 BlockRunner 在进程内逐块执行，也可由 sharded_ecology 分发到进程池。
+调用方见 TensorEcologyEngine._process_ecology_chunked。
+"""
+
+from __future__ import annotations
+
+import time
+
+import numpy as np
+
+from . import numpy_kernels as nk
+from .buffers import BufferArena
+
+# 块内同时存活的 (H, W) float32 临时平面数/物种（扩散、迁徙评分内核的经验上界）
+WORKING_PLANES_PER_SPECIES = 48
+# 分块路径常驻的 (S, H, W) float32 数组数：输入、宜居度、死亡率、两个中间种群、局部适应度、结果
+RESIDENT_PLANES_PER_SPECIES = 7
+
+
+def dense_working_set(S: int, H: int, W: int) -> int:
+    """整体计算（不分块）的工作集字节数估计"""
+    return S * H * W * 4 * (WORKING_PLANES_PER_SPECIES + RESIDENT_PLANES_PER_SPECIES)
+
+
+def chunked_working_set(S: int, H: int, W: int, chunk: int) -> int:
+    """块大小为 chunk 时的工作集字节数估计"""
+    plane = H * W * 4
+    return S * plane * RESIDENT_PLANES_PER_SPECIES + min(chunk, S) * plane * WORKING_PLANES_PER_SPECIES
+
+
+def choose_chunk_size(S: int, H: int, W: int, budget_bytes: int, min_chunk: int = 1) -> int:
+    """内存预算内可容纳的最大物种块（预算连常驻数组都不够时退化为 min_chunk）"""
+    plane = H * W * 4
+    free = budget_bytes - S * plane * RESIDENT_PLANES_PER_SPECIES
+    chunk = free // (plane * WORKING_PLANES_PER_SPECIES) if free > 0 else 0
+    return int(min(max(chunk, min_chunk, 1), max(S, 1)))
+
+
+def species_chunks(S: int, chunk: int) -> list[slice]:
+    """物种块 [a, b)，最后一块可能不足 chunk"""
+    chunk = max(1, chunk)
+    return [slice(a, min(a + chunk, S)) for a in range(0, S, chunk)]
+
+
+def _noise(sl: slice, H: int, W: int, a: int, b: int, c: int, offset: int = 0) -> np.ndarray:
+    """物种块的坐标扰动（按全局物种下标，与 nk._coord_noise 的对应行一致）"""
+    ss = np.arange(sl.start, sl.stop, dtype=np.int64)[:, None, None]
+    ii = np.arange(H, dtype=np.int64)[None, :, None]
+    jj = np.arange(W, dtype=np.int64)[None, None, :]
+    return nk._coord_noise_at(ss, ii, jj, a, b, c, offset)
+
+
+# ============================================================================
+# 宜居度 / 死亡率 / 扩散（物种独立）
+# ============================================================================
+
+def trait_suitability(env7: np.ndarray, species_traits: np.ndarray, out: np.ndarray, sl: slice) -> None:
+    """把物种块的特质宜居度写入 out[sl]"""
+    nk.kernel_compute_trait_suitability(env7, species_traits[sl], out[sl])
+
+
+def trait_mortality(
+    pop: np.ndarray,
+    total_pop: np.ndarray,
+    suitability: np.ndarray,
+    env7: np.ndarray,
+    species_traits: np.ndarray,
+    pressure_overlay: np.ndarray,
+    mortality_scale: np.ndarray,
+    base_mortality: float,
+    era_scaling: float,
+) -> np.ndarray:
+    """物种块死亡率（对应 kernel_trait_mortality_v2，total_pop 为全部物种的地块总和）"""
+    external = nk._external_mortality(pressure_overlay)
+    return nk._trait_mortality(
+        species_traits[:, :, None, None],
+        mortality_scale[:, None, None],
+        pop,
+        total_pop[None],
+        suitability,
+        env7[0][None],
+        env7[1][None],
+        env7[3][None],
+        external[None] if np.ndim(external) else external,
+        (env7[4] > 0.5)[None],
+        (env7[5] > 0.5)[None],
+        base_mortality,
+        era_scaling,
+    )
+
+
+def trait_diffusion(
+    pop: np.ndarray,
+    suitability: np.ndarray,
+    env7: np.ndarray,
+    species_traits: np.ndarray,
+    diffusion_scale: np.ndarray,
+    sl: slice,
+    base_rate: float,
+    background_rate: float,
+    density_threshold: float,
+    escape_threshold: float,
+) -> np.ndarray:
+    """物种块一轮扩散（对应 kernel_trait_diffusion_v2）"""
+    _, H, W = pop.shape
+    is_terrestrial, is_aquatic, is_amphibious = nk._habitat_types(species_traits)
+    land, ocean, coast = nk._habitat_channels(env7)
+
+    def neighbors():
+        for di, dj in nk._NEIGHBOR_OFFSETS:
+            yield (
+                nk._valid_mask(H, W, di, dj)[None],
+                nk._shift(suitability, di, dj),
+                nk._shift(pop, di, dj),
+                nk._shift(land, di, dj)[None],
+                nk._shift(ocean, di, dj)[None],
+                nk._shift(coast, di, dj)[None],
+            )
+
+    return nk._trait_diffusion(
+        pop, suitability,
+        species_traits[:, 7][:, None, None],
+        species_traits[:, 6][:, None, None],
+        diffusion_scale[:, None, None],
+        is_terrestrial & ~is_amphibious,
+        is_aquatic & ~is_amphibious,
+        land[None], ocean[None],
+        neighbors(),
+        0.5 + 0.5 * _noise(sl, H, W, 13, 17, 7),
+        base_rate, background_rate, density_threshold, escape_threshold,
+    ).astype(np.float32, copy=False)
+
+
+# ============================================================================
+# 迁徙
+# ============================================================================
+
+def distance_weights(pop: np.ndarray, max_distance: float) -> np.ndarray:
+    """物种块到各自种群质心的距离权重"""
+    result = np.zeros(pop.shape, dtype=np.float32)
+    nk.kernel_compute_distance_weights(pop, result, max_distance)
+    return result
+
+
+def prey_density(
+    pop: np.ndarray,
+    prey_matrix: np.ndarray,
+    trophic_levels: np.ndarray,
+    total_pop: np.ndarray,
+    sl: slice,
+) -> np.ndarray:
+    """物种块的归一化猎物密度（对应 _compute_prey_density_tensor 的 [a:b] 行）"""
+    S, H, W = pop.shape
+    prey_pop = (prey_matrix[sl] @ pop.reshape(S, H * W)).reshape(-1, H, W)
+    prey_normalized = prey_pop / (total_pop + 1e-6)
+    consumer_mask = (trophic_levels[sl] >= 2.0)[:, None, None]
+    return np.where(consumer_mask, prey_normalized, 1.0).astype(np.float32)
+
+
+def migration_scores(
+    pop: np.ndarray,
+    suitability: np.ndarray,
+    distance_weights: np.ndarray,
+    death_rates: np.ndarray,
+    resource_pressure: np.ndarray,
+    prey_density: np.ndarray,
+    trophic_levels: np.ndarray,
+    species_traits: np.ndarray,
+    env7: np.ndarray,
+    sl: slice,
+    pressure_threshold: float,
+    saturation_threshold: float,
+    oversaturation_threshold: float,
+    prey_scarcity_threshold: float,
+    prey_weight: float,
+    oversat_bonus: float,
+    consumer_trophic_threshold: float,
+) -> np.ndarray:
+    """物种块迁徙决策分数（对应 kernel_migration_decision_v2）"""
+    _, H, W = pop.shape
+    land, ocean, coast = nk._habitat_channels(env7)
+    is_terrestrial, is_aquatic, is_amphibious = nk._habitat_types(species_traits)
+    habitat_ok = nk._target_habitat_ok(
+        is_terrestrial, is_aquatic, is_amphibious, land[None], ocean[None], coast[None]
+    )
+    adj_count, adj_suit, has_low = nk._connected_source_count(
+        pop, is_terrestrial, is_aquatic, land, ocean, coast, suitability, 0.25,
+    )
+    return nk._migration_decision_v2(
+        pop, suitability, distance_weights,
+        death_rates[:, None, None], resource_pressure[:, None, None], trophic_levels[:, None, None],
+        prey_density, adj_count, adj_suit, has_low, habitat_ok,
+        0.9 + 0.2 * _noise(sl, H, W, 17, 31, 11),
+        pressure_threshold, saturation_threshold, oversaturation_threshold,
+        prey_scarcity_threshold, prey_weight, oversat_bonus, consumer_trophic_threshold,
+    ).astype(np.float32, copy=False)
+
+
+def execute_migration(
+    pop: np.ndarray,
+    migration_scores: np.ndarray,
+    distance_weights: np.ndarray,
+    species_traits: np.ndarray,
+    env7: np.ndarray,
+    migration_rates: np.ndarray,
+    sl: slice,
+    score_threshold: float,
+    long_jump_prob: float,
+) -> np.ndarray:
+    """物种块执行迁徙（对应 kernel_execute_migration）"""
+    _, H, W = pop.shape
+    result = np.zeros(pop.shape, dtype=np.float32)
+    land, ocean, coast = nk._habitat_channels(env7)
+    is_terrestrial, is_aquatic, is_amphibious = nk._habitat_types(species_traits)
+    habitat_ok = nk._target_habitat_ok(
+        is_terrestrial, is_aquatic, is_amphibious, land[None], ocean[None], coast[None]
+    )
+    adj_count, _, _ = nk._connected_source_count(
+        pop, is_terrestrial, is_aquatic, land, ocean, coast,
+    )
+
+    occupied = pop > 0
+    total_pop = np.where(occupied, pop, 0.0).sum(axis=(1, 2))
+    has_land_pop = (occupied & (land > 0.5)[None]).any(axis=(1, 2))[:, None, None]
+    has_ocean_pop = (occupied & (ocean > 0.5)[None]).any(axis=(1, 2))[:, None, None]
+    long_jump_ok = nk._long_jump_ok(
+        is_terrestrial, is_aquatic, is_amphibious, has_land_pop, has_ocean_pop,
+        land[None], ocean[None], coast[None],
+    )
+
+    counted, receivable = nk._migration_targets(
+        occupied, migration_scores, habitat_ok, adj_count > 0, distance_weights, long_jump_ok,
+        0.5 + 0.5 * _noise(sl, H, W, 13, 17, 19),
+        0.5 + 0.5 * _noise(sl, H, W, 23, 29, 31, offset=1),
+        score_threshold, long_jump_prob,
+    )
+    total_score = np.where(counted, migration_scores, 0.0).sum(axis=(1, 2))
+
+    rates = migration_rates[:, None, None]
+    migrate_amount = (total_pop * migration_rates)[:, None, None]
+    receive = receivable & (total_score > 0)[:, None, None]
+    safe_total = np.where(total_score > 0, total_score, 1.0)[:, None, None]
+    arrivals = np.where(receive, migrate_amount * (migration_scores / safe_total), 0.0)
+    result[...] = np.where(occupied, pop * (1.0 - rates), arrivals)
+    return result
+
+
+# ============================================================================
+# 繁殖 / 竞争
+# ============================================================================
+
+def reproduction(
+    pop: np.ndarray,
+    suitability: np.ndarray,
+    total_pop: np.ndarray,
+    capacity: np.ndarray,
+    birth_scale: np.ndarray,
+    birth_rate: float,
+    overcapacity: np.ndarray,
+    overcapacity_clamp: float,
+) -> np.ndarray:
+    """物种块繁殖（对应 _compute_reproduction_tensor，total_pop/overcapacity 为全部物种的地块量）"""
+    result = nk._reproduction_v2(
+        pop, suitability, total_pop[None], capacity[None], birth_scale[:, None, None], birth_rate
+    ).astype(np.float32, copy=False)
+    if overcapacity.any():
+        clamp_factor = np.where(overcapacity[None], overcapacity_clamp, 1.0)
+        result = np.maximum(0.0, pop + (result - pop) * clamp_factor)
+    return result
+
+
+def local_fitness(suitability: np.ndarray, species_traits: np.ndarray, pop: np.ndarray) -> np.ndarray:
+    """物种块局部竞争适应度"""
+    return nk._local_fitness(suitability, species_traits[:, :, None, None], pop).astype(np.float32, copy=False)
+
+
+def niche_overlap(species_traits: np.ndarray) -> np.ndarray:
+    """物种间生态位重叠矩阵 (S, S)"""
+    S = species_traits.shape[0]
+    result = np.zeros((S, S), dtype=np.float32)
+    nk.kernel_compute_niche_overlap_matrix(species_traits, result)
+    return result
+
+
+def trait_competition(
+    pop: np.ndarray,
+    local_fitness: np.ndarray,
+    niche_overlap: np.ndarray,
+    sl: slice,
+    competition_strength: float,
+) -> np.ndarray:
+    """物种块的特质竞争结果：竞争者取全部物种，逐个累加压力（对应 kernel_apply_trait_competition）"""
+    block = pop[sl]
+    block_fitness = local_fitness[sl]
+    strength = np.float32(competition_strength)
+    pressure = np.zeros_like(block)
+    self_idx = np.arange(sl.start, sl.stop)
+
+    for other in range(pop.shape[0]):
+        overlap = niche_overlap[sl, other][:, None, None]
+        other_pop = pop[other][None]
+        active = (other_pop > 0) & (overlap >= 0.3) & (self_idx != other)[:, None, None]
+        fitness_diff = local_fitness[other][None] - block_fitness
+        contrib = nk._trait_competition_contrib(overlap, fitness_diff, other_pop, strength)
+        pressure += np.where(active, contrib, 0.0).astype(np.float32)
+
+    loss_ratio = np.minimum(0.5, pressure / (block + 100.0))
+    return np.where(block > 0, block * (1.0 - loss_ratio), 0.0).astype(np.float32)
+
+
+# ============================================================================
+# 阶段函数 phase(arrays, params, sl)
+# ============================================================================
+# arrays 为按名称的数组（进程内执行时来自 BufferArena，分片执行时为共享内存视图），
+# params 为标量参数。每个阶段只写本物种块的输出行，返回块内统计与跨物种量的部分和
+# （tile_total 为本块的地块种群和），调用方在阶段之间汇总后写回 arrays["total_pop"]。
+
+def phase_survival(arrays: dict, params: dict, sl: slice) -> dict:
+    """宜居度 + 死亡率 + 多轮扩散（读 pop/total_pop，写 suitability/mortality/dispersed）"""
+    t0 = time.perf_counter()
+    env7 = arrays["env7"]
+    traits = arrays["traits"][sl]
+    suitability = arrays["suitability"]
+    block = arrays["pop"][sl]
+
+    trait_suitability(env7, arrays["traits"], suitability, sl)
+    mortality = np.clip(
+        trait_mortality(
+            block, arrays["total_pop"], suitability[sl], env7, traits, arrays["overlay"],
+            arrays["mortality_scale"][sl], params["base_mortality"], params["era_scaling"],
+        ),
+        0.01, 0.95,
+    ).astype(np.float32)
+    arrays["mortality"][sl] = mortality
+    current = block * (1.0 - mortality)
+
+    occupied = block > 0
+    occupied_count = occupied.sum(axis=(1, 2))
+    occupied_sum = np.where(occupied, mortality, 0.0).sum(axis=(1, 2))
+    stats = {
+        "death_counts": (block - current).sum(axis=(1, 2)),
+        "survivor_counts": current.sum(axis=(1, 2)),
+        "death_rates": (occupied_sum / np.maximum(occupied_count, 1)).astype(np.float32),
+        "occupied_mortality": float(occupied_sum.sum()),
+        "occupied_cells": int(occupied_count.sum()),
+    }
+    t1 = time.perf_counter()
+
+    for _ in range(params["dispersal_iterations"]):
+        current = trait_diffusion(
+            current, suitability[sl], env7, traits, arrays["diffusion_scale"][sl], sl,
+            params["diffusion_rate"], params["background_rate"],
+            params["density_threshold"], params["escape_threshold"],
+        )
+    dispersed = arrays["dispersed"]
+    dispersed[sl] = current
+    stats["tile_total"] = dispersed[sl].sum(axis=0)
+    stats["mortality_ms"] = (t1 - t0) * 1000
+    stats["dispersal_ms"] = (time.perf_counter() - t1) * 1000
+    return stats
+
+
+def phase_migration(arrays: dict, params: dict, sl: slice) -> dict:
+    """迁徙（读全部物种的 dispersed 计算猎物密度，写 migrated）"""
+    from .ecology import _adjust_migration_scores, _attenuate_distance_weights, _habitat_prefs
+
+    env7 = arrays["env7"]
+    pop = arrays["dispersed"]
+    block = pop[sl]
+    traits = arrays["traits"][sl]
+    mortality = arrays["mortality"][sl]
+
+    # 1. 距离权重 + 栖息地衰减
+    weights = distance_weights(block, params["max_distance"])
+    habitat = None
+    if params["habitat"]:
+        land_pref, sea_pref, coast_pref = (p[:, None, None] for p in _habitat_prefs(arrays["prefs"][sl]))
+        is_land = (env7[4] > 0.5)[None]
+        is_sea = (env7[5] > 0.5)[None]
+        weights = _attenuate_distance_weights(
+            weights, land_pref, sea_pref, coast_pref, is_land, is_sea, params["habitat_attenuation"],
+        )
+        habitat = (land_pref, sea_pref, is_land, is_sea)
+    weights32 = weights.astype(np.float32, copy=False)
+
+    # 2. 猎物密度 + 迁徙分数
+    prey = prey_density(pop, arrays["prey_matrix"], arrays["trophic"], arrays["total_pop"], sl)
+    scores = migration_scores(
+        block, arrays["suitability"][sl], weights32, arrays["death_rates"][sl],
+        arrays["resource_pressure"][sl], prey, arrays["trophic"][sl], traits, env7, sl,
+        params["pressure_threshold"], params["saturation_threshold"],
+        params["saturation_threshold"] * 1.2, 0.35, 0.3, 0.1, 2.0,
+    )
+    external_bonus = arrays.get("external_bonus")
+    scores = _adjust_migration_scores(
+        scores,
+        mortality,
+        (
+            mortality.max(axis=(1, 2))[:, None, None],
+            mortality.min(axis=(1, 2))[:, None, None],
+            (mortality >= 0.50).mean(axis=(1, 2))[:, None, None],
+        ),
+        external_bonus[sl] if external_bonus is not None else None,
+        arrays["decline_streaks"][sl][:, None, None],
+        habitat,
+        weights,
+        arrays["mobility"][sl][:, None, None],
+    )
+
+    # 3. 冷却期掩码 + 全局拥挤加成
+    scores = np.where(arrays["cooldown"][sl][:, None, None], scores, 0.0)
+    if params["crowding_bonus"]:
+        scores = scores + params["crowding_bonus"]
+
+    # 4. 执行迁徙
+    moved = execute_migration(
+        block, scores.astype(np.float32), weights32, traits, env7,
+        arrays["migration_rates"][sl], sl, params["score_threshold"], params["long_jump"],
+    )
+    arrays["migrated"][sl] = moved
+    change_ratio = np.abs(moved - block).sum(axis=(1, 2)) / (block.sum(axis=(1, 2)) + 1e-6)
+
+    # 繁殖阶段的压力-繁殖反相扣：迁徙后占用格子的平均死亡率
+    occupied = moved > 0
+    occupied_count = occupied.sum(axis=(1, 2))
+    avg_mortality = np.where(
+        occupied_count > 0,
+        np.where(occupied, mortality, 0).sum(axis=(1, 2)) / np.maximum(occupied_count, 1),
+        0.0,
+    )
+    return {
+        "migrated": (np.where(change_ratio > 0.05)[0] + sl.start).tolist(),
+        "avg_mortality": avg_mortality,
+        "tile_total": moved.sum(axis=0),
+    }
+
+
+def phase_reproduction(arrays: dict, params: dict, sl: slice) -> None:
+    """繁殖 + 局部适应度（读 migrated/total_pop，写 reproduced/local_fitness）"""
+    suitability = arrays["suitability"][sl]
+    reproduced = arrays["reproduced"]
+    reproduced[sl] = reproduction(
+        arrays["migrated"][sl], suitability, arrays["total_pop"], arrays["capacity"],
+        arrays["birth_scale"][sl], params["birth_rate"],
+        arrays["overcapacity"], params["overcapacity_clamp"],
+    )
+    arrays["local_fitness"][sl] = local_fitness(suitability, arrays["traits"][sl], reproduced[sl])
+
+
+def phase_competition(arrays: dict, params: dict, sl: slice) -> tuple[float, float]:
+    """竞争 + 净变化钳制（读全部物种的 reproduced/local_fitness，写 final）
+
+    Returns:
+        (净变化绝对值总和, 被钳制的变化绝对值总和)
+    """
+    competed = trait_competition(
+        arrays["reproduced"], arrays["local_fitness"], arrays["niche_overlap"], sl,
+        params["competition_strength"],
+    )
+    block = arrays["pop"][sl]
+    net_change = competed - block
+    clamped_change = np.clip(
+        net_change,
+        -block * params["max_net_decline_ratio"],
+        block * params["max_net_growth_ratio"],
+    )
+    arrays["final"][sl] = np.maximum(0.0, block + clamped_change)
+    return float(np.abs(net_change).sum()), float(np.abs(net_change - clamped_change).sum())
+
+
+class BlockRunner:
+    """在当前进程内逐块执行阶段函数
+
+    数组登记在 arrays 中：put 直接引用调用方数组，zeros 取自 BufferArena，
+    output 为新分配数组（可作为结果返回）。ShardedEcologyExecutor 提供同样的接口。
+    """
+
+    def __init__(self, arena: BufferArena):
+        self._arena = arena
+        self.arrays: dict[str, np.ndarray] = {}
+
+    def begin(self) -> None:
+        """开始新回合：清空数组登记"""
+        self.arrays.clear()
+
+    def put(self, key: str, value: np.ndarray) -> np.ndarray:
+        self.arrays[key] = value
+        return value
+
+    def zeros(self, key: str, shape: tuple[int, ...], dtype=np.float32) -> np.ndarray:
+        self.arrays[key] = self._arena.zeros(f"chunk_{key}", shape, dtype)
+        return self.arrays[key]
+
+    def output(self, key: str, shape: tuple[int, ...], dtype=np.float32) -> np.ndarray:
+        self.arrays[key] = np.empty(shape, dtype=dtype)
+        return self.arrays[key]
+
+    def alias(self, key: str, existing: str) -> np.ndarray:
+        """让 key 与 existing 共用同一数组（前者不再被读取后复用其存储）"""
+        self.arrays[key] = self.arrays[existing]
+        return self.arrays[key]
+
+    def result(self, key: str) -> np.ndarray:
+        return self.arrays[key]
+
+    def run(self, phase, params: dict, chunks: list[slice]) -> list:
+        return [phase(self.arrays, params, sl) for sl in chunks]
@@ -5,24 +5,23 @@
 核心优化：
 1. 适应度计算：Taichi GPU并行
 2. 竞争矩阵：Taichi GPU并行，O(S²) 全并行
-3. 亲缘矩阵：预处理后GPU并行计算
+3. 亲缘矩阵：共享谱系索引（欧拉序 LCA）向量化构建
 
-内核定义在 taichi_hybrid_kernels.py 中（需要在Taichi初始化后定义）
+内核定义在 taichi_hybrid_kernels.py 中，首次计算时才导入并初始化 Taichi
+（见 compute_backend.get_taichi_kernels）。
 """
 
 from __future__ import annotations
 
 import logging
-import re
 from dataclasses import dataclass
 from typing import TYPE_CHECKING, Sequence
 
 import numpy as np
 
-# 导入Taichi内核（GPU-only 模式）
-import taichi as ti
-from . import taichi_hybrid_kernels as _kernels
-TAICHI_AVAILABLE = True  # GPU-only: 如果导入失败会直接抛出错误
+from .compute_backend import get_taichi_kernels
+from .kernel_metrics import instrument_kernels
+from .phylogeny import get_phylogeny_index
 
 if TYPE_CHECKING:
     from ..models.species import Species
@@ -54,8 +53,7 @@ class TensorCompetitionCalculator:
     
     def __init__(self, config: EcologyBalanceConfig | None = None):
         self._config = config
-        self._lineage_pattern = re.compile(r'^(.+?)([A-Z]\d+)$')
-        self._taichi_initialized = False
+        self._kernels = None  # 首次计算时加载（延迟 Taichi 初始化）
     
     def reload_config(self, config: EcologyBalanceConfig) -> None:
         self._config = config
@@ -86,9 +84,10 @@ class TensorCompetitionCalculator:
                 species_codes=codes,
             )
         
-        # GPU-only 模式：Taichi 始终可用
-        if not TAICHI_AVAILABLE:
-            raise RuntimeError("[GPU-only] Taichi GPU 不可用，请检查 GPU 驱动")
+        # 首次计算时初始化 Taichi（失败直接抛错）
+        if self._kernels is None:
+            kernels = get_taichi_kernels()
+            self._kernels = instrument_kernels(kernels, kernels.get_taichi_backend())
         
         # ========== 1. 提取物种数据 ==========
         data = self._extract_species_data(species_list)
@@ -97,7 +96,7 @@ class TensorCompetitionCalculator:
         fitness = self._compute_fitness_gpu(data, n)
         
         # ========== 3. 构建亲缘矩阵（CPU预处理）==========
-        kinship = self._build_kinship_matrix(codes)
+        kinship = self._build_kinship_matrix(species_list)
         
         # ========== 4. 构建重叠矩阵（GPU）==========
         overlap = self._build_overlap_matrix_gpu(codes, niche_overlaps, n)
@@ -111,6 +110,7 @@ class TensorCompetitionCalculator:
         )
         
         # 同步GPU
+        import taichi as ti
         ti.sync()
         
         logger.info(
@@ -170,13 +170,13 @@ class TensorCompetitionCalculator:
         survival_amp = np.zeros(n, dtype=np.float32)
         repro_amp = np.zeros(n, dtype=np.float32)
         
-        _kernels.kernel_amplify_difference(pop_ranks, pop_amp, 1.5, n)
-        _kernels.kernel_amplify_difference(survival_ranks, survival_amp, 2.0, n)
-        _kernels.kernel_amplify_difference(repro_ranks, repro_amp, 1.5, n)
+        self._kernels.kernel_amplify_difference(pop_ranks, pop_amp, 1.5, n)
+        self._kernels.kernel_amplify_difference(survival_ranks, survival_amp, 2.0, n)
+        self._kernels.kernel_amplify_difference(repro_ranks, repro_amp, 1.5, n)
         
         # 5. 计算最终适应度（GPU）
         fitness = np.zeros(n, dtype=np.float32)
-        _kernels.kernel_compute_fitness_1d(
+        self._kernels.kernel_compute_fitness_1d(
             pop_amp, survival_amp, repro_amp,
             data['trophic'], data['age'], fitness, n
         )
@@ -199,45 +199,11 @@ class TensorCompetitionCalculator:
         
         return ranks
     
-    def _build_kinship_matrix(self, codes: list[str]) -> np.ndarray:
-        """构建亲缘矩阵（CPU预处理，因为需要字符串操作）"""
-        n = len(codes)
-        kinship = np.full((n, n), 999, dtype=np.int32)
-        np.fill_diagonal(kinship, 0)
-        
-        # 预计算祖先链
-        ancestors_list = [self._parse_ancestors(code) for code in codes]
-        
-        for i in range(n):
-            anc_i = ancestors_list[i]
-            set_i = set(anc_i)
-            for j in range(i + 1, n):
-                anc_j = ancestors_list[j]
-                common = set_i & set(anc_j)
-                if common:
-                    for gen, anc in enumerate(anc_i):
-                        if anc in common:
-                            gen_j = anc_j.index(anc) if anc in anc_j else 999
-                            kinship[i, j] = max(gen, gen_j)
-                            kinship[j, i] = kinship[i, j]
-                            break
-        
-        return kinship
-    
-    def _parse_ancestors(self, code: str) -> list[str]:
-        """解析lineage_code得到祖先链"""
-        chain = [code]
-        current = code
-        
-        while True:
-            match = self._lineage_pattern.match(current)
-            if match and match.group(1):
-                current = match.group(1)
-                chain.append(current)
-            else:
-                break
-        
-        return chain
+    def _build_kinship_matrix(self, species_list: Sequence[Species]) -> np.ndarray:
+        """构建亲缘矩阵（共享谱系索引，向量化 LCA 查询）"""
+        index = get_phylogeny_index()
+        index.add_species(species_list)
+        return index.kinship_matrix([sp.lineage_code for sp in species_list])
     
     def _build_overlap_matrix_gpu(
         self, codes: list[str], niche_overlaps: dict[str, float] | None, n: int
@@ -249,14 +215,14 @@ class TensorCompetitionCalculator:
         overlaps = np.array([niche_overlaps.get(c, 0.5) for c in codes], dtype=np.float32)
         overlap_matrix = np.zeros((n, n), dtype=np.float32)
         
-        _kernels.kernel_build_overlap_matrix_2d(overlaps, overlap_matrix, n)
+        self._kernels.kernel_build_overlap_matrix_2d(overlaps, overlap_matrix, n)
         
         return overlap_matrix
     
     def _build_trophic_mask_gpu(self, trophic: np.ndarray, n: int) -> np.ndarray:
         """GPU构建营养级掩码"""
         mask = np.zeros((n, n), dtype=np.float32)
-        _kernels.kernel_build_trophic_mask_2d(trophic, mask, n)
+        self._kernels.kernel_build_trophic_mask_2d(trophic, mask, n)
         return mask
     
     def _compute_competition_gpu(
@@ -275,7 +241,7 @@ class TensorCompetitionCalculator:
         
         contested_coef = getattr(cfg, 'kin_contested_penalty_coefficient', 0.12)
         
-        _kernels.kernel_compute_competition_mods(
+        self._kernels.kernel_compute_competition_mods(
             fitness, kinship, overlap, trophic_mask, repro,
             mortality_mods, repro_mods, n,
             cfg.kin_generation_threshold,
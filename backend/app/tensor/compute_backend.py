@@ -0,0 +1,273 @@
+"""
+张量计算后端选择
+
+统一管理 HybridCompute / TensorEcologyEngine 使用的内核实现：
+
+┌──────────┬──────────────────────────────────────────────────────┐
+│ 后端      │ 说明                                                  │
+├──────────┼──────────────────────────────────────────────────────┤
+│ auto     │ Taichi GPU → Taichi CPU (ti.cpu) → NumPy 逐级回退       │
+│ gpu      │ 仅 Taichi GPU（cuda/vulkan/metal/opengl），失败即抛错    │
+│ cpu      │ Taichi CPU 后端（多核 LLVM 并行，适合无 GPU 的批处理节点） │
+│ numpy    │ 纯 NumPy 向量化内核（不导入 Taichi，适合 CI/受限环境）     │
+└──────────┴──────────────────────────────────────────────────────┘
+
+选择优先级：
+1. 显式参数（HybridCompute(arch=...) / TensorEcologyEngine(backend=...)）
+2. set_default_compute_backend()（SimulationEngine 根据 tensor_balance.yaml 设置）
+3. 环境变量 TENSOR_COMPUTE_BACKEND（Settings.tensor_compute_backend）
+4. auto
+
+两套内核模块（taichi_hybrid_kernels / numpy_kernels）的函数名与参数顺序完全一致，
+调用方只需持有返回的模块对象即可切换实现。
+
+【延迟初始化】
+导入 app 包不会导入 Taichi，也不会初始化设备；首次调用 load_kernels() /
+get_taichi_kernels() 时才初始化。API 进程在启动后调用 start_kernel_warmup()
+于后台线程完成初始化与预编译，get_kernel_status() 供 /health 报告就绪状态。
+流水线把张量阶段放到常驻计算线程（compute_thread）时，初始化与预编译也提交到
+该线程（on_compute_thread=True），与这些阶段共用同一个 Taichi 线程。
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import sys
+import threading
+import time
+from types import ModuleType
+
+logger = logging.getLogger(__name__)
+
+COMPUTE_BACKENDS = ("auto", "gpu", "cpu", "numpy")
+
+# 进程级默认后端（None 表示读取环境变量/Settings）
+_default_backend: str | None = None
+
+# 后台预热状态：idle / running / ready / failed
+_warmup_lock = threading.Lock()
+_warmup_thread: threading.Thread | None = None
+_warmup_state = "idle"
+_warmup_device: str | None = None
+_warmup_error: str | None = None
+_warmup_seconds: float | None = None
+
+_TAICHI_MODULE = f"{__package__}.taichi_hybrid_kernels"
+
+
+def normalize_compute_backend(name: str | None) -> str:
+    """规范化后端名称
+
+    兼容 Taichi 架构名：cuda/vulkan/metal/opengl → gpu，x64/arm64 → cpu。
+    未知名称回退为 auto 并记录警告。
+    """
+    if not name:
+        return "auto"
+    key = str(name).strip().lower()
+    if key in COMPUTE_BACKENDS:
+        return key
+    if key in ("cuda", "vulkan", "metal", "opengl"):
+        return "gpu"
+    if key in ("x64", "arm64", "llvm"):
+        return "cpu"
+    logger.warning(f"[ComputeBackend] 未知计算后端 '{name}'，回退为 auto")
+    return "auto"
+
+
+def set_default_compute_backend(name: str | None) -> None:
+    """设置进程级默认计算后端（None 恢复为读取环境配置）"""
+    global _default_backend
+    _default_backend = normalize_compute_backend(name) if name else None
+
+
+def get_default_compute_backend() -> str:
+    """获取默认计算后端（未显式设置时读取 TENSOR_COMPUTE_BACKEND）"""
+    if _default_backend is not None:
+        return _default_backend
+    env_value = os.environ.get("TENSOR_COMPUTE_BACKEND")
+    if env_value:
+        return normalize_compute_backend(env_value)
+    try:
+        from ..core.config import get_settings
+        return normalize_compute_backend(get_settings().tensor_compute_backend)
+    except Exception:
+        return "auto"
+
+
+def resolve_compute_backend(requested: str | None = None) -> str:
+    """解析请求的后端名称：显式参数为 auto/None 时使用默认后端"""
+    backend = normalize_compute_backend(requested)
+    if backend == "auto":
+        backend = get_default_compute_backend()
+    return backend
+
+
+def load_kernels(requested: str | None = None) -> tuple[ModuleType, str]:
+    """按后端加载内核模块
+
+    Args:
+        requested: auto/gpu/cpu/numpy，None 表示使用默认配置
+
+    Returns:
+        (内核模块, 实际后端名称)。实际后端名称为 Taichi 架构名
+        （cuda/vulkan/metal/opengl/cpu）或 "numpy"。
+
+    Raises:
+        RuntimeError: 显式要求 gpu/cpu 但 Taichi 无法在该架构上初始化
+    """
+    backend = resolve_compute_backend(requested)
+
+    if backend == "numpy":
+        from . import numpy_kernels
+        return numpy_kernels, "numpy"
+
+    try:
+        _wait_for_warmup()
+        from . import taichi_hybrid_kernels as kernels
+        arch = kernels._ensure_taichi_init(backend)
+        return kernels, arch
+    except Exception as e:
+        if backend != "auto":
+            raise RuntimeError(f"[ComputeBackend] Taichi {backend} 后端初始化失败: {e}") from e
+        logger.warning(f"[ComputeBackend] Taichi 不可用，回退到 NumPy 内核: {e}")
+        from . import numpy_kernels
+        return numpy_kernels, "numpy"
+
+
+def get_taichi_kernels() -> ModuleType:
+    """获取已初始化的 Taichi 内核模块
+
+    供只有 Taichi 实现的计算器（竞争、适宜度、生态位）在首次计算时调用。
+    默认后端为 numpy 时按 auto 初始化 Taichi。
+
+    Raises:
+        RuntimeError: Taichi 无法初始化
+    """
+    _wait_for_warmup()
+    from . import taichi_hybrid_kernels as kernels
+    kernels._ensure_taichi_init()
+    return kernels
+
+
+# ============================================================================
+# 后台预热（初始化 + 预编译）
+# ============================================================================
+
+def _wait_for_warmup() -> None:
+    """预热进行中时等待其完成，避免与后台线程并发编译内核
+
+    已在计算线程上时不等待：预热任务排在当前任务之后，等待会死锁；
+    单线程执行也保证了不会并发编译。
+    """
+    from .compute_thread import get_compute_thread
+    thread = _warmup_thread
+    if thread is None or not thread.is_alive() or thread is threading.current_thread():
+        return
+    if get_compute_thread().is_current():
+        return
+    thread.join()
+
+
+def _run_warmup(requested: str | None) -> None:
+    global _warmup_state, _warmup_device, _warmup_error, _warmup_seconds
+    start = time.perf_counter()
+    try:
+        backend = resolve_compute_backend(requested)
+        if backend == "numpy":
+            device = "numpy"
+        else:
+            module, device = load_kernels(backend)
+            if device != "numpy":
+                module._precompile_all_kernels()
+        _warmup_device = device
+        _warmup_state = "ready"
+        logger.info(
+            f"[ComputeBackend] 内核预热完成: {device} ({time.perf_counter() - start:.2f}s)"
+        )
+    except Exception as e:
+        _warmup_error = str(e)
+        _warmup_state = "failed"
+        logger.warning(f"[ComputeBackend] 内核预热失败（将在首次使用时重试）: {e}")
+    finally:
+        _warmup_seconds = time.perf_counter() - start
+
+
+def _run_warmup_on_compute_thread(requested: str | None) -> None:
+    """在计算线程上初始化 Taichi 运行时（与后续内核调用同一线程）"""
+    from .compute_thread import get_compute_thread
+    get_compute_thread().call(_run_warmup, requested)
+
+
+def start_kernel_warmup(
+    requested: str | None = None,
+    on_compute_thread: bool = False,
+) -> threading.Thread | None:
+    """在后台线程初始化计算后端并预编译全部内核
+
+    重复调用是幂等的：已在运行或已完成时直接返回。
+
+    Args:
+        requested: 计算后端（None = 默认后端）
+        on_compute_thread: 在常驻计算线程上初始化（流水线把 compute 阶段放到该线程时使用）
+
+    Returns:
+        预热线程（已在运行或已完成时返回原线程）
+    """
+    global _warmup_thread, _warmup_state, _warmup_error
+    with _warmup_lock:
+        if _warmup_state in ("running", "ready"):
+            return _warmup_thread
+        _warmup_state = "running"
+        _warmup_error = None
+        _warmup_thread = threading.Thread(
+            target=_run_warmup_on_compute_thread if on_compute_thread else _run_warmup,
+            args=(requested,),
+            name="tensor-kernel-warmup",
+            daemon=True,
+        )
+        _warmup_thread.start()
+        return _warmup_thread
+
+
+def get_kernel_status() -> dict:
+    """计算后端就绪状态（不会触发 Taichi 导入或初始化）
+
+    Returns:
+        {
+            "ready": 内核是否已可直接使用（无需再编译/初始化）,
+            "warmup": idle/running/ready/failed,
+            "backend": 配置的后端偏好,
+            "device": 实际设备（未初始化时为 None）,
+            "taichi_loaded": Taichi 内核模块是否已导入,
+            "warmup_seconds": 预热耗时,
+            "error": 预热错误信息,
+        }
+    """
+    backend = get_default_compute_backend()
+    device = _warmup_device
+    kernels = sys.modules.get(_TAICHI_MODULE)
+    if device is None and kernels is not None:
+        device = kernels.get_taichi_backend()
+    ready = _warmup_state == "ready" or backend == "numpy"
+    return {
+        "ready": ready,
+        "warmup": _warmup_state,
+        "backend": backend,
+        "device": device or ("numpy" if backend == "numpy" else None),
+        "taichi_loaded": kernels is not None,
+        "warmup_seconds": None if _warmup_seconds is None else round(_warmup_seconds, 3),
+        "error": _warmup_error,
+    }
+
+
+def reset_kernel_warmup() -> None:
+    """重置预热状态（测试用；不会反初始化 Taichi）"""
+    global _warmup_thread, _warmup_state, _warmup_device, _warmup_error, _warmup_seconds
+    _wait_for_warmup()
+    with _warmup_lock:
+        _warmup_thread = None
+        _warmup_state = "idle"
+        _warmup_device = None
+        _warmup_error = None
+        _warmup_seconds = None
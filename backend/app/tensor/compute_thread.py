@@ -0,0 +1,92 @@
+"""
+张量计算线程 - 把 Taichi 工作固定在一个常驻线程
+
+Taichi/CUDA 上下文是线程绑定的：运行时在哪个线程初始化，内核就应在哪个线程
+启动，不能把张量计算随意交给 asyncio.to_thread() 的线程池。
+流水线把 CPU 密集阶段移出事件循环时（PipelineConfig.offload_stages /
+compute_thread_stages），
+所有可能调用 Taichi 的工作都提交到同一个常驻线程 "tensor-compute"：
+- 运行时初始化与内核预热（compute_backend.start_kernel_warmup）
+- execution_policy=COMPUTE 的阶段（张量生态、种群更新、张量状态同步……）
+单工作线程同时保证这些任务按提交顺序逐个执行，不会并发进入 Taichi。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+
+T = TypeVar("T")
+
+COMPUTE_THREAD_NAME = "tensor-compute"
+
+
+class ComputeThread:
+    """单线程执行器：所有任务在同一个线程上按提交顺序执行"""
+
+    def __init__(self, name: str = COMPUTE_THREAD_NAME):
+        self.name = name
+        self._ident: int | None = None
+        self._executor = ThreadPoolExecutor(
+            max_workers=1,
+            thread_name_prefix=name,
+            initializer=self._bind,
+        )
+
+    def _bind(self) -> None:
+        self._ident = threading.get_ident()
+
+    def is_current(self) -> bool:
+        """当前是否运行在计算线程上"""
+        return self._ident is not None and threading.get_ident() == self._ident
+
+    def submit(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> Future:
+        """提交任务；已在计算线程上时直接执行（避免自我等待死锁）"""
+        if self.is_current():
+            future: Future = Future()
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+            return future
+        return self._executor.submit(fn, *args, **kwargs)
+
+    def call(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """在计算线程上同步执行并返回结果"""
+        return self.submit(fn, *args, **kwargs).result()
+
+    async def run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """在计算线程上执行，不阻塞调用方的事件循环"""
+        if self.is_current():
+            return fn(*args, **kwargs)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait)
+
+
+_compute_thread: ComputeThread | None = None
+_compute_thread_lock = threading.Lock()
+
+
+def get_compute_thread() -> ComputeThread:
+    """获取进程级计算线程（首次调用时创建）"""
+    global _compute_thread
+    if _compute_thread is None:
+        with _compute_thread_lock:
+            if _compute_thread is None:
+                _compute_thread = ComputeThread()
+    return _compute_thread
+
+
+def reset_compute_thread() -> None:
+    """关闭并重置计算线程（测试用）"""
+    global _compute_thread
+    with _compute_thread_lock:
+        if _compute_thread is not None:
+            _compute_thread.shutdown(wait=True)
+        _compute_thread = None
@@ -183,6 +183,9 @@ class TensorConfig:
     use_tensor_speciation: 是否使用张量分化检测
     use_auto_tradeoff: 是否使用自动代价计算器
     
+    === 计算后端 ===
+    compute_backend: 张量内核后端 auto/gpu/cpu/numpy（auto 时由 TENSOR_COMPUTE_BACKEND 决定）
+    
     === 数值平衡 ===
     balance: 张量计算数值平衡配置
     tradeoff: 演化代价计算配置
@@ -198,6 +201,9 @@ class TensorConfig:
     use_tensor_speciation: bool = True
     use_auto_tradeoff: bool = True
     
+    # 计算后端（auto/gpu/cpu/numpy）
+    compute_backend: str = "auto"
+    
     # 数值平衡配置
     balance: TensorBalanceConfig = field(default_factory=TensorBalanceConfig)
     tradeoff: TradeoffConfig = field(default_factory=TradeoffConfig)
@@ -235,6 +241,7 @@ class TensorConfig:
         cfg.use_tensor_mortality = getattr(settings, "use_tensor_mortality", cfg.use_tensor_mortality)
         cfg.use_tensor_speciation = getattr(settings, "use_tensor_speciation", cfg.use_tensor_speciation)
         cfg.use_auto_tradeoff = getattr(settings, "use_auto_tradeoff", cfg.use_auto_tradeoff)
+        cfg.compute_backend = getattr(settings, "tensor_compute_backend", cfg.compute_backend)
         
         # 数值平衡配置
         for field_name, default_val in cfg.balance.to_dict().items():
@@ -280,6 +287,7 @@ class TensorConfig:
             "use_tensor_mortality": self.use_tensor_mortality,
             "use_tensor_speciation": self.use_tensor_speciation,
             "use_auto_tradeoff": self.use_auto_tradeoff,
+            "compute_backend": self.compute_backend,
             "balance": self.balance.to_dict(),
             "tradeoff": self.tradeoff.to_dict(),
         }
@@ -319,6 +327,7 @@ class TensorConfig:
             use_tensor_mortality=data.get("use_tensor_mortality", True),
             use_tensor_speciation=data.get("use_tensor_speciation", True),
             use_auto_tradeoff=data.get("use_auto_tradeoff", True),
+            compute_backend=data.get("compute_backend", "auto"),
             balance=balance,
             tradeoff=tradeoff,
         )
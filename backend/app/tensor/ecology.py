@@ -1,9 +1,26 @@
 """
-GPU-only 统一张量生态计算引擎
+统一张量生态计算引擎
 
-【GPU-only 模式】
-本模块强制使用 Taichi GPU 后端，无 NumPy fallback。
-如果 GPU/Taichi 不可用，会直接抛出 RuntimeError。
+【计算后端】
+内核实现由 compute_backend 模块选择（TENSOR_COMPUTE_BACKEND / tensor_balance.yaml）：
+- Taichi GPU（CUDA/Vulkan/Metal/OpenGL）
+- Taichi CPU（ti.cpu，无 GPU 的批处理/CI 节点）
+- NumPy 向量化内核（numpy_kernels，与 Taichi 内核数值一致）
+
+【步进模式】EcologyConfig.stepping（TENSOR_ECOLOGY_STEPPING）
+- staged（默认）：各阶段以 NumPy 数组调用内核
+- fused：回合内种群/环境/参数常驻设备（DeviceArena），只在迁徙评分与
+  回合结束时回传，GPU 后端省去每次内核调用的主机↔设备拷贝
+
+【物种分块】EcologyConfig.chunking
+- 整体计算的工作集（约 55 个 S·H·W float32 数组）超出内存预算时，
+  按物种块流式计算（chunked_ecology），跨物种项先分块汇总
+- EcologyConfig.shard_workers（TENSOR_ECOLOGY_SHARD_WORKERS）> 1 时（NumPy / Taichi CPU），物种块分发到进程池，
+  数组放在共享内存中（sharded_ecology）
+
+【细节层次】EcologyConfig.lod_factor（TENSOR_ECOLOGY_LOD_FACTOR）
+- lod_factor > 1 且传入 lod_mask 时，背景层物种在 lod_factor 倍降采样网格上计算，
+  回到全分辨率时逐块质量守恒（lod_ecology）
 
 【核心优化】
 将原本分散在多个模块中的循环计算统一为张量并行计算：
@@ -17,14 +34,14 @@ GPU-only 统一张量生态计算引擎
 - 加速比：10-50x
 
 【设计原则】
-1. GPU-only：所有计算通过 Taichi 内核执行
+1. 内核统一：所有计算通过同签名的 Taichi/NumPy 内核执行
 2. 零循环：Python 层无显式循环
 3. 一次调用：process_ecology() 完成全部生态计算
 
 使用方式：
     from app.tensor.ecology import get_ecology_engine
     
-    engine = get_ecology_engine()  # 无 GPU 时抛错
+    engine = get_ecology_engine()  # 自动选择 GPU/CPU/NumPy 后端
     result = engine.process_ecology(
         pop=tensor_state.pop,
         env=tensor_state.env,
@@ -36,47 +53,44 @@ GPU-only 统一张量生态计算引擎
 
 from __future__ import annotations
 
+import dataclasses
 import logging
 import time
 from dataclasses import dataclass, field
+from types import ModuleType
 from typing import TYPE_CHECKING, Optional, Sequence
 
 import numpy as np
 
 if TYPE_CHECKING:
+    from ..core.config import Settings
     from ..models.species import Species
     from .state import TensorState
 
 logger = logging.getLogger(__name__)
 
-# Taichi 内核（延迟导入）
-_taichi_kernels = None
-_taichi_available = False
+from . import chunked_ecology, lod_ecology, sharded_ecology, sparse_ecology
+from .buffers import ArenaStats, BufferArena, DeviceArena, available_memory_bytes
+from .compute_backend import load_kernels
+from .kernel_metrics import instrument_kernels
+from .sparse_pop import (
+    LAYOUT_DENSE,
+    LAYOUT_SPARSE,
+    SparseDomain,
+    SparsePopulation,
+    occupancy_ratio,
+    select_layout,
+)
 
+# 步进模式：staged 逐阶段以 NumPy 数组调用内核；fused 回合内数组常驻设备
+STEPPING_STAGED = "staged"
+STEPPING_FUSED = "fused"
+STEPPING_MODES = (STEPPING_STAGED, STEPPING_FUSED)
 
-def _load_ecology_kernels():
-    """加载 Taichi 内核 - GPU-only 模式，无 fallback"""
-    global _taichi_kernels, _taichi_available
-    
-    if _taichi_kernels is not None:
-        return _taichi_available
-    
-    try:
-        from . import taichi_hybrid_kernels as kernels
-        _taichi_kernels = kernels
-        _taichi_available = True
-        logger.info("[TensorEcology] Taichi GPU 内核已加载")
-        return True
-    except ImportError as e:
-        raise RuntimeError(
-            f"[GPU-only] Taichi 导入失败: {e}\n"
-            "请确保已安装 taichi-gpu 并且有可用的 GPU 设备"
-        ) from e
-    except Exception as e:
-        raise RuntimeError(
-            f"[GPU-only] Taichi GPU 初始化失败: {e}\n"
-            "请检查 GPU 驱动是否正确安装"
-        ) from e
+# 物种分块：off 不分块；auto 整体工作集超出内存预算时分块；on 始终分块
+CHUNKING_OFF = "off"
+CHUNKING_AUTO = "auto"
+CHUNKING_ON = "on"
 
 
 @dataclass
@@ -155,6 +169,50 @@ class EcologyConfig:
     # 容量归一上限
     overcapacity_birth_clamp: float = 0.5   # 超容量时繁殖放大系数钳制
     overcapacity_threshold: float = 1.2     # 超容量触发阈值（容量的倍数）
+    
+    # === 计算布局 ===
+    # 【新增】auto：按占用率选择；dense：稠密 (S, H, W)；sparse：只在占用格子及其可达邻域上计算
+    # 稀疏布局仅用于特质系统路径（species_traits 非空），旧偏好路径始终稠密
+    layout: str = "auto"
+    sparse_occupancy_threshold: float = 0.03  # 占用率不高于此值时 auto 选择稀疏布局
+    
+    # === 步进模式 ===
+    # staged：每个内核调用都以 NumPy 数组为参数（GPU 后端每次调用都有主机↔设备拷贝）
+    # fused：回合开始上传一次，宜居度→死亡→扩散（多轮）→繁殖→竞争→净变化钳制
+    #        全部在设备数组上完成，只在迁徙评分（主机后处理）与回合结束时回传
+    # 仅作用于稠密布局；结果与 staged 一致（浮点误差内）
+    stepping: str = STEPPING_STAGED
+    
+    # === 物种分块 ===
+    # 分块时物种按块流式通过 NumPy 逐元素内核，只有少数 (S, H, W) 结果数组常驻；
+    # 仅作用于稠密布局的特质系统路径，优先于 fused 步进；结果与整体计算一致（浮点误差内）
+    chunking: str = CHUNKING_AUTO
+    chunk_memory_budget_bytes: int = 0    # 内存预算（0 = 实测可用内存 × chunk_memory_fraction）
+    chunk_memory_fraction: float = 0.5    # 实测可用内存中允许生态计算使用的比例
+    chunk_species: int = 0                # 固定块大小（0 = 按预算自动选择）
+    min_chunk_species: int = 1            # 自动选择时的最小块大小
+    
+    # === 多进程物种分片（sharded_ecology）===
+    # 物种块分发到进程池并行计算，数组放在共享内存中；走分块路径（块大小另按进程数细分），
+    # 仅用于 NumPy / Taichi CPU 后端（GPU 后端单进程已占满设备）
+    shard_workers: int = 0                # 工作进程数（0/1 = 不分片，-1 = 全部可用 CPU）
+    
+    # === 细节层次（lod_ecology）===
+    # process_ecology 传入 lod_mask 时，标记的（背景层）物种在 lod_factor 倍降采样网格上计算
+    lod_factor: int = 1                   # 降采样倍数（1 = 关闭，全部物种全分辨率）
+    
+    @classmethod
+    def from_settings(cls, settings: Settings) -> EcologyConfig:
+        """从全局配置创建（TENSOR_ECOLOGY_* 环境变量），其余参数取默认值"""
+        stepping = str(settings.tensor_ecology_stepping).strip().lower()
+        if stepping not in STEPPING_MODES:
+            logger.warning(f"[TensorEcology] 未知步进模式 '{settings.tensor_ecology_stepping}'，回退为 staged")
+            stepping = STEPPING_STAGED
+        return cls(
+            stepping=stepping,
+            shard_workers=int(settings.tensor_ecology_shard_workers),
+            lod_factor=max(1, int(settings.tensor_ecology_lod_factor)),
+        )
 
 
 @dataclass
@@ -169,6 +227,33 @@ class EcologyMetrics:
     species_count: int = 0
     tile_count: int = 0
     backend: str = "numpy"
+    layout: str = "dense"             # 计算布局：dense / sparse
+    occupancy_ratio: float = 0.0      # 输入种群占用率（非零格子 / S·H·W）
+    active_cells: int = 0             # 稀疏布局实际计算的 (物种, 地块) 数
+    
+    # 缓冲区复用统计（本次调用的增量，稳态回合应接近 0 次分配）
+    buffer_allocations: int = 0       # 中间缓冲区新分配/扩容次数
+    buffer_reuses: int = 0            # 中间缓冲区复用次数
+    buffer_bytes_allocated: int = 0   # 中间缓冲区新分配字节数
+    input_copies: int = 0             # 输入因类型/布局不符产生的拷贝次数
+    input_bytes_copied: int = 0       # 输入拷贝字节数
+    
+    # 融合步进（stepping="fused"）的主机↔设备传输统计
+    stepping: str = STEPPING_STAGED
+    device_uploads: int = 0           # 主机 → 设备拷贝次数
+    device_downloads: int = 0         # 设备 → 主机拷贝次数
+    device_bytes_transferred: int = 0 # 双向传输总字节数
+    
+    # 物种分块（chunks=0 表示整体计算）
+    chunks: int = 0                   # 物种块数
+    chunk_species: int = 0            # 每块物种数
+    memory_budget_bytes: int = 0      # 选择块大小时的内存预算
+    shard_workers: int = 0            # 多进程分片的工作进程数（0 = 进程内计算）
+    
+    # 细节层次（lod_species=0 表示全部物种全分辨率）
+    lod_factor: int = 1               # 背景层降采样倍数
+    lod_species: int = 0              # 在降采样网格上计算的物种数
+    computed_cells: int = 0           # 内核实际处理的 (物种, 地块) 数
     
     # 生态统计
     avg_mortality_rate: float = 0.0
@@ -197,6 +282,166 @@ class EcologyResult:
     
     # 兼容旧系统的结果格式
     tile_mortality: dict[str, dict[int, float]] = field(default_factory=dict)
+    
+    # 稀疏布局下的占用列表（pop 的等价表示，可直接作为下一次 process_ecology 的输入）
+    sparse_pop: SparsePopulation | None = None
+
+
+# ============================================================================
+# 稠密/稀疏布局共用的逐元素计算
+# ============================================================================
+# 物种量以可广播形式传入：稠密布局为 (S, 1, 1)，稀疏布局为按键 gather 后的 (N,)
+
+def _pad_env(env: np.ndarray) -> np.ndarray:
+    """补齐到 7 个环境通道（缺失通道为 0，不足 5 通道时默认陆地）"""
+    C, H, W = env.shape
+    if C >= 7:
+        return env.astype(np.float32, copy=False)
+    padded_env = np.zeros((7, H, W), dtype=np.float32)
+    padded_env[:C] = env
+    if C <= 4:
+        padded_env[4] = 1.0  # 默认陆地
+    return padded_env
+
+
+def _habitat_prefs(species_prefs: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(陆地, 海洋, 海岸) 偏好列，缺少海岸列时为 0"""
+    land_pref = species_prefs[:, 4]
+    sea_pref = species_prefs[:, 5]
+    coast_pref = species_prefs[:, 6] if species_prefs.shape[1] > 6 else np.zeros_like(land_pref)
+    return land_pref, sea_pref, coast_pref
+
+
+def _migration_traits(species_traits: np.ndarray | None, species_prefs: np.ndarray) -> np.ndarray:
+    """迁徙内核使用的特质矩阵（无特质矩阵时由 species_prefs 构造默认值）"""
+    if species_traits is not None:
+        return species_traits.astype(np.float32)
+    S = species_prefs.shape[0]
+    traits = np.zeros((S, 14), dtype=np.float32)
+    traits[:, 7] = 5.0  # 默认机动性
+    if species_prefs.shape[1] >= 7:
+        traits[:, 8] = species_prefs[:, 4]  # land_pref
+        traits[:, 9] = species_prefs[:, 5]  # ocean_pref
+        traits[:, 10] = species_prefs[:, 6]  # coast_pref
+    else:
+        traits[:, 8] = 1.0  # 默认陆地
+    return traits
+
+
+def _prey_matrix(trophic_levels: np.ndarray) -> np.ndarray:
+    """猎物关系矩阵 (S, S)：prey[s, o] = 1 表示 o 是 s 的猎物（排除同营养级/自食）"""
+    trophic_2d = trophic_levels[:, np.newaxis]
+    trophic_t = trophic_levels[np.newaxis, :]
+    
+    prey_min = trophic_2d - 1.5
+    prey_max = trophic_2d - 0.5
+    
+    prey_matrix = ((trophic_t >= prey_min) & (trophic_t <= prey_max)).astype(np.float32)
+    # 排除同营养级与自身
+    prey_matrix *= (np.abs(trophic_t - trophic_2d) > 1e-3).astype(np.float32)
+    return prey_matrix
+
+
+def _attenuate_distance_weights(
+    distance_weights: np.ndarray,
+    land_pref: np.ndarray,
+    sea_pref: np.ndarray,
+    coast_pref: np.ndarray,
+    land_mask: np.ndarray,
+    sea_mask: np.ndarray,
+    attenuation: float,
+    out: np.ndarray | None = None,
+) -> np.ndarray:
+    """【v3.0】栖息地衰减距离权重（衰减而非硬屏蔽）
+    
+    结果为 float32；out 给出时写入 out（可以就是 distance_weights 本身）。
+    """
+    if out is None:
+        out = np.array(distance_weights, dtype=np.float32)
+    elif out is not distance_weights:
+        np.copyto(out, distance_weights)
+    
+    land_only = land_pref > sea_pref + 0.2
+    sea_only = sea_pref > land_pref + 0.2
+    amphibious = (coast_pref > 0.3) | ((land_pref > 0.3) & (sea_pref > 0.3))
+    
+    # 陆地物种在海洋、海洋物种在陆地：衰减而非 0
+    np.multiply(out, np.float32(attenuation), out=out, where=land_only & ~land_mask)
+    np.multiply(out, np.float32(attenuation), out=out, where=sea_only & ~sea_mask)
+    # 两栖物种：陆地 1.0，海洋 0.7
+    medium_factor = land_mask * np.float32(1.0) + sea_mask * np.float32(0.7)
+    np.multiply(out, medium_factor, out=out, where=amphibious)
+    return out
+
+
+def _adjust_migration_scores(
+    result: np.ndarray,
+    mortality_rates: np.ndarray | None,
+    mortality_stats: tuple[np.ndarray, np.ndarray, np.ndarray] | None,
+    external_bonus: np.ndarray | None,
+    decline_streaks: np.ndarray,
+    habitat: tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray] | None,
+    distance_weights: np.ndarray,
+    species_mobility: np.ndarray,
+    scratch: np.ndarray | None = None,
+) -> np.ndarray:
+    """迁徙分数后处理：梯度/避难所/外部加成、慢性衰退、栖息地连通性、长跳衰减
+    
+    原地修改 float32 的 result 并返回。
+    
+    Args:
+        mortality_stats: 每个物种在整张地图上的 (最大死亡率, 最小死亡率, 高死亡格子占比)
+        habitat: (陆地偏好, 海洋偏好, 陆地掩码, 海洋掩码)，环境通道不足时为 None
+        scratch: 与 result 同形状的 float32 临时缓冲区（None 时临时分配）
+    """
+    if scratch is None:
+        scratch = np.empty_like(result)
+    
+    if mortality_rates is not None and mortality_stats is not None:
+        death_max, death_min, critical_ratio = mortality_stats
+        valid_grad = (death_max - death_min >= 0.10) & (death_max > 1e-6)
+        np.subtract(death_max, mortality_rates, out=scratch)
+        scratch /= death_max + np.float32(1e-6)
+        scratch *= valid_grad
+        scratch *= np.float32(0.3)
+        result += scratch
+        
+        refuge_trigger = critical_ratio >= 0.50
+        np.subtract(np.float32(1.0), mortality_rates, out=scratch)
+        scratch *= refuge_trigger
+        scratch *= np.float32(0.5)
+        result += scratch
+    
+    # 外部事件/embedding 加成
+    if external_bonus is not None:
+        result += external_bonus.astype(np.float32, copy=False)
+    
+    # 慢性衰退：提升整体迁徙意愿
+    np.multiply(result, np.float32(1.3), out=result, where=decline_streaks >= 2)
+    
+    # 栖息地连通性：陆/海偏好与环境通道匹配
+    if habitat is not None:
+        land_pref, sea_pref, is_land, is_sea = habitat
+        land_only = (land_pref > 0.5) & (sea_pref < 0.1)
+        sea_only = (sea_pref > 0.5) & (land_pref < 0.1)
+        np.multiply(result, is_land, out=result, where=land_only)
+        np.multiply(result, is_sea, out=result, where=sea_only)
+    
+    # 保留非相邻地块用于长跳：按距离权重与机动性衰减
+    mobility_scale = np.clip(species_mobility, 0.5, 3.0).astype(np.float32, copy=False)
+    np.multiply(distance_weights, np.float32(0.5), out=scratch)
+    scratch *= mobility_scale
+    scratch += np.float32(0.5)
+    result *= scratch
+    return result
+
+
+def _trait_competition_strength(era_scaling: float) -> float:
+    """特质竞争强度（随时代调整）"""
+    base_strength = 0.08
+    if era_scaling > 1.5:
+        base_strength *= max(0.6, 1.0 / (era_scaling ** 0.15))
+    return base_strength
 
 
 class TensorEcologyEngine:
@@ -219,24 +464,69 @@ class TensorEcologyEngine:
       - 新系统: ~50ms (Taichi GPU) / ~150ms (NumPy)
     """
     
-    def __init__(self, config: EcologyConfig | None = None):
+    def __init__(self, config: EcologyConfig | None = None, backend: str | None = None):
         self.config = config or EcologyConfig()
-        self._taichi_ready = _load_ecology_kernels()
+        # 内核实现：Taichi（GPU/CPU）或 NumPy 向量化，函数签名一致
+        # 首次计算时才加载（避免构造引擎即触发 Taichi 设备初始化）
+        self._requested_backend = backend
+        self._kernel_module: ModuleType | None = None
+        self._device: str | None = None
         
         # 缓存
         self._species_prefs_cache: np.ndarray | None = None
         self._suitability_cache: np.ndarray | None = None
         self._last_metrics: EcologyMetrics | None = None
         
-        if not self._taichi_ready:
-            raise RuntimeError("[GPU-only] Taichi GPU 初始化失败，无 NumPy fallback")
-        
-        logger.info("[TensorEcology] 使用 Taichi GPU 加速")
+        # 中间数组复用（跨回合保留，物种数/地图尺寸变大时才扩容）
+        self._arena = BufferArena()
+        # 融合步进的设备端数组（首次使用时按内核后端创建）
+        self._device_arena: DeviceArena | None = None
+        # 多进程分片执行器（首次分片时创建，进程池与共享内存跨回合复用）
+        self._shard_executor: sharded_ecology.ShardedEcologyExecutor | None = None
+        # 背景层物种的降采样引擎（首次使用 LOD 时创建）
+        self._lod_child: TensorEcologyEngine | None = None
+    
+    @property
+    def _kernels(self) -> ModuleType:
+        """内核模块（首次访问时加载并初始化设备）"""
+        if self._kernel_module is None:
+            module, self._device = load_kernels(self._requested_backend)
+            self._kernel_module = instrument_kernels(module, self._device)
+            logger.info(f"[TensorEcology] 计算后端: {self._device}")
+        return self._kernel_module
     
     @property
     def backend(self) -> str:
-        """当前计算后端 - GPU-only 模式始终为 taichi"""
-        return "taichi"
+        """当前内核实现：taichi 或 numpy"""
+        return "numpy" if self.device == "numpy" else "taichi"
+    
+    @property
+    def device(self) -> str:
+        """实际设备：cuda/vulkan/metal/opengl/cpu（Taichi）或 numpy"""
+        self._kernels  # 触发延迟加载
+        return self._device
+    
+    def _sync(self) -> None:
+        """同步 Taichi 运行时（NumPy 后端无需同步）"""
+        if self.device != "numpy":
+            import taichi as ti
+            ti.sync()
+    
+    @property
+    def _device_buffers(self) -> DeviceArena:
+        """融合步进使用的设备端数组"""
+        if self._device_arena is None:
+            self._device_arena = DeviceArena(self._kernels)
+        return self._device_arena
+    
+    def _record_arena_stats(self, metrics: EcologyMetrics, before: ArenaStats) -> None:
+        """把本次调用的缓冲区统计写入 metrics"""
+        delta = self._arena.stats.since(before)
+        metrics.buffer_allocations = delta.allocations
+        metrics.buffer_reuses = delta.reuses
+        metrics.buffer_bytes_allocated = delta.allocated_bytes
+        metrics.input_copies = delta.input_copies
+        metrics.input_bytes_copied = delta.copied_bytes
     
     @property
     def last_metrics(self) -> EcologyMetrics | None:
@@ -249,7 +539,7 @@ class TensorEcologyEngine:
     
     def process_ecology(
         self,
-        pop: np.ndarray,
+        pop: np.ndarray | SparsePopulation,
         env: np.ndarray,
         species_params: np.ndarray,
         species_prefs: np.ndarray,
@@ -261,6 +551,7 @@ class TensorEcologyEngine:
         decline_streaks: np.ndarray | None = None,
         species_traits: np.ndarray | None = None,
         turn_years: int | None = None,
+        lod_mask: np.ndarray | None = None,
     ) -> EcologyResult:
         """统一生态计算入口 - 一次调用完成全部计算
         
@@ -268,7 +559,7 @@ class TensorEcologyEngine:
         【v3.0】支持世代缩放：根据 turn_years 和 generation_time 计算 effective_steps
         
         Args:
-            pop: 种群张量 (S, H, W)
+            pop: 种群张量 (S, H, W)，或占用列表 SparsePopulation
             env: 环境张量 (C, H, W)
             species_params: 物种参数 (S, F) - 耐受性等
             species_prefs: 物种偏好 (S, 7) - 温度/湿度/栖息地偏好
@@ -280,38 +571,70 @@ class TensorEcologyEngine:
             decline_streaks: 慢性衰退计数 (S,) - 可选
             species_traits: 物种特质 (S, 14) - 完整特质矩阵，用于精确宜居度计算
             turn_years: 【新】当前回合代表的年数（用于世代缩放）
+            lod_mask: (S,) True=背景层物种，lod_factor > 1 时在降采样网格上计算
         
         Returns:
             EcologyResult 包含更新后的种群和各阶段结果
+            （pop/mortality_rates 始终为稠密张量，稀疏布局额外返回 sparse_pop）
         """
+        if lod_mask is not None and self.config.lod_factor > 1 and np.any(lod_mask):
+            return self._process_ecology_lod(
+                pop, env, species_params, species_prefs, turn_index, trophic_levels,
+                pressure_overlay, cooldown_mask, external_bonus, decline_streaks,
+                species_traits, turn_years, lod_mask,
+            )
+        
         start_time = time.perf_counter()
+        arena_before = self._arena.stats
         S, H, W = pop.shape
         
         # 【v3.0】获取回合年数
         if turn_years is None:
             turn_years = self.config.turn_years
         
-        # 同步 Taichi 运行时（确保与主线程编译的内核兼容）
-        import taichi as ti
-        ti.sync()
+        # 【新增】选择计算布局：低占用率时只在占用格子上计算
+        layout = self._select_layout(pop, species_traits)
+        sparse_pop = None
+        if layout == LAYOUT_SPARSE:
+            sparse_pop = pop if isinstance(pop, SparsePopulation) else SparsePopulation.from_dense(pop)
+            total_before = float(sparse_pop.values.sum())
+        else:
+            if isinstance(pop, SparsePopulation):
+                pop = pop.to_dense()
+            total_before = float(pop.sum())
+        
+        use_trait_system = species_traits is not None
+        chunk, memory_budget, shard_workers = None, 0, 0
+        if sparse_pop is None:
+            chunk, memory_budget = self._select_chunk_size(S, H, W, use_trait_system)
+            shard_workers = self._select_shard_workers(S, use_trait_system)
+            if shard_workers:
+                chunk = sharded_ecology.shard_block_size(S, shard_workers, chunk)
         
         metrics = EcologyMetrics(
             species_count=S,
             tile_count=H * W,
-            backend=self.backend,
-            total_population_before=float(pop.sum()),
+            # 稀疏/分块内核为 NumPy 实现
+            backend="numpy" if layout == LAYOUT_SPARSE or chunk is not None else self.backend,
+            layout=layout,
+            occupancy_ratio=occupancy_ratio(sparse_pop if sparse_pop is not None else pop),
+            total_population_before=total_before,
+            memory_budget_bytes=memory_budget,
+            shard_workers=shard_workers,
+            computed_cells=S * H * W,
         )
         
-        # 确保数据类型
-        pop = pop.astype(np.float32)
-        env = env.astype(np.float32)
-        species_params = species_params.astype(np.float32)
-        species_prefs = species_prefs.astype(np.float32)
+        # 确保数据类型（已是 C 连续 float32 的输入零拷贝透传，内核只读不写）
+        if sparse_pop is None:
+            pop = self._arena.as_float32(pop)
+        env = self._arena.as_float32(env)
+        species_params = self._arena.as_float32(species_params)
+        species_prefs = self._arena.as_float32(species_prefs)
         
         if trophic_levels is None:
             trophic_levels = np.ones(S, dtype=np.float32)
         else:
-            trophic_levels = trophic_levels.astype(np.float32)
+            trophic_levels = self._arena.as_float32(trophic_levels)
         
         if cooldown_mask is None:
             cooldown_mask = np.ones(S, dtype=bool)
@@ -323,9 +646,8 @@ class TensorEcologyEngine:
             decline_streaks = decline_streaks.astype(np.int32, copy=False)
         
         # 【新】处理特质矩阵
-        use_trait_system = species_traits is not None
         if use_trait_system:
-            species_traits = species_traits.astype(np.float32)
+            species_traits = self._arena.as_float32(species_traits)
         
         # 获取时代缩放因子
         era_scaling = self._get_era_scaling(turn_index)
@@ -399,7 +721,10 @@ class TensorEcologyEngine:
         )
         
         # 资源压力 & 机动性 & 预估增长率
-        resource_pressure = pop.sum(axis=(1, 2))
+        if sparse_pop is not None:
+            resource_pressure = sparse_pop.species_totals()
+        else:
+            resource_pressure = pop.sum(axis=(1, 2))
         if env.shape[0] > 3:
             total_resource = float(np.maximum(env[3].sum(), 1e-6))
             resource_pressure = np.clip(resource_pressure / total_resource, 0.0, 2.0).astype(np.float32)
@@ -418,6 +743,34 @@ class TensorEcologyEngine:
         elif species_params.shape[1] >= 4:
             growth_rates = np.clip(species_params[:, 3], 0.0, 5.0).astype(np.float32)
         
+        if sparse_pop is not None:
+            return self._process_ecology_sparse(
+                sparse_pop, env, species_prefs, species_traits, trophic_levels,
+                pressure_overlay, cooldown_mask, external_bonus, decline_streaks,
+                turn_index, era_scaling, birth_scale, mortality_scale, diffusion_scale,
+                migration_scale, resource_pressure, growth_rates, species_mobility,
+                metrics, start_time, arena_before,
+            )
+        
+        if chunk is not None:
+            return self._process_ecology_chunked(
+                pop, env, species_prefs, species_traits, trophic_levels,
+                pressure_overlay, cooldown_mask, external_bonus, decline_streaks,
+                turn_index, era_scaling, birth_scale, mortality_scale, diffusion_scale,
+                migration_scale, resource_pressure, growth_rates, species_mobility,
+                chunk, metrics, start_time, arena_before,
+                runner=self._shard_runner(shard_workers) if shard_workers else None,
+            )
+        
+        if cfg.stepping == STEPPING_FUSED:
+            return self._process_ecology_fused(
+                pop, env, species_params, species_prefs, species_traits, trophic_levels,
+                pressure_overlay, cooldown_mask, external_bonus, decline_streaks,
+                turn_index, era_scaling, birth_scale, mortality_scale, diffusion_scale,
+                migration_scale, resource_pressure, growth_rates, species_mobility,
+                metrics, start_time, arena_before,
+            )
+        
         # === 阶段1：宜居度计算（先于死亡率）===
         t0 = time.perf_counter()
         if use_trait_system:
@@ -445,42 +798,39 @@ class TensorEcologyEngine:
         # 应用死亡率
         pop_after_death = self._apply_mortality_tensor(pop, mortality_rates)
         
-        # 计算死亡统计
-        death_counts = (pop - pop_after_death).sum(axis=(1, 2))
+        # 计算死亡统计（有种群格子上的死亡率，迁徙压力信号同样使用）
+        arena = self._arena
+        death_counts = np.subtract(pop, pop_after_death, out=arena.empty("death_delta", pop.shape)).sum(axis=(1, 2))
         survivor_counts = pop_after_death.sum(axis=(1, 2))
-        metrics.avg_mortality_rate = float(mortality_rates[pop > 0].mean()) if (pop > 0).any() else 0.0
+        pop_mask = np.greater(pop, 0, out=arena.empty("pop_mask", pop.shape, np.bool_))
+        mortality_masked = arena.zeros("mortality_masked", pop.shape)
+        np.copyto(mortality_masked, mortality_rates, where=pop_mask)
+        occupied_total = int(np.count_nonzero(pop_mask))
+        metrics.avg_mortality_rate = float(mortality_masked.sum() / occupied_total) if occupied_total else 0.0
         
         # === 阶段3：扩散计算 ===
         # 【v3.1】使用缓冲后的 diffusion_scale，迭代次数限制
         t0 = time.perf_counter()
         
-        # 计算扩散迭代次数（限制最大次数）
-        if turn_index < 30 and cfg.era_scaling_enabled:
-            dispersal_iterations = min(
-                cfg.early_dispersal_iterations,
-                max(1, int(np.mean(diffusion_scale) ** 0.5))
-            )
-        else:
-            dispersal_iterations = 1
-        
-        # 调整基础扩散率（使用缓冲后的 diffusion_scale）
-        mean_diffusion_scale = float(np.mean(diffusion_scale))
-        adjusted_diffusion_rate = min(
-            cfg.max_diffusion_rate,
-            cfg.base_diffusion_rate * mean_diffusion_scale
+        dispersal_iterations, adjusted_diffusion_rate = self._dispersal_schedule(
+            turn_index, diffusion_scale
         )
         
-        pop_after_dispersal = pop_after_death.copy()
+        # 两个缓冲区交替作为输入/输出，避免内核读写同一数组
+        pop_after_dispersal = pop_after_death
         for disp_iter in range(dispersal_iterations):
+            buffer = "dispersal_a" if disp_iter % 2 == 0 else "dispersal_b"
             if use_trait_system:
                 pop_after_dispersal = self._compute_trait_dispersal_tensor(
                     pop_after_dispersal, suitability, species_traits, env, 
-                    era_scaling, diffusion_scale, adjusted_diffusion_rate
+                    era_scaling, diffusion_scale, adjusted_diffusion_rate,
+                    buffer=buffer,
                 )
             else:
                 pop_after_dispersal = self._compute_dispersal_tensor(
                     pop_after_dispersal, suitability, era_scaling,
-                    diffusion_scale, adjusted_diffusion_rate
+                    diffusion_scale, adjusted_diffusion_rate,
+                    buffer=buffer,
                 )
         
         if dispersal_iterations > 1:
@@ -491,8 +841,6 @@ class TensorEcologyEngine:
         # === 阶段4：迁徙计算 ===
         t0 = time.perf_counter()
         # 提取每个物种的平均死亡率作为迁徙压力信号 - 向量化
-        pop_mask = pop > 0
-        mortality_masked = np.where(pop_mask, mortality_rates, 0.0)
         pop_counts = pop_mask.sum(axis=(1, 2))
         pop_counts = np.maximum(pop_counts, 1)  # 避免除零
         species_death_rates = mortality_masked.sum(axis=(1, 2)) / pop_counts
@@ -513,14 +861,17 @@ class TensorEcologyEngine:
         t0 = time.perf_counter()
         
         # 【缓冲5】压力-繁殖反相扣：高死亡时降低繁殖放大
+        occupied = np.greater(pop_after_migration, 0, out=pop_mask)
+        occupied_counts = occupied.sum(axis=(1, 2))
+        mortality_masked.fill(0)
+        np.copyto(mortality_masked, mortality_rates, where=occupied)
         avg_mortality_per_species = np.where(
-            (pop_after_migration > 0).sum(axis=(1, 2)) > 0,
-            np.where(pop_after_migration > 0, mortality_rates, 0).sum(axis=(1, 2)) / 
-            np.maximum((pop_after_migration > 0).sum(axis=(1, 2)), 1),
+            occupied_counts > 0,
+            mortality_masked.sum(axis=(1, 2)) / np.maximum(occupied_counts, 1),
             0.0
         )
         pressure_discount = np.clip(1.0 - avg_mortality_per_species, 0.3, 1.0)
-        adjusted_birth_scale = birth_scale * pressure_discount
+        adjusted_birth_scale = (birth_scale * pressure_discount).astype(np.float32)
         
         pop_after_reproduction = self._compute_reproduction_tensor(
             pop_after_migration, env, suitability, era_scaling, adjusted_birth_scale
@@ -543,27 +894,33 @@ class TensorEcologyEngine:
         # === 阶段7：净变化钳制 ===
         # 【v3.1 缓冲6】防止单步爆炸或瞬灭
         # 对每个格子的净变化设置 [-max_decline, +max_growth] 比例上限
-        net_change = final_pop - pop
-        max_growth = pop * cfg.max_net_growth_ratio
-        max_decline = pop * cfg.max_net_decline_ratio
+        net_change = np.subtract(final_pop, pop, out=arena.empty("net_change", pop.shape))
+        limit = arena.empty("clamp_limit", pop.shape)
+        clamped_change = arena.empty("clamped_change", pop.shape)
         
-        # 钳制净变化
-        clamped_change = np.clip(net_change, -max_decline, max_growth)
+        # 钳制净变化：clip(net_change, -max_decline, max_growth)
+        np.multiply(pop, -cfg.max_net_decline_ratio, out=limit)
+        np.maximum(net_change, limit, out=clamped_change)
+        np.multiply(pop, cfg.max_net_growth_ratio, out=limit)
+        np.minimum(clamped_change, limit, out=clamped_change)
         
-        # 应用钳制后的变化
-        final_pop = np.maximum(0.0, pop + clamped_change)
+        # 应用钳制后的变化（结果数组返回给调用方，不使用缓冲区）
+        final_pop = pop + clamped_change
+        np.maximum(final_pop, 0.0, out=final_pop)
         
         # 统计被钳制的程度
-        clamp_ratio = np.abs(net_change - clamped_change).sum() / (np.abs(net_change).sum() + 1e-6)
+        clamped_away = np.abs(np.subtract(net_change, clamped_change, out=limit), out=limit).sum()
+        clamp_ratio = clamped_away / (np.abs(net_change, out=net_change).sum() + 1e-6)
         if clamp_ratio > 0.05:
             logger.debug(f"[TensorEcology] 净变化钳制: {clamp_ratio:.1%} 的变化被限制")
         
         metrics.total_population_after = float(final_pop.sum())
         metrics.total_time_ms = (time.perf_counter() - start_time) * 1000
+        self._record_arena_stats(metrics, arena_before)
         self._last_metrics = metrics
         
         # 同步 Taichi 确保所有 GPU 操作完成
-        ti.sync()
+        self._sync()
         
         logger.info(
             f"[TensorEcology] 完成: {S}物种, {H}x{W}地图, "
@@ -574,7 +931,7 @@ class TensorEcologyEngine:
         
         return EcologyResult(
             pop=final_pop,
-            mortality_rates=mortality_rates,
+            mortality_rates=mortality_rates.copy(),  # 死亡率位于缓冲区，下一回合会被覆盖
             death_counts=death_counts.astype(np.int32),
             survivor_counts=survivor_counts.astype(np.int32),
             migrated_species=migrated,
@@ -582,194 +939,1080 @@ class TensorEcologyEngine:
         )
     
     # ========================================================================
-    # 张量化死亡率计算
+    # 融合步进：回合内数组常驻设备
     # ========================================================================
     
-    def _compute_mortality_tensor(
+    def _process_ecology_fused(
         self,
         pop: np.ndarray,
         env: np.ndarray,
         species_params: np.ndarray,
         species_prefs: np.ndarray,
+        species_traits: np.ndarray | None,
         trophic_levels: np.ndarray,
         pressure_overlay: np.ndarray | None,
+        cooldown_mask: np.ndarray,
+        external_bonus: np.ndarray | None,
+        decline_streaks: np.ndarray,
+        turn_index: int,
         era_scaling: float,
-        mortality_scale: np.ndarray | None = None,
-    ) -> np.ndarray:
-        """张量化多因子死亡率计算 - GPU 加速
+        birth_scale: np.ndarray,
+        mortality_scale: np.ndarray,
+        diffusion_scale: np.ndarray,
+        migration_scale: np.ndarray,
+        resource_pressure: np.ndarray,
+        growth_rates: np.ndarray,
+        species_mobility: np.ndarray,
+        metrics: EcologyMetrics,
+        start_time: float,
+        arena_before: ArenaStats,
+    ) -> EcologyResult:
+        """稠密布局的融合步进（与 staged 路径逐阶段对应，结果一致）
         
-        【v3.1】使用缓冲后的 mortality_scale（已带上限）
+        输入在回合开始时上传一次，宜居度、死亡率、多轮扩散、繁殖、竞争与
+        净变化钳制都在设备数组上完成，阶段之间的 NumPy 后处理由同名辅助内核
+        （kernel_clamp / kernel_overcapacity_clamp / kernel_clamp_net_change）代替。
+        迁徙评分依赖主机端后处理（距离衰减、梯度/避难所加成），是回合内唯一的
+        同步点：下载死亡率/扩散后种群/宜居度，迁徙后再上传。
         """
-        S, H, W = pop.shape
         cfg = self.config
+        dev = self._device_buffers
+        transfer_before = dev.stats
+        S, H, W = pop.shape
+        use_trait_system = species_traits is not None
+        kernels = self._kernels
+        metrics.stepping = STEPPING_FUSED
         
-        # 确保压力叠加层存在
+        # === 上传（每回合一次）===
+        d_pop = dev.upload("pop", pop)
+        d_env = dev.upload("env", _pad_env(env))
         if pressure_overlay is None:
-            pressure_overlay = np.zeros((1, H, W), dtype=np.float32)
+            d_pressure = dev.zeros("pressure", (1, H, W))
+        else:
+            d_pressure = dev.upload("pressure", pressure_overlay)
+        d_mortality_scale = dev.upload("mortality_scale", mortality_scale)
+        d_diffusion_scale = dev.upload("diffusion_scale", diffusion_scale)
+        if use_trait_system:
+            d_traits = dev.upload("traits", species_traits)
+        else:
+            d_prefs = dev.upload("prefs", species_prefs)
         
-        # 准备 mortality_scale（已在上层计算时带上限）
-        if mortality_scale is None:
-            mortality_scale_arr = np.ones(S, dtype=np.float32)
+        # === 阶段1-2：宜居度 + 死亡率 ===
+        t0 = time.perf_counter()
+        d_suitability = dev.empty("suitability", (S, H, W))
+        d_mortality = dev.empty("mortality", (S, H, W))
+        if use_trait_system:
+            kernels.kernel_compute_trait_suitability(d_env, d_traits, d_suitability)
+            kernels.kernel_trait_mortality_v2(
+                d_pop, d_env, d_traits, d_suitability, d_pressure, d_mortality_scale,
+                d_mortality, float(cfg.base_mortality), float(era_scaling),
+            )
         else:
-            mortality_scale_arr = mortality_scale.astype(np.float32)
+            habitat_mask = dev.full("habitat_mask", (S, H, W), 1.0)
+            kernels.kernel_compute_suitability(d_env, d_prefs, habitat_mask, d_suitability)
+            kernels.kernel_multifactor_mortality_v2(
+                d_pop, d_env, d_prefs, dev.upload("params", species_params),
+                dev.upload("trophic", trophic_levels), d_pressure, d_mortality_scale,
+                d_mortality,
+                float(cfg.base_mortality),
+                float(cfg.temp_mortality_weight),
+                float(cfg.competition_weight),
+                float(cfg.resource_weight),
+                float(cfg.capacity_multiplier),
+                float(era_scaling),
+            )
+        kernels.kernel_clamp(d_mortality, 0.01, 0.95, d_mortality)
+        d_after_death = dev.empty("pop_after_death", (S, H, W))
+        kernels.kernel_apply_mortality(d_pop, d_mortality, d_after_death)
+        metrics.mortality_time_ms = (time.perf_counter() - t0) * 1000
         
-        # === Taichi GPU 计算 ===
-        result = np.zeros((S, H, W), dtype=np.float32)
+        # === 阶段3：扩散（多轮迭代在设备上交替读写两个数组）===
+        t0 = time.perf_counter()
+        dispersal_iterations, diffusion_rate = self._dispersal_schedule(turn_index, diffusion_scale)
+        d_dispersed = d_after_death
+        for disp_iter in range(dispersal_iterations):
+            d_next = dev.empty("dispersal_a" if disp_iter % 2 == 0 else "dispersal_b", (S, H, W))
+            if use_trait_system:
+                kernels.kernel_trait_diffusion_v2(
+                    d_dispersed, d_suitability, d_traits, d_env, d_diffusion_scale, d_next,
+                    float(diffusion_rate),
+                    float(cfg.background_diffusion_rate),
+                    float(cfg.density_pressure_threshold),
+                    float(cfg.suit_escape_threshold),
+                )
+            else:
+                kernels.kernel_advanced_diffusion_v2(
+                    d_dispersed, d_suitability, d_diffusion_scale, d_next,
+                    float(diffusion_rate),
+                    float(cfg.background_diffusion_rate),
+                    float(cfg.density_pressure_threshold),
+                    float(cfg.suit_escape_threshold),
+                )
+            d_dispersed = d_next
+        metrics.dispersal_time_ms = (time.perf_counter() - t0) * 1000
         
-        # 确保环境张量有足够的通道
-        C = env.shape[0]
-        if C < 7:
-            padded_env = np.zeros((7, H, W), dtype=np.float32)
-            padded_env[:C] = env
-            if C <= 4:
-                padded_env[4] = 1.0  # 默认陆地
-            env = padded_env
-        
-        _taichi_kernels.kernel_multifactor_mortality_v2(
-            pop.astype(np.float32),
-            env.astype(np.float32),
-            species_prefs.astype(np.float32),
-            species_params.astype(np.float32),
-            trophic_levels.astype(np.float32),
-            pressure_overlay.astype(np.float32),
-            mortality_scale_arr,  # 【v3.1】使用缓冲后的 mortality_scale
-            result,
-            float(cfg.base_mortality),
-            float(cfg.temp_mortality_weight),
-            float(cfg.competition_weight),
-            float(cfg.resource_weight),
-            float(cfg.capacity_multiplier),
-            float(era_scaling),
-        )
+        # === 同步点：迁徙评分需要主机端后处理 ===
+        t0 = time.perf_counter()
+        mortality_rates = dev.download(d_mortality)
+        pop_after_dispersal = dev.download(d_dispersed)
+        suitability = dev.download(d_suitability) if dev.on_device else d_suitability
         
-        total_mortality = result
+        # 死亡统计（主机端，与 staged 路径相同的表达式）
+        pop_after_death = pop * (1.0 - mortality_rates)
+        death_counts = (pop - pop_after_death).sum(axis=(1, 2))
+        survivor_counts = pop_after_death.sum(axis=(1, 2))
+        pop_mask = pop > 0
+        metrics.avg_mortality_rate = float(mortality_rates[pop_mask].mean()) if pop_mask.any() else 0.0
+        pop_counts = np.maximum(pop_mask.sum(axis=(1, 2)), 1)
+        species_death_rates = (
+            np.where(pop_mask, mortality_rates, 0.0).sum(axis=(1, 2)) / pop_counts
+        ).astype(np.float32)
         
-        return np.clip(total_mortality, 0.01, 0.95).astype(np.float32)
-    
-    def _apply_mortality_tensor(
-        self,
-        pop: np.ndarray,
-        mortality: np.ndarray,
-    ) -> np.ndarray:
-        """应用死亡率 [Taichi GPU]"""
-        result = np.zeros_like(pop, dtype=np.float32)
-        _taichi_kernels.kernel_apply_mortality(
-            pop.astype(np.float32),
-            mortality.astype(np.float32),
-            result,
+        pop_after_migration, migrated = self._compute_migration_tensor(
+            pop_after_dispersal, env, species_prefs, species_traits, suitability,
+            species_death_rates, trophic_levels, cooldown_mask, era_scaling,
+            resource_pressure, growth_rates, species_mobility,
+            mortality_rates, external_bonus, decline_streaks,
+            turn_index, migration_scale,
         )
-        return result
-    
-    # ========================================================================
-    # 张量化扩散计算
-    # ========================================================================
-    
-    def _compute_suitability_tensor(
-        self,
-        env: np.ndarray,
-        species_prefs: np.ndarray,
-    ) -> np.ndarray:
-        """计算适宜度矩阵 [Taichi GPU]"""
-        S = species_prefs.shape[0]
-        C, H, W = env.shape
+        d_after_migration = dev.upload("pop_after_migration", pop_after_migration)
+        metrics.migration_time_ms = (time.perf_counter() - t0) * 1000
+        metrics.migrating_species = len(migrated)
         
-        # 确保环境张量有足够的通道
-        if C < 7:
-            padded_env = np.zeros((7, H, W), dtype=np.float32)
-            padded_env[:C] = env
-            if C <= 4:
-                padded_env[4] = 1.0  # 默认陆地
-            env = padded_env
-        
-        habitat_mask = np.ones((S, H, W), dtype=np.float32)
-        result = np.zeros((S, H, W), dtype=np.float32)
-        _taichi_kernels.kernel_compute_suitability(
-            env.astype(np.float32),
-            species_prefs.astype(np.float32),
-            habitat_mask,
-            result,
+        # === 阶段5：繁殖（压力-繁殖反相扣与超容量判定用主机端已有的迁徙结果）===
+        t0 = time.perf_counter()
+        occupied = pop_after_migration > 0
+        occupied_counts = occupied.sum(axis=(1, 2))
+        avg_mortality_per_species = np.where(
+            occupied_counts > 0,
+            np.where(occupied, mortality_rates, 0).sum(axis=(1, 2)) / np.maximum(occupied_counts, 1),
+            0.0,
         )
-        return result
-    
-    def _compute_trait_suitability_tensor(
-        self,
-        env: np.ndarray,
-        species_traits: np.ndarray,
-    ) -> np.ndarray:
-        """计算基于特质的精确适宜度矩阵 [Taichi GPU]
+        adjusted_birth_scale = birth_scale * np.clip(1.0 - avg_mortality_per_species, 0.3, 1.0)
+        capacity = self._capacity_map(env, era_scaling)
+        overcapacity = pop_after_migration.sum(axis=0) > capacity * cfg.overcapacity_threshold
+        
+        d_reproduced = dev.empty("reproduction", (S, H, W))
+        kernels.kernel_reproduction_v2(
+            d_after_migration, d_suitability, dev.upload("capacity", capacity),
+            dev.upload("birth_scale", adjusted_birth_scale),
+            float(self._birth_rate(era_scaling, adjusted_birth_scale)),
+            d_reproduced,
+        )
+        if overcapacity.any():
+            kernels.kernel_overcapacity_clamp(
+                d_after_migration, dev.upload("overcapacity", overcapacity),
+                float(cfg.overcapacity_birth_clamp), d_reproduced,
+            )
+        metrics.reproduction_time_ms = (time.perf_counter() - t0) * 1000
         
-        【新】使用完整特质矩阵进行精确环境-特质匹配
-        """
-        S = species_traits.shape[0]
-        C, H, W = env.shape
+        # === 阶段6：竞争 ===
+        t0 = time.perf_counter()
+        d_competed = dev.empty("competition", (S, H, W))
+        if use_trait_system:
+            d_fitness = dev.empty("local_fitness", (S, H, W))
+            kernels.kernel_compute_local_fitness(d_suitability, d_traits, d_reproduced, d_fitness)
+            d_overlap = dev.empty("niche_overlap", (S, S))
+            kernels.kernel_compute_niche_overlap_matrix(d_traits, d_overlap)
+            kernels.kernel_apply_trait_competition(
+                d_reproduced, d_fitness, d_overlap, d_competed,
+                float(_trait_competition_strength(era_scaling)),
+            )
+        else:
+            base_strength = 0.05
+            if era_scaling > 1.5:
+                base_strength *= max(0.5, 1.0 / (era_scaling ** 0.2))
+            kernels.kernel_competition(d_reproduced, d_suitability, d_competed, float(base_strength))
+        metrics.competition_time_ms = (time.perf_counter() - t0) * 1000
         
-        # 确保环境张量有足够的通道
-        if C < 7:
-            padded_env = np.zeros((7, H, W), dtype=np.float32)
-            padded_env[:C] = env
-            if C <= 4:
-                padded_env[4] = 1.0  # 默认陆地
-            env = padded_env
-        
-        result = np.zeros((S, H, W), dtype=np.float32)
-        _taichi_kernels.kernel_compute_trait_suitability(
-            env.astype(np.float32),
-            species_traits.astype(np.float32),
-            result,
+        # === 阶段7：净变化钳制，只回传最终种群 ===
+        d_final = dev.empty("final_pop", (S, H, W))
+        kernels.kernel_clamp_net_change(
+            d_pop, d_competed,
+            float(cfg.max_net_growth_ratio), float(cfg.max_net_decline_ratio),
+            d_final,
+        )
+        final_pop = dev.download(d_final)
+        
+        transfer = dev.stats.since(transfer_before)
+        metrics.device_uploads = transfer.uploads
+        metrics.device_downloads = transfer.downloads
+        metrics.device_bytes_transferred = transfer.upload_bytes + transfer.download_bytes
+        metrics.total_population_after = float(final_pop.sum())
+        metrics.total_time_ms = (time.perf_counter() - start_time) * 1000
+        self._record_arena_stats(metrics, arena_before)
+        self._last_metrics = metrics
+        
+        logger.info(
+            f"[TensorEcology] 完成(fused): {S}物种, {H}x{W}地图, "
+            f"耗时={metrics.total_time_ms:.1f}ms, 后端={metrics.backend}, "
+            f"传输={metrics.device_uploads}↑/{metrics.device_downloads}↓ "
+            f"{metrics.device_bytes_transferred / 2**20:.1f}MB"
+        )
+        
+        return EcologyResult(
+            pop=final_pop,
+            mortality_rates=mortality_rates,
+            death_counts=death_counts.astype(np.int32),
+            survivor_counts=survivor_counts.astype(np.int32),
+            migrated_species=migrated,
+            metrics=metrics,
         )
-        return result
     
-    def _compute_trait_mortality_tensor(
+    # ========================================================================
+    # 物种分块：按内存预算逐块计算
+    # ========================================================================
+    
+    def _memory_budget(self) -> int | None:
+        """分块使用的内存预算（字节），无法测得可用内存时为 None"""
+        cfg = self.config
+        if cfg.chunk_memory_budget_bytes > 0:
+            return int(cfg.chunk_memory_budget_bytes)
+        available = available_memory_bytes()
+        if available is None:
+            return None
+        return int(available * cfg.chunk_memory_fraction)
+    
+    def _select_chunk_size(
+        self,
+        S: int,
+        H: int,
+        W: int,
+        use_trait_system: bool,
+    ) -> tuple[int | None, int]:
+        """选择物种块大小，返回 (块大小或 None=整体计算, 内存预算)"""
+        cfg = self.config
+        if cfg.chunking == CHUNKING_OFF or S == 0:
+            return None, 0
+        budget = self._memory_budget()
+        if not use_trait_system:
+            # 分块内核只实现了特质系统路径
+            if cfg.chunking == CHUNKING_ON:
+                logger.debug("[TensorEcology] 无特质矩阵，物种分块回退为整体计算")
+            return None, budget or 0
+        if cfg.chunking == CHUNKING_AUTO and (
+            budget is None or chunked_ecology.dense_working_set(S, H, W) <= budget
+        ):
+            return None, budget or 0
+        
+        if cfg.chunk_species > 0:
+            chunk = min(cfg.chunk_species, S)
+        elif budget is not None:
+            chunk = chunked_ecology.choose_chunk_size(S, H, W, budget, cfg.min_chunk_species)
+        else:
+            chunk = S
+        if budget is not None and chunked_ecology.chunked_working_set(S, H, W, chunk) > budget:
+            logger.warning(
+                f"[TensorEcology] 内存预算 {budget / 2**20:.0f}MB 不足以容纳 {S}物种×{H}x{W} 的常驻数组，"
+                f"按每块 {chunk} 个物种计算"
+            )
+        return chunk, budget or 0
+    
+    def _select_shard_workers(self, S: int, use_trait_system: bool) -> int:
+        """多进程分片的工作进程数（0 = 不分片）"""
+        workers = self.config.shard_workers
+        if workers < 0:
+            workers = sharded_ecology.default_workers()
+        workers = min(workers, S)
+        if workers <= 1 or not use_trait_system:
+            return 0
+        if self.device not in ("numpy", "cpu"):
+            logger.debug(f"[TensorEcology] {self.device} 后端不使用多进程分片")
+            return 0
+        return workers
+    
+    def _shard_runner(self, workers: int) -> sharded_ecology.ShardedEcologyExecutor:
+        """分片执行器（进程数变化时重建）"""
+        executor = self._shard_executor
+        if executor is None or executor.workers != workers:
+            if executor is not None:
+                executor.close()
+            executor = self._shard_executor = sharded_ecology.ShardedEcologyExecutor(workers)
+        return executor
+    
+    def _process_ecology_chunked(
         self,
         pop: np.ndarray,
         env: np.ndarray,
+        species_prefs: np.ndarray,
         species_traits: np.ndarray,
-        suitability: np.ndarray,
+        trophic_levels: np.ndarray,
         pressure_overlay: np.ndarray | None,
+        cooldown_mask: np.ndarray,
+        external_bonus: np.ndarray | None,
+        decline_streaks: np.ndarray,
+        turn_index: int,
         era_scaling: float,
-        mortality_scale: np.ndarray | None = None,
-    ) -> np.ndarray:
-        """基于特质的精确死亡率计算 [Taichi GPU]
-        
-        【v3.1】使用缓冲后的 mortality_scale（已带上限）
+        birth_scale: np.ndarray,
+        mortality_scale: np.ndarray,
+        diffusion_scale: np.ndarray,
+        migration_scale: np.ndarray,
+        resource_pressure: np.ndarray,
+        growth_rates: np.ndarray,
+        species_mobility: np.ndarray,
+        chunk: int,
+        metrics: EcologyMetrics,
+        start_time: float,
+        arena_before: ArenaStats,
+        runner=None,
+    ) -> EcologyResult:
+        """按物种块计算的稠密特质系统路径（与 staged 路径逐阶段对应）
+        
+        各阶段由 chunked_ecology 的阶段函数逐块执行，runner 为进程内的 BlockRunner
+        或多进程的 ShardedEcologyExecutor。
+        常驻数组：输入种群、宜居度、死亡率、两个中间种群（扩散→繁殖 / 迁徙）、
+        局部适应度、结果；其余临时数组只有块大小。
+        跨物种项在进入依赖它的阶段前由全部物种汇总：
+        - 死亡：地块总种群（输入种群）
+        - 迁徙：全局拥挤度、地块总种群、猎物密度（扩散后种群）
+        - 繁殖：地块总种群与超容量掩码、平均 birth_scale（迁徙后种群）
+        - 竞争：全部物种的局部适应度与生态位重叠
         """
-        S, H, W = pop.shape
         cfg = self.config
+        S, H, W = pop.shape
+        chunks = chunked_ecology.species_chunks(S, chunk)
+        metrics.chunks = len(chunks)
+        metrics.chunk_species = chunk
+        if runner is None:
+            runner = chunked_ecology.BlockRunner(self._arena)
+        runner.begin()
+        
+        overlay = pressure_overlay if pressure_overlay is not None else np.zeros((1, H, W), dtype=np.float32)
+        dispersal_iterations, adjusted_diffusion_rate = self._dispersal_schedule(
+            turn_index, diffusion_scale
+        )
+        runner.put("pop", pop)
+        runner.put("env7", _pad_env(env))
+        runner.put("overlay", self._arena.as_float32(overlay))
+        runner.put("traits", species_traits)
+        runner.put("mortality_scale", self._arena.as_float32(mortality_scale))
+        runner.put("diffusion_scale", self._arena.as_float32(diffusion_scale))
+        runner.put("total_pop", pop.sum(axis=0))
+        runner.zeros("suitability", (S, H, W))
+        runner.zeros("dispersed", (S, H, W))
+        runner.output("mortality", (S, H, W))
+        
+        # === 阶段1/2/3：宜居度 + 死亡率 + 扩散（物种独立，块内完成全部扩散轮次）===
+        t0 = time.perf_counter()
+        survival = runner.run(chunked_ecology.phase_survival, {
+            "base_mortality": cfg.base_mortality,
+            "era_scaling": era_scaling,
+            "dispersal_iterations": dispersal_iterations,
+            "diffusion_rate": adjusted_diffusion_rate,
+            "background_rate": cfg.background_diffusion_rate,
+            "density_threshold": cfg.density_pressure_threshold,
+            "escape_threshold": cfg.suit_escape_threshold,
+        }, chunks)
+        elapsed_ms = (time.perf_counter() - t0) * 1000
+        # 多进程时各块耗时之和大于墙钟时间：按块内耗时比例拆分墙钟时间
+        mortality_ms = sum(s["mortality_ms"] for s in survival)
+        dispersal_ms = sum(s["dispersal_ms"] for s in survival)
+        mortality_share = mortality_ms / (mortality_ms + dispersal_ms) if mortality_ms + dispersal_ms > 0 else 0.5
+        metrics.mortality_time_ms = elapsed_ms * mortality_share
+        metrics.dispersal_time_ms = elapsed_ms - metrics.mortality_time_ms
+        
+        death_counts = np.concatenate([s["death_counts"] for s in survival])
+        survivor_counts = np.concatenate([s["survivor_counts"] for s in survival])
+        species_death_rates = np.concatenate([s["death_rates"] for s in survival])
+        occupied_cells = sum(s["occupied_cells"] for s in survival)
+        occupied_mortality = sum(s["occupied_mortality"] for s in survival)
+        metrics.avg_mortality_rate = occupied_mortality / occupied_cells if occupied_cells else 0.0
+        
+        # === 阶段4：迁徙 ===
+        t0 = time.perf_counter()
+        total_pop = sum(s["tile_total"] for s in survival)
+        global_crowding = self._global_crowding(total_pop.sum(), env)
+        crowding_bonus = 0.0
+        if global_crowding > 0.6:
+            crowding_bonus = cfg.crowding_migration_bonus * (global_crowding - 0.6) / 0.4
+            logger.debug(f"[迁徙] 全局拥挤={global_crowding:.2f}, 加成={crowding_bonus:.3f}")
         
-        # 确保压力叠加层存在
-        if pressure_overlay is None:
-            pressure_overlay = np.zeros((1, H, W), dtype=np.float32)
+        runner.put("total_pop", total_pop)
+        runner.put("prefs", species_prefs)
+        runner.put("trophic", trophic_levels)
+        runner.put("prey_matrix", _prey_matrix(trophic_levels))
+        runner.put("death_rates", species_death_rates)
+        runner.put("resource_pressure", resource_pressure.astype(np.float32))
+        runner.put("migration_rates", self._migration_rates(
+            species_death_rates, growth_rates, resource_pressure, era_scaling, migration_scale
+        ).astype(np.float32))
+        runner.put("mobility", species_mobility)
+        runner.put("decline_streaks", decline_streaks)
+        runner.put("cooldown", cooldown_mask)
+        if external_bonus is not None:
+            runner.put("external_bonus", external_bonus)
+        runner.zeros("migrated", (S, H, W))
+        
+        migration = runner.run(chunked_ecology.phase_migration, {
+            "max_distance": self._migration_max_distance(species_mobility, migration_scale),
+            "habitat": env.shape[0] >= 6 and species_prefs.shape[1] >= 6,
+            "habitat_attenuation": cfg.habitat_attenuation_factor,
+            "pressure_threshold": float(cfg.pressure_threshold),
+            "saturation_threshold": float(cfg.saturation_threshold),
+            "crowding_bonus": crowding_bonus,
+            "score_threshold": float(self._migration_score_threshold(turn_index)),
+            "long_jump": float(self._long_jump_rate(env, species_prefs, turn_index)),
+        }, chunks)
+        migrated = [idx for m in migration for idx in m["migrated"]]
+        metrics.migration_time_ms = (time.perf_counter() - t0) * 1000
+        metrics.migrating_species = len(migrated)
         
-        # 准备 mortality_scale
-        if mortality_scale is None:
-            mortality_scale_arr = np.ones(S, dtype=np.float32)
-        else:
-            mortality_scale_arr = mortality_scale.astype(np.float32)
+        # === 阶段5：繁殖（扩散结果已不再需要，复用其缓冲区）===
+        t0 = time.perf_counter()
+        avg_mortality_per_species = np.concatenate([m["avg_mortality"] for m in migration])
+        pressure_discount = np.clip(1.0 - avg_mortality_per_species, 0.3, 1.0)
+        adjusted_birth_scale = birth_scale * pressure_discount
+        birth_rate = self._birth_rate(era_scaling, adjusted_birth_scale)
+        capacity = self._capacity_map(env, era_scaling).astype(np.float32)
+        total_pop = sum(m["tile_total"] for m in migration)
+        
+        runner.put("total_pop", total_pop)
+        runner.put("capacity", capacity)
+        runner.put("overcapacity", total_pop > capacity * cfg.overcapacity_threshold)
+        runner.put("birth_scale", adjusted_birth_scale.astype(np.float32))
+        runner.alias("reproduced", "dispersed")
+        runner.zeros("local_fitness", (S, H, W))
+        runner.run(chunked_ecology.phase_reproduction, {
+            "birth_rate": birth_rate,
+            "overcapacity_clamp": cfg.overcapacity_birth_clamp,
+        }, chunks)
+        metrics.reproduction_time_ms = (time.perf_counter() - t0) * 1000
         
-        # 确保环境张量有足够的通道
-        C = env.shape[0]
-        if C < 7:
-            padded_env = np.zeros((7, H, W), dtype=np.float32)
-            padded_env[:C] = env
-            if C <= 4:
-                padded_env[4] = 1.0
-            env = padded_env
-        
-        result = np.zeros((S, H, W), dtype=np.float32)
-        _taichi_kernels.kernel_trait_mortality_v2(
-            pop.astype(np.float32),
-            env.astype(np.float32),
-            species_traits.astype(np.float32),
-            suitability.astype(np.float32),
-            pressure_overlay.astype(np.float32),
-            mortality_scale_arr,  # 【v3.1】使用缓冲后的 mortality_scale
-            result,
-            float(cfg.base_mortality),
-            float(era_scaling),
-        )
+        # === 阶段6/7：竞争 + 净变化钳制 ===
+        t0 = time.perf_counter()
+        runner.put("niche_overlap", chunked_ecology.niche_overlap(species_traits))
+        runner.output("final", (S, H, W))
+        competition = runner.run(chunked_ecology.phase_competition, {
+            "competition_strength": _trait_competition_strength(era_scaling),
+            "max_net_decline_ratio": cfg.max_net_decline_ratio,
+            "max_net_growth_ratio": cfg.max_net_growth_ratio,
+        }, chunks)
+        metrics.competition_time_ms = (time.perf_counter() - t0) * 1000
         
-        return np.clip(result, 0.01, 0.95).astype(np.float32)
-    
+        change_total = sum(c[0] for c in competition)
+        clamped_total = sum(c[1] for c in competition)
+        clamp_ratio = clamped_total / (change_total + 1e-6)
+        if clamp_ratio > 0.05:
+            logger.debug(f"[TensorEcology] 净变化钳制: {clamp_ratio:.1%} 的变化被限制")
+        
+        final_pop = runner.result("final")
+        mortality_rates = runner.result("mortality")
+        runner.begin()
+        
+        metrics.total_population_after = float(final_pop.sum())
+        metrics.total_time_ms = (time.perf_counter() - start_time) * 1000
+        self._record_arena_stats(metrics, arena_before)
+        self._last_metrics = metrics
+        
+        mode = f"分片×{metrics.shard_workers}进程" if metrics.shard_workers else "分块"
+        logger.info(
+            f"[TensorEcology] 完成({mode}): {S}物种, {H}x{W}地图, "
+            f"{metrics.chunks}块×{chunk}物种, 耗时={metrics.total_time_ms:.1f}ms, "
+            f"平均死亡率={metrics.avg_mortality_rate:.1%}"
+        )
+        
+        return EcologyResult(
+            pop=final_pop,
+            mortality_rates=mortality_rates,
+            death_counts=death_counts.astype(np.int32),
+            survivor_counts=survivor_counts.astype(np.int32),
+            migrated_species=migrated,
+            metrics=metrics,
+        )
+    
+    # ========================================================================
+    # 细节层次：背景层物种在降采样网格上计算
+    # ========================================================================
+    
+    @property
+    def _lod_engine(self) -> TensorEcologyEngine:
+        """背景层物种的降采样引擎（迁徙距离以粗格计）"""
+        if self._lod_child is None:
+            cfg = self.config
+            self._lod_child = TensorEcologyEngine(
+                dataclasses.replace(
+                    cfg,
+                    lod_factor=1,
+                    max_migration_distance=max(1.0, cfg.max_migration_distance / cfg.lod_factor),
+                ),
+                backend=self._requested_backend,
+            )
+        return self._lod_child
+    
+    def _process_ecology_lod(
+        self,
+        pop: np.ndarray | SparsePopulation,
+        env: np.ndarray,
+        species_params: np.ndarray,
+        species_prefs: np.ndarray,
+        turn_index: int,
+        trophic_levels: np.ndarray | None,
+        pressure_overlay: np.ndarray | None,
+        cooldown_mask: np.ndarray | None,
+        external_bonus: np.ndarray | None,
+        decline_streaks: np.ndarray | None,
+        species_traits: np.ndarray | None,
+        turn_years: int | None,
+        lod_mask: np.ndarray,
+    ) -> EcologyResult:
+        """全分辨率物种与背景层物种分别计算后合并（见 lod_ecology）"""
+        start_time = time.perf_counter()
+        if isinstance(pop, SparsePopulation):
+            pop = pop.to_dense()
+        pop = np.asarray(pop, dtype=np.float32)
+        S, H, W = pop.shape
+        grid = lod_ecology.LodGrid(self.config.lod_factor, H, W)
+        fine, coarse = lod_ecology.species_tiers(lod_mask)
+        
+        def take(values: np.ndarray | None, idx: np.ndarray) -> np.ndarray | None:
+            return None if values is None else np.asarray(values)[idx]
+        
+        def coarsen(values: np.ndarray | None) -> np.ndarray | None:
+            return None if values is None else grid.block_mean(np.asarray(values, dtype=np.float32))
+        
+        def tier_kwargs(idx: np.ndarray) -> dict:
+            return dict(
+                species_params=species_params[idx],
+                species_prefs=species_prefs[idx],
+                turn_index=turn_index,
+                trophic_levels=take(trophic_levels, idx),
+                cooldown_mask=take(cooldown_mask, idx),
+                decline_streaks=take(decline_streaks, idx),
+                species_traits=take(species_traits, idx),
+                turn_years=turn_years,
+            )
+        
+        final_pop = np.zeros((S, H, W), dtype=np.float32)
+        mortality_rates = np.zeros((S, H, W), dtype=np.float32)
+        death_counts = np.zeros(S, dtype=np.int64)
+        survivor_counts = np.zeros(S, dtype=np.int64)
+        migrated: list[int] = []
+        results = []
+        
+        if fine.size:
+            result = self.process_ecology(
+                pop[fine], env, pressure_overlay=pressure_overlay,
+                external_bonus=take(external_bonus, fine), **tier_kwargs(fine),
+            )
+            final_pop[fine] = result.pop
+            mortality_rates[fine] = result.mortality_rates
+            death_counts[fine] = result.death_counts
+            survivor_counts[fine] = result.survivor_counts
+            migrated.extend(int(fine[i]) for i in result.migrated_species)
+            results.append(result)
+        
+        # 背景层：粗格密度计算，回到全分辨率时逐块质量守恒
+        density = grid.block_mean(pop[coarse])
+        result = self._lod_engine.process_ecology(
+            density, grid.block_mean(np.asarray(env, dtype=np.float32)),
+            pressure_overlay=coarsen(pressure_overlay),
+            external_bonus=coarsen(take(external_bonus, coarse)),
+            **tier_kwargs(coarse),
+        )
+        final_pop[coarse] = grid.redistribute(result.pop, pop[coarse])
+        mortality_rates[coarse] = grid.repeat(result.mortality_rates)
+        counts = grid.counts()
+        deaths = (density * result.mortality_rates * counts).sum(axis=(1, 2))
+        death_counts[coarse] = deaths
+        survivor_counts[coarse] = (density * counts).sum(axis=(1, 2)) - deaths
+        migrated.extend(int(coarse[i]) for i in result.migrated_species)
+        results.append(result)
+        
+        metrics = dataclasses.replace(
+            results[0].metrics,
+            species_count=S,
+            tile_count=H * W,
+            lod_factor=grid.factor,
+            lod_species=int(coarse.size),
+            computed_cells=int(fine.size * H * W + coarse.size * grid.cells),
+            migrating_species=len(migrated),
+            total_population_before=float(pop.sum()),
+            total_population_after=float(final_pop.sum()),
+        )
+        for name in (
+            "mortality_time_ms", "dispersal_time_ms", "migration_time_ms",
+            "reproduction_time_ms", "competition_time_ms",
+        ):
+            setattr(metrics, name, sum(getattr(r.metrics, name) for r in results))
+        occupied = pop > 0
+        metrics.avg_mortality_rate = float(mortality_rates[occupied].mean()) if occupied.any() else 0.0
+        metrics.total_time_ms = (time.perf_counter() - start_time) * 1000
+        self._last_metrics = metrics
+        
+        logger.info(
+            f"[TensorEcology] LOD: {fine.size} 物种全分辨率 {H}x{W}, "
+            f"{coarse.size} 背景物种 {grid.h}x{grid.w}（{grid.factor}x 降采样）, "
+            f"计算单元 {metrics.computed_cells}/{S * H * W}, 耗时={metrics.total_time_ms:.1f}ms"
+        )
+        
+        return EcologyResult(
+            pop=final_pop,
+            mortality_rates=mortality_rates,
+            death_counts=death_counts.astype(np.int32),
+            survivor_counts=survivor_counts.astype(np.int32),
+            migrated_species=sorted(migrated),
+            metrics=metrics,
+        )
+    
+    # ========================================================================
+    # 稀疏布局：只在占用格子及其可达邻域上计算
+    # ========================================================================
+    
+    def _select_layout(
+        self,
+        pop: np.ndarray | SparsePopulation,
+        species_traits: np.ndarray | None,
+    ) -> str:
+        """选择计算布局（稀疏布局只实现了特质系统路径）"""
+        cfg = self.config
+        if species_traits is None:
+            if cfg.layout == LAYOUT_SPARSE:
+                logger.debug("[TensorEcology] 无特质矩阵，稀疏布局回退为稠密")
+            return LAYOUT_DENSE
+        return select_layout(pop, cfg.layout, cfg.sparse_occupancy_threshold)
+    
+    def _process_ecology_sparse(
+        self,
+        sparse_pop: SparsePopulation,
+        env: np.ndarray,
+        species_prefs: np.ndarray,
+        species_traits: np.ndarray,
+        trophic_levels: np.ndarray,
+        pressure_overlay: np.ndarray | None,
+        cooldown_mask: np.ndarray,
+        external_bonus: np.ndarray | None,
+        decline_streaks: np.ndarray,
+        turn_index: int,
+        era_scaling: float,
+        birth_scale: np.ndarray,
+        mortality_scale: np.ndarray,
+        diffusion_scale: np.ndarray,
+        migration_scale: np.ndarray,
+        resource_pressure: np.ndarray,
+        growth_rates: np.ndarray,
+        species_mobility: np.ndarray,
+        metrics: EcologyMetrics,
+        start_time: float,
+        arena_before: ArenaStats,
+    ) -> EcologyResult:
+        """稀疏布局的生态计算（与稠密特质系统路径逐阶段对应）
+        
+        定义域随阶段扩展，保证覆盖稠密实现中所有可能非零的格子：
+        - 死亡：当前占用格子 P0（死亡率只在有种群处计算）
+        - 扩散：P0 的 k 步 4 邻域（k = 扩散迭代次数，每轮最多外扩一格）
+        - 迁徙：再并入迁徙源的 4 邻域与质心 max_distance 范围（长跳目标）
+        定义域外的格子种群恒为 0，死亡率与稠密实现一致地视为 0.01。
+        """
+        cfg = self.config
+        S, H, W = sparse_pop.shape
+        env7 = _pad_env(env)
+        base = sparse_pop.domain
+        pop0 = sparse_pop.values.astype(np.float32, copy=False)
+        
+        # === 阶段1/2：宜居度 + 死亡率 ===
+        t0 = time.perf_counter()
+        dispersal_iterations, adjusted_diffusion_rate = self._dispersal_schedule(
+            turn_index, diffusion_scale
+        )
+        domain = base.dilate(dispersal_iterations)
+        base_pos = domain.lookup(base.keys)
+        suitability = sparse_ecology.trait_suitability(domain, env7, species_traits)
+        
+        overlay = pressure_overlay if pressure_overlay is not None else np.zeros((1, H, W), dtype=np.float32)
+        mortality0 = sparse_ecology.trait_mortality(
+            base, pop0, suitability[base_pos], env7, species_traits,
+            self._arena.as_float32(overlay),
+            self._arena.as_float32(mortality_scale),
+            cfg.base_mortality, era_scaling,
+        )
+        metrics.mortality_time_ms = (time.perf_counter() - t0) * 1000
+        
+        pop_after_death = pop0 * (1.0 - mortality0)
+        death_counts = base.species_sum(pop0 - pop_after_death)
+        survivor_counts = base.species_sum(pop_after_death)
+        metrics.avg_mortality_rate = float(mortality0.mean()) if mortality0.size else 0.0
+        
+        # === 阶段3：扩散 ===
+        t0 = time.perf_counter()
+        pop_after_dispersal = np.zeros(domain.size, dtype=np.float32)
+        pop_after_dispersal[base_pos] = pop_after_death
+        diffusion_scale_arr = self._arena.as_float32(diffusion_scale)
+        for _ in range(dispersal_iterations):
+            pop_after_dispersal = sparse_ecology.trait_diffusion(
+                domain, pop_after_dispersal, suitability, env7, species_traits,
+                diffusion_scale_arr, adjusted_diffusion_rate,
+                cfg.background_diffusion_rate, cfg.density_pressure_threshold,
+                cfg.suit_escape_threshold,
+            )
+        metrics.dispersal_time_ms = (time.perf_counter() - t0) * 1000
+        
+        # === 阶段4：迁徙 ===
+        t0 = time.perf_counter()
+        occupied_count = np.bincount(base.species, minlength=S)
+        species_death_rates = (
+            base.species_sum(mortality0) / np.maximum(occupied_count, 1)
+        ).astype(np.float32)
+        
+        # 迁徙定义域：迁徙源 4 邻域 + 质心 max_distance 范围
+        max_distance = self._migration_max_distance(species_mobility, migration_scale)
+        totals, center_i, center_j = sparse_ecology.species_centroids(domain, pop_after_dispersal)
+        sources = SparseDomain(base.shape, domain.keys[pop_after_dispersal > 0])
+        domain, old_pos = domain.union(np.concatenate([
+            sources.dilate(1).keys,
+            sparse_ecology.reach_keys(base.shape, totals, center_i, center_j, max_distance),
+        ]))
+        added = np.ones(domain.size, dtype=bool)
+        added[old_pos] = False
+        suitability = sparse_ecology.extend(suitability, old_pos, domain.size)
+        suitability[added] = sparse_ecology.trait_suitability(
+            domain, env7, species_traits, positions=np.flatnonzero(added)
+        )
+        pop_before_migration = sparse_ecology.extend(pop_after_dispersal, old_pos, domain.size)
+        base_pos = domain.lookup(base.keys)
+        mortality_rates = np.full(domain.size, 0.01, dtype=np.float32)
+        mortality_rates[base_pos] = mortality0
+        
+        pop_after_migration, migrated = self._compute_migration_sparse(
+            domain, pop_before_migration, env, env7, species_prefs, species_traits,
+            suitability, species_death_rates, trophic_levels, cooldown_mask, era_scaling,
+            resource_pressure, growth_rates, species_mobility, mortality_rates,
+            sparse_ecology.mortality_stats(base, mortality0, occupied_count, H * W),
+            external_bonus, decline_streaks, turn_index, migration_scale,
+            (totals, center_i, center_j), max_distance,
+        )
+        metrics.migration_time_ms = (time.perf_counter() - t0) * 1000
+        metrics.migrating_species = len(migrated)
+        
+        # === 阶段5：繁殖 ===
+        t0 = time.perf_counter()
+        occupied = pop_after_migration > 0
+        occupied_after = domain.species_count(occupied)
+        avg_mortality_per_species = np.where(
+            occupied_after > 0,
+            domain.species_sum(np.where(occupied, mortality_rates, 0.0)) / np.maximum(occupied_after, 1),
+            0.0,
+        )
+        pressure_discount = np.clip(1.0 - avg_mortality_per_species, 0.3, 1.0)
+        adjusted_birth_scale = birth_scale * pressure_discount
+        
+        pop_after_reproduction = sparse_ecology.reproduction(
+            domain, pop_after_migration, suitability,
+            self._capacity_map(env, era_scaling).astype(np.float32),
+            self._arena.as_float32(adjusted_birth_scale),
+            self._birth_rate(era_scaling, adjusted_birth_scale),
+            cfg.overcapacity_threshold, cfg.overcapacity_birth_clamp,
+        )
+        metrics.reproduction_time_ms = (time.perf_counter() - t0) * 1000
+        
+        # === 阶段6：竞争 ===
+        t0 = time.perf_counter()
+        final_pop = sparse_ecology.trait_competition(
+            domain, pop_after_reproduction.astype(np.float32), suitability,
+            species_traits, _trait_competition_strength(era_scaling),
+        )
+        metrics.competition_time_ms = (time.perf_counter() - t0) * 1000
+        
+        # === 阶段7：净变化钳制（P0 之外原种群为 0）===
+        pop_initial = np.zeros(domain.size, dtype=np.float32)
+        pop_initial[base_pos] = pop0
+        net_change = final_pop - pop_initial
+        clamped_change = np.clip(
+            net_change,
+            -pop_initial * cfg.max_net_decline_ratio,
+            pop_initial * cfg.max_net_growth_ratio,
+        )
+        final_pop = np.maximum(0.0, pop_initial + clamped_change)
+        clamp_ratio = np.abs(net_change - clamped_change).sum() / (np.abs(net_change).sum() + 1e-6)
+        if clamp_ratio > 0.05:
+            logger.debug(f"[TensorEcology] 净变化钳制: {clamp_ratio:.1%} 的变化被限制")
+        
+        alive = final_pop > 0
+        result_sparse = SparsePopulation(SparseDomain(base.shape, domain.keys[alive]), final_pop[alive])
+        
+        metrics.active_cells = domain.size
+        metrics.total_population_after = float(final_pop.sum())
+        metrics.total_time_ms = (time.perf_counter() - start_time) * 1000
+        self._record_arena_stats(metrics, arena_before)
+        self._last_metrics = metrics
+        
+        logger.info(
+            f"[TensorEcology] 完成(稀疏): {S}物种, {H}x{W}地图, "
+            f"占用率={metrics.occupancy_ratio:.1%}, 计算格子={domain.size}, "
+            f"耗时={metrics.total_time_ms:.1f}ms, "
+            f"平均死亡率={metrics.avg_mortality_rate:.1%}"
+        )
+        
+        return EcologyResult(
+            pop=domain.scatter(final_pop),
+            mortality_rates=base.scatter(mortality0, fill=0.01),
+            death_counts=death_counts.astype(np.int32),
+            survivor_counts=survivor_counts.astype(np.int32),
+            migrated_species=migrated,
+            metrics=metrics,
+            sparse_pop=result_sparse,
+        )
+    
+    def _compute_migration_sparse(
+        self,
+        domain: SparseDomain,
+        pop: np.ndarray,
+        env: np.ndarray,
+        env7: np.ndarray,
+        species_prefs: np.ndarray,
+        species_traits: np.ndarray,
+        suitability: np.ndarray,
+        death_rates: np.ndarray,
+        trophic_levels: np.ndarray,
+        cooldown_mask: np.ndarray,
+        era_scaling: float,
+        resource_pressure: np.ndarray,
+        growth_rates: np.ndarray,
+        species_mobility: np.ndarray,
+        mortality_rates: np.ndarray,
+        mortality_stats: tuple[np.ndarray, np.ndarray, np.ndarray],
+        external_bonus: np.ndarray | None,
+        decline_streaks: np.ndarray,
+        turn_index: int,
+        migration_scale: np.ndarray,
+        centroids: tuple[np.ndarray, np.ndarray, np.ndarray],
+        max_distance: float,
+    ) -> tuple[np.ndarray, list[int]]:
+        """稀疏迁徙计算（对应 _compute_migration_tensor + _compute_migration_scores_tensor）"""
+        cfg = self.config
+        s = domain.species
+        
+        global_crowding = self._global_crowding(pop.sum(), env)
+        current_score_threshold = self._migration_score_threshold(turn_index)
+        
+        # 1. 距离权重 + 栖息地衰减
+        distance_weights = sparse_ecology.distance_weights(domain, *centroids, max_distance)
+        habitat = None
+        if env.shape[0] >= 6 and species_prefs.shape[1] >= 6:
+            land_pref, sea_pref, coast_pref = _habitat_prefs(species_prefs)
+            is_land = domain.gather(env[4] > 0.5)
+            is_sea = domain.gather(env[5] > 0.5)
+            distance_weights = _attenuate_distance_weights(
+                distance_weights, land_pref[s], sea_pref[s], coast_pref[s],
+                is_land, is_sea, cfg.habitat_attenuation_factor,
+            )
+            habitat = (land_pref[s], sea_pref[s], is_land, is_sea)
+        
+        # 2. 猎物密度 + 迁徙分数
+        prey_density = sparse_ecology.prey_density(
+            domain, pop, _prey_matrix(trophic_levels), trophic_levels
+        )
+        migration_scores = sparse_ecology.migration_scores(
+            domain, pop, suitability, distance_weights,
+            death_rates.astype(np.float32), resource_pressure.astype(np.float32),
+            prey_density, trophic_levels, species_traits, env7,
+            float(cfg.pressure_threshold),
+            float(cfg.saturation_threshold),
+            float(cfg.saturation_threshold * 1.2),
+            0.35, 0.3, 0.1, 2.0,
+        )
+        death_max, death_min, critical_ratio = mortality_stats
+        migration_scores = _adjust_migration_scores(
+            migration_scores,
+            mortality_rates,
+            (death_max[s], death_min[s], critical_ratio[s]),
+            domain.gather(external_bonus) if external_bonus is not None else None,
+            decline_streaks[s],
+            habitat,
+            distance_weights,
+            species_mobility[s],
+        )
+        
+        # 3. 冷却期掩码 + 全局拥挤加成
+        migration_scores = np.where(cooldown_mask[s], migration_scores, 0.0)
+        if global_crowding > 0.6:
+            crowding_bonus = cfg.crowding_migration_bonus * (global_crowding - 0.6) / 0.4
+            migration_scores = migration_scores + crowding_bonus
+            logger.debug(f"[迁徙] 全局拥挤={global_crowding:.2f}, 加成={crowding_bonus:.3f}")
+        
+        # 4. 执行迁徙
+        migration_rates = self._migration_rates(
+            death_rates, growth_rates, resource_pressure, era_scaling, migration_scale
+        )
+        new_pop = sparse_ecology.execute_migration(
+            domain, pop, migration_scores.astype(np.float32), distance_weights,
+            species_traits, env7, migration_rates.astype(np.float32),
+            float(current_score_threshold),
+            float(self._long_jump_rate(env, species_prefs, turn_index)),
+        )
+        
+        change_ratio = domain.species_sum(np.abs(new_pop - pop)) / (domain.species_sum(pop) + 1e-6)
+        migrated = np.where(change_ratio > 0.05)[0].tolist()
+        return new_pop, migrated
+    
+
+    # ========================================================================
+    # 张量化死亡率计算
+    # ========================================================================
+    
+    def _compute_mortality_tensor(
+        self,
+        pop: np.ndarray,
+        env: np.ndarray,
+        species_params: np.ndarray,
+        species_prefs: np.ndarray,
+        trophic_levels: np.ndarray,
+        pressure_overlay: np.ndarray | None,
+        era_scaling: float,
+        mortality_scale: np.ndarray | None = None,
+    ) -> np.ndarray:
+        """张量化多因子死亡率计算 - GPU 加速
+        
+        【v3.1】使用缓冲后的 mortality_scale（已带上限）
+        """
+        S, H, W = pop.shape
+        cfg = self.config
+        
+        # 确保压力叠加层存在
+        if pressure_overlay is None:
+            pressure_overlay = np.zeros((1, H, W), dtype=np.float32)
+        
+        # 准备 mortality_scale（已在上层计算时带上限）
+        if mortality_scale is None:
+            mortality_scale_arr = np.ones(S, dtype=np.float32)
+        else:
+            mortality_scale_arr = self._arena.as_float32(mortality_scale)
+        
+        # === Taichi GPU 计算 ===
+        result = self._arena.zeros("mortality", (S, H, W))
+        
+        # 确保环境张量有足够的通道
+        env = _pad_env(env)
+        
+        self._kernels.kernel_multifactor_mortality_v2(
+            self._arena.as_float32(pop),
+            self._arena.as_float32(env),
+            self._arena.as_float32(species_prefs),
+            self._arena.as_float32(species_params),
+            self._arena.as_float32(trophic_levels),
+            self._arena.as_float32(pressure_overlay),
+            mortality_scale_arr,  # 【v3.1】使用缓冲后的 mortality_scale
+            result,
+            float(cfg.base_mortality),
+            float(cfg.temp_mortality_weight),
+            float(cfg.competition_weight),
+            float(cfg.resource_weight),
+            float(cfg.capacity_multiplier),
+            float(era_scaling),
+        )
+        
+        total_mortality = result
+        
+        return np.clip(total_mortality, 0.01, 0.95).astype(np.float32)
+    
+    def _apply_mortality_tensor(
+        self,
+        pop: np.ndarray,
+        mortality: np.ndarray,
+    ) -> np.ndarray:
+        """应用死亡率 [Taichi GPU]"""
+        result = self._arena.zeros("pop_after_death", pop.shape)
+        self._kernels.kernel_apply_mortality(
+            self._arena.as_float32(pop),
+            self._arena.as_float32(mortality),
+            result,
+        )
+        return result
+    
+    # ========================================================================
+    # 张量化扩散计算
+    # ========================================================================
+    
+    def _compute_suitability_tensor(
+        self,
+        env: np.ndarray,
+        species_prefs: np.ndarray,
+    ) -> np.ndarray:
+        """计算适宜度矩阵 [Taichi GPU]"""
+        S = species_prefs.shape[0]
+        H, W = env.shape[1], env.shape[2]
+        
+        # 确保环境张量有足够的通道
+        env = _pad_env(env)
+        
+        habitat_mask = self._arena.empty("habitat_mask", (S, H, W))
+        habitat_mask.fill(1.0)
+        result = self._arena.zeros("suitability", (S, H, W))
+        self._kernels.kernel_compute_suitability(
+            self._arena.as_float32(env),
+            self._arena.as_float32(species_prefs),
+            habitat_mask,
+            result,
+        )
+        return result
+    
+    def _compute_trait_suitability_tensor(
+        self,
+        env: np.ndarray,
+        species_traits: np.ndarray,
+    ) -> np.ndarray:
+        """计算基于特质的精确适宜度矩阵 [Taichi GPU]
+        
+        【新】使用完整特质矩阵进行精确环境-特质匹配
+        """
+        S = species_traits.shape[0]
+        H, W = env.shape[1], env.shape[2]
+        
+        # 确保环境张量有足够的通道
+        env = _pad_env(env)
+        
+        result = self._arena.zeros("suitability", (S, H, W))
+        self._kernels.kernel_compute_trait_suitability(
+            self._arena.as_float32(env),
+            self._arena.as_float32(species_traits),
+            result,
+        )
+        return result
+    
+    def _compute_trait_mortality_tensor(
+        self,
+        pop: np.ndarray,
+        env: np.ndarray,
+        species_traits: np.ndarray,
+        suitability: np.ndarray,
+        pressure_overlay: np.ndarray | None,
+        era_scaling: float,
+        mortality_scale: np.ndarray | None = None,
+    ) -> np.ndarray:
+        """基于特质的精确死亡率计算 [Taichi GPU]
+        
+        【v3.1】使用缓冲后的 mortality_scale（已带上限）
+        """
+        S, H, W = pop.shape
+        cfg = self.config
+        
+        # 确保压力叠加层存在
+        if pressure_overlay is None:
+            pressure_overlay = np.zeros((1, H, W), dtype=np.float32)
+        
+        # 准备 mortality_scale
+        if mortality_scale is None:
+            mortality_scale_arr = np.ones(S, dtype=np.float32)
+        else:
+            mortality_scale_arr = self._arena.as_float32(mortality_scale)
+        
+        # 确保环境张量有足够的通道
+        env = _pad_env(env)
+        
+        result = self._arena.zeros("mortality", (S, H, W))
+        self._kernels.kernel_trait_mortality_v2(
+            self._arena.as_float32(pop),
+            self._arena.as_float32(env),
+            self._arena.as_float32(species_traits),
+            self._arena.as_float32(suitability),
+            self._arena.as_float32(pressure_overlay),
+            mortality_scale_arr,  # 【v3.1】使用缓冲后的 mortality_scale
+            result,
+            float(cfg.base_mortality),
+            float(era_scaling),
+        )
+        
+        return np.clip(result, 0.01, 0.95).astype(np.float32)
+    
     def _compute_trait_dispersal_tensor(
         self,
         pop: np.ndarray,
@@ -779,10 +2022,12 @@ class TensorEcologyEngine:
         era_scaling: float,
         diffusion_scale: np.ndarray | None = None,
         override_diffusion_rate: float | None = None,
+        buffer: str = "dispersal",
     ) -> np.ndarray:
         """基于特质的扩散计算 [Taichi GPU]
         
         【v3.1】使用缓冲后的 diffusion_scale + 背景扩散 + 栖息地连通性检查
+        结果写入名为 buffer 的复用缓冲区（迭代扩散时交替传入不同名称）
         """
         cfg = self.config
         S = pop.shape[0]
@@ -796,26 +2041,20 @@ class TensorEcologyEngine:
             diffusion_rate = min(cfg.max_diffusion_rate, cfg.base_diffusion_rate * effective_scaling)
         
         # 确保环境张量有足够的通道
-        C, H, W = env.shape
-        if C < 7:
-            padded_env = np.zeros((7, H, W), dtype=np.float32)
-            padded_env[:C] = env
-            if C <= 4:
-                padded_env[4] = 1.0  # 默认陆地
-            env = padded_env
+        env = _pad_env(env)
         
         # 准备 diffusion_scale（已在上层计算时带上限）
         if diffusion_scale is None:
             diffusion_scale_arr = np.ones(S, dtype=np.float32)
         else:
-            diffusion_scale_arr = diffusion_scale.astype(np.float32)
-        
-        result = np.zeros_like(pop, dtype=np.float32)
-        _taichi_kernels.kernel_trait_diffusion_v2(
-            pop.astype(np.float32),
-            suitability.astype(np.float32),
-            species_traits.astype(np.float32),
-            env.astype(np.float32),
+            diffusion_scale_arr = self._arena.as_float32(diffusion_scale)
+        
+        result = self._arena.zeros(buffer, pop.shape)
+        self._kernels.kernel_trait_diffusion_v2(
+            self._arena.as_float32(pop),
+            self._arena.as_float32(suitability),
+            self._arena.as_float32(species_traits),
+            self._arena.as_float32(env),
             diffusion_scale_arr,  # 【v3.1】使用缓冲后的 diffusion_scale
             result,
             float(diffusion_rate),
@@ -839,30 +2078,28 @@ class TensorEcologyEngine:
         S, H, W = pop.shape
         
         # 竞争强度（随时代调整）
-        base_strength = 0.08
-        if era_scaling > 1.5:
-            base_strength *= max(0.6, 1.0 / (era_scaling ** 0.15))
+        base_strength = _trait_competition_strength(era_scaling)
         
         # 1. 计算局部适应度
-        local_fitness = np.zeros((S, H, W), dtype=np.float32)
-        _taichi_kernels.kernel_compute_local_fitness(
-            suitability.astype(np.float32),
-            species_traits.astype(np.float32),
-            pop.astype(np.float32),
+        local_fitness = self._arena.zeros("local_fitness", (S, H, W))
+        self._kernels.kernel_compute_local_fitness(
+            self._arena.as_float32(suitability),
+            self._arena.as_float32(species_traits),
+            self._arena.as_float32(pop),
             local_fitness,
         )
         
         # 2. 计算生态位重叠矩阵
-        niche_overlap = np.zeros((S, S), dtype=np.float32)
-        _taichi_kernels.kernel_compute_niche_overlap_matrix(
-            species_traits.astype(np.float32),
+        niche_overlap = self._arena.zeros("niche_overlap", (S, S))
+        self._kernels.kernel_compute_niche_overlap_matrix(
+            self._arena.as_float32(species_traits),
             niche_overlap,
         )
         
         # 3. 应用基于特质的竞争
-        result = np.zeros_like(pop, dtype=np.float32)
-        _taichi_kernels.kernel_apply_trait_competition(
-            pop.astype(np.float32),
+        result = self._arena.zeros("competition", pop.shape)
+        self._kernels.kernel_apply_trait_competition(
+            self._arena.as_float32(pop),
             local_fitness,
             niche_overlap,
             result,
@@ -878,10 +2115,12 @@ class TensorEcologyEngine:
         era_scaling: float,
         diffusion_scale: np.ndarray | None = None,
         override_diffusion_rate: float | None = None,
+        buffer: str = "dispersal",
     ) -> np.ndarray:
         """张量化扩散计算 [Taichi GPU]
         
         【v3.1】使用缓冲后的 diffusion_scale（已带上限）
+        结果写入名为 buffer 的复用缓冲区（迭代扩散时交替传入不同名称）
         """
         cfg = self.config
         S = pop.shape[0]
@@ -901,12 +2140,12 @@ class TensorEcologyEngine:
         if diffusion_scale is None:
             diffusion_scale_arr = np.ones(S, dtype=np.float32)
         else:
-            diffusion_scale_arr = diffusion_scale.astype(np.float32)
+            diffusion_scale_arr = self._arena.as_float32(diffusion_scale)
         
-        result = np.zeros_like(pop, dtype=np.float32)
-        _taichi_kernels.kernel_advanced_diffusion_v2(
-            pop.astype(np.float32),
-            suitability.astype(np.float32),
+        result = self._arena.zeros(buffer, pop.shape)
+        self._kernels.kernel_advanced_diffusion_v2(
+            self._arena.as_float32(pop),
+            self._arena.as_float32(suitability),
             diffusion_scale_arr,  # 【v3.1】使用缓冲后的 diffusion_scale
             result,
             float(diffusion_rate),
@@ -955,70 +2194,27 @@ class TensorEcologyEngine:
         S, H, W = pop.shape
         
         # 【v3.0】计算全局拥挤度
-        total_pop = pop.sum()
-        if env.shape[0] > 3:
-            vegetation = env[3]
-            total_capacity = float(np.maximum(vegetation.sum() * cfg.capacity_multiplier, 1e-6))
-        else:
-            total_capacity = float(H * W * 100)
-        global_crowding = total_pop / total_capacity
+        global_crowding = self._global_crowding(pop.sum(), env)
         
         # 【v3.0】动态 score_threshold（早期时代更低）
-        if turn_index < 30:
-            current_score_threshold = cfg.early_score_threshold
-        else:
-            current_score_threshold = cfg.score_threshold
+        current_score_threshold = self._migration_score_threshold(turn_index)
         
         # 【v3.1】根据世代缩放/机动性放大 max_distance
-        # 高机动性或快繁殖物种可以迁徙更远
-        mobility_factor = np.clip(species_mobility.max(), 0.5, 3.0)
-        if migration_scale is not None:
-            generation_factor = 1.0 + 0.15 * np.log1p(migration_scale.mean())
-        else:
-            generation_factor = 1.0
-        max_distance = float(
-            np.clip(cfg.max_migration_distance * mobility_factor * generation_factor, 1.0, 25.0)
-        )
+        max_distance = self._migration_max_distance(species_mobility, migration_scale)
         
         # 1. 计算距离权重 (S, H, W)
         distance_weights = self._compute_distance_weights_tensor(pop, max_distance)
         
         # 【v3.0】栖息地掩码改为衰减式而非硬屏蔽
         if env.shape[0] >= 6 and species_prefs.shape[1] >= 6:
-            is_land = env[4] > 0.5  # (H, W)
-            is_sea = env[5] > 0.5   # (H, W)
-            land_pref = species_prefs[:, 4]  # (S,)
-            sea_pref = species_prefs[:, 5]   # (S,)
-            coast_pref = species_prefs[:, 6] if species_prefs.shape[1] > 6 else np.zeros(S, dtype=np.float32)
-            
-            land_only = (land_pref > sea_pref + 0.2)[:, None, None]
-            sea_only = (sea_pref > land_pref + 0.2)[:, None, None]
-            amphibious = ((coast_pref > 0.3) | ((land_pref > 0.3) & (sea_pref > 0.3)))[:, None, None]
-            
-            land_mask = is_land[None, ...]
-            sea_mask = is_sea[None, ...]
-            
-            # 【v3.0】使用衰减而非硬屏蔽
-            attenuation = cfg.habitat_attenuation_factor  # 0.5
-            # 陆地物种在海洋：衰减而非 0
-            distance_weights = np.where(
-                land_only & ~land_mask,
-                distance_weights * attenuation,
-                distance_weights
-            )
-            # 海洋物种在陆地：衰减而非 0
-            distance_weights = np.where(
-                sea_only & ~sea_mask,
-                distance_weights * attenuation,
-                distance_weights
+            land_pref, sea_pref, coast_pref = _habitat_prefs(species_prefs)
+            _attenuate_distance_weights(
+                distance_weights,
+                land_pref[:, None, None], sea_pref[:, None, None], coast_pref[:, None, None],
+                (env[4] > 0.5)[None, ...], (env[5] > 0.5)[None, ...],
+                cfg.habitat_attenuation_factor,
+                out=distance_weights,
             )
-            # 两栖物种：陆地 1.0，海洋 0.7
-            amphibious_mask = amphibious.astype(np.float32)
-            distance_weights = distance_weights * (
-                1.0 - amphibious_mask + amphibious_mask * (land_mask * 1.0 + sea_mask * 0.7)
-            )
-        
-        distance_weights = distance_weights.reshape(S, H, W)
         
         # 2. 计算猎物密度（用于消费者）(S, H, W)
         prey_density = self._compute_prey_density_tensor(pop, trophic_levels)
@@ -1032,97 +2228,39 @@ class TensorEcologyEngine:
         )
         
         # 4. 应用冷却期掩码
-        cooldown_3d = cooldown_mask[:, np.newaxis, np.newaxis]
-        migration_scores = np.where(cooldown_3d, migration_scores, 0.0)
+        migration_scores[~cooldown_mask] = 0.0
         
         # 【v3.0】全局拥挤加成
         if global_crowding > 0.6:
             crowding_bonus = cfg.crowding_migration_bonus * (global_crowding - 0.6) / 0.4
-            migration_scores = migration_scores + crowding_bonus
+            migration_scores += np.float32(crowding_bonus)
             logger.debug(f"[迁徙] 全局拥挤={global_crowding:.2f}, 加成={crowding_bonus:.3f}")
         
         # 5. 计算迁徙率（高压力时迁徙更多）
-        migration_rates = np.full(S, cfg.base_migration_rate, dtype=np.float32)
-        high_pressure = death_rates > cfg.pressure_threshold
-        # 模式化迁徙率：压力>溢出>饱和>常规
-        overflow = (growth_rates > 1.10) & (resource_pressure > cfg.saturation_threshold)
-        oversat = resource_pressure > cfg.saturation_threshold * 1.2
-        migration_rates = np.where(
-            overflow,
-            np.minimum(0.85, cfg.base_migration_rate * 2.2),
-            migration_rates,
-        )
-        migration_rates = np.where(
-            oversat & (~overflow),
-            np.minimum(0.65, cfg.base_migration_rate * 1.6),
-            migration_rates,
-        )
-        migration_rates = np.where(
-            high_pressure & (~oversat) & (~overflow),
-            np.minimum(0.75, cfg.base_migration_rate * 1.9),
-            migration_rates,
+        migration_rates = self._migration_rates(
+            death_rates, growth_rates, resource_pressure, era_scaling, migration_scale
         )
         
-        # 时代缩放
-        if era_scaling > 1.5:
-            migration_rates *= min(2.5, era_scaling ** 0.35)
-        
-        # 【v3.1】世代缩放：使用缓冲后的 migration_scale（已带上限）
-        if migration_scale is not None:
-            # migration_scale 已在上层计算时带了上限（cfg.migration_scale_max）
-            migration_rates = migration_rates * migration_scale.astype(np.float32)
-        
         # 6. 执行迁徙 [Taichi GPU]
-        new_pop = np.zeros_like(pop, dtype=np.float32)
+        new_pop = self._arena.zeros("migration", pop.shape)
         
-        # 【v3.0】动态 base_long_jump
-        if turn_index < 30:
-            base_long_jump = cfg.early_long_jump_rate  # 早期时代更高
-        else:
-            base_long_jump = cfg.base_long_jump_rate
-        
-        # 飞行物种进一步提升长跳概率
-        if env.shape[0] >= 6 and species_prefs.shape[1] >= 6:
-            land_pref = species_prefs[:, 4]
-            sea_pref = species_prefs[:, 5]
-            coast_pref = species_prefs[:, 6] if species_prefs.shape[1] > 6 else np.zeros_like(land_pref)
-            flying = (land_pref > 0.3) & (sea_pref > 0.3) & (coast_pref > 0.3)
-            if flying.any():
-                base_long_jump = min(0.08, base_long_jump * 1.8)
+        # 【v3.0】动态 base_long_jump（飞行物种进一步提升长跳概率）
+        base_long_jump = self._long_jump_rate(env, species_prefs, turn_index)
         
         # 确保 species_traits 存在（如果没有，从 species_prefs 构造）
-        if species_traits is None:
-            # 构造默认特质矩阵
-            traits_for_migration = np.zeros((S, 14), dtype=np.float32)
-            traits_for_migration[:, 7] = 5.0  # 默认机动性
-            if species_prefs.shape[1] >= 7:
-                traits_for_migration[:, 8] = species_prefs[:, 4]  # land_pref
-                traits_for_migration[:, 9] = species_prefs[:, 5]  # ocean_pref
-                traits_for_migration[:, 10] = species_prefs[:, 6]  # coast_pref
-            else:
-                traits_for_migration[:, 8] = 1.0  # 默认陆地
-        else:
-            traits_for_migration = species_traits.astype(np.float32)
+        traits_for_migration = _migration_traits(species_traits, species_prefs)
         
         # 确保环境张量有足够的通道
-        C = env.shape[0]
-        if C < 7:
-            padded_env = np.zeros((7, H, W), dtype=np.float32)
-            padded_env[:C] = env
-            if C <= 4:
-                padded_env[4] = 1.0  # 默认陆地
-            env_for_migration = padded_env
-        else:
-            env_for_migration = env.astype(np.float32)
+        env_for_migration = _pad_env(env)
         
-        _taichi_kernels.kernel_execute_migration(
-            pop.astype(np.float32),
-            migration_scores.astype(np.float32),
-            distance_weights.astype(np.float32),
+        self._kernels.kernel_execute_migration(
+            self._arena.as_float32(pop),
+            self._arena.as_float32(migration_scores),
+            self._arena.as_float32(distance_weights),
             traits_for_migration,
             env_for_migration,
             new_pop,
-            migration_rates.astype(np.float32),
+            self._arena.as_float32(migration_rates),
             float(current_score_threshold),  # 【v3.0】使用动态阈值
             float(base_long_jump),
         )
@@ -1142,9 +2280,9 @@ class TensorEcologyEngine:
     ) -> np.ndarray:
         """计算距离权重 [Taichi GPU]"""
         S, H, W = pop.shape
-        result = np.zeros((S, H, W), dtype=np.float32)
-        _taichi_kernels.kernel_compute_distance_weights(
-            pop.astype(np.float32),
+        result = self._arena.zeros("distance_weights", (S, H, W))
+        self._kernels.kernel_compute_distance_weights(
+            self._arena.as_float32(pop),
             result,
             float(max_distance),
         )
@@ -1157,26 +2295,18 @@ class TensorEcologyEngine:
     ) -> np.ndarray:
         """计算猎物密度 - 向量化，排除同营养级/自食"""
         S, H, W = pop.shape
+        prey_matrix = _prey_matrix(trophic_levels)
         
-        trophic_2d = trophic_levels[:, np.newaxis]
-        trophic_t = trophic_levels[np.newaxis, :]
-        
-        prey_min = trophic_2d - 1.5
-        prey_max = trophic_2d - 0.5
+        result = self._arena.empty("prey_density", (S, H, W))
+        np.matmul(prey_matrix, pop.reshape(S, H * W), out=result.reshape(S, H * W))
         
-        prey_matrix = ((trophic_t >= prey_min) & (trophic_t <= prey_max)).astype(np.float32)
-        # 排除同营养级与自身
-        prey_matrix *= (np.abs(trophic_t - trophic_2d) > 1e-3).astype(np.float32)
+        total_pop = pop.sum(axis=0)
+        total_pop += np.float32(1e-6)
+        result /= total_pop
         
-        pop_flat = pop.reshape(S, H * W)
-        prey_pop_flat = prey_matrix @ pop_flat
-        prey_pop = prey_pop_flat.reshape(S, H, W)
-        
-        total_pop = pop.sum(axis=0) + 1e-6
-        prey_normalized = prey_pop / total_pop
-        
-        consumer_mask = (trophic_levels >= 2.0)[:, np.newaxis, np.newaxis]
-        return np.where(consumer_mask, prey_normalized, 1.0).astype(np.float32)
+        # 非消费者不追踪猎物
+        result[trophic_levels < 2.0] = 1.0
+        return result
     
     def _compute_migration_scores_tensor(
         self,
@@ -1204,39 +2334,21 @@ class TensorEcologyEngine:
         distance_weights = distance_weights.reshape(S, H, W)
         
         # 确保 species_traits 存在
-        if species_traits is None:
-            traits_for_scores = np.zeros((S, 14), dtype=np.float32)
-            traits_for_scores[:, 7] = 5.0  # 默认机动性
-            if species_prefs.shape[1] >= 7:
-                traits_for_scores[:, 8] = species_prefs[:, 4]
-                traits_for_scores[:, 9] = species_prefs[:, 5]
-                traits_for_scores[:, 10] = species_prefs[:, 6]
-            else:
-                traits_for_scores[:, 8] = 1.0
-        else:
-            traits_for_scores = species_traits.astype(np.float32)
+        traits_for_scores = _migration_traits(species_traits, species_prefs)
         
         # 确保环境张量有足够的通道
-        C = env.shape[0]
-        if C < 7:
-            padded_env = np.zeros((7, H, W), dtype=np.float32)
-            padded_env[:C] = env
-            if C <= 4:
-                padded_env[4] = 1.0
-            env_for_scores = padded_env
-        else:
-            env_for_scores = env.astype(np.float32)
-        
-        result = np.zeros_like(pop, dtype=np.float32)
-        if hasattr(_taichi_kernels, "kernel_migration_decision_v2"):
-            _taichi_kernels.kernel_migration_decision_v2(
-                pop.astype(np.float32),
-                suitability.astype(np.float32),
-                distance_weights.astype(np.float32),
-                death_rates.astype(np.float32),
-                resource_pressure.astype(np.float32),
-                prey_density.astype(np.float32),
-                trophic_levels.astype(np.float32),
+        env_for_scores = _pad_env(env)
+        
+        result = self._arena.zeros("migration_scores", pop.shape)
+        if hasattr(self._kernels, "kernel_migration_decision_v2"):
+            self._kernels.kernel_migration_decision_v2(
+                self._arena.as_float32(pop),
+                self._arena.as_float32(suitability),
+                self._arena.as_float32(distance_weights),
+                self._arena.as_float32(death_rates),
+                self._arena.as_float32(resource_pressure),
+                self._arena.as_float32(prey_density),
+                self._arena.as_float32(trophic_levels),
                 traits_for_scores,
                 env_for_scores,
                 result,
@@ -1249,11 +2361,11 @@ class TensorEcologyEngine:
                 float(2.0),   # consumer trophic threshold
             )
         else:
-            _taichi_kernels.kernel_migration_decision(
-                pop.astype(np.float32),
-                suitability.astype(np.float32),
-                distance_weights.astype(np.float32),
-                death_rates.astype(np.float32),
+            self._kernels.kernel_migration_decision(
+                self._arena.as_float32(pop),
+                self._arena.as_float32(suitability),
+                self._arena.as_float32(distance_weights),
+                self._arena.as_float32(death_rates),
                 result,
                 float(cfg.pressure_threshold),
                 float(cfg.saturation_threshold),
@@ -1268,49 +2380,35 @@ class TensorEcologyEngine:
         
         # === 梯度/避难所/外部加成（CPU 后处理，保持轻量） ===
         if mortality_rates is not None:
-            death_max = mortality_rates.max(axis=(1, 2))
-            death_min = mortality_rates.min(axis=(1, 2))
-            gradient = death_max - death_min
-            valid_grad = gradient >= 0.10
-            grad_bonus = np.where(
-                death_max[:, np.newaxis, np.newaxis] > 1e-6,
-                (death_max[:, np.newaxis, np.newaxis] - mortality_rates) / (death_max[:, np.newaxis, np.newaxis] + 1e-6),
-                0.0,
+            mortality_stats = (
+                mortality_rates.max(axis=(1, 2))[:, np.newaxis, np.newaxis],
+                mortality_rates.min(axis=(1, 2))[:, np.newaxis, np.newaxis],
+                (mortality_rates >= 0.50).mean(axis=(1, 2))[:, np.newaxis, np.newaxis],
             )
-            grad_bonus *= valid_grad[:, np.newaxis, np.newaxis]
-            result += grad_bonus.astype(np.float32) * 0.3
-            
-            critical_mask = mortality_rates >= 0.50
-            critical_ratio = critical_mask.mean(axis=(1, 2))
-            refuge_trigger = critical_ratio >= 0.50
-            refuge_bonus = (1.0 - mortality_rates) * refuge_trigger[:, np.newaxis, np.newaxis]
-            result += refuge_bonus.astype(np.float32) * 0.5
-        
-        # 外部事件/embedding 加成
-        if external_bonus is not None:
-            result += external_bonus.astype(np.float32)
-        
-        # 慢性衰退：提升整体迁徙意愿
-        decline_mask = (decline_streaks >= 2)[:, np.newaxis, np.newaxis]
-        result = np.where(decline_mask, result * 1.3, result)
+        else:
+            mortality_stats = None
         
         # 栖息地连通性：陆/海偏好与环境通道匹配
+        habitat = None
         if env.shape[0] >= 6 and species_prefs is not None and species_prefs.shape[1] >= 6:
-            is_land = env[4] > 0.5
-            is_sea = env[5] > 0.5
-            land_pref = species_prefs[:, 4][:, None, None]
-            sea_pref = species_prefs[:, 5][:, None, None]
-            habitat_mask = np.ones_like(result, dtype=bool)
-            land_only = (land_pref > 0.5) & (sea_pref < 0.1)
-            sea_only = (sea_pref > 0.5) & (land_pref < 0.1)
-            habitat_mask = np.where(land_only, is_land[None, ...], habitat_mask)
-            habitat_mask = np.where(sea_only, is_sea[None, ...], habitat_mask)
-            result *= habitat_mask.astype(np.float32)
-        
-        # 保留非相邻地块用于长跳：按距离权重与机动性衰减
-        mobility_scale = np.clip(species_mobility[:, None, None], 0.5, 3.0)
-        result *= (0.5 + 0.5 * distance_weights * mobility_scale)
-        return result
+            habitat = (
+                species_prefs[:, 4][:, None, None],
+                species_prefs[:, 5][:, None, None],
+                (env[4] > 0.5)[None, ...],
+                (env[5] > 0.5)[None, ...],
+            )
+        
+        return _adjust_migration_scores(
+            result,
+            mortality_rates,
+            mortality_stats,
+            external_bonus,
+            decline_streaks[:, np.newaxis, np.newaxis],
+            habitat,
+            distance_weights,
+            species_mobility[:, None, None],
+            scratch=self._arena.empty("migration_scratch", pop.shape),
+        )
     
     
     # ========================================================================
@@ -1332,28 +2430,11 @@ class TensorEcologyEngine:
         cfg = self.config
         S, H, W = pop.shape
         
-        # 时代缩放
-        effective_scaling = max(1.0, era_scaling ** 0.5)
-        base_birth = cfg.base_birth_rate * effective_scaling
-        
-        # 【v3.1】使用缓冲后的 birth_scale
-        if birth_scale is not None and cfg.generation_scaling_enabled:
-            mean_scale = float(np.mean(birth_scale))
-            birth_rate = min(cfg.birth_scale_max * base_birth, base_birth * mean_scale)
-        else:
-            birth_rate = min(2.0, base_birth)
+        # 【v3.1】使用缓冲后的 birth_scale（时代缩放）
+        birth_rate = self._birth_rate(era_scaling, birth_scale)
         
         # 承载力
-        if env.shape[0] > 3:
-            vegetation = env[3]
-        elif env.shape[0] > 4:
-            vegetation = env[4]
-        else:
-            vegetation = np.ones((H, W), dtype=np.float32) * 0.5
-        
-        capacity = vegetation * cfg.capacity_multiplier
-        if era_scaling > 1.5:
-            capacity *= max(1.0, era_scaling ** 0.3)
+        capacity = self._capacity_map(env, era_scaling)
         
         # 【v3.1 缓冲7】容量归一：超容量时钳制繁殖放大系数
         total_pop_per_tile = pop.sum(axis=0)  # (H, W)
@@ -1363,13 +2444,13 @@ class TensorEcologyEngine:
         if birth_scale is None:
             birth_scale_arr = np.ones(S, dtype=np.float32)
         else:
-            birth_scale_arr = birth_scale.astype(np.float32)
+            birth_scale_arr = self._arena.as_float32(birth_scale)
         
-        result = np.zeros_like(pop, dtype=np.float32)
-        _taichi_kernels.kernel_reproduction_v2(
-            pop.astype(np.float32),
-            suitability.astype(np.float32),
-            capacity.astype(np.float32),
+        result = self._arena.zeros("reproduction", pop.shape)
+        self._kernels.kernel_reproduction_v2(
+            self._arena.as_float32(pop),
+            self._arena.as_float32(suitability),
+            self._arena.as_float32(capacity),
             birth_scale_arr,  # 【v3.1】使用缓冲后的 birth_scale
             float(birth_rate),
             result,
@@ -1377,15 +2458,14 @@ class TensorEcologyEngine:
         
         # 【v3.1】超容量格子的繁殖结果额外钳制
         if overcapacity_mask.any():
-            # 对超容量格子，限制净增长
+            # 对超容量格子，限制净增长：max(0, pop + (result - pop) × clamp)
             clamp_factor = np.where(
-                overcapacity_mask[np.newaxis, ...],
-                cfg.overcapacity_birth_clamp,
-                1.0
+                overcapacity_mask, np.float32(cfg.overcapacity_birth_clamp), np.float32(1.0)
             )
-            net_growth = result - pop
-            clamped_growth = net_growth * clamp_factor
-            result = np.maximum(0.0, pop + clamped_growth)
+            result -= pop
+            result *= clamp_factor
+            result += pop
+            np.maximum(result, 0.0, out=result)
         
         return result
     
@@ -1405,10 +2485,10 @@ class TensorEcologyEngine:
         if era_scaling > 1.5:
             base_strength *= max(0.5, 1.0 / (era_scaling ** 0.2))
         
-        result = np.zeros_like(pop, dtype=np.float32)
-        _taichi_kernels.kernel_competition(
-            pop.astype(np.float32),
-            suitability.astype(np.float32),
+        result = self._arena.zeros("competition", pop.shape)
+        self._kernels.kernel_competition(
+            self._arena.as_float32(pop),
+            self._arena.as_float32(suitability),
             result,
             float(base_strength),
         )
@@ -1418,6 +2498,141 @@ class TensorEcologyEngine:
     # 辅助方法
     # ========================================================================
     
+    def _dispersal_schedule(self, turn_index: int, diffusion_scale: np.ndarray) -> tuple[int, float]:
+        """扩散迭代次数与调整后的基础扩散率（使用缓冲后的 diffusion_scale）"""
+        cfg = self.config
+        # 计算扩散迭代次数（限制最大次数）
+        if turn_index < 30 and cfg.era_scaling_enabled:
+            dispersal_iterations = min(
+                cfg.early_dispersal_iterations,
+                max(1, int(np.mean(diffusion_scale) ** 0.5))
+            )
+        else:
+            dispersal_iterations = 1
+        
+        mean_diffusion_scale = float(np.mean(diffusion_scale))
+        adjusted_diffusion_rate = min(
+            cfg.max_diffusion_rate,
+            cfg.base_diffusion_rate * mean_diffusion_scale
+        )
+        return dispersal_iterations, adjusted_diffusion_rate
+    
+    def _global_crowding(self, total_pop, env: np.ndarray):
+        """【v3.0】全局拥挤度：总种群 / 全图承载力"""
+        if env.shape[0] > 3:
+            vegetation = env[3]
+            total_capacity = float(np.maximum(vegetation.sum() * self.config.capacity_multiplier, 1e-6))
+        else:
+            total_capacity = float(env.shape[1] * env.shape[2] * 100)
+        return total_pop / total_capacity
+    
+    def _migration_score_threshold(self, turn_index: int) -> float:
+        """【v3.0】动态 score_threshold（早期时代更低）"""
+        if turn_index < 30:
+            return self.config.early_score_threshold
+        return self.config.score_threshold
+    
+    def _migration_max_distance(
+        self,
+        species_mobility: np.ndarray,
+        migration_scale: np.ndarray | None,
+    ) -> float:
+        """【v3.1】根据世代缩放/机动性放大 max_distance
+        
+        高机动性或快繁殖物种可以迁徙更远
+        """
+        mobility_factor = np.clip(species_mobility.max(), 0.5, 3.0)
+        if migration_scale is not None:
+            generation_factor = 1.0 + 0.15 * np.log1p(migration_scale.mean())
+        else:
+            generation_factor = 1.0
+        return float(
+            np.clip(self.config.max_migration_distance * mobility_factor * generation_factor, 1.0, 25.0)
+        )
+    
+    def _migration_rates(
+        self,
+        death_rates: np.ndarray,
+        growth_rates: np.ndarray,
+        resource_pressure: np.ndarray,
+        era_scaling: float,
+        migration_scale: np.ndarray | None,
+    ) -> np.ndarray:
+        """每个物种的迁徙率（高压力时迁徙更多）"""
+        cfg = self.config
+        S = death_rates.shape[0]
+        migration_rates = np.full(S, cfg.base_migration_rate, dtype=np.float32)
+        high_pressure = death_rates > cfg.pressure_threshold
+        # 模式化迁徙率：压力>溢出>饱和>常规
+        overflow = (growth_rates > 1.10) & (resource_pressure > cfg.saturation_threshold)
+        oversat = resource_pressure > cfg.saturation_threshold * 1.2
+        migration_rates = np.where(
+            overflow,
+            np.minimum(0.85, cfg.base_migration_rate * 2.2),
+            migration_rates,
+        )
+        migration_rates = np.where(
+            oversat & (~overflow),
+            np.minimum(0.65, cfg.base_migration_rate * 1.6),
+            migration_rates,
+        )
+        migration_rates = np.where(
+            high_pressure & (~oversat) & (~overflow),
+            np.minimum(0.75, cfg.base_migration_rate * 1.9),
+            migration_rates,
+        )
+        
+        # 时代缩放
+        if era_scaling > 1.5:
+            migration_rates *= min(2.5, era_scaling ** 0.35)
+        
+        # 【v3.1】世代缩放：使用缓冲后的 migration_scale（已带上限）
+        if migration_scale is not None:
+            # migration_scale 已在上层计算时带了上限（cfg.migration_scale_max）
+            migration_rates = migration_rates * migration_scale.astype(np.float32)
+        return migration_rates.astype(np.float32, copy=False)
+    
+    def _long_jump_rate(self, env: np.ndarray, species_prefs: np.ndarray, turn_index: int) -> float:
+        """【v3.0】动态 base_long_jump，飞行物种进一步提升长跳概率"""
+        cfg = self.config
+        if turn_index < 30:
+            base_long_jump = cfg.early_long_jump_rate  # 早期时代更高
+        else:
+            base_long_jump = cfg.base_long_jump_rate
+        
+        if env.shape[0] >= 6 and species_prefs.shape[1] >= 6:
+            land_pref, sea_pref, coast_pref = _habitat_prefs(species_prefs)
+            flying = (land_pref > 0.3) & (sea_pref > 0.3) & (coast_pref > 0.3)
+            if flying.any():
+                base_long_jump = min(0.08, base_long_jump * 1.8)
+        return base_long_jump
+    
+    def _birth_rate(self, era_scaling: float, birth_scale: np.ndarray | None) -> float:
+        """基础出生率（时代缩放 + 缓冲后的 birth_scale）"""
+        cfg = self.config
+        effective_scaling = max(1.0, era_scaling ** 0.5)
+        base_birth = cfg.base_birth_rate * effective_scaling
+        
+        if birth_scale is not None and cfg.generation_scaling_enabled:
+            mean_scale = float(np.mean(birth_scale))
+            return min(cfg.birth_scale_max * base_birth, base_birth * mean_scale)
+        return min(2.0, base_birth)
+    
+    def _capacity_map(self, env: np.ndarray, era_scaling: float) -> np.ndarray:
+        """承载力 (H, W)"""
+        H, W = env.shape[1], env.shape[2]
+        if env.shape[0] > 3:
+            vegetation = env[3]
+        elif env.shape[0] > 4:
+            vegetation = env[4]
+        else:
+            vegetation = np.ones((H, W), dtype=np.float32) * 0.5
+        
+        capacity = vegetation * self.config.capacity_multiplier
+        if era_scaling > 1.5:
+            capacity *= max(1.0, era_scaling ** 0.3)
+        return capacity
+    
     def _get_era_scaling(self, turn_index: int) -> float:
         """获取时代缩放因子
         
@@ -1451,6 +2666,15 @@ class TensorEcologyEngine:
         """清空缓存"""
         self._species_prefs_cache = None
         self._suitability_cache = None
+        self._arena.clear()
+        if self._device_arena is not None:
+            self._device_arena.clear()
+        if self._shard_executor is not None:
+            self._shard_executor.close()
+            self._shard_executor = None
+        if self._lod_child is not None:
+            self._lod_child.clear_cache()
+            self._lod_child = None
 
 
 # ============================================================================
@@ -1461,9 +2685,12 @@ _global_engine: TensorEcologyEngine | None = None
 
 
 def get_ecology_engine(config: EcologyConfig | None = None) -> TensorEcologyEngine:
-    """获取全局生态计算引擎实例"""
+    """获取全局生态计算引擎实例（未传入 config 时按全局配置创建）"""
     global _global_engine
     if _global_engine is None:
+        if config is None:
+            from ..core.config import get_settings
+            config = EcologyConfig.from_settings(get_settings())
         _global_engine = TensorEcologyEngine(config)
     return _global_engine
 
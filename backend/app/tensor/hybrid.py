@@ -1,13 +1,16 @@
 """
-GPU-only 混合计算模块 - Taichi GPU + NumPy 数据交换
+混合计算模块 - Taichi（GPU/CPU）/ NumPy 内核 + NumPy 数据交换
 
-【GPU-only 模式】
-本模块强制使用 Taichi GPU 后端，无 NumPy fallback。
-如果 GPU/Taichi 不可用，会直接抛出 RuntimeError。
+【计算后端】
+内核实现由 compute_backend 模块选择（arch 参数 / TENSOR_COMPUTE_BACKEND）：
+- gpu:   Taichi GPU（CUDA/Vulkan/Metal/OpenGL）
+- cpu:   Taichi CPU（ti.cpu，多核并行，适合无 GPU 的批处理/CI 节点）
+- numpy: 纯 NumPy 向量化内核（numpy_kernels，与 Taichi 内核数值一致）
+- auto:  GPU → CPU → NumPy 逐级回退
 
 分工原则：
 ┌────────────────────────────────────────────────────────────────┐
-│                    Taichi GPU（计算核心）                        │
+│                Taichi / NumPy 内核（计算核心）                    │
 ├────────────────────────────────────────────────────────────────┤
 │ • 大规模空间计算（死亡率、扩散、适应度）                           │
 │ • 并行遍历所有格子的操作                                         │
@@ -27,9 +30,9 @@ GPU-only 混合计算模块 - Taichi GPU + NumPy 数据交换
 使用方式：
     from app.tensor.hybrid import HybridCompute
     
-    compute = HybridCompute()  # 无GPU时抛错
+    compute = HybridCompute()             # 自动选择后端
+    compute = HybridCompute(arch="cpu")   # 强制 Taichi CPU
     
-    # Taichi GPU 加速计算
     mortality = compute.mortality(pop, env, params)
     new_pop = compute.diffusion(pop, rate=0.1)
 """
@@ -38,42 +41,14 @@ from __future__ import annotations
 
 import logging
 from dataclasses import dataclass, field
+from types import ModuleType
 
 import numpy as np
 
-logger = logging.getLogger(__name__)
-
-# ============================================================================
-# Taichi 内核（延迟导入）
-# ============================================================================
+from .compute_backend import load_kernels
+from .kernel_metrics import instrument_kernels
 
-_taichi_kernels = None
-_taichi_available = False
-
-
-def _load_taichi_kernels():
-    """加载 Taichi 内核 - GPU-only 模式，无 fallback"""
-    global _taichi_kernels, _taichi_available
-    
-    if _taichi_kernels is not None:
-        return _taichi_available
-    
-    try:
-        from . import taichi_hybrid_kernels as kernels
-        _taichi_kernels = kernels
-        _taichi_available = True
-        logger.info("[HybridCompute] Taichi GPU 内核已加载")
-        return True
-    except ImportError as e:
-        raise RuntimeError(
-            f"[GPU-only] Taichi 导入失败: {e}\n"
-            "请确保已安装 taichi-gpu 并且有可用的 GPU 设备"
-        ) from e
-    except Exception as e:
-        raise RuntimeError(
-            f"[GPU-only] Taichi GPU 初始化失败: {e}\n"
-            "请检查 GPU 驱动是否正确安装"
-        ) from e
+logger = logging.getLogger(__name__)
 
 
 # ============================================================================
@@ -84,7 +59,7 @@ def _load_taichi_kernels():
 class HybridCompute:
     """混合计算引擎 - NumPy + Taichi 分工协作
     
-    Taichi 负责：
+    内核负责（Taichi GPU/CPU 或 NumPy 向量化）：
     - mortality: 死亡率计算（大规模并行）
     - diffusion: 种群扩散（空间计算）
     - reproduction: 繁殖计算（并行）
@@ -99,7 +74,7 @@ class HybridCompute:
     Example:
         compute = HybridCompute()
         
-        # Taichi 加速的大规模计算
+        # 内核加速的大规模计算
         mortality = compute.mortality(pop, env, params)
         new_pop = compute.diffusion(pop, rate=0.1)
         
@@ -109,22 +84,31 @@ class HybridCompute:
     """
     
     arch: str = "auto"
-    _taichi_ready: bool = field(default=False, repr=False)
+    _kernel_module: ModuleType | None = field(default=None, repr=False)
+    _device: str | None = field(default=None, repr=False)
     
-    def __post_init__(self):
-        """初始化 Taichi - GPU-only 模式"""
-        self._taichi_ready = _load_taichi_kernels()
-        
-        if not self._taichi_ready:
-            raise RuntimeError("[GPU-only] Taichi GPU 初始化失败，无 NumPy fallback")
+    @property
+    def _kernels(self) -> ModuleType:
+        """按 arch 加载内核（auto/gpu/cpu/numpy），首次使用时才初始化设备"""
+        if self._kernel_module is None:
+            module, self._device = load_kernels(self.arch)
+            self._kernel_module = instrument_kernels(module, self._device)
+            logger.info(f"[HybridCompute] 计算后端: {self._device}")
+        return self._kernel_module
     
     @property
     def backend(self) -> str:
-        """当前后端 - GPU-only 模式始终为 taichi"""
-        return "taichi"
+        """当前内核实现：taichi 或 numpy"""
+        return "numpy" if self.device == "numpy" else "taichi"
+    
+    @property
+    def device(self) -> str:
+        """实际设备：cuda/vulkan/metal/opengl/cpu（Taichi）或 numpy"""
+        self._kernels  # 触发延迟加载
+        return self._device
     
     # ========================================================================
-    # Taichi 加速操作（大规模并行）
+    # 内核加速操作（大规模并行）
     # ========================================================================
     
     def mortality(
@@ -136,7 +120,7 @@ class HybridCompute:
         temp_opt: float = 20.0,
         temp_tol: float = 15.0,
     ) -> np.ndarray:
-        """计算死亡率 [Taichi GPU]
+        """计算死亡率 [内核]
         
         Args:
             pop: 种群张量 (S, H, W)
@@ -150,7 +134,7 @@ class HybridCompute:
             死亡率张量 (S, H, W)
         """
         result = np.zeros_like(pop, dtype=np.float32)
-        _taichi_kernels.kernel_mortality(
+        self._kernels.kernel_mortality(
             pop.astype(np.float32),
             env.astype(np.float32),
             params.astype(np.float32),
@@ -164,7 +148,7 @@ class HybridCompute:
         pop: np.ndarray,
         rate: float = 0.1,
     ) -> np.ndarray:
-        """种群扩散 [Taichi GPU]
+        """种群扩散 [内核]
         
         Args:
             pop: 种群张量 (S, H, W)
@@ -174,7 +158,7 @@ class HybridCompute:
             扩散后的种群张量 (S, H, W)
         """
         new_pop = np.zeros_like(pop, dtype=np.float32)
-        _taichi_kernels.kernel_diffusion(
+        self._kernels.kernel_diffusion(
             pop.astype(np.float32),
             new_pop,
             rate,
@@ -186,9 +170,9 @@ class HybridCompute:
         pop: np.ndarray,
         mortality: np.ndarray,
     ) -> np.ndarray:
-        """应用死亡率 [Taichi GPU]"""
+        """应用死亡率 [内核]"""
         result = np.zeros_like(pop, dtype=np.float32)
-        _taichi_kernels.kernel_apply_mortality(
+        self._kernels.kernel_apply_mortality(
             pop.astype(np.float32),
             mortality.astype(np.float32),
             result,
@@ -202,7 +186,7 @@ class HybridCompute:
         capacity: np.ndarray,
         birth_rate: float = 0.1,
     ) -> np.ndarray:
-        """繁殖计算 [Taichi GPU]
+        """繁殖计算 [内核]
         
         Args:
             pop: 种群张量 (S, H, W)
@@ -214,7 +198,7 @@ class HybridCompute:
             繁殖后的种群张量 (S, H, W)
         """
         result = np.zeros_like(pop, dtype=np.float32)
-        _taichi_kernels.kernel_reproduction(
+        self._kernels.kernel_reproduction(
             pop.astype(np.float32),
             fitness.astype(np.float32),
             capacity.astype(np.float32),
@@ -229,7 +213,7 @@ class HybridCompute:
         fitness: np.ndarray,
         strength: float = 0.01,
     ) -> np.ndarray:
-        """种间竞争 [Taichi GPU]
+        """种间竞争 [内核]
         
         Args:
             pop: 种群张量 (S, H, W)
@@ -240,7 +224,7 @@ class HybridCompute:
             竞争后的种群张量 (S, H, W)
         """
         result = np.zeros_like(pop, dtype=np.float32)
-        _taichi_kernels.kernel_competition(
+        self._kernels.kernel_competition(
             pop.astype(np.float32),
             fitness.astype(np.float32),
             result,
@@ -308,7 +292,7 @@ class HybridCompute:
         pop: np.ndarray,
         new_totals: np.ndarray,
     ) -> np.ndarray:
-        """将新总数按旧分布权重/均匀方式写回张量 [Taichi GPU]"""
+        """将新总数按旧分布权重/均匀方式写回张量 [内核]"""
         if new_totals.shape[0] != pop.shape[0]:
             raise ValueError("new_totals length must match species dimension")
         
@@ -318,7 +302,7 @@ class HybridCompute:
         current_totals = pop_f32.sum(axis=(1, 2), dtype=np.float32)
         out = np.zeros_like(pop_f32, dtype=np.float32)
         tile_count = int(pop_f32.shape[1] * pop_f32.shape[2])
-        _taichi_kernels.kernel_redistribute_population(
+        self._kernels.kernel_redistribute_population(
             pop_f32,
             current_totals,
             new_totals,
@@ -328,7 +312,7 @@ class HybridCompute:
         return out
 
     # ========================================================================
-    # 迁徙相关操作 [Taichi 加速]
+    # 迁徙相关操作 [内核加速]
     # ========================================================================
     
     def compute_suitability(
@@ -337,7 +321,7 @@ class HybridCompute:
         species_prefs: np.ndarray,
         habitat_mask: np.ndarray | None = None,
     ) -> np.ndarray:
-        """批量计算所有物种对所有地块的适宜度 [Taichi GPU]
+        """批量计算所有物种对所有地块的适宜度 [内核]
         
         Args:
             env: 环境张量 (C, H, W)
@@ -362,7 +346,7 @@ class HybridCompute:
             habitat_mask = np.ones((S, H, W), dtype=np.float32)
         
         result = np.zeros((S, H, W), dtype=np.float32)
-        _taichi_kernels.kernel_compute_suitability(
+        self._kernels.kernel_compute_suitability(
             env.astype(np.float32),
             species_prefs.astype(np.float32),
             habitat_mask.astype(np.float32),
@@ -377,7 +361,7 @@ class HybridCompute:
         suitability: np.ndarray,
         rate: float = 0.1,
     ) -> np.ndarray:
-        """带适宜度引导的扩散 [Taichi GPU]
+        """带适宜度引导的扩散 [内核]
         
         Args:
             pop: 种群张量 (S, H, W)
@@ -388,7 +372,7 @@ class HybridCompute:
             扩散后的种群 (S, H, W)
         """
         new_pop = np.zeros_like(pop, dtype=np.float32)
-        _taichi_kernels.kernel_advanced_diffusion(
+        self._kernels.kernel_advanced_diffusion(
             pop.astype(np.float32),
             suitability.astype(np.float32),
             new_pop,
@@ -406,7 +390,7 @@ class HybridCompute:
         pressure_threshold: float = 0.12,
         migration_rate: float = 0.15,
     ) -> np.ndarray:
-        """完整的批量迁徙计算 [Taichi GPU]
+        """完整的批量迁徙计算 [内核]
         
         一次调用完成所有物种的迁徙计算。
         
@@ -429,7 +413,7 @@ class HybridCompute:
         
         # 2. 计算距离权重
         distance_weights = np.zeros((S, H, W), dtype=np.float32)
-        _taichi_kernels.kernel_compute_distance_weights(
+        self._kernels.kernel_compute_distance_weights(
             pop.astype(np.float32),
             distance_weights,
             float(max_distance),
@@ -437,7 +421,7 @@ class HybridCompute:
         
         # 3. 计算迁徙分数
         migration_scores = np.zeros((S, H, W), dtype=np.float32)
-        _taichi_kernels.kernel_migration_decision(
+        self._kernels.kernel_migration_decision(
             pop.astype(np.float32),
             suitability,
             distance_weights,
@@ -453,13 +437,23 @@ class HybridCompute:
             death_rates > pressure_threshold,
             np.minimum(0.8, migration_rate * 2.0),
             migration_rates
-        )
+        ).astype(np.float32)
+        
+        # 栖息地偏好 (陆地/海洋/海岸) 映射到特质矩阵的 8-10 列
+        habitat_traits = np.zeros((S, 14), dtype=np.float32)
+        habitat_traits[:, 8:11] = species_prefs[:, 4:7]
+        padded_env = np.zeros((7, H, W), dtype=np.float32)
+        padded_env[:min(env.shape[0], 7)] = env[:7]
+        if env.shape[0] <= 4:
+            padded_env[4] = 1.0
         
         new_pop = np.zeros((S, H, W), dtype=np.float32)
-        _taichi_kernels.kernel_execute_migration(
+        self._kernels.kernel_execute_migration(
             pop.astype(np.float32),
             migration_scores,
             distance_weights,
+            habitat_traits,
+            padded_env,
             new_pop,
             migration_rates,
             0.08,  # score_threshold
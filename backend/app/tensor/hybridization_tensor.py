@@ -7,6 +7,10 @@
 1. 批量计算同域矩阵（地块重叠）
 2. 批量计算遗传距离矩阵
 3. 向量化筛选杂交候选
+
+候选查找（find_hybrid_candidates）走同域优先的稀疏路径：由地块→物种倒排
+（稀疏物种×地块矩阵）只生成真正同域的物种对，遗传距离只对这些物种对计算，
+最后用 argpartition 取 top-k，代价随实际共存对数线性增长，而不是 S²。
 """
 
 from __future__ import annotations
@@ -17,6 +21,7 @@ from dataclasses import dataclass, field
 from typing import Sequence, TYPE_CHECKING
 
 import numpy as np
+from scipy.sparse import coo_matrix, triu
 
 if TYPE_CHECKING:
     from ..models.species import Species
@@ -48,11 +53,24 @@ class HybridizationTensorMetrics:
     genetic_distance_time_ms: float = 0.0
     filtering_time_ms: float = 0.0
     species_count: int = 0
+    sympatric_pairs: int = 0
     candidate_pairs: int = 0
     filtered_pairs: int = 0
     backend: str = "numpy"
 
 
+@dataclass
+class _GeneticFeatures:
+    """遗传距离所需的逐物种特征（成对距离按下标广播计算）"""
+    lengths: np.ndarray
+    weights: np.ndarray
+    trophic_levels: np.ndarray
+    created_turns: np.ndarray
+    turn_scale: float
+    code_array: np.ndarray     # (n, L) 谱系代码字符码
+    code_lengths: np.ndarray   # (n,)
+
+
 class HybridizationTensorCompute:
     """张量化杂交候选筛选引擎
     
@@ -79,15 +97,8 @@ class HybridizationTensorCompute:
     
     def __init__(self):
         """初始化杂交张量计算引擎"""
+        # 杂交计算全部使用 NumPy 向量化，构造时不导入 Taichi（避免触发设备初始化）
         self._taichi_available = False
-        
-        try:
-            from .taichi_hybrid_kernels import TAICHI_AVAILABLE
-            self._taichi_available = TAICHI_AVAILABLE
-            if self._taichi_available:
-                logger.debug("[HybridTensor] Taichi 可用")
-        except ImportError:
-            pass
     
     def build_sympatry_matrix(
         self,
@@ -174,6 +185,63 @@ class HybridizationTensorCompute:
         
         return shared_tiles_matrix, total_tiles_matrix, sympatry_ratio_matrix
     
+    def build_sympatric_pairs(
+        self,
+        species_list: Sequence['Species'],
+        habitat_data: list['HabitatPopulation'] | None,
+        min_shared_tiles: int = 1,
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """由地块→物种倒排生成同域物种对（稀疏）
+        
+        物种×地块稀疏矩阵 M 的 M @ M.T 只在共享地块的物种对上产生非零元，
+        代价为各地块物种数平方之和，与实际共存规模成正比。
+        
+        Args:
+            species_list: 物种列表
+            habitat_data: 栖息地数据
+            min_shared_tiles: 最少共享地块数
+            
+        Returns:
+            (pair_i, pair_j, shared_tiles, tile_counts)
+            - pair_i, pair_j: 物种对下标（i < j，按 (i, j) 升序）
+            - shared_tiles: 各物种对的共享地块数
+            - tile_counts: (N,) 各物种地块数
+        """
+        species_list = list(species_list)
+        n = len(species_list)
+        empty = np.zeros(0, dtype=np.int64)
+        
+        id_to_idx = {sp.id: i for i, sp in enumerate(species_list) if sp.id is not None}
+        rows: list[int] = []
+        tiles: list[int] = []
+        for hab in habitat_data or ():
+            idx = id_to_idx.get(hab.species_id)
+            if idx is not None:
+                rows.append(idx)
+                tiles.append(hab.tile_id)
+        
+        if not rows:
+            return empty, empty, empty, np.zeros(n, dtype=np.int64)
+        
+        # 去重 (物种, 地块)，地块 ID 压缩为列号
+        tile_ids, cols = np.unique(np.asarray(tiles, dtype=np.int64), return_inverse=True)
+        keys = np.unique(np.asarray(rows, dtype=np.int64) * tile_ids.size + cols)
+        rows_arr, cols_arr = np.divmod(keys, tile_ids.size)
+        membership = coo_matrix(
+            (np.ones(keys.size, dtype=np.int32), (rows_arr, cols_arr)),
+            shape=(n, tile_ids.size),
+        ).tocsr()
+        tile_counts = np.bincount(rows_arr, minlength=n)
+        
+        shared = triu(membership @ membership.T, k=1).tocoo()
+        keep = shared.data >= max(min_shared_tiles, 1)
+        pair_i = shared.row[keep].astype(np.int64)
+        pair_j = shared.col[keep].astype(np.int64)
+        shared_tiles = shared.data[keep].astype(np.int64)
+        
+        order = np.lexsort((pair_j, pair_i))
+        return pair_i[order], pair_j[order], shared_tiles[order], tile_counts
+    
     def build_genetic_distance_matrix(
         self,
         species_list: Sequence['Species'],
@@ -197,7 +265,14 @@ class HybridizationTensorCompute:
         if n == 0:
             return np.array([])
         
-        # 提取特征向量
+        features = self._extract_genetic_features(species_list)
+        idx = np.arange(n)
+        distance_matrix = self._pair_genetic_distance(features, idx[:, np.newaxis], idx[np.newaxis, :])
+        np.fill_diagonal(distance_matrix, 0)
+        return distance_matrix
+    
+    def _extract_genetic_features(self, species_list: list['Species']) -> _GeneticFeatures:
+        """提取遗传距离特征向量"""
         lengths = np.array([
             sp.morphology_stats.get("body_length_cm", 1.0)
             for sp in species_list
@@ -217,42 +292,61 @@ class HybridizationTensorCompute:
         ], dtype=np.float64)
         
         lineage_codes = [sp.lineage_code for sp in species_list]
+        code_array, code_lengths = self._encode_lineage_codes(lineage_codes)
+        
+        # 时间分化尺度：40回合达到最大
+        max_turn_diff = max(created_turns.max() - created_turns.min(), 1)
+        
+        return _GeneticFeatures(
+            # 确保非零
+            lengths=np.maximum(lengths, 0.001),
+            weights=np.maximum(weights, 0.001),
+            trophic_levels=trophic_levels,
+            created_turns=created_turns,
+            turn_scale=max(max_turn_diff, 40),
+            code_array=code_array,
+            code_lengths=code_lengths,
+        )
+    
+    def _pair_genetic_distance(
+        self,
+        features: _GeneticFeatures,
+        i: np.ndarray,
+        j: np.ndarray,
+    ) -> np.ndarray:
+        """物种对 (i, j) 的遗传距离（i/j 可广播：成对列表或 N×N 网格）
         
-        # 确保非零
-        lengths = np.maximum(lengths, 0.001)
-        weights = np.maximum(weights, 0.001)
+        使用简化的快速计算方法，主要基于：
+        1. 形态差异（体长、体重）
+        2. 营养级差异
+        3. 谱系距离
+        """
+        f = features
         
         # 1. 形态差异（30%）
-        length_ratio = np.minimum.outer(lengths, lengths) / np.maximum.outer(lengths, lengths)
-        weight_ratio = np.minimum.outer(weights, weights) / np.maximum.outer(weights, weights)
+        length_ratio = np.minimum(f.lengths[i], f.lengths[j]) / np.maximum(f.lengths[i], f.lengths[j])
+        weight_ratio = np.minimum(f.weights[i], f.weights[j]) / np.maximum(f.weights[i], f.weights[j])
         morphology_diff = ((1 - length_ratio) + (1 - weight_ratio)) / 2
         
         # 2. 营养级差异（20%）
-        trophic_diff = np.abs(
-            trophic_levels[:, np.newaxis] - trophic_levels[np.newaxis, :]
-        ) / 4.0  # 营养级最大差 ~4
+        trophic_diff = np.abs(f.trophic_levels[i] - f.trophic_levels[j]) / 4.0  # 营养级最大差 ~4
         trophic_diff = np.clip(trophic_diff, 0, 1)
         
         # 3. 时间分化（20%）
-        max_turn_diff = max(created_turns.max() - created_turns.min(), 1)
-        turn_diff = np.abs(
-            created_turns[:, np.newaxis] - created_turns[np.newaxis, :]
-        ) / max(max_turn_diff, 40)  # 40回合达到最大
+        turn_diff = np.abs(f.created_turns[i] - f.created_turns[j]) / f.turn_scale
         turn_diff = np.clip(turn_diff, 0, 1)
         
         # 4. 谱系距离（30%）- 基于共同前缀长度
-        lineage_diff = self._compute_lineage_distance_matrix(lineage_codes)
+        lineage_diff = self._pair_lineage_distance(f.code_array, f.code_lengths, i, j)
         
         # 组合
-        distance_matrix = (
+        distance = (
             morphology_diff * 0.30 +
             trophic_diff * 0.20 +
             turn_diff * 0.20 +
             lineage_diff * 0.30
         )
-        
-        np.fill_diagonal(distance_matrix, 0)
-        return np.clip(distance_matrix, 0, 1)
+        return np.clip(distance, 0, 1)
     
     def _compute_lineage_distance_matrix(
         self,
@@ -269,7 +363,20 @@ class HybridizationTensorCompute:
         if n == 0:
             return np.array([])
         
-        max_len = max(len(c) for c in lineage_codes) if lineage_codes else 1
+        code_array, code_lengths = self._encode_lineage_codes(lineage_codes)
+        idx = np.arange(n)
+        distance = self._pair_lineage_distance(
+            code_array, code_lengths, idx[:, np.newaxis], idx[np.newaxis, :]
+        )
+        np.fill_diagonal(distance, 0)
+        
+        return distance
+    
+    @staticmethod
+    def _encode_lineage_codes(lineage_codes: list[str]) -> tuple[np.ndarray, np.ndarray]:
+        """谱系代码 → (n, L) 字符码数组与 (n,) 长度"""
+        n = len(lineage_codes)
+        max_len = max((len(c) for c in lineage_codes), default=1)
         
         # 转换为字符数组
         code_array = np.zeros((n, max_len), dtype=np.int32)
@@ -280,20 +387,24 @@ class HybridizationTensorCompute:
             for j, char in enumerate(code):
                 code_array[i, j] = ord(char)
         
+        return code_array, code_lengths
+    
+    @staticmethod
+    def _pair_lineage_distance(
+        code_array: np.ndarray,
+        code_lengths: np.ndarray,
+        i: np.ndarray,
+        j: np.ndarray,
+    ) -> np.ndarray:
+        """物种对的谱系距离 = 1 - 共同前缀长度 / 较短代码长度（i/j 可广播）"""
         # 计算共同前缀长度
-        char_match = code_array[:, np.newaxis, :] == code_array[np.newaxis, :, :]
-        cumulative_match = np.cumprod(char_match, axis=2)
-        common_prefix_length = cumulative_match.sum(axis=2)  # (n, n)
+        char_match = code_array[i] == code_array[j]
+        common_prefix_length = np.cumprod(char_match, axis=-1).sum(axis=-1)
         
         # 计算最大可能前缀长度
-        max_possible = np.minimum.outer(code_lengths, code_lengths)
-        max_possible = np.maximum(max_possible, 1)  # 避免除零
-        
-        # 距离 = 1 - (共同前缀 / 最大可能前缀)
-        distance = 1.0 - (common_prefix_length / max_possible)
-        np.fill_diagonal(distance, 0)
+        max_possible = np.maximum(np.minimum(code_lengths[i], code_lengths[j]), 1)  # 避免除零
         
-        return distance
+        return 1.0 - (common_prefix_length / max_possible)
     
     def compute_fertility(self, genetic_distance: np.ndarray) -> np.ndarray:
         """计算可育性矩阵
@@ -309,6 +420,12 @@ class HybridizationTensorCompute:
         Returns:
             N×N 可育性矩阵
         """
+        fertility = self._fertility(genetic_distance)
+        np.fill_diagonal(fertility, 0)
+        return fertility
+    
+    def _fertility(self, genetic_distance: np.ndarray) -> np.ndarray:
+        """逐元素可育性（任意形状，不处理对角线）"""
         fertility = np.zeros_like(genetic_distance)
         
         # 距离 < 0.15: 高可育性
@@ -330,7 +447,6 @@ class HybridizationTensorCompute:
         # 距离 > 0.70: 不可杂交
         # fertility 默认为 0
         
-        np.fill_diagonal(fertility, 0)
         return np.clip(fertility, 0, 1)
     
     def find_hybrid_candidates(
@@ -344,7 +460,8 @@ class HybridizationTensorCompute:
     ) -> tuple[list[HybridCandidate], HybridizationTensorMetrics]:
         """批量查找杂交候选对
         
-        使用张量计算批量筛选所有可能的杂交候选，然后按得分排序。
+        同域优先：先由地块倒排生成共享地块的物种对，再只对这些物种对计算
+        遗传距离与可育性，最后取得分最高的 max_candidates 个（降序）。
         
         Args:
             species_list: 物种列表
@@ -372,70 +489,60 @@ class HybridizationTensorCompute:
         if n < 2:
             return [], metrics
         
-        # 1. 计算同域矩阵
+        # 1. 同域物种对（稀疏倒排，只生成共享地块的物种对）
         t0 = time.perf_counter()
-        shared_tiles, total_tiles, sympatry_ratio = self.build_sympatry_matrix(
-            species_list, habitat_data
+        pair_i, pair_j, shared_tiles, tile_counts = self.build_sympatric_pairs(
+            species_list, habitat_data, min_shared_tiles
         )
+        metrics.sympatric_pairs = int(pair_i.size)
+        
+        min_tiles = np.maximum(np.minimum(tile_counts[pair_i], tile_counts[pair_j]), 1)
+        sympatry_ratio = np.clip(shared_tiles / min_tiles, 0, 1)
+        total_tiles = np.maximum(tile_counts[pair_i] + tile_counts[pair_j] - shared_tiles, 1)
         metrics.sympatry_time_ms = (time.perf_counter() - t0) * 1000
         
-        # 2. 计算遗传距离矩阵
+        # 2. 只对同域物种对计算遗传距离与可育性
         t0 = time.perf_counter()
-        genetic_distance = self.build_genetic_distance_matrix(species_list)
-        fertility = self.compute_fertility(genetic_distance)
+        features = self._extract_genetic_features(species_list)
+        genetic_distance = self._pair_genetic_distance(features, pair_i, pair_j)
+        fertility = self._fertility(genetic_distance)
         metrics.genetic_distance_time_ms = (time.perf_counter() - t0) * 1000
         
-        # 3. 向量化筛选
+        # 3. 向量化筛选：遗传距离在阈值内且可育
         t0 = time.perf_counter()
+        valid = (genetic_distance <= max_genetic_distance) & (fertility > 0)
+        valid_idx = np.flatnonzero(valid)
+        metrics.candidate_pairs = int(valid_idx.size)
         
-        # 创建有效候选掩码
-        # 只取上三角（避免重复）
-        upper_mask = np.triu(np.ones((n, n), dtype=bool), k=1)
-        
-        # 条件1：有共享地块
-        sympatry_mask = shared_tiles >= min_shared_tiles
-        
-        # 条件2：遗传距离在阈值内
-        distance_mask = genetic_distance <= max_genetic_distance
-        
-        # 条件3：可育性 > 0
-        fertility_mask = fertility > 0
-        
-        # 组合所有条件
-        valid_mask = upper_mask & sympatry_mask & distance_mask & fertility_mask
-        
-        # 计算综合得分
         # 得分 = 同域比例 × 可育性 × (1 - 遗传距离)
         hybrid_score = sympatry_ratio * fertility * (1 - genetic_distance)
-        hybrid_score[~valid_mask] = 0
-        
-        # 找到所有有效候选的索引
-        valid_indices = np.argwhere(valid_mask)
-        metrics.candidate_pairs = len(valid_indices)
         
-        # 按得分排序
-        scores = hybrid_score[valid_mask]
-        sorted_order = np.argsort(scores)[::-1]  # 降序
+        # top-k：argpartition 取前 k，再对 k 个按得分降序（同分按物种下标）排序
+        scores = hybrid_score[valid_idx]
+        k = min(max_candidates, valid_idx.size)
+        if 0 < k < valid_idx.size:
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(valid_idx.size)[:k]
+        top = top[np.lexsort((pair_j[valid_idx[top]], pair_i[valid_idx[top]], -scores[top]))]
         
         # 提取候选
         candidates = []
         lineage_codes = [sp.lineage_code for sp in species_list]
         
-        for rank in range(min(len(sorted_order), max_candidates)):
-            idx = sorted_order[rank]
-            i, j = valid_indices[idx]
-            
+        for p in valid_idx[top]:
+            i, j = int(pair_i[p]), int(pair_j[p])
             candidate = HybridCandidate(
-                species1_idx=int(i),
-                species2_idx=int(j),
+                species1_idx=i,
+                species2_idx=j,
                 species1_code=lineage_codes[i],
                 species2_code=lineage_codes[j],
-                shared_tiles=int(shared_tiles[i, j]),
-                total_tiles=int(total_tiles[i, j]),
-                sympatry_ratio=float(sympatry_ratio[i, j]),
-                genetic_distance=float(genetic_distance[i, j]),
-                fertility=float(fertility[i, j]),
-                hybrid_score=float(hybrid_score[i, j]),
+                shared_tiles=int(shared_tiles[p]),
+                total_tiles=int(total_tiles[p]),
+                sympatry_ratio=float(sympatry_ratio[p]),
+                genetic_distance=float(genetic_distance[p]),
+                fertility=float(fertility[p]),
+                hybrid_score=float(hybrid_score[p]),
             )
             candidates.append(candidate)
         
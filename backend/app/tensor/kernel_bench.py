@@ -0,0 +1,676 @@
+"""
+生态内核基准测试 - v1/v2 内核对照与性能回归检测
+
+taichi_hybrid_kernels 中多个内核存在两代实现（kernel_advanced_diffusion /
+kernel_advanced_diffusion_v2 等）。本模块在合成世界上逐个运行内核：
+- 物种数 × 地图尺寸网格（默认 S ∈ {10, 100, 1000}，地图 128×40 ~ 512×160）
+- 记录墙钟时间（中位数/最小/平均）、吞吐量（格子/秒）、峰值内存
+- 同组 v1/v2 内核给出加速比
+- 结果写入 JSON，可与存档的基线对比（可配置容差），超出即报告回归
+
+默认使用 Taichi CPU 后端（ti.cpu），无 GPU 的机器/CI 也能运行；
+--backend numpy 可对 numpy_kernels 做同样的测量（仅覆盖其实现的内核）。
+
+用法（在 backend 目录下）：
+    python -m app.tensor.kernel_bench --output kernel_bench.json
+    python -m app.tensor.kernel_bench --baseline kernel_baseline.json --tolerance 0.2
+    python -m app.tensor.kernel_bench --kernels "*diffusion*" --species 10 100 --maps 128x40
+
+合成世界按需生成（只分配当前内核用到的数组），工作量超过 --max-work
+的组合（如 O(S·(HW)²) 的距离权重内核在大地图上）记为跳过。
+"""
+
+from __future__ import annotations
+
+import argparse
+import fnmatch
+import json
+import logging
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from functools import cached_property
+from pathlib import Path
+from types import ModuleType
+from typing import Callable, Iterable, Sequence
+
+import numpy as np
+
+from .compute_backend import load_kernels
+
+try:  # Windows 无 resource 模块
+    import resource
+except ImportError:  # pragma: no cover
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+REPORT_VERSION = 1
+
+DEFAULT_SPECIES = (10, 100, 1000)
+# (H, W)；命令行写作 WxH，如 128x40
+DEFAULT_MAPS = ((40, 128), (80, 256), (160, 512))
+DEFAULT_REPEAT = 5
+DEFAULT_TOLERANCE = 0.2
+# 单次内核调用的最大估算工作量（内层循环次数），超过即跳过
+DEFAULT_MAX_WORK = 2e10
+
+
+# ============================================================================
+# 合成世界
+# ============================================================================
+
+class SyntheticWorld:
+    """合成世界输入（按需生成，生成顺序不影响取值）
+
+    取值范围与 tests/test_numpy_kernels.py 的对照数据一致：
+    - 种群约 45% 空格
+    - 环境 7 通道 [温度, 湿度, 海拔, 资源, 陆地, 海洋, 海岸]
+    - 特质 (S, 14)，覆盖陆生/水生/两栖
+    """
+
+    def __init__(self, S: int, H: int, W: int, seed: int = 20240620):
+        self.S, self.H, self.W = S, H, W
+        self.seed = seed
+
+    def _rng(self, stream: int) -> np.random.Generator:
+        return np.random.default_rng([self.seed, self.S, self.H, self.W, stream])
+
+    @property
+    def shape(self) -> tuple[int, int, int]:
+        return self.S, self.H, self.W
+
+    @property
+    def cells(self) -> int:
+        return self.S * self.H * self.W
+
+    @cached_property
+    def pop(self) -> np.ndarray:
+        rng = self._rng(0)
+        p = (rng.random(self.shape, dtype=np.float32) * 180).astype(np.float32)
+        p[rng.random(self.shape, dtype=np.float32) < 0.45] = 0
+        return p
+
+    @cached_property
+    def env(self) -> np.ndarray:
+        rng = self._rng(1)
+        H, W = self.H, self.W
+        e = np.zeros((7, H, W), dtype=np.float32)
+        e[0] = rng.uniform(-1, 1, (H, W))
+        e[1:4] = rng.random((3, H, W))
+        ocean = rng.random((H, W)) < 0.35
+        coast = ~ocean & (rng.random((H, W)) < 0.2)
+        e[4] = ~ocean & ~coast
+        e[5] = ocean
+        e[6] = coast
+        return e
+
+    @cached_property
+    def climate(self) -> np.ndarray:
+        """kernel_mortality 使用的 3 通道气候（通道 1 为温度，单位 °C）"""
+        return self._rng(2).uniform(-10, 35, (3, self.H, self.W)).astype(np.float32)
+
+    @cached_property
+    def traits(self) -> np.ndarray:
+        rng = self._rng(3)
+        S = self.S
+        t = np.zeros((S, 14), dtype=np.float32)
+        t[:, 0:8] = rng.uniform(1, 10, (S, 8))
+        habitat = rng.integers(0, 3, S)
+        t[:, 8] = np.where(habitat == 0, 1.0, np.where(habitat == 2, 0.5, 0.0))
+        t[:, 9] = np.where(habitat == 1, 1.0, np.where(habitat == 2, 0.5, 0.0))
+        t[:, 10] = np.where(habitat == 2, 0.6, 0.1)
+        t[:, 11] = rng.uniform(1, 4, S)
+        t[:, 12] = rng.integers(0, 40, S)
+        t[:, 13] = rng.random(S)
+        return t
+
+    @cached_property
+    def prefs(self) -> np.ndarray:
+        rng = self._rng(4)
+        p = rng.random((self.S, 7)).astype(np.float32)
+        p[:, 0] = rng.uniform(-1, 1, self.S)
+        return p
+
+    @cached_property
+    def params(self) -> np.ndarray:
+        return (self._rng(5).random((self.S, 8)) * 10).astype(np.float32)
+
+    @cached_property
+    def trophic(self) -> np.ndarray:
+        return self._rng(6).choice(
+            np.array([1.0, 1.5, 2.0, 2.5, 3.0], dtype=np.float32), self.S
+        )
+
+    @cached_property
+    def pressure(self) -> np.ndarray:
+        return (self._rng(7).random((2, self.H, self.W)) * 2).astype(np.float32)
+
+    @cached_property
+    def suitability(self) -> np.ndarray:
+        return self._rng(8).random(self.shape, dtype=np.float32)
+
+    @cached_property
+    def capacity(self) -> np.ndarray:
+        return (self._rng(9).random((self.H, self.W), dtype=np.float32) * 500).astype(np.float32)
+
+    @cached_property
+    def habitat_mask(self) -> np.ndarray:
+        return (self._rng(10).random(self.shape, dtype=np.float32) > 0.2).astype(np.float32)
+
+    @cached_property
+    def scale(self) -> np.ndarray:
+        """v2 内核的逐物种缩放因子"""
+        return self._rng(11).uniform(1.0, 2.5, self.S).astype(np.float32)
+
+    @cached_property
+    def distance(self) -> np.ndarray:
+        return self._rng(12).random(self.shape, dtype=np.float32)
+
+    @cached_property
+    def scores(self) -> np.ndarray:
+        return (self._rng(13).random(self.shape, dtype=np.float32) * 0.6).astype(np.float32)
+
+    @cached_property
+    def prey(self) -> np.ndarray:
+        return (self._rng(14).random(self.shape, dtype=np.float32) * 0.3).astype(np.float32)
+
+    @cached_property
+    def death_rates(self) -> np.ndarray:
+        return (self._rng(15).random(self.S) * 0.5).astype(np.float32)
+
+    @cached_property
+    def resource_pressure(self) -> np.ndarray:
+        return self._rng(16).random(self.S).astype(np.float32)
+
+    @cached_property
+    def migration_rates(self) -> np.ndarray:
+        return self._rng(17).uniform(0.05, 0.3, self.S).astype(np.float32)
+
+    @cached_property
+    def overlap(self) -> np.ndarray:
+        o = self._rng(18).random((self.S, self.S), dtype=np.float32)
+        o = (o + o.T) * 0.5
+        np.fill_diagonal(o, 1.0)
+        return o
+
+    @cached_property
+    def out(self) -> np.ndarray:
+        """(S, H, W) 输出缓冲区（各内核共用，内核整体覆盖写入）"""
+        return np.zeros(self.shape, dtype=np.float32)
+
+    @cached_property
+    def out_pairs(self) -> np.ndarray:
+        return np.zeros((self.S, self.S), dtype=np.float32)
+
+
+# ============================================================================
+# 内核用例
+# ============================================================================
+
+@dataclass(frozen=True)
+class KernelCase:
+    """单个内核的基准用例
+
+    Attributes:
+        kernel: 内核函数名（两套内核模块同名）
+        group: 对照组，同组的 v1/v2 内核给出加速比
+        version: "v1" / "v2"
+        args: 合成世界 → 调用参数（输出缓冲区已在参数中）
+        work: (S, H, W) → 估算工作量（内层循环次数），用于跳过超大组合
+    """
+    kernel: str
+    group: str
+    version: str
+    args: Callable[[SyntheticWorld], tuple]
+    work: Callable[[int, int, int], float] = lambda S, H, W: S * H * W
+
+
+def _pairwise_work(S: int, H: int, W: int) -> float:
+    return float(S) * S * H * W
+
+
+def _global_work(S: int, H: int, W: int) -> float:
+    return float(S) * (H * W) ** 2
+
+
+# 参数取值与 TensorEcologyEngine / HybridCompute 的默认配置一致
+KERNEL_CASES: tuple[KernelCase, ...] = (
+    # --- 两代实现对照 ---
+    KernelCase("kernel_advanced_diffusion", "advanced_diffusion", "v1",
+               lambda w: (w.pop, w.suitability, w.out, 0.18)),
+    KernelCase("kernel_advanced_diffusion_v2", "advanced_diffusion", "v2",
+               lambda w: (w.pop, w.suitability, w.scale, w.out, 0.18, 0.08, 15.0, 0.22)),
+    KernelCase("kernel_trait_diffusion", "trait_diffusion", "v1",
+               lambda w: (w.pop, w.suitability, w.traits, w.env, w.out, 0.18)),
+    KernelCase("kernel_trait_diffusion_v2", "trait_diffusion", "v2",
+               lambda w: (w.pop, w.suitability, w.traits, w.env, w.scale, w.out, 0.18, 0.08, 15.0, 0.22)),
+    KernelCase("kernel_reproduction", "reproduction", "v1",
+               lambda w: (w.pop, w.suitability, w.capacity, 0.12, w.out)),
+    KernelCase("kernel_reproduction_v2", "reproduction", "v2",
+               lambda w: (w.pop, w.suitability, w.capacity, w.scale, 0.12, w.out)),
+    KernelCase("kernel_multifactor_mortality", "multifactor_mortality", "v1",
+               lambda w: (w.pop, w.env, w.prefs, w.params, w.trophic, w.pressure, w.out,
+                          0.06, 0.25, 0.2, 0.25, 100.0, 1.0)),
+    KernelCase("kernel_multifactor_mortality_v2", "multifactor_mortality", "v2",
+               lambda w: (w.pop, w.env, w.prefs, w.params, w.trophic, w.pressure, w.scale, w.out,
+                          0.06, 0.25, 0.2, 0.25, 100.0, 1.0)),
+    KernelCase("kernel_trait_mortality", "trait_mortality", "v1",
+               lambda w: (w.pop, w.env, w.traits, w.suitability, w.pressure, w.out, 0.06, 1.0)),
+    KernelCase("kernel_trait_mortality_v2", "trait_mortality", "v2",
+               lambda w: (w.pop, w.env, w.traits, w.suitability, w.pressure, w.scale, w.out, 0.06, 1.0)),
+    KernelCase("kernel_migration_decision", "migration_decision", "v1",
+               lambda w: (w.pop, w.suitability, w.distance, w.death_rates, w.out, 0.12, 0.6)),
+    KernelCase("kernel_migration_decision_v2", "migration_decision", "v2",
+               lambda w: (w.pop, w.suitability, w.distance, w.death_rates, w.resource_pressure,
+                          w.prey, w.trophic, w.traits, w.env, w.out,
+                          0.08, 0.5, 0.8, 0.1, 0.4, 0.12, 2.0)),
+    # --- 单一实现 ---
+    KernelCase("kernel_mortality", "mortality", "v1",
+               lambda w: (w.pop, w.climate, w.params, w.out, 1, 20.0, 15.0)),
+    KernelCase("kernel_diffusion", "diffusion", "v1",
+               lambda w: (w.pop, w.out, 0.2)),
+    KernelCase("kernel_apply_mortality", "apply_mortality", "v1",
+               lambda w: (w.pop, w.suitability, w.out)),
+    KernelCase("kernel_competition", "competition", "v1",
+               lambda w: (w.pop, w.suitability, w.out, 0.01)),
+    KernelCase("kernel_compute_suitability", "suitability", "v1",
+               lambda w: (w.env, w.prefs, w.habitat_mask, w.out)),
+    KernelCase("kernel_compute_trait_suitability", "trait_suitability", "v1",
+               lambda w: (w.env, w.traits, w.out)),
+    KernelCase("kernel_compute_local_fitness", "local_fitness", "v1",
+               lambda w: (w.suitability, w.traits, w.pop, w.out)),
+    KernelCase("kernel_compute_niche_overlap_matrix", "niche_overlap", "v1",
+               lambda w: (w.traits, w.out_pairs),
+               work=lambda S, H, W: float(S) * S),
+    KernelCase("kernel_apply_trait_competition", "trait_competition", "v1",
+               lambda w: (w.pop, w.suitability, w.overlap, w.out, 0.05),
+               work=_pairwise_work),
+    KernelCase("kernel_compute_distance_weights", "distance_weights", "v1",
+               lambda w: (w.pop, w.out, 6.0),
+               work=_global_work),
+    KernelCase("kernel_execute_migration", "execute_migration", "v1",
+               lambda w: (w.pop, w.scores, w.distance, w.traits, w.env, w.out,
+                          w.migration_rates, 0.15, 0.0)),
+)
+
+
+def select_cases(patterns: Sequence[str] | None = None) -> list[KernelCase]:
+    """按内核名/对照组的通配符筛选用例（None 表示全部）"""
+    if not patterns:
+        return list(KERNEL_CASES)
+    return [
+        case for case in KERNEL_CASES
+        if any(fnmatch.fnmatch(case.kernel, p) or fnmatch.fnmatch(case.group, p) for p in patterns)
+    ]
+
+
+# ============================================================================
+# 测量
+# ============================================================================
+
+@dataclass
+class KernelResult:
+    """单个 (内核, S, H, W) 组合的测量结果"""
+    kernel: str
+    group: str
+    version: str
+    S: int
+    H: int
+    W: int
+    cells: int
+    repeat: int = 0
+    wall_ms: float | None = None        # 中位数
+    min_ms: float | None = None
+    mean_ms: float | None = None
+    cells_per_s: float | None = None
+    peak_bytes: int | None = None       # 单次调用期间的主机内存峰值（tracemalloc）
+    input_bytes: int | None = None      # 参数数组总字节数（含输出缓冲区）
+    skipped: str | None = None
+
+    @property
+    def key(self) -> str:
+        return f"{self.kernel}@{self.S}x{self.H}x{self.W}"
+
+
+@dataclass
+class BenchmarkReport:
+    """一次基准运行的完整结果"""
+    backend: str
+    repeat: int
+    created_at: str = field(default_factory=lambda: datetime.now().isoformat(timespec="seconds"))
+    environment: dict = field(default_factory=dict)
+    results: list[KernelResult] = field(default_factory=list)
+    max_rss_bytes: int | None = None
+
+    def comparisons(self) -> list[dict]:
+        """同组 v1/v2 在同一尺寸下的加速比（v1 耗时 / v2 耗时）"""
+        timed = {
+            (r.group, r.version, r.S, r.H, r.W): r
+            for r in self.results if r.wall_ms is not None
+        }
+        rows = []
+        for (group, version, S, H, W), v2 in timed.items():
+            if version != "v2":
+                continue
+            v1 = timed.get((group, "v1", S, H, W))
+            if v1 is None:
+                continue
+            rows.append({
+                "group": group, "S": S, "H": H, "W": W,
+                "v1_ms": v1.wall_ms, "v2_ms": v2.wall_ms,
+                "speedup": v1.wall_ms / v2.wall_ms if v2.wall_ms > 0 else None,
+            })
+        return rows
+
+    def to_dict(self) -> dict:
+        return {
+            "version": REPORT_VERSION,
+            "backend": self.backend,
+            "repeat": self.repeat,
+            "created_at": self.created_at,
+            "environment": self.environment,
+            "max_rss_bytes": self.max_rss_bytes,
+            "results": [asdict(r) for r in self.results],
+            "comparisons": self.comparisons(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> BenchmarkReport:
+        return cls(
+            backend=data["backend"],
+            repeat=data.get("repeat", 0),
+            created_at=data.get("created_at", ""),
+            environment=data.get("environment", {}),
+            results=[KernelResult(**r) for r in data.get("results", [])],
+            max_rss_bytes=data.get("max_rss_bytes"),
+        )
+
+    def save(self, path: str | Path) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.to_dict(), indent=2, ensure_ascii=False), encoding="utf-8")
+
+    @classmethod
+    def load(cls, path: str | Path) -> BenchmarkReport:
+        return cls.from_dict(json.loads(Path(path).read_text(encoding="utf-8")))
+
+
+def _max_rss_bytes() -> int | None:
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS 以字节为单位，Linux 以 KB 为单位
+    return int(rss if sys.platform == "darwin" else rss * 1024)
+
+
+def _environment(kernels: ModuleType, device: str) -> dict:
+    env = {
+        "device": device,
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+    }
+    ti = getattr(kernels, "ti", None)
+    if ti is not None:
+        version = ti.__version__
+        env["taichi"] = ".".join(map(str, version)) if isinstance(version, tuple) else str(version)
+    return env
+
+
+def measure_case(
+    kernels: ModuleType,
+    case: KernelCase,
+    world: SyntheticWorld,
+    repeat: int = DEFAULT_REPEAT,
+    warmup: int = 1,
+) -> KernelResult:
+    """测量单个内核在给定世界上的耗时与内存
+
+    预热调用触发 JIT 编译且不计时；峰值内存在额外一次调用中用 tracemalloc
+    测量，避免追踪开销影响计时。
+    """
+    S, H, W = world.shape
+    result = KernelResult(
+        kernel=case.kernel, group=case.group, version=case.version,
+        S=S, H=H, W=W, cells=world.cells,
+    )
+    fn = getattr(kernels, case.kernel, None)
+    if fn is None:
+        result.skipped = "unavailable"
+        return result
+
+    args = case.args(world)
+    ti = getattr(kernels, "ti", None)
+    sync = ti.sync if ti is not None else (lambda: None)
+
+    for _ in range(warmup):
+        fn(*args)
+    sync()
+
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args)
+        sync()
+        samples.append(time.perf_counter() - start)
+
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    base, _ = tracemalloc.get_traced_memory()
+    fn(*args)
+    sync()
+    _, peak = tracemalloc.get_traced_memory()
+    if not tracing:
+        tracemalloc.stop()
+
+    median = statistics.median(samples)
+    result.repeat = repeat
+    result.wall_ms = median * 1000
+    result.min_ms = min(samples) * 1000
+    result.mean_ms = statistics.fmean(samples) * 1000
+    result.cells_per_s = world.cells / median if median > 0 else None
+    result.peak_bytes = int(peak - base)
+    result.input_bytes = int(sum(a.nbytes for a in args if isinstance(a, np.ndarray)))
+    return result
+
+
+def run_benchmarks(
+    species: Iterable[int] = DEFAULT_SPECIES,
+    maps: Iterable[tuple[int, int]] = DEFAULT_MAPS,
+    cases: Sequence[KernelCase] | None = None,
+    backend: str = "cpu",
+    repeat: int = DEFAULT_REPEAT,
+    max_work: float = DEFAULT_MAX_WORK,
+    seed: int = 20240620,
+) -> BenchmarkReport:
+    """在 物种数 × 地图尺寸 网格上运行全部用例
+
+    Args:
+        species: 物种数列表
+        maps: (H, W) 列表
+        cases: 内核用例，None 表示全部
+        backend: cpu/gpu/auto/numpy（见 compute_backend）
+        repeat: 每个组合的计时次数
+        max_work: 单次调用工作量上限，超过的组合记为跳过
+    """
+    kernels, device = load_kernels(backend)
+    cases = list(KERNEL_CASES) if cases is None else list(cases)
+    report = BenchmarkReport(backend=device, repeat=repeat, environment=_environment(kernels, device))
+
+    for H, W in maps:
+        for S in species:
+            world = SyntheticWorld(S, H, W, seed=seed)
+            for case in cases:
+                if case.work(S, H, W) > max_work:
+                    report.results.append(KernelResult(
+                        kernel=case.kernel, group=case.group, version=case.version,
+                        S=S, H=H, W=W, cells=world.cells, skipped="work budget",
+                    ))
+                    continue
+                result = measure_case(kernels, case, world, repeat=repeat)
+                report.results.append(result)
+                if result.wall_ms is not None:
+                    logger.info(
+                        f"[KernelBench] {result.key}: {result.wall_ms:.3f}ms "
+                        f"({result.cells_per_s / 1e6:.1f}M cells/s)"
+                    )
+
+    report.max_rss_bytes = _max_rss_bytes()
+    return report
+
+
+# ============================================================================
+# 基线对比
+# ============================================================================
+
+@dataclass
+class Regression:
+    """超出容差的指标"""
+    key: str
+    metric: str
+    baseline: float
+    current: float
+
+    @property
+    def ratio(self) -> float:
+        return self.current / self.baseline if self.baseline else float("inf")
+
+    def __str__(self) -> str:
+        return f"{self.key} {self.metric}: {self.baseline:.4g} → {self.current:.4g} (×{self.ratio:.2f})"
+
+
+def compare_reports(
+    current: BenchmarkReport,
+    baseline: BenchmarkReport,
+    tolerance: float = DEFAULT_TOLERANCE,
+    metrics: Sequence[str] = ("wall_ms", "peak_bytes"),
+) -> list[Regression]:
+    """对比当前结果与基线，返回超出 (1 + tolerance) 倍的指标
+
+    只比较两边都有测量值的组合；新增/跳过的组合不算回归。
+    """
+    if current.backend != baseline.backend:
+        logger.warning(
+            f"[KernelBench] 基线后端 {baseline.backend} 与当前后端 {current.backend} 不同，对比结果仅供参考"
+        )
+    base = {r.key: r for r in baseline.results if r.skipped is None}
+    regressions = []
+    for r in current.results:
+        ref = base.get(r.key)
+        if ref is None or r.skipped is not None:
+            continue
+        for metric in metrics:
+            old, new = getattr(ref, metric), getattr(r, metric)
+            if old is None or new is None:
+                continue
+            if new > old * (1.0 + tolerance):
+                regressions.append(Regression(r.key, metric, float(old), float(new)))
+    return regressions
+
+
+# ============================================================================
+# 命令行
+# ============================================================================
+
+def _parse_map(text: str) -> tuple[int, int]:
+    """WxH → (H, W)"""
+    try:
+        w, h = (int(v) for v in text.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"地图尺寸格式应为 WxH，如 128x40: {text}") from None
+    return h, w
+
+
+def _format_table(report: BenchmarkReport) -> str:
+    lines = [f"{'kernel':<38}{'S':>6}{'map':>10}{'ms':>12}{'Mcells/s':>11}{'peak MB':>10}"]
+    for r in report.results:
+        size = f"{r.W}x{r.H}"
+        if r.skipped:
+            lines.append(f"{r.kernel:<38}{r.S:>6}{size:>10}  skipped ({r.skipped})")
+            continue
+        peak = (r.peak_bytes or 0) / 2**20
+        lines.append(
+            f"{r.kernel:<38}{r.S:>6}{size:>10}{r.wall_ms:>12.3f}"
+            f"{(r.cells_per_s or 0) / 1e6:>11.1f}{peak:>10.1f}"
+        )
+    comparisons = report.comparisons()
+    if comparisons:
+        lines.append("")
+        lines.append(f"{'v1 → v2':<38}{'S':>6}{'map':>10}{'speedup':>12}")
+        for c in comparisons:
+            size = f"{c['W']}x{c['H']}"
+            speedup = f"{c['speedup']:.2f}x" if c["speedup"] else "-"
+            lines.append(f"{c['group']:<38}{c['S']:>6}{size:>10}{speedup:>12}")
+    return "\n".join(lines)
+
+
+def create_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m app.tensor.kernel_bench",
+        description="生态内核基准测试（v1/v2 对照、基线回归检测）",
+    )
+    parser.add_argument("--backend", default="cpu", help="计算后端: cpu/gpu/auto/numpy（默认 cpu）")
+    parser.add_argument("--species", type=int, nargs="+", default=list(DEFAULT_SPECIES), help="物种数列表")
+    parser.add_argument(
+        "--maps", type=_parse_map, nargs="+",
+        default=list(DEFAULT_MAPS), metavar="WxH", help="地图尺寸列表，如 128x40 512x160",
+    )
+    parser.add_argument("--kernels", nargs="+", metavar="PATTERN", help="内核名/对照组通配符")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="每个组合的计时次数")
+    parser.add_argument("--max-work", type=float, default=DEFAULT_MAX_WORK, help="单次调用工作量上限")
+    parser.add_argument("--output", type=Path, help="结果 JSON 输出路径")
+    parser.add_argument("--baseline", type=Path, help="基线 JSON，存在时进行回归对比")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="回归容差（0.2 = 慢 20%%）")
+    parser.add_argument("--update-baseline", action="store_true", help="将本次结果写入 --baseline")
+    return parser
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    args = create_parser().parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    cases = select_cases(args.kernels)
+    if not cases:
+        print(f"没有匹配的内核: {args.kernels}", file=sys.stderr)
+        return 2
+
+    report = run_benchmarks(
+        species=args.species, maps=args.maps, cases=cases,
+        backend=args.backend, repeat=args.repeat, max_work=args.max_work,
+    )
+    print(_format_table(report))
+
+    if args.output:
+        report.save(args.output)
+        print(f"\n结果已写入 {args.output}")
+
+    exit_code = 0
+    if args.baseline:
+        if args.update_baseline:
+            report.save(args.baseline)
+            print(f"基线已更新: {args.baseline}")
+        elif args.baseline.exists():
+            regressions = compare_reports(report, BenchmarkReport.load(args.baseline), args.tolerance)
+            if regressions:
+                print(f"\n性能回归 {len(regressions)} 项（容差 {args.tolerance:.0%}）:")
+                for reg in regressions:
+                    print(f"  {reg}")
+                exit_code = 1
+            else:
+                print(f"\n与基线一致（容差 {args.tolerance:.0%}）")
+        else:
+            print(f"基线不存在: {args.baseline}（使用 --update-baseline 创建）", file=sys.stderr)
+            exit_code = 2
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,368 @@
+"""
+内核级性能指标 - 逐内核调用次数、耗时、主机↔设备传输量与吞吐
+
+TensorMetricsCollector 只记录死亡率/分化检测/代价计算三个粗粒度计时，
+EcologyMetrics 只写日志。本模块在内核模块外包一层计量代理：
+- instrument(module, device) 返回与内核模块同名接口的代理，kernel_* 调用逐次计量：
+  调用次数、墙钟耗时、传输字节、处理格子数（最大数组参数的元素数）
+- 传输字节：GPU 设备上 NumPy 数组参数在调用前上传、调用后回写，按 2 × nbytes 计；
+  Taichi CPU 与 NumPy 后端直接使用主机内存，不计传输
+- 可选 Taichi 内核分析器（TENSOR_KERNEL_PROFILER=1）：ti.init(kernel_profiler=True)，
+  每次调用后同步设备，回合结束时读取逐内核设备耗时
+- end_turn() 把本回合计数归档为 KernelTurnProfile（保留最近 max_history 回合），
+  同时累加到进程级总计；to_prometheus() 输出 Prometheus 文本格式
+
+API：GET /metrics（Prometheus 文本）、GET /api/metrics/kernels（JSON 历史）。
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import sys
+import threading
+import time
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from types import ModuleType
+from typing import TYPE_CHECKING, Any, Dict, List
+
+if TYPE_CHECKING:
+    from .ecology import EcologyMetrics
+
+logger = logging.getLogger(__name__)
+
+# 设备内存独立于主机内存的 Taichi 后端（NumPy 数组参数需要拷贝）
+_GPU_DEVICES = ("cuda", "vulkan", "metal", "opengl")
+
+# EcologyMetrics 中按阶段导出的耗时字段
+_ECOLOGY_STAGES = ("mortality", "dispersal", "migration", "reproduction", "competition")
+
+
+@dataclass
+class KernelStats:
+    """单个内核的计量"""
+    launches: int = 0
+    wall_ms: float = 0.0
+    device_ms: float = 0.0            # Taichi 内核分析器给出的设备耗时（未启用为 0）
+    bytes_transferred: int = 0        # 主机 ↔ 设备传输字节
+    cells: int = 0                    # 处理的格子数（各次调用最大数组参数的元素数之和）
+
+    @property
+    def cells_per_second(self) -> float:
+        """实际吞吐（格子/秒，按墙钟耗时）"""
+        return self.cells / (self.wall_ms / 1000) if self.wall_ms > 0 else 0.0
+
+    def add(self, other: "KernelStats") -> None:
+        self.launches += other.launches
+        self.wall_ms += other.wall_ms
+        self.device_ms += other.device_ms
+        self.bytes_transferred += other.bytes_transferred
+        self.cells += other.cells
+
+    def to_dict(self) -> Dict[str, float | int]:
+        data = asdict(self)
+        data["wall_ms"] = round(self.wall_ms, 3)
+        data["device_ms"] = round(self.device_ms, 3)
+        data["cells_per_second"] = round(self.cells_per_second, 1)
+        return data
+
+
+@dataclass
+class KernelTurnProfile:
+    """一个回合的内核计量"""
+    turn_index: int
+    kernels: Dict[str, KernelStats] = field(default_factory=dict)
+    ecology_stages_ms: Dict[str, float] = field(default_factory=dict)
+    ecology_backend: str | None = None
+    finished_at: float = 0.0
+
+    @property
+    def wall_ms(self) -> float:
+        return sum(stats.wall_ms for stats in self.kernels.values())
+
+    @property
+    def launches(self) -> int:
+        return sum(stats.launches for stats in self.kernels.values())
+
+    def top(self, n: int = 10) -> List[tuple[str, KernelStats]]:
+        """按墙钟耗时降序的前 n 个内核"""
+        return sorted(self.kernels.items(), key=lambda item: item[1].wall_ms, reverse=True)[:n]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "turn_index": self.turn_index,
+            "wall_ms": round(self.wall_ms, 3),
+            "launches": self.launches,
+            "kernels": {name: stats.to_dict() for name, stats in self.top(len(self.kernels))},
+            "ecology_stages_ms": {k: round(v, 3) for k, v in self.ecology_stages_ms.items()},
+            "ecology_backend": self.ecology_backend,
+            "finished_at": self.finished_at,
+        }
+
+
+class KernelProfiler:
+    """跨回合的内核计量（线程安全：后台线程与 API 读取可并发）"""
+
+    def __init__(self, max_history: int = 100, device_profiler: bool | None = None):
+        self._lock = threading.Lock()
+        self._current: Dict[str, KernelStats] = {}
+        self._ecology_stages_ms: Dict[str, float] = {}
+        self._ecology_backend: str | None = None
+        self.totals: Dict[str, KernelStats] = {}
+        self.history: deque[KernelTurnProfile] = deque(maxlen=max(1, max_history))
+        self.turns = 0
+        self.device_profiler = taichi_profiler_enabled() if device_profiler is None else device_profiler
+
+    def instrument(self, module: ModuleType, device: str | None) -> Any:
+        """给内核模块包一层计量代理（模块其他属性原样透传）"""
+        if isinstance(module, ProfiledKernels):
+            return module
+        return ProfiledKernels(module, device or "numpy", self)
+
+    def record(self, name: str, wall_ms: float, bytes_transferred: int = 0, cells: int = 0) -> None:
+        """记录一次内核调用"""
+        with self._lock:
+            stats = self._current.get(name)
+            if stats is None:
+                stats = self._current[name] = KernelStats()
+            stats.launches += 1
+            stats.wall_ms += wall_ms
+            stats.bytes_transferred += bytes_transferred
+            stats.cells += cells
+
+    def record_ecology(self, metrics: "EcologyMetrics") -> None:
+        """记录本回合生态计算的阶段耗时（同一回合多次调用时累加）"""
+        with self._lock:
+            for stage in _ECOLOGY_STAGES:
+                key = f"{stage}_time_ms"
+                self._ecology_stages_ms[stage] = self._ecology_stages_ms.get(stage, 0.0) + getattr(metrics, key)
+            self._ecology_stages_ms["total"] = self._ecology_stages_ms.get("total", 0.0) + metrics.total_time_ms
+            self._ecology_backend = metrics.backend
+
+    def end_turn(self, turn_index: int = 0) -> KernelTurnProfile:
+        """归档本回合计量并清零"""
+        with self._lock:
+            kernels, self._current = self._current, {}
+            profile = KernelTurnProfile(
+                turn_index=turn_index,
+                kernels=kernels,
+                ecology_stages_ms=self._ecology_stages_ms,
+                ecology_backend=self._ecology_backend,
+                finished_at=time.time(),
+            )
+            self._ecology_stages_ms = {}
+            self._ecology_backend = None
+        if self.device_profiler:
+            _collect_device_times(profile.kernels)
+
+        with self._lock:
+            for name, stats in profile.kernels.items():
+                self.totals.setdefault(name, KernelStats()).add(stats)
+            self.history.append(profile)
+            self.turns += 1
+
+        if profile.kernels:
+            top = ", ".join(f"{name}={stats.wall_ms:.1f}ms×{stats.launches}" for name, stats in profile.top(5))
+            logger.info(
+                f"[内核监控] 回合{turn_index}: {profile.launches} 次调用, "
+                f"{profile.wall_ms:.1f}ms; 最耗时: {top}"
+            )
+        return profile
+
+    def get_history(self, limit: int | None = None) -> List[Dict[str, Any]]:
+        """最近 limit 回合的计量（旧 → 新）"""
+        with self._lock:
+            history = list(self.history)
+        if limit is not None:
+            history = history[-limit:] if limit > 0 else []
+        return [profile.to_dict() for profile in history]
+
+    def to_prometheus(self) -> str:
+        """Prometheus 文本格式（累计计数器 + 最近一回合的吞吐/阶段耗时）"""
+        with self._lock:
+            totals = {name: KernelStats(**asdict(stats)) for name, stats in self.totals.items()}
+            last = self.history[-1] if self.history else None
+            turns = self.turns
+
+        lines: List[str] = []
+
+        def metric(name: str, kind: str, help_text: str, samples: List[tuple[str, float]]) -> None:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                lines.append(f"{name}{labels} {_format_value(value)}")
+
+        def by_kernel(values) -> List[tuple[str, float]]:
+            return [(f'{{kernel="{_escape(name)}"}}', value) for name, value in values]
+
+        metric("tensor_turns_total", "counter", "Turns with recorded kernel metrics.", [("", turns)])
+        metric(
+            "tensor_kernel_launches_total", "counter", "Kernel launches.",
+            by_kernel((name, s.launches) for name, s in sorted(totals.items())),
+        )
+        metric(
+            "tensor_kernel_wall_seconds_total", "counter", "Host wall time spent in kernel calls.",
+            by_kernel((name, s.wall_ms / 1000) for name, s in sorted(totals.items())),
+        )
+        metric(
+            "tensor_kernel_device_seconds_total", "counter",
+            "Device time reported by the Taichi kernel profiler (0 when disabled).",
+            by_kernel((name, s.device_ms / 1000) for name, s in sorted(totals.items())),
+        )
+        metric(
+            "tensor_kernel_transfer_bytes_total", "counter", "Bytes copied between NumPy and the device.",
+            by_kernel((name, s.bytes_transferred) for name, s in sorted(totals.items())),
+        )
+        metric(
+            "tensor_kernel_cells_total", "counter", "Grid cells processed.",
+            by_kernel((name, s.cells) for name, s in sorted(totals.items())),
+        )
+        if last is not None:
+            metric(
+                "tensor_kernel_cells_per_second", "gauge", "Achieved throughput in the last turn.",
+                by_kernel((name, s.cells_per_second) for name, s in sorted(last.kernels.items())),
+            )
+            metric(
+                "tensor_turn_kernel_seconds", "gauge", "Kernel wall time in the last turn.",
+                [("", last.wall_ms / 1000)],
+            )
+            metric(
+                "tensor_ecology_stage_seconds", "gauge", "Ecology stage wall time in the last turn.",
+                [(f'{{stage="{stage}"}}', ms / 1000) for stage, ms in last.ecology_stages_ms.items()],
+            )
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        with self._lock:
+            self._current = {}
+            self._ecology_stages_ms = {}
+            self._ecology_backend = None
+            self.totals = {}
+            self.history.clear()
+            self.turns = 0
+
+
+class ProfiledKernels:
+    """内核模块的计量代理：kernel_* 调用逐次记录，其余属性透传"""
+
+    def __init__(self, module: ModuleType, device: str, profiler: KernelProfiler):
+        self._module = module
+        self._device = device
+        self._profiler = profiler
+        self._copies = device in _GPU_DEVICES
+        self._sync = None
+        if profiler.device_profiler and device != "numpy":
+            ti = getattr(module, "ti", None)
+            self._sync = getattr(ti, "sync", None)
+        self._wrapped: Dict[str, Any] = {}
+
+    @property
+    def module(self) -> ModuleType:
+        return self._module
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._module, name)
+        if not name.startswith("kernel_") or not callable(attr):
+            return attr
+        wrapped = self._wrapped.get(name)
+        if wrapped is None:
+            wrapped = self._wrapped[name] = self._wrap(name, attr)
+        return wrapped
+
+    def _wrap(self, name: str, kernel):
+        profiler = self._profiler
+        copies = self._copies
+        sync = self._sync
+
+        def call(*args, **kwargs):
+            start = time.perf_counter()
+            result = kernel(*args, **kwargs)
+            if sync is not None:
+                sync()
+            wall_ms = (time.perf_counter() - start) * 1000
+            cells = 0
+            moved = 0
+            for arg in args:
+                shape = getattr(arg, "shape", None)
+                if shape is None:
+                    continue
+                size = 1
+                for dim in shape:
+                    size *= int(dim)
+                cells = max(cells, size)
+                if copies and hasattr(arg, "__array_interface__"):
+                    moved += 2 * int(arg.nbytes)
+            profiler.record(name, wall_ms, moved, cells)
+            return result
+
+        call.__name__ = name
+        call.__doc__ = kernel.__doc__
+        return call
+
+
+# ============================================================================
+# Taichi 内核分析器
+# ============================================================================
+
+def taichi_profiler_enabled() -> bool:
+    """是否启用 Taichi 内核分析器（TENSOR_KERNEL_PROFILER，默认关闭：有设备同步开销）"""
+    env_value = os.environ.get("TENSOR_KERNEL_PROFILER")
+    if env_value is not None:
+        return env_value.strip().lower() in ("1", "true", "yes", "on")
+    try:
+        from ..core.config import get_settings
+        return bool(get_settings().tensor_kernel_profiler)
+    except Exception:
+        return False
+
+
+def _collect_device_times(kernels: Dict[str, KernelStats]) -> None:
+    """从 Taichi 内核分析器读取本回合逐内核设备耗时，然后清空分析器记录"""
+    ti = sys.modules.get("taichi")
+    if ti is None or not kernels:
+        return
+    try:
+        for name, stats in kernels.items():
+            info = ti.profiler.query_kernel_profile_info(name)
+            if info.counter:
+                stats.device_ms = float(info.counter * info.avg)
+        ti.profiler.clear_kernel_profiler_info()
+    except Exception as e:
+        logger.debug(f"[内核监控] 读取 Taichi 内核分析器失败: {e}")
+
+
+def _escape(label: str) -> str:
+    return label.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, int):
+        return str(value)
+    return repr(float(value))
+
+
+# ============================================================================
+# 全局实例
+# ============================================================================
+
+_profiler: KernelProfiler | None = None
+
+
+def get_kernel_profiler() -> KernelProfiler:
+    """获取全局内核计量器"""
+    global _profiler
+    if _profiler is None:
+        _profiler = KernelProfiler()
+    return _profiler
+
+
+def reset_kernel_profiler() -> None:
+    """清空全局内核计量器（原地清空：已包装的内核模块继续记录到同一实例）"""
+    if _profiler is not None:
+        _profiler.reset()
+
+
+def instrument_kernels(module: ModuleType, device: str | None) -> Any:
+    """用全局计量器包装内核模块（HybridCompute / TensorEcologyEngine 等加载内核时调用）"""
+    return get_kernel_profiler().instrument(module, device)
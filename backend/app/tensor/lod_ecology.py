@@ -0,0 +1,112 @@
+"""
+细节层次（LOD）生态 - 背景层物种在降采样网格上计算
+
+SpeciesTieringService 把种群低于阈值、生态强度低的物种归入背景层（C 档），
+但张量生态仍以全分辨率 (H, W) 计算它们。LOD 模式下背景层物种在 factor 倍
+降采样的网格 (⌈H/f⌉, ⌈W/f⌉) 上计算，内核处理的单元数约为 1/f²：
+- 种群以密度聚合：粗格密度 = 块内种群总量 / 块内有效细格数，
+  承载力、密度扩散阈值等按单格定义的参数无需换算
+- 环境 / 压力叠加 / 外部加成取块内均值，迁徙距离按 1/f 缩放（以粗格计）
+- 回到全分辨率时按块质量守恒再分配：块内按上回合的细格分布分配，
+  并以 INTRA_BLOCK_MIX 的比例在块内均匀混合（粗网格看不到块内扩散）；
+  上回合块内无种群时均匀分配
+- 死亡率为强度量，按最近邻放大；死亡/存活数按块质量统计
+
+物种升为重点/关注层时直接以再分配后的全分辨率种群参与计算，总量不变。
+两层物种分别计算，跨层的密度耦合（竞争、猎物密度、全局拥挤）不计入；
+背景层按定义种群小，对另一层的影响可以忽略。
+调用方见 TensorEcologyEngine._process_ecology_lod。
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+
+# 再分配时块内均匀混合的比例（近似粗网格忽略的块内扩散）
+INTRA_BLOCK_MIX = 0.1
+
+
+@dataclass(frozen=True)
+class LodGrid:
+    """全分辨率 (H, W) ↔ 粗网格 (h, w) 的块映射"""
+    factor: int
+    H: int
+    W: int
+
+    @property
+    def h(self) -> int:
+        return -(-self.H // self.factor)
+
+    @property
+    def w(self) -> int:
+        return -(-self.W // self.factor)
+
+    @property
+    def cells(self) -> int:
+        return self.h * self.w
+
+    def _valid(self) -> np.ndarray:
+        """补齐后的 (h·f, w·f) 有效细格掩码"""
+        valid = np.zeros((self.h * self.factor, self.w * self.factor), dtype=np.float32)
+        valid[:self.H, :self.W] = 1.0
+        return valid
+
+    def counts(self) -> np.ndarray:
+        """每个粗格覆盖的有效细格数 (h, w)"""
+        return self.block_sum(np.ones((self.H, self.W), dtype=np.float32))
+
+    def _pad(self, x: np.ndarray) -> np.ndarray:
+        pad = [(0, 0)] * (x.ndim - 2) + [(0, self.h * self.factor - self.H), (0, self.w * self.factor - self.W)]
+        return np.pad(x, pad)
+
+    def _blocks(self, x: np.ndarray) -> np.ndarray:
+        """(..., h·f, w·f) → (..., h, f, w, f)"""
+        f = self.factor
+        return x.reshape(*x.shape[:-2], self.h, f, self.w, f)
+
+    def block_sum(self, x: np.ndarray) -> np.ndarray:
+        """块内求和 (..., H, W) → (..., h, w)"""
+        return self._blocks(self._pad(x)).sum(axis=(-3, -1), dtype=np.float64).astype(np.float32)
+
+    def block_mean(self, x: np.ndarray) -> np.ndarray:
+        """块内有效细格均值 (..., H, W) → (..., h, w)"""
+        return (self.block_sum(x) / self.counts()).astype(np.float32)
+
+    def _repeat_padded(self, x: np.ndarray) -> np.ndarray:
+        """最近邻放大到补齐尺寸 (..., h·f, w·f)"""
+        f = self.factor
+        return np.repeat(np.repeat(x, f, axis=-2), f, axis=-1)
+
+    def repeat(self, x: np.ndarray) -> np.ndarray:
+        """最近邻放大 (..., h, w) → (..., H, W)"""
+        return self._repeat_padded(x)[..., :self.H, :self.W]
+
+    def mass(self, density: np.ndarray) -> np.ndarray:
+        """粗格密度 → 粗格种群总量"""
+        return density * self.counts()
+
+    def redistribute(self, density: np.ndarray, previous: np.ndarray) -> np.ndarray:
+        """粗格密度 (S, h, w) → 全分辨率种群 (S, H, W)，逐块质量守恒
+
+        块内权重 = (1 - INTRA_BLOCK_MIX) × 上回合细格占比 + INTRA_BLOCK_MIX × 均匀分布；
+        上回合块内为空时取均匀分布。
+        """
+        prev = self._pad(previous.astype(np.float32))
+        prev_sum = self._repeat_padded(self._blocks(prev).sum(axis=(-3, -1)))
+        uniform = self._valid() / self._repeat_padded(self.counts())
+        share = prev / np.maximum(prev_sum, 1e-12)
+        weights = np.where(
+            prev_sum > 0,
+            (1.0 - INTRA_BLOCK_MIX) * share + INTRA_BLOCK_MIX * uniform,
+            uniform,
+        )
+        fine = self._repeat_padded(self.mass(density)) * weights
+        return fine[..., :self.H, :self.W].astype(np.float32)
+
+
+def species_tiers(lod_mask: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """(全分辨率物种下标, 降采样物种下标)"""
+    lod_mask = np.asarray(lod_mask, dtype=bool)
+    return np.flatnonzero(~lod_mask), np.flatnonzero(lod_mask)
@@ -4,8 +4,9 @@
 将 O(n²) 的循环计算优化为矩阵运算，支持 GPU 加速。
 
 主要优化：
-1. 地块重叠因子计算：使用二进制矩阵 + 矩阵乘法
-2. 谱系前缀匹配：向量化字符比较
+1. 地块重叠因子计算：跨回合维护的稀疏物种×地块 CSR 矩阵，只对分布变化的
+   物种行重算交集，交集矩阵作为持久缓冲区原地修补（TileOverlapIndex）
+2. 同属谱系匹配：共享谱系索引（欧拉序 LCA）
 3. 栖息地类型匹配：类别编码 + 广播
 """
 
@@ -17,6 +18,9 @@ from dataclasses import dataclass
 from typing import Sequence, TYPE_CHECKING
 
 import numpy as np
+from scipy.sparse import csr_matrix
+
+from .phylogeny import get_phylogeny_index
 
 if TYPE_CHECKING:
     from ..models.species import Species
@@ -33,9 +37,143 @@ class NicheTensorMetrics:
     habitat_bonus_time_ms: float = 0.0
     species_count: int = 0
     tile_count: int = 0
+    changed_rows: int = 0
     backend: str = "numpy"
 
 
+class TileOverlapIndex:
+    """跨回合维护的物种×地块稀疏矩阵与共享地块数缓冲区
+    
+    每个物种 ID 占一行，保存上次登记的地块集合；地块 ID 按首次出现分配列号。
+    update() 只重建分布发生变化的行，并用 CSR 稀疏乘法重算这些行与所有行的
+    交集，原地写回持久的 int32 交集矩阵，代价随回合内变化的物种数增长，
+    而不是随 S² 增长。
+    
+    行与列只增不减；登记行数超过本次物种数两倍时，丢弃不再出现的物种并压缩一次。
+    """
+    
+    def __init__(self, initial_capacity: int = 64):
+        self._rows: dict[int | None, int] = {}
+        self._row_tiles: list[frozenset[int]] = []
+        self._row_cols: list[np.ndarray] = []
+        self._columns: dict[int, int] = {}
+        self._capacity = initial_capacity
+        self._intersection = np.zeros((initial_capacity, initial_capacity), dtype=np.int32)
+        self._counts = np.zeros(initial_capacity, dtype=np.int32)
+        self._matrix: csr_matrix | None = None
+    
+    @property
+    def num_rows(self) -> int:
+        return len(self._row_tiles)
+    
+    @property
+    def num_tiles(self) -> int:
+        return len(self._columns)
+    
+    @property
+    def matrix(self) -> csr_matrix:
+        """当前物种×地块 CSR 矩阵 (行数, 地块数)"""
+        if self._matrix is None:
+            self._matrix = self._build_matrix()
+        return self._matrix
+    
+    def clear(self) -> None:
+        self._rows.clear()
+        self._row_tiles.clear()
+        self._row_cols.clear()
+        self._columns.clear()
+        self._intersection.fill(0)
+        self._counts.fill(0)
+        self._matrix = None
+    
+    def update(
+        self,
+        species_ids: Sequence[int | None],
+        habitat_cache: dict[int, set[int]],
+    ) -> tuple[np.ndarray, int]:
+        """同步物种分布，返回 (各物种行号, 变化的行数)"""
+        if len(self._rows) > 2 * max(len(species_ids), 32):
+            self._compact(species_ids)
+        
+        changed: list[int] = []
+        rows = np.empty(len(species_ids), dtype=np.int64)
+        for i, sp_id in enumerate(species_ids):
+            tiles = frozenset(habitat_cache.get(sp_id, ())) if sp_id is not None else frozenset()
+            row = self._rows.get(sp_id)
+            if row is None:
+                row = self._add_row(sp_id)
+            elif self._row_tiles[row] == tiles:
+                rows[i] = row
+                continue
+            self._set_row(row, tiles)
+            changed.append(row)
+            rows[i] = row
+        
+        if changed:
+            self._patch(np.unique(changed))
+        return rows, len(changed)
+    
+    def intersection(self, rows: np.ndarray) -> np.ndarray:
+        """(n, n) 共享地块数"""
+        return self._intersection[np.ix_(rows, rows)]
+    
+    def counts(self, rows: np.ndarray) -> np.ndarray:
+        """(n,) 各物种地块数"""
+        return self._counts[rows]
+    
+    def _add_row(self, sp_id: int | None) -> int:
+        row = len(self._row_tiles)
+        self._rows[sp_id] = row
+        self._row_tiles.append(frozenset())
+        self._row_cols.append(np.zeros(0, dtype=np.int32))
+        if row >= self._capacity:
+            self._grow(2 * self._capacity)
+        return row
+    
+    def _set_row(self, row: int, tiles: frozenset[int]) -> None:
+        columns = self._columns
+        for tile_id in tiles - columns.keys():
+            columns[tile_id] = len(columns)
+        self._row_tiles[row] = tiles
+        self._row_cols[row] = np.fromiter((columns[t] for t in tiles), dtype=np.int32, count=len(tiles))
+        self._counts[row] = len(tiles)
+        self._matrix = None
+    
+    def _grow(self, capacity: int) -> None:
+        intersection = np.zeros((capacity, capacity), dtype=np.int32)
+        n = self._capacity
+        intersection[:n, :n] = self._intersection
+        counts = np.zeros(capacity, dtype=np.int32)
+        counts[:n] = self._counts
+        self._intersection, self._counts, self._capacity = intersection, counts, capacity
+    
+    def _build_matrix(self) -> csr_matrix:
+        lengths = np.fromiter((c.size for c in self._row_cols), dtype=np.int64, count=self.num_rows)
+        indptr = np.zeros(self.num_rows + 1, dtype=np.int64)
+        np.cumsum(lengths, out=indptr[1:])
+        indices = np.concatenate(self._row_cols) if self._row_cols else np.zeros(0, dtype=np.int32)
+        data = np.ones(indices.size, dtype=np.int32)
+        return csr_matrix((data, indices, indptr), shape=(self.num_rows, max(1, self.num_tiles)))
+    
+    def _patch(self, changed: np.ndarray) -> None:
+        """重算变化行与所有行的交集并原地写回（对称）"""
+        matrix = self.matrix
+        n = self.num_rows
+        block = (matrix[changed] @ matrix.T).toarray().astype(np.int32, copy=False)
+        self._intersection[changed, :n] = block
+        self._intersection[:n, changed] = block.T
+    
+    def _compact(self, species_ids: Sequence[int | None]) -> None:
+        """丢弃不在本次物种列表中的行，其余行保持分布并重算交集"""
+        keep = [sp_id for sp_id in dict.fromkeys(species_ids) if sp_id in self._rows]
+        tiles = [self._row_tiles[self._rows[sp_id]] for sp_id in keep]
+        self.clear()
+        for sp_id, tile_set in zip(keep, tiles):
+            self._set_row(self._add_row(sp_id), tile_set)
+        if keep:
+            self._patch(np.arange(len(keep)))
+
+
 class NicheTensorCompute:
     """张量化生态位计算引擎
     
@@ -78,22 +216,15 @@ class NicheTensorCompute:
         """初始化生态位张量计算引擎"""
         self._taichi_available = False
         self._kernels = None
+        self._tile_index = TileOverlapIndex()
         
-        # 尝试加载 Taichi 内核
-        try:
-            from .taichi_hybrid_kernels import (
-                kernel_tile_overlap_matrix,
-                kernel_lineage_prefix_match,
-            )
-            self._taichi_available = True
-            self._kernels = {
-                "tile_overlap": kernel_tile_overlap_matrix,
-                "lineage_prefix": kernel_lineage_prefix_match,
-            }
-            logger.debug("[NicheTensor] Taichi 内核加载成功")
-        except Exception as e:
-            # 捕获所有异常（包括 ImportError, RuntimeError 等）
-            logger.debug(f"[NicheTensor] Taichi 不可用，使用 NumPy: {e}")
+        # taichi_hybrid_kernels 尚未提供 tile_overlap / lineage_prefix 内核，
+        # 使用 NumPy 实现；构造时不导入 Taichi，避免触发设备初始化
+        logger.debug("[NicheTensor] 使用 NumPy 实现")
+    
+    def clear_cache(self) -> None:
+        """清空跨回合的物种×地块索引"""
+        self._tile_index.clear()
     
     def compute_tile_overlap_matrix(
         self,
@@ -102,14 +233,15 @@ class NicheTensorCompute:
         max_tile_id: int | None = None,
         min_overlap_factor: float = 0.1,
     ) -> tuple[np.ndarray, NicheTensorMetrics]:
-        """计算地块重叠因子矩阵（向量化）
+        """计算地块重叠因子矩阵（稀疏增量）
         
-        使用二进制矩阵表示物种-地块关系，然后通过矩阵运算计算 Jaccard 系数。
+        物种-地块关系由 TileOverlapIndex 跨回合维护，只对分布变化的物种
+        重算共享地块数，然后向量化计算 Jaccard 系数。
         
         Args:
             species_ids: 物种 ID 列表（与物种列表顺序一致）
             habitat_cache: {species_id: set(tile_ids)} 映射
-            max_tile_id: 最大地块 ID（用于确定矩阵大小）
+            max_tile_id: 最大地块 ID（保留参数，列按地块首次出现分配）
             min_overlap_factor: 无共享地块时的最小重叠因子
             
         Returns:
@@ -124,59 +256,24 @@ class NicheTensorCompute:
         if n <= 1:
             return np.ones((n, n)), metrics
         
-        # 收集所有地块 ID
-        all_tiles: set[int] = set()
-        for sp_id in species_ids:
-            if sp_id is not None and sp_id in habitat_cache:
-                all_tiles.update(habitat_cache[sp_id])
+        # 同步稀疏物种×地块矩阵，只重算分布变化的物种行
+        rows, metrics.changed_rows = self._tile_index.update(species_ids, habitat_cache)
+        metrics.tile_count = self._tile_index.num_tiles
         
-        if not all_tiles:
+        tile_counts = self._tile_index.counts(rows).astype(np.float64)  # (S,)
+        if not tile_counts.any():
             # 没有栖息地数据，返回默认中等重叠
             return np.full((n, n), 0.5), metrics
         
-        # 创建地块 ID 到索引的映射
-        tile_list = sorted(all_tiles)
-        tile_to_idx = {tile_id: idx for idx, tile_id in enumerate(tile_list)}
-        num_tiles = len(tile_list)
-        metrics.tile_count = num_tiles
-        
-        # 构建物种-地块二进制矩阵 (S × T)
-        species_tile_matrix = np.zeros((n, num_tiles), dtype=np.float32)
-        
-        for i, sp_id in enumerate(species_ids):
-            if sp_id is not None and sp_id in habitat_cache:
-                for tile_id in habitat_cache[sp_id]:
-                    if tile_id in tile_to_idx:
-                        species_tile_matrix[i, tile_to_idx[tile_id]] = 1.0
-        
-        # 计算每个物种的地块数量
-        tile_counts = species_tile_matrix.sum(axis=1)  # (S,)
-        
-        # 计算共享地块数：A ∩ B = A @ B.T（对于二进制矩阵）
-        intersection = species_tile_matrix @ species_tile_matrix.T  # (S, S)
+        # 共享地块数 |A ∩ B|（持久缓冲区按行号取子矩阵）
+        intersection = self._tile_index.intersection(rows).astype(np.float64)
         
         # 计算总地块数：|A ∪ B| = |A| + |B| - |A ∩ B|
-        union = (
-            tile_counts[:, np.newaxis] +  # |A|
-            tile_counts[np.newaxis, :] -  # |B|
-            intersection                   # - |A ∩ B|
-        )
+        union = tile_counts[:, np.newaxis] + tile_counts[np.newaxis, :] - intersection
         
-        # 计算 Jaccard 系数
-        # 避免除零：当 union 为 0 时，设置为 min_overlap_factor
-        with np.errstate(divide='ignore', invalid='ignore'):
-            overlap_matrix = np.where(
-                union > 0,
-                intersection / union,
-                min_overlap_factor
-            )
-        
-        # 无共享地块时使用最小重叠因子
-        overlap_matrix = np.where(
-            intersection == 0,
-            min_overlap_factor,
-            overlap_matrix
-        )
+        # Jaccard 系数；无共享地块时使用最小重叠因子
+        overlap_matrix = np.full((n, n), min_overlap_factor, dtype=np.float64)
+        np.divide(intersection, union, out=overlap_matrix, where=intersection > 0)
         
         # 对角线设为 1
         np.fill_diagonal(overlap_matrix, 1.0)
@@ -184,21 +281,19 @@ class NicheTensorCompute:
         metrics.tile_overlap_time_ms = (time.perf_counter() - start_time) * 1000
         metrics.total_time_ms = metrics.tile_overlap_time_ms
         
-        return overlap_matrix.astype(np.float64), metrics
+        return overlap_matrix, metrics
     
     def compute_lineage_bonus_matrix(
         self,
         lineage_codes: list[str],
-        min_common_prefix: int = 2,
         bonus_value: float = 0.15,
     ) -> tuple[np.ndarray, float]:
-        """计算谱系前缀匹配的 bonus 矩阵（向量化）
+        """计算同属谱系 bonus 矩阵（共享谱系索引，向量化 LCA）
         
-        如果两个物种共享 >= min_common_prefix 个前缀字符，给予 bonus。
+        两个物种有共同祖先（同一属，如 A1a 与 A1b）时给予 bonus。
         
         Args:
             lineage_codes: 物种谱系代码列表
-            min_common_prefix: 最小共同前缀长度
             bonus_value: bonus 值
             
         Returns:
@@ -210,35 +305,8 @@ class NicheTensorCompute:
         if n <= 1:
             return np.zeros((n, n)), 0.0
         
-        # 计算最大代码长度
-        max_len = max(len(code) for code in lineage_codes) if lineage_codes else 0
-        if max_len < min_common_prefix:
-            return np.zeros((n, n)), (time.perf_counter() - start_time) * 1000
-        
-        # 将代码转换为字符数组
-        # 使用 ASCII 编码，填充为相同长度
-        code_array = np.zeros((n, max_len), dtype=np.int32)
-        for i, code in enumerate(lineage_codes):
-            for j, char in enumerate(code):
-                code_array[i, j] = ord(char)
-        
-        # 向量化比较：对每个位置检查是否相等
-        # (n, 1, max_len) == (1, n, max_len) -> (n, n, max_len)
-        char_match = code_array[:, np.newaxis, :] == code_array[np.newaxis, :, :]
-        
-        # 计算累积匹配（从开头连续匹配的长度）
-        # 使用 cumprod 检测连续匹配
-        cumulative_match = np.cumprod(char_match, axis=2)
-        
-        # 计算共同前缀长度
-        common_prefix_length = cumulative_match.sum(axis=2)  # (n, n)
-        
-        # 生成 bonus 矩阵
-        bonus_matrix = np.where(
-            common_prefix_length >= min_common_prefix,
-            bonus_value,
-            0.0
-        )
+        related = get_phylogeny_index().related_matrix(lineage_codes)
+        bonus_matrix = np.where(related, bonus_value, 0.0)
         
         # 对角线设为 0（自己与自己不算）
         np.fill_diagonal(bonus_matrix, 0.0)
@@ -374,7 +442,7 @@ class NicheTensorCompute:
             size_bonus
         )
         
-        # 4. 谱系前缀 bonus（向量化）
+        # 4. 同属谱系 bonus（向量化）
         lineage_bonus, lin_time = self.compute_lineage_bonus_matrix(lineage_codes)
         metrics.lineage_bonus_time_ms = lin_time
         
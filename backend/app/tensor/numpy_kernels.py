@@ -0,0 +1,1259 @@
+"""
+NumPy 向量化内核 - taichi_hybrid_kernels 的 CPU 等价实现
+
+本模块为无 GPU / 无 Taichi 的环境（CI、批处理节点）提供与
+taichi_hybrid_kernels 完全同名、同参数顺序的内核函数：
+- 输入为 float32 NumPy 数组
+- 输出写入调用方预分配的 result/new_pop 数组（与 Taichi ndarray 内核语义一致）
+
+所有分支阈值、常量与 Taichi 内核逐一对应，保证数值一致性
+（见 tests/test_numpy_kernels.py 中的对照测试）。
+
+实现原则：
+- 地块维度 (H, W) 完全向量化，4 邻域通过平移视图计算（边界不环绕）
+- 仅在 O(S²) 的物种对计算中按物种循环，每次循环处理整张地图
+"""
+
+from __future__ import annotations
+
+import numpy as np
+
+BACKEND_NAME = "numpy"
+
+# 4 邻域偏移（与 Taichi 内核中的 neighbors 顺序一致）
+_NEIGHBOR_OFFSETS = ((-1, 0), (1, 0), (0, -1), (0, 1))
+
+
+# ============================================================================
+# 内部工具
+# ============================================================================
+
+def _shift_slices(size: int, d: int) -> tuple[slice, slice]:
+    """返回 (目标切片, 源切片)，使 out[dst] = arr[src] 对应 out[i] = arr[i + d]"""
+    if d >= 0:
+        return slice(0, size - d), slice(d, size)
+    return slice(-d, size), slice(0, size + d)
+
+
+def _shift(arr: np.ndarray, di: int, dj: int) -> np.ndarray:
+    """平移最后两维：out[..., i, j] = arr[..., i+di, j+dj]，越界补 0"""
+    H, W = arr.shape[-2], arr.shape[-1]
+    dst_i, src_i = _shift_slices(H, di)
+    dst_j, src_j = _shift_slices(W, dj)
+    out = np.zeros_like(arr)
+    out[..., dst_i, dst_j] = arr[..., src_i, src_j]
+    return out
+
+
+def _valid_mask(H: int, W: int, di: int, dj: int) -> np.ndarray:
+    """邻居 (i+di, j+dj) 是否在地图范围内 (H, W)"""
+    dst_i, _ = _shift_slices(H, di)
+    dst_j, _ = _shift_slices(W, dj)
+    mask = np.zeros((H, W), dtype=bool)
+    mask[dst_i, dst_j] = True
+    return mask
+
+
+def _coord_noise_at(
+    s: np.ndarray, i: np.ndarray, j: np.ndarray, a: int, b: int, c: int, offset: int = 0,
+) -> np.ndarray:
+    """指定 (物种, 行, 列) 处的坐标伪随机扰动 sin(f32((i+offset)*a + (j+offset)*b + s*c))"""
+    return np.sin(((i + offset) * a + (j + offset) * b + s * c).astype(np.float32))
+
+
+def _coord_noise(S: int, H: int, W: int, a: int, b: int, c: int, offset: int = 0) -> np.ndarray:
+    """整张地图的坐标伪随机扰动，形状 (S, H, W)"""
+    ii = np.arange(H, dtype=np.int64)[None, :, None]
+    jj = np.arange(W, dtype=np.int64)[None, None, :]
+    ss = np.arange(S, dtype=np.int64)[:, None, None]
+    return _coord_noise_at(ss, ii, jj, a, b, c, offset)
+
+
+def _habitat_channels(env: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """获取 (陆地, 海洋, 海岸) 通道，缺失通道使用 Taichi 内核中的默认值"""
+    C, H, W = env.shape
+    land = env[4] if C > 4 else np.ones((H, W), dtype=np.float32)
+    ocean = env[5] if C > 5 else np.zeros((H, W), dtype=np.float32)
+    coast = env[6] if C > 6 else np.zeros((H, W), dtype=np.float32)
+    return land, ocean, coast
+
+
+def _habitat_types(species_traits: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """物种栖息地类型 (陆生, 水生, 两栖)，形状 (S, 1, 1)"""
+    land_pref = species_traits[:, 8]
+    ocean_pref = species_traits[:, 9]
+    coast_pref = species_traits[:, 10]
+    is_terrestrial = (land_pref > 0.5) & (ocean_pref < 0.4)
+    is_aquatic = (ocean_pref > 0.5) & (land_pref < 0.4)
+    is_amphibious = (coast_pref > 0.4) | ((land_pref > 0.3) & (ocean_pref > 0.3))
+    expand = lambda a: a[:, None, None]
+    return expand(is_terrestrial), expand(is_aquatic), expand(is_amphibious)
+
+
+def _target_habitat_ok(
+    is_terrestrial: np.ndarray,
+    is_aquatic: np.ndarray,
+    is_amphibious: np.ndarray,
+    land: np.ndarray,
+    ocean: np.ndarray,
+    coast: np.ndarray,
+) -> np.ndarray:
+    """目标地块栖息地类型硬约束（物种量与地块量需可广播）"""
+    blocked_terrestrial = is_terrestrial & ~is_amphibious & ((ocean > 0.6) & (coast < 0.3))
+    blocked_aquatic = is_aquatic & ~is_amphibious & ((land > 0.6) & (coast < 0.3))
+    return ~(blocked_terrestrial | blocked_aquatic)
+
+
+def _accumulate_sources(
+    neighbors,
+    is_terrestrial: np.ndarray,
+    is_aquatic: np.ndarray,
+    target_land_ok: np.ndarray,
+    target_ocean_ok: np.ndarray,
+    shape: tuple,
+    with_suitability: bool,
+    low_suit_threshold: float,
+):
+    """累加栖息地连通的有种群邻居
+
+    Args:
+        neighbors: 逐个邻居产出 (valid, n_pop, src_land_ok, src_ocean_ok, n_suit)，
+            各量与目标格子可广播；稠密与稀疏内核共用
+    """
+    adj_count = np.zeros(shape, dtype=np.int32)
+    adj_suit = np.zeros(shape, dtype=np.float32) if with_suitability else None
+    has_low = np.zeros(shape, dtype=bool) if with_suitability else None
+
+    for valid, n_pop, src_land_ok, src_ocean_ok, n_suit in neighbors:
+        conn_terrestrial = src_land_ok & target_land_ok
+        conn_aquatic = src_ocean_ok & target_ocean_ok
+        connected = np.where(
+            is_terrestrial, conn_terrestrial,
+            np.where(is_aquatic, conn_aquatic, True),
+        )
+        hit = valid & (n_pop > 0) & connected
+        adj_count += hit
+        if with_suitability:
+            adj_suit += np.where(hit, n_suit, 0.0).astype(np.float32)
+            has_low |= hit & (n_suit < low_suit_threshold)
+
+    return adj_count, adj_suit, has_low
+
+
+def _connected_source_count(
+    pop: np.ndarray,
+    is_terrestrial: np.ndarray,
+    is_aquatic: np.ndarray,
+    land: np.ndarray,
+    ocean: np.ndarray,
+    coast: np.ndarray,
+    suitability: np.ndarray | None = None,
+    low_suit_threshold: float = 0.25,
+):
+    """统计每个目标地块的栖息地连通源邻居
+
+    Returns:
+        (adj_count, adj_suit_total, has_low_suit_source)
+        后两项仅在提供 suitability 时计算，否则为 None
+    """
+    S, H, W = pop.shape
+    land_ok = ((land > 0.3) | (coast > 0.3)).astype(np.float32)
+    ocean_ok = ((ocean > 0.3) | (coast > 0.3)).astype(np.float32)
+
+    def neighbors():
+        for di, dj in _NEIGHBOR_OFFSETS:
+            yield (
+                _valid_mask(H, W, di, dj)[None],
+                _shift(pop, di, dj),
+                (_shift(land_ok, di, dj) > 0)[None],
+                (_shift(ocean_ok, di, dj) > 0)[None],
+                _shift(suitability, di, dj) if suitability is not None else None,
+            )
+
+    return _accumulate_sources(
+        neighbors(), is_terrestrial, is_aquatic,
+        (land_ok > 0)[None], (ocean_ok > 0)[None],
+        (S, H, W), suitability is not None, low_suit_threshold,
+    )
+
+
+def _suit_mortality(suit: np.ndarray, low: float, critical: float) -> np.ndarray:
+    """宜居度死亡率分段函数"""
+    return np.where(
+        suit < critical,
+        0.75,
+        np.where(
+            suit < low,
+            0.55 - (suit - critical) / (low - critical) * 0.40,
+            (1.0 - suit) * 0.10,
+        ),
+    )
+
+
+def _prey_density(pop: np.ndarray, trophic_levels: np.ndarray) -> np.ndarray:
+    """每个物种的猎物密度 (S, H, W)：营养级低于自身且不低于自身-1.5 的物种之和"""
+    S, H, W = pop.shape
+    t = trophic_levels.astype(np.float32)
+    prey_mask = (t[None, :] < t[:, None]) & (t[None, :] >= t[:, None] - 1.5)
+    return (prey_mask.astype(np.float32) @ pop.reshape(S, H * W)).reshape(S, H, W)
+
+
+# ============================================================================
+# 基础内核
+# ============================================================================
+
+def kernel_mortality(pop, env, params, result, temp_idx, temp_opt, temp_tol):
+    """死亡率计算 - NumPy 向量化"""
+    deviation = np.abs(env[temp_idx] - np.float32(temp_opt))
+    mortality = np.clip(1.0 - np.exp(-deviation / np.float32(temp_tol)), 0.01, 0.99)
+    result[...] = np.where(pop > 0, mortality[None], 0.0)
+
+
+def kernel_diffusion(pop, new_pop, rate):
+    """种群扩散 - NumPy 向量化"""
+    neighbor_rate = np.float32(rate / 4.0)
+    received = np.zeros_like(pop)
+    for di, dj in _NEIGHBOR_OFFSETS:
+        received += _shift(pop, di, dj) * neighbor_rate
+    new_pop[...] = pop * np.float32(1.0 - rate) + received
+
+
+def kernel_apply_mortality(pop, mortality, result):
+    """应用死亡率 - NumPy 向量化"""
+    result[...] = pop * (1.0 - mortality)
+
+
+def _repro_suit_factor(suit, min_suit, low_suit, floor, span, high_mult):
+    return np.where(
+        suit < min_suit,
+        floor,
+        np.where(
+            suit < low_suit,
+            floor + (suit - min_suit) / (low_suit - min_suit) * span,
+            np.minimum(1.0, suit * high_mult),
+        ),
+    )
+
+
+def kernel_reproduction(pop, fitness, capacity, birth_rate, result):
+    """繁殖计算 - NumPy 向量化（含低宜居度繁殖抑制）"""
+    total_pop = pop.sum(axis=0)
+    cap = capacity
+    active = (cap > 0) & (total_pop > 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        crowding = np.where(active, np.minimum(1.0, total_pop / np.where(active, cap, 1.0)), 0.0)
+    suit_factor = _repro_suit_factor(fitness, 0.10, 0.25, 0.05, 0.65, 1.2)
+    effective_rate = np.float32(birth_rate) * suit_factor * (1.0 - crowding)[None]
+    grown = np.where(active[None], pop * (1.0 + effective_rate), pop)
+    result[...] = np.where(pop > 0, grown, 0.0)
+
+
+def kernel_competition(pop, fitness, result, strength):
+    """种间竞争 - NumPy 向量化"""
+    total_competitor = pop.sum(axis=0)[None] - pop
+    pressure = total_competitor * np.float32(strength) / (fitness + 0.1)
+    loss = np.minimum(0.5, pressure / (pop + 1.0))
+    competed = np.where(fitness > 0, pop * (1.0 - loss), pop * 0.9)
+    result[...] = np.where(pop > 0, competed, 0.0)
+
+
+def kernel_redistribute_population(pop, current_totals, new_totals, out_pop, tile_count):
+    """按权重分配新的种群总数 - NumPy 向量化"""
+    total = current_totals[:, None, None]
+    target = new_totals[:, None, None]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        weighted = np.where(total > 0, pop / np.where(total > 0, total, 1.0) * target, 0.0)
+    out_pop[...] = np.where(target > 0, weighted, 0.0)
+
+
+# ============================================================================
+# 适宜度内核
+# ============================================================================
+
+def kernel_compute_suitability(env, species_prefs, habitat_mask, result):
+    """批量计算所有物种对所有地块的适宜度 - NumPy 向量化"""
+    prefs = species_prefs[:, :, None, None]
+    temp_match = np.maximum(0.0, 1.0 - np.abs(env[0][None] - prefs[:, 0]) * 2.0)
+    humidity_match = np.maximum(0.0, 1.0 - np.abs(env[1][None] - prefs[:, 1]) * 2.0)
+    resource_match = env[3][None]
+    habitat_match = (
+        env[4][None] * prefs[:, 4]
+        + env[5][None] * prefs[:, 5]
+        + env[6][None] * prefs[:, 6]
+    )
+    base_score = (
+        temp_match * 0.3
+        + humidity_match * 0.2
+        + resource_match * 0.2
+        + habitat_match * 0.3
+    )
+    suit = np.where(
+        (temp_match < 0.05) | (habitat_match < 0.01),
+        0.0,
+        np.clip(base_score, 0.0, 1.0),
+    )
+    result[...] = np.where(habitat_mask > 0.5, suit, 0.0)
+
+
+def _trait_suitability(t, tile_temp, tile_humidity, tile_resource, tile_land, tile_ocean, tile_coast):
+    """特质-环境匹配宜居度（逐元素）
+
+    t[:, k] 为第 k 个特质，与地块量可广播：稠密内核传入 (S, 14, 1, 1) 与 (1, H, W)，
+    稀疏内核传入按键 gather 后的 (N, 14) 与 (N,)。
+    """
+    heat_res, cold_res = t[:, 0], t[:, 1]
+    drought_res, salt_res, light_req = t[:, 2], t[:, 3], t[:, 4]
+    land_pref, ocean_pref, coast_pref = t[:, 8], t[:, 9], t[:, 10]
+    specialization = t[:, 13]
+
+    # 1. 温度
+    optimal_temp_norm = (heat_res - cold_res) * 0.06
+    temp_tolerance = (heat_res + cold_res) * 0.012
+    temp_diff = np.abs(tile_temp - optimal_temp_norm)
+    temp_score = np.where(
+        temp_diff <= temp_tolerance, 1.0, np.exp(-(temp_diff - temp_tolerance) * 8.0)
+    )
+
+    # 2. 湿度
+    optimal_humidity = 1.0 - drought_res * 0.08
+    humidity_tolerance = 0.12 + drought_res * 0.02
+    humidity_diff = np.abs(tile_humidity - optimal_humidity)
+    humidity_score = np.where(
+        humidity_diff <= humidity_tolerance,
+        1.0,
+        np.maximum(0.0, 1.0 - (humidity_diff - humidity_tolerance) * 4.0),
+    )
+
+    # 3. 盐度
+    tile_salinity = tile_ocean * 1.0 + tile_coast * 0.3
+    salinity_score = np.maximum(0.0, 1.0 - np.abs(tile_salinity - salt_res * 0.1) * 3.0)
+
+    # 4. 光照
+    tile_light = np.maximum(0.1, 1.0 - tile_ocean * 0.7)
+    light_score = np.maximum(0.0, 1.0 - np.abs(tile_light - light_req * 0.1) * 3.0)
+
+    # 5. 资源
+    resource_score = np.minimum(1.0, tile_resource * 1.2)
+
+    # 6. 栖息地
+    habitat_match = tile_land * land_pref + tile_ocean * ocean_pref + tile_coast * coast_pref
+    is_land_only = (land_pref > 0.7) & (ocean_pref < 0.2)
+    is_ocean_only = (ocean_pref > 0.7) & (land_pref < 0.2)
+    habitat_blocked = (is_land_only & (tile_ocean > 0.5)) | (
+        is_ocean_only & (tile_land > 0.5) & (tile_coast < 0.3)
+    )
+
+    # 7. 综合
+    base_suit = (
+        temp_score * 0.30
+        + humidity_score * 0.18
+        + salinity_score * 0.18
+        + light_score * 0.12
+        + resource_score * 0.12
+        + habitat_match * 0.10
+    )
+    base_suit = np.where(habitat_blocked, 0.0, base_suit)
+
+    # 8. 专化度调节
+    specialist = specialization > 0.6
+    generalist = specialization < 0.3
+    spec_factor = np.where(
+        base_suit > 0.65,
+        1.0 + (specialization - 0.6) * 0.5,
+        np.where(base_suit < 0.35, 1.0 - (specialization - 0.6) * 0.8, 1.0),
+    )
+    base_suit = np.where(
+        specialist,
+        base_suit * spec_factor,
+        np.where(generalist, base_suit * (0.85 + specialization * 0.5), base_suit),
+    )
+
+    return np.clip(base_suit, 0.0, 1.0)
+
+
+def kernel_compute_trait_suitability(env, species_traits, result):
+    """精确特质-环境匹配的宜居度计算 - NumPy 向量化"""
+    land, ocean, coast = _habitat_channels(env)
+    result[...] = _trait_suitability(
+        species_traits[:, :, None, None],
+        env[0][None], env[1][None], env[3][None],
+        land[None], ocean[None], coast[None],
+    )
+
+
+# ============================================================================
+# 竞争内核
+# ============================================================================
+
+def _local_fitness(suitability, t, pop):
+    """局部竞争适应度（逐元素，t[:, k] 与地块量可广播）"""
+    repro_rate, body_size, mobility, age = t[:, 5], t[:, 6], t[:, 7], t[:, 12]
+
+    repro_score = np.minimum(1.0, repro_rate / np.maximum(body_size, 1.0) * 0.5)
+    size_efficiency = (11.0 - body_size) / 10.0
+    mobility_score = mobility / 10.0
+    age_bonus = np.select(
+        [age <= 2, age <= 5, age <= 10, age > 20],
+        [1.25, 1.15, 1.05, 0.90],
+        default=1.0,
+    )
+
+    local_fitness = (
+        suitability * 0.40
+        + repro_score * 0.25
+        + size_efficiency * 0.15
+        + mobility_score * 0.20
+    ) * age_bonus
+
+    inactive = (pop <= 0) | (suitability <= 0.01)
+    return np.where(inactive, 0.0, np.clip(local_fitness, 0.0, 1.0))
+
+
+def kernel_compute_local_fitness(suitability, species_traits, pop, result):
+    """计算局部竞争适应度 - NumPy 向量化"""
+    result[...] = _local_fitness(suitability, species_traits[:, :, None, None], pop)
+
+
+def kernel_compute_niche_overlap_matrix(species_traits, result):
+    """物种间多维生态位重叠矩阵 - NumPy 向量化"""
+    t = species_traits
+    features = np.stack(
+        [
+            (t[:, 0] + t[:, 1]) / 20.0,
+            t[:, 2] / 10.0,
+            t[:, 3] / 10.0,
+            t[:, 4] / 10.0,
+            t[:, 6] / 10.0,
+            t[:, 11] / 5.0,
+        ],
+        axis=1,
+    ).astype(np.float32)
+    weights = np.array([0.15, 0.12, 0.12, 0.08, 0.13, 0.40], dtype=np.float32)
+    diff = features[:, None, :] - features[None, :, :]
+    dist_sq = (diff * diff * weights).sum(axis=2)
+    similarity = np.exp(-dist_sq * 8.0)
+    np.fill_diagonal(similarity, 1.0)
+    result[...] = similarity
+
+
+def _trait_competition_contrib(overlap, fitness_diff, other_pop, strength):
+    """竞争者对本物种的竞争压力贡献（逐元素）"""
+    return np.where(
+        fitness_diff > 0.05,
+        overlap * fitness_diff * other_pop * strength,
+        np.where(
+            fitness_diff < -0.05,
+            -(overlap * np.abs(fitness_diff) * other_pop * strength * 0.1),
+            overlap * other_pop * strength * 0.3,
+        ),
+    )
+
+
+def kernel_apply_trait_competition(pop, local_fitness, niche_overlap, result, competition_strength):
+    """基于特质的竞争 - NumPy 向量化（按竞争者循环，每次处理全部物种和地块）"""
+    S = pop.shape[0]
+    strength = np.float32(competition_strength)
+    pressure = np.zeros_like(pop)
+    self_idx = np.arange(S)
+
+    for other in range(S):
+        overlap = niche_overlap[:, other][:, None, None]
+        other_pop = pop[other][None]
+        active = (other_pop > 0) & (overlap >= 0.3) & (self_idx != other)[:, None, None]
+        fitness_diff = local_fitness[other][None] - local_fitness
+        contrib = _trait_competition_contrib(overlap, fitness_diff, other_pop, strength)
+        pressure += np.where(active, contrib, 0.0).astype(np.float32)
+
+    loss_ratio = np.minimum(0.5, pressure / (pop + 100.0))
+    result[...] = np.where(pop > 0, pop * (1.0 - loss_ratio), 0.0)
+
+
+# ============================================================================
+# 迁徙内核
+# ============================================================================
+
+def kernel_compute_distance_weights(current_pos, result, max_distance):
+    """到种群质心的距离权重 - NumPy 向量化"""
+    S, H, W = current_pos.shape
+    positive = np.where(current_pos > 0, current_pos, 0.0)
+    total = positive.sum(axis=(1, 2))
+    ii = np.arange(H, dtype=np.float32)
+    jj = np.arange(W, dtype=np.float32)
+    safe_total = np.where(total > 0, total, 1.0)
+    center_i = (positive.sum(axis=2) * ii).sum(axis=1) / safe_total
+    center_j = (positive.sum(axis=1) * jj).sum(axis=1) / safe_total
+
+    dist = (
+        np.abs(ii[None, :, None] - center_i[:, None, None])
+        + np.abs(jj[None, None, :] - center_j[:, None, None])
+    )
+    max_d = np.float32(max_distance)
+    weights = np.where(dist <= max_d, np.exp(-dist / max_d), 0.0)
+    result[...] = np.where(total[:, None, None] > 0, weights, 0.0)
+
+
+def kernel_migration_decision(
+    pop, suitability, distance_weights, death_rates, migration_scores,
+    pressure_threshold, saturation_threshold,
+):
+    """迁徙决策分数 - NumPy 向量化 (v2.3)"""
+    S, H, W = pop.shape
+    adj_count = np.zeros((S, H, W), dtype=np.int32)
+    adj_suit = np.zeros((S, H, W), dtype=np.float32)
+    has_low = np.zeros((S, H, W), dtype=bool)
+    for di, dj in _NEIGHBOR_OFFSETS:
+        hit = _valid_mask(H, W, di, dj)[None] & (_shift(pop, di, dj) > 0)
+        n_suit = _shift(suitability, di, dj)
+        adj_count += hit
+        adj_suit += np.where(hit, n_suit, 0.0).astype(np.float32)
+        has_low |= hit & (n_suit < 0.25)
+
+    death = death_rates[:, None, None]
+    avg_source = adj_suit / np.maximum(adj_count, 1)
+    base_score = suitability * 0.6 + distance_weights * 0.4
+    base_score = np.where(
+        has_low & (suitability > avg_source),
+        base_score + (suitability - avg_source) * 1.2,
+        base_score,
+    )
+    boost = np.minimum(0.7, (death - pressure_threshold) * 2.5)
+    pressured = (
+        suitability * (0.7 + boost * 0.2) + distance_weights * (0.3 - boost * 0.1)
+    ) * (1.0 + boost * 0.8)
+    base_score = np.where(death > pressure_threshold, pressured, base_score)
+
+    noise = 0.9 + 0.2 * _coord_noise(S, H, W, 17, 31, 7)
+    eligible = (pop <= 0) & (suitability >= 0.15) & (adj_count > 0)
+    migration_scores[...] = np.where(eligible, base_score * noise, 0.0)
+
+
+def _migration_decision_v2(
+    pop, target, distance_weights, death, res_pressure, trophic, prey_val,
+    adj_count, adj_suit, has_low, habitat_ok, noise,
+    pressure_threshold, saturation_threshold, oversaturation_threshold,
+    prey_scarcity_threshold, prey_weight, oversat_bonus, consumer_trophic_threshold,
+):
+    """迁徙决策分数（逐元素，物种量与地块量可广播）"""
+    avg_source = adj_suit / np.maximum(adj_count, 1)
+
+    base_score = target * 0.5 + distance_weights * 0.5
+    base_score = np.where(
+        has_low & (target > avg_source), base_score + (target - avg_source) * 1.5, base_score
+    )
+    base_score = np.where(
+        target > avg_source + 0.15, base_score + (target - avg_source) * 0.8, base_score
+    )
+
+    boost = np.minimum(0.8, (death - pressure_threshold) * 3.0)
+    pressured = (
+        target * (0.7 + boost * 0.2) + distance_weights * (0.3 - boost * 0.1)
+    ) * (1.0 + boost * 0.8)
+    base_score = np.where(death > pressure_threshold, pressured, base_score)
+
+    base_score = np.where(
+        res_pressure > saturation_threshold,
+        (target * 0.5 + distance_weights * 0.5) * 1.2,
+        base_score,
+    )
+    base_score = np.where(
+        res_pressure > oversaturation_threshold,
+        base_score * (1.0 + oversat_bonus * 1.5),
+        base_score,
+    )
+
+    prey_adjusted = np.where(
+        prey_val < prey_scarcity_threshold,
+        base_score * (1.0 - prey_weight) + prey_val * target * prey_weight,
+        np.where(prey_val > prey_scarcity_threshold * 2.0, base_score * 1.3, base_score),
+    )
+    base_score = np.where(trophic >= consumer_trophic_threshold, prey_adjusted, base_score)
+
+    eligible = (pop <= 0) & (target >= 0.15) & habitat_ok & (adj_count > 0)
+    return np.where(eligible, base_score * noise, 0.0)
+
+
+def kernel_migration_decision_v2(
+    pop, suitability, distance_weights, death_rates, resource_pressure,
+    prey_density, trophic_levels, species_traits, env, migration_scores,
+    pressure_threshold, saturation_threshold, oversaturation_threshold,
+    prey_scarcity_threshold, prey_weight, oversat_bonus, consumer_trophic_threshold,
+):
+    """迁徙决策 v3.0（栖息地类型约束）- NumPy 向量化"""
+    S, H, W = pop.shape
+    land, ocean, coast = _habitat_channels(env)
+    is_terrestrial, is_aquatic, is_amphibious = _habitat_types(species_traits)
+    habitat_ok = _target_habitat_ok(
+        is_terrestrial, is_aquatic, is_amphibious, land[None], ocean[None], coast[None]
+    )
+    adj_count, adj_suit, has_low = _connected_source_count(
+        pop, is_terrestrial, is_aquatic, land, ocean, coast, suitability, 0.25,
+    )
+    migration_scores[...] = _migration_decision_v2(
+        pop, suitability, distance_weights,
+        death_rates[:, None, None], resource_pressure[:, None, None], trophic_levels[:, None, None],
+        prey_density, adj_count, adj_suit, has_low, habitat_ok,
+        0.9 + 0.2 * _coord_noise(S, H, W, 17, 31, 11),
+        pressure_threshold, saturation_threshold, oversaturation_threshold,
+        prey_scarcity_threshold, prey_weight, oversat_bonus, consumer_trophic_threshold,
+    )
+
+
+def _long_jump_ok(is_terrestrial, is_aquatic, is_amphibious, has_land_pop, has_ocean_pop, land, ocean, coast):
+    """长跳目标栖息地约束（逐元素）"""
+    return (
+        (is_terrestrial & has_land_pop & ((land > 0.5) | (coast > 0.3)))
+        | (is_aquatic & has_ocean_pop & ((ocean > 0.5) | (coast > 0.3)))
+        | is_amphibious
+    )
+
+
+def _migration_targets(
+    occupied, migration_scores, habitat_ok, adjacent, distance_weights, long_jump_ok,
+    noise_pass2, noise_pass3, score_threshold, long_jump_prob,
+):
+    """迁徙目标判定（逐元素）
+
+    Returns:
+        (counted, receivable)：计入分数总和的格子，以及可接收迁入的格子
+        （后者还需物种分数总和 > 0）
+    """
+    long_jump_enabled = long_jump_prob > 0
+    threshold = np.float32(score_threshold)
+    jump_limit = np.float32(long_jump_prob * 3.0)
+
+    # 第二遍：有效迁徙分数总和
+    candidate = (~occupied) & (migration_scores > threshold) & habitat_ok
+    long_jump_pass2 = (
+        long_jump_enabled
+        & (migration_scores > threshold * 1.5)
+        & (distance_weights > 0.0)
+        & long_jump_ok
+        & (noise_pass2 < jump_limit)
+    )
+    counted = candidate & (adjacent | long_jump_pass2)
+
+    # 第三遍：按分数比例分配
+    allow_long = (
+        (~adjacent)
+        & long_jump_enabled
+        & (distance_weights > 0.0)
+        & long_jump_ok
+        & (noise_pass3 < jump_limit)
+    )
+    receivable = candidate & (adjacent | allow_long)
+    return counted, receivable
+
+
+def kernel_execute_migration(
+    pop, migration_scores, distance_weights, species_traits, env, new_pop,
+    migration_rates, score_threshold, long_jump_prob,
+):
+    """执行迁徙 v3.0（栖息地连通性检查）- NumPy 向量化"""
+    S, H, W = pop.shape
+    land, ocean, coast = _habitat_channels(env)
+    is_terrestrial, is_aquatic, is_amphibious = _habitat_types(species_traits)
+    habitat_ok = _target_habitat_ok(
+        is_terrestrial, is_aquatic, is_amphibious, land[None], ocean[None], coast[None]
+    )
+    adj_count, _, _ = _connected_source_count(
+        pop, is_terrestrial, is_aquatic, land, ocean, coast,
+    )
+
+    occupied = pop > 0
+    total_pop = np.where(occupied, pop, 0.0).sum(axis=(1, 2))
+    has_land_pop = (occupied & (land > 0.5)[None]).any(axis=(1, 2))[:, None, None]
+    has_ocean_pop = (occupied & (ocean > 0.5)[None]).any(axis=(1, 2))[:, None, None]
+    long_jump_ok = _long_jump_ok(
+        is_terrestrial, is_aquatic, is_amphibious, has_land_pop, has_ocean_pop,
+        land[None], ocean[None], coast[None],
+    )
+
+    counted, receivable = _migration_targets(
+        occupied, migration_scores, habitat_ok, adj_count > 0, distance_weights, long_jump_ok,
+        0.5 + 0.5 * _coord_noise(S, H, W, 13, 17, 19),
+        0.5 + 0.5 * _coord_noise(S, H, W, 23, 29, 31, offset=1),
+        score_threshold, long_jump_prob,
+    )
+    total_score = np.where(counted, migration_scores, 0.0).sum(axis=(1, 2))
+
+    rates = migration_rates[:, None, None]
+    migrate_amount = (total_pop * migration_rates)[:, None, None]
+    receive = receivable & (total_score > 0)[:, None, None]
+    safe_total = np.where(total_score > 0, total_score, 1.0)[:, None, None]
+    arrivals = np.where(receive, migrate_amount * (migration_scores / safe_total), 0.0)
+    new_pop[...] = np.where(occupied, pop * (1.0 - rates), arrivals)
+
+
+# ============================================================================
+# 扩散内核
+# ============================================================================
+
+def kernel_advanced_diffusion(pop, suitability, new_pop, base_rate):
+    """带适宜度引导和密度驱动的高级扩散 - NumPy 向量化 (v2.3)"""
+    S, H, W = pop.shape
+    SUIT_THRESHOLD = 0.20
+    SUIT_LOW_THRESHOLD = 0.10
+    SUIT_ESCAPE_THRESHOLD = 0.15
+    DENSITY_PRESSURE_THRESHOLD = 50.0
+    DENSITY_PRESSURE_RATE = 1.5
+    CROWDING_THRESHOLD = 100.0
+
+    rate = np.float32(base_rate)
+    current = pop
+    my_suit = suitability
+    outflow = np.zeros_like(pop)
+    inflow = np.zeros_like(pop)
+    any_better = np.zeros(pop.shape, dtype=bool)
+    any_lower = np.zeros(pop.shape, dtype=bool)
+
+    for di, dj in _NEIGHBOR_OFFSETS:
+        valid = _valid_mask(H, W, di, dj)[None]
+        n_suit = _shift(suitability, di, dj)
+        n_pop = _shift(pop, di, dj)
+        any_better |= valid & (n_suit > my_suit)
+        any_lower |= valid & (n_pop < current * 0.5)
+        gradient = n_suit - my_suit
+        density_gradient = current - n_pop
+
+        # 流出
+        out = np.where(
+            n_suit > SUIT_THRESHOLD,
+            np.where(
+                gradient > 0,
+                current * rate * (1.0 + gradient * 0.5) * 0.25,
+                np.where(gradient > -0.3, current * rate * 0.4 * 0.25, 0.0),
+            ),
+            0.0,
+        )
+        pressure_factor = np.minimum(2.0, current / DENSITY_PRESSURE_THRESHOLD)
+        out += np.where(
+            (current > DENSITY_PRESSURE_THRESHOLD) & (n_suit > SUIT_LOW_THRESHOLD) & (density_gradient > 0),
+            current * rate * DENSITY_PRESSURE_RATE * pressure_factor
+            * (density_gradient / (current + 1.0)) * 0.25,
+            0.0,
+        )
+        out += np.where(
+            (current > CROWDING_THRESHOLD) & (n_suit > SUIT_LOW_THRESHOLD),
+            current * (rate * 2.0 * (current / CROWDING_THRESHOLD)) * 0.15,
+            0.0,
+        )
+        out += np.where(
+            (n_suit > SUIT_LOW_THRESHOLD) & (my_suit < SUIT_ESCAPE_THRESHOLD) & (gradient > 0),
+            current * rate * 2.0 * gradient * 0.25,
+            0.0,
+        )
+        outflow += np.where(valid & (current > 0), out, 0.0).astype(np.float32)
+
+        # 流入
+        inn = np.where(
+            my_suit > SUIT_THRESHOLD,
+            np.where(
+                gradient < 0,
+                n_pop * rate * (1.0 - gradient * 0.5) * 0.25,
+                np.where(gradient < 0.3, n_pop * rate * 0.4 * 0.25, 0.0),
+            ),
+            np.where(
+                my_suit > SUIT_LOW_THRESHOLD,
+                np.where(
+                    (n_pop > DENSITY_PRESSURE_THRESHOLD) & (current < n_pop * 0.5),
+                    n_pop * rate * 0.8 * (n_pop / CROWDING_THRESHOLD) * 0.25,
+                    np.where(gradient < 0, n_pop * rate * 0.3 * np.abs(gradient) * 0.25, 0.0),
+                ),
+                0.0,
+            ),
+        )
+        inflow += np.where(valid & (n_pop > 0), inn, 0.0).astype(np.float32)
+
+    noise = 0.5 + 0.5 * _coord_noise(S, H, W, 13, 17, 7)
+    escape_case = (my_suit < SUIT_ESCAPE_THRESHOLD) & ~any_better
+    random_escape = np.where(
+        escape_case,
+        np.where(noise > 0.6, current * rate * 0.15, 0.0),
+        np.where((current > CROWDING_THRESHOLD * 1.5) & ~any_lower, current * rate * 0.10, 0.0),
+    )
+    total_outflow = np.minimum(outflow + random_escape, current * 0.60)
+    total_outflow = np.where(current > 0, total_outflow, 0.0)
+    new_pop[...] = current - total_outflow + inflow
+
+
+def kernel_advanced_diffusion_v2(
+    pop, suitability, diffusion_scale, new_pop,
+    base_rate, background_rate, density_threshold, escape_threshold,
+):
+    """带世代缩放和背景扩散的高级扩散 - NumPy 向量化 (v3.1)"""
+    S, H, W = pop.shape
+    SUIT_THRESHOLD = 0.18
+    SUIT_LOW_THRESHOLD = 0.08
+    CROWDING_THRESHOLD = 60.0
+
+    scale = diffusion_scale[:, None, None]
+    scaled_rate = np.float32(base_rate) * scale
+    bg = np.float32(background_rate)
+    density_threshold = np.float32(density_threshold)
+    current = pop
+    my_suit = suitability
+
+    outflow = np.zeros_like(pop)
+    inflow = np.zeros_like(pop)
+    any_better = np.zeros(pop.shape, dtype=bool)
+    any_lower = np.zeros(pop.shape, dtype=bool)
+    valid_neighbors = np.zeros((H, W), dtype=np.int32)
+
+    for di, dj in _NEIGHBOR_OFFSETS:
+        valid2d = _valid_mask(H, W, di, dj)
+        valid = valid2d[None]
+        valid_neighbors += valid2d
+        n_suit = _shift(suitability, di, dj)
+        n_pop = _shift(pop, di, dj)
+        any_better |= valid & (n_suit > my_suit)
+        any_lower |= valid & (n_pop < current * 0.5)
+        gradient = n_suit - my_suit
+        density_gradient = current - n_pop
+
+        # 流出
+        out = np.where(
+            n_suit > SUIT_THRESHOLD,
+            np.where(
+                gradient > 0,
+                current * scaled_rate * (1.0 + gradient * 0.6) * 0.25,
+                np.where(gradient > -0.25, current * scaled_rate * 0.45 * 0.25, 0.0),
+            ),
+            0.0,
+        )
+        pressure_factor = np.minimum(2.5, current / density_threshold)
+        out += np.where(
+            (current > density_threshold) & (n_suit > SUIT_LOW_THRESHOLD) & (density_gradient > 0),
+            current * scaled_rate * 1.8 * pressure_factor * (density_gradient / (current + 1.0)) * 0.25,
+            0.0,
+        )
+        out += np.where(
+            (current > CROWDING_THRESHOLD) & (n_suit > SUIT_LOW_THRESHOLD),
+            current * (scaled_rate * 2.5 * (current / CROWDING_THRESHOLD)) * 0.12,
+            0.0,
+        )
+        out += np.where(
+            (n_suit > SUIT_LOW_THRESHOLD) & (my_suit < escape_threshold) & (gradient > 0),
+            current * scaled_rate * 2.5 * gradient * 0.25,
+            0.0,
+        )
+        out += np.where(n_suit > SUIT_LOW_THRESHOLD, current * bg * 0.25, 0.0)
+        outflow += np.where(valid & (current > 0), out, 0.0).astype(np.float32)
+
+        # 流入
+        inn = np.where(
+            my_suit > SUIT_THRESHOLD,
+            np.where(
+                gradient < 0,
+                n_pop * scaled_rate * (1.0 - gradient * 0.6) * 0.25,
+                np.where(gradient < 0.25, n_pop * scaled_rate * 0.45 * 0.25, 0.0),
+            ),
+            np.where(
+                my_suit > SUIT_LOW_THRESHOLD,
+                np.where(
+                    (n_pop > density_threshold) & (current < n_pop * 0.5),
+                    n_pop * scaled_rate * 0.9 * (n_pop / CROWDING_THRESHOLD) * 0.25,
+                    0.0,
+                ) + n_pop * bg * 0.15,
+                0.0,
+            ),
+        )
+        inflow += np.where(valid & (n_pop > 0), inn, 0.0).astype(np.float32)
+
+    noise = 0.5 + 0.5 * _coord_noise(S, H, W, 13, 17, 7)
+    escape_case = (my_suit < escape_threshold) & ~any_better & (valid_neighbors > 0)[None]
+    random_escape = np.where(
+        escape_case,
+        np.where(noise > 0.55, current * scaled_rate * 0.18, 0.0),
+        np.where(
+            (current > CROWDING_THRESHOLD * 1.5) & ~any_lower, current * scaled_rate * 0.12, 0.0
+        ),
+    )
+    max_outflow_ratio = np.minimum(0.70, 0.50 + 0.08 * scale)
+    total_outflow = np.minimum(outflow + random_escape, current * max_outflow_ratio)
+    total_outflow = np.where(current > 0, total_outflow, 0.0)
+    new_pop[...] = current - total_outflow + inflow
+
+
+def _trait_diffusion(
+    current, my_suit, mobility, body_size, scale, land_only, ocean_only, land, ocean,
+    neighbors, noise, base_rate, background_rate, density_threshold, escape_threshold,
+):
+    """基于特质的扩散（逐元素）
+
+    Args:
+        neighbors: 逐个邻居产出 (valid, n_suit, n_pop, n_land, n_ocean, n_coast)，
+            各量与目标格子可广播；稠密与稀疏内核共用
+    """
+    SUIT_THRESHOLD = 0.16
+    SUIT_LOW_THRESHOLD = 0.08
+    CROWDING_THRESHOLD = 50.0
+
+    mobility_factor = 0.6 + mobility * 0.12
+    size_penalty = 1.0 - (body_size - 5) * 0.025
+    effective_rate = np.float32(base_rate) * mobility_factor * size_penalty * scale
+    bg = np.float32(background_rate)
+    density_threshold = np.float32(density_threshold)
+
+    receive_factor = np.where(
+        (land_only & (ocean > 0.6)) | (ocean_only & (land > 0.6)), 0.3, 1.0
+    ).astype(np.float32)
+
+    outflow = np.zeros_like(current)
+    inflow = np.zeros_like(current)
+    any_better = np.zeros(current.shape, dtype=bool)
+    any_lower = np.zeros(current.shape, dtype=bool)
+    has_neighbors = np.zeros(current.shape, dtype=bool)
+
+    for valid, n_suit, n_pop, n_land, n_ocean, n_coast in neighbors:
+        has_neighbors |= valid
+        gradient = n_suit - my_suit
+        density_gradient = current - n_pop
+
+        # 栖息地连通性衰减（0.3 > 0.1，邻居始终计入有效邻居）
+        habitat_factor = np.where(
+            (land_only & ((n_ocean > 0.6) & (n_coast < 0.3)))
+            | (ocean_only & ((n_land > 0.6) & (n_coast < 0.3))),
+            0.3, 1.0,
+        ).astype(np.float32)
+
+        any_better |= valid & (n_suit > my_suit)
+        any_lower |= valid & (n_pop < current * 0.5)
+
+        # 流出
+        out = np.where(
+            n_suit > SUIT_THRESHOLD,
+            np.where(
+                gradient > 0,
+                current * effective_rate * (1.0 + gradient * 0.7) * habitat_factor * 0.25,
+                np.where(
+                    gradient > -0.22,
+                    current * effective_rate * 0.45 * habitat_factor * 0.25,
+                    0.0,
+                ),
+            ),
+            0.0,
+        )
+        pressure_factor = np.minimum(3.0, current / density_threshold)
+        out += np.where(
+            (current > density_threshold) & (n_suit > SUIT_LOW_THRESHOLD) & (density_gradient > 0),
+            current * effective_rate * 2.0 * pressure_factor
+            * (density_gradient / (current + 1.0)) * habitat_factor * 0.25,
+            0.0,
+        )
+        out += np.where(
+            (current > CROWDING_THRESHOLD) & (n_suit > SUIT_LOW_THRESHOLD),
+            current * (effective_rate * 3.0 * (current / CROWDING_THRESHOLD) * habitat_factor) * 0.10,
+            0.0,
+        )
+        out += np.where(
+            (n_suit > SUIT_LOW_THRESHOLD) & (my_suit < escape_threshold) & (gradient > 0),
+            current * effective_rate * 2.8 * gradient * habitat_factor * 0.25,
+            0.0,
+        )
+        out += np.where(n_suit > SUIT_LOW_THRESHOLD, current * bg * habitat_factor * 0.25, 0.0)
+        outflow += np.where(valid & (current > 0), out, 0.0).astype(np.float32)
+
+        # 流入
+        inn = np.where(
+            my_suit > SUIT_THRESHOLD,
+            np.where(
+                gradient < 0,
+                n_pop * effective_rate * (1.0 - gradient * 0.7) * receive_factor * 0.25,
+                np.where(
+                    gradient < 0.22,
+                    n_pop * effective_rate * 0.45 * receive_factor * 0.25,
+                    0.0,
+                ),
+            ),
+            np.where(
+                my_suit > SUIT_LOW_THRESHOLD,
+                np.where(
+                    (n_pop > density_threshold) & (current < n_pop * 0.5),
+                    n_pop * effective_rate * 1.0 * (n_pop / CROWDING_THRESHOLD) * receive_factor * 0.25,
+                    0.0,
+                ) + n_pop * bg * receive_factor * 0.15,
+                0.0,
+            ),
+        )
+        inflow += np.where(valid & (n_pop > 0), inn, 0.0).astype(np.float32)
+
+    escape_case = (my_suit < escape_threshold) & ~any_better
+    random_escape = np.where(
+        has_neighbors,
+        np.where(
+            escape_case,
+            np.where(noise > 0.50, current * effective_rate * 0.20, 0.0),
+            np.where(
+                (current > CROWDING_THRESHOLD * 1.5) & ~any_lower,
+                current * effective_rate * 0.15,
+                0.0,
+            ),
+        ),
+        0.0,
+    )
+    max_outflow_ratio = np.minimum(0.70, 0.48 + mobility * 0.02 + scale * 0.05)
+    total_outflow = np.minimum(outflow + random_escape, current * max_outflow_ratio)
+    total_outflow = np.where(current > 0, total_outflow, 0.0)
+    return current - total_outflow + inflow
+
+
+def kernel_trait_diffusion_v2(
+    pop, suitability, species_traits, env, diffusion_scale, new_pop,
+    base_rate, background_rate, density_threshold, escape_threshold,
+):
+    """基于特质的扩散 v2 - NumPy 向量化"""
+    S, H, W = pop.shape
+    is_terrestrial, is_aquatic, is_amphibious = _habitat_types(species_traits)
+    land, ocean, coast = _habitat_channels(env)
+
+    def neighbors():
+        for di, dj in _NEIGHBOR_OFFSETS:
+            yield (
+                _valid_mask(H, W, di, dj)[None],
+                _shift(suitability, di, dj),
+                _shift(pop, di, dj),
+                _shift(land, di, dj)[None],
+                _shift(ocean, di, dj)[None],
+                _shift(coast, di, dj)[None],
+            )
+
+    new_pop[...] = _trait_diffusion(
+        pop, suitability,
+        species_traits[:, 7][:, None, None],
+        species_traits[:, 6][:, None, None],
+        diffusion_scale[:, None, None],
+        is_terrestrial & ~is_amphibious,
+        is_aquatic & ~is_amphibious,
+        land[None], ocean[None],
+        neighbors(),
+        0.5 + 0.5 * _coord_noise(S, H, W, 13, 17, 7),
+        base_rate, background_rate, density_threshold, escape_threshold,
+    )
+
+
+# ============================================================================
+# v3.0 世代缩放内核（繁殖 / 死亡率）
+# ============================================================================
+
+def _reproduction_v2(pop, fitness, total_pop, capacity, birth_scale, birth_rate):
+    """繁殖 v2（逐元素，total_pop/capacity 为所在地块的量，与 pop 可广播）"""
+    active = (capacity > 0) & (total_pop > 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        crowding = np.where(active, np.minimum(1.0, total_pop / np.where(active, capacity, 1.0)), 0.0)
+    suit_factor = _repro_suit_factor(fitness, 0.08, 0.22, 0.03, 0.67, 1.25)
+    effective_rate = np.float32(birth_rate) * suit_factor * (1.0 - crowding) * birth_scale
+    effective_rate = np.where((fitness > 0.6) & (crowding < 0.3), effective_rate * 1.2, effective_rate)
+    grown = np.where(active, pop * (1.0 + effective_rate), pop)
+    return np.where(pop > 0, grown, 0.0)
+
+
+def kernel_reproduction_v2(pop, fitness, capacity, birth_scale, birth_rate, result):
+    """繁殖计算 v2（预计算 birth_scale）- NumPy 向量化"""
+    result[...] = _reproduction_v2(
+        pop, fitness, pop.sum(axis=0)[None], capacity[None], birth_scale[:, None, None], birth_rate
+    )
+
+
+def _era_factor(era_scaling: float, floor: float) -> float:
+    if era_scaling > 1.5:
+        return max(floor, 1.0 / float(np.power(np.float32(era_scaling), np.float32(0.15))))
+    return 1.0
+
+
+def kernel_multifactor_mortality_v2(
+    pop, env, species_prefs, species_params, trophic_levels, pressure_overlay,
+    mortality_scale, result, base_mortality, temp_weight, competition_weight,
+    resource_weight, capacity_multiplier, era_scaling,
+):
+    """多因子死亡率 v2（预计算 mortality_scale）- NumPy 向量化"""
+    S, H, W = pop.shape
+    C_env = env.shape[0]
+    prefs = species_prefs[:, :, None, None]
+    scale = mortality_scale[:, None, None]
+
+    # 1. 温度
+    temp = env[0][None]
+    temp_deviation = np.abs(temp - prefs[:, 0] * 50.0)
+    if species_params.shape[1] >= 2:
+        temp_tolerance = np.maximum(5.0, species_params[:, 1])[:, None, None]
+    else:
+        temp_tolerance = np.float32(15.0)
+    temp_mortality = np.clip(1.0 - np.exp(-temp_deviation / temp_tolerance), 0.01, 0.8)
+
+    # 2. 湿度
+    humidity = env[1][None] if C_env > 1 else np.float32(0.5)
+    humidity_deviation = np.abs(humidity - prefs[:, 1])
+    humidity_mortality = np.minimum(0.4, humidity_deviation * 0.5)
+
+    # 3. 竞争
+    total_pop_tile = pop.sum(axis=0)[None]
+    my_pop = np.maximum(pop, 1e-6)
+    competitor_pop = total_pop_tile - pop
+    competition_mortality = np.minimum(0.35, competitor_pop / (my_pop + 100.0) * 0.12)
+
+    # 4. 资源
+    resources = env[3][None] if C_env > 3 else np.float32(100.0)
+    capacity = resources * np.float32(capacity_multiplier)
+    saturation = total_pop_tile / (capacity + 1e-6)
+    resource_mortality = np.clip((saturation - 0.5) * 0.45, 0.0, 0.45)
+
+    # 5. 营养级
+    my_trophic = trophic_levels[:, None, None]
+    prey_norm = _prey_density(pop, trophic_levels) / (total_pop_tile + 1e-6)
+    prey_scarcity_mortality = np.where(
+        my_trophic >= 2.0,
+        np.where(prey_norm < 0.20, (0.20 - prey_norm) * 1.6 + 0.12, (1.0 - prey_norm) * 0.15),
+        0.0,
+    )
+
+    # 6. 外部压力
+    external_pressure = pressure_overlay.sum(axis=0)[None] if pressure_overlay.shape[0] > 0 else 0.0
+    external_mortality = np.minimum(0.5, external_pressure * 0.1)
+
+    # 7. 宜居度
+    temp_match = np.maximum(0.0, 1.0 - np.abs(temp - prefs[:, 0]) * 2.0)
+    humidity_match = np.maximum(0.0, 1.0 - humidity_deviation * 2.0)
+    if C_env >= 7:
+        habitat_match = env[4][None] * prefs[:, 4] + env[5][None] * prefs[:, 5] + env[6][None] * prefs[:, 6]
+    else:
+        habitat_match = np.float32(0.5)
+    suitability = np.clip(temp_match * 0.35 + humidity_match * 0.25 + habitat_match * 0.40, 0.0, 1.0)
+    suit_mortality = _suit_mortality(suitability, 0.22, 0.10)
+
+    # 8. 栖息地不匹配
+    habitat_mismatch = np.zeros((S, H, W), dtype=np.float32)
+    if C_env >= 6 and species_prefs.shape[1] >= 6:
+        is_land = (env[4] > 0.5)[None]
+        is_sea = (env[5] > 0.5)[None]
+        land_pref, sea_pref = prefs[:, 4], prefs[:, 5]
+        mismatch = (is_sea & (land_pref > sea_pref + 0.3)) | (is_land & (sea_pref > land_pref + 0.3))
+        habitat_mismatch = np.where(mismatch, 0.55, 0.0)
+
+    total_mortality = (
+        temp_mortality * np.float32(temp_weight)
+        + humidity_mortality * 0.1
+        + competition_mortality * np.float32(competition_weight)
+        + resource_mortality * np.float32(resource_weight)
+        + prey_scarcity_mortality
+        + external_mortality
+        + suit_mortality * 0.38
+        + habitat_mismatch
+        + np.float32(base_mortality)
+    )
+    gen_death_factor = np.minimum(1.6, 1.0 + (scale - 1.0) * 0.3)
+    total_mortality = np.where(
+        (suitability < 0.3) | (habitat_mismatch > 0), total_mortality * gen_death_factor, total_mortality
+    )
+    total_mortality = total_mortality * _era_factor(era_scaling, 0.82)
+
+    result[...] = np.where(pop > 0, np.clip(total_mortality, 0.02, 0.95), 0.0)
+
+
+def _external_mortality(pressure_overlay: np.ndarray):
+    """外部压力死亡率 (H, W)，无压力通道时为标量 0"""
+    if pressure_overlay.shape[0] > 0:
+        return np.minimum(0.5, (pressure_overlay * 0.1).sum(axis=0))
+    return np.float32(0.0)
+
+
+def _trait_mortality(
+    t, scale, pop, total_pop, suit, temp, humidity, resources, external_mortality,
+    is_land, is_sea, base_mortality, era_scaling,
+):
+    """基于特质的死亡率（逐元素）
+
+    t[:, k] 与地块量可广播；total_pop 为所在地块全部物种之和；
+    is_land/is_sea 为 None 时（环境不足 6 通道）不计栖息地不匹配。
+    """
+    heat_res, cold_res, drought_res = t[:, 0], t[:, 1], t[:, 2]
+    body_size, land_pref, ocean_pref = t[:, 6], t[:, 8], t[:, 9]
+
+    # 1. 温度
+    optimal_temp = (heat_res - cold_res) * 5.0
+    temp_range = (heat_res + cold_res) * 3.0 + 10.0
+    temp_dev = np.abs(temp * 50.0 - optimal_temp)
+    temp_mortality = np.minimum(0.7, np.maximum(0.0, (temp_dev - temp_range) / 30.0))
+
+    # 2. 湿度
+    humidity_mortality = np.minimum(0.4, np.abs(humidity - (1.0 - drought_res * 0.08)) * 0.6)
+
+    # 3. 竞争（体型影响）
+    competitor_pop = total_pop - pop
+    size_advantage = 1.0 - (body_size - 5.0) * 0.05
+    competition_mortality = np.minimum(0.35, competitor_pop / (pop + 100.0) * 0.12 * size_advantage)
+
+    # 4. 资源
+    saturation = total_pop / (resources * 100.0 + 1e-6)
+    resource_mortality = np.clip((saturation - 0.5) * 0.45, 0.0, 0.45)
+
+    # 5. 宜居度
+    suit_mortality = _suit_mortality(suit, 0.22, 0.10)
+
+    # 6. 栖息地不匹配
+    habitat_mortality = np.zeros(pop.shape, dtype=np.float32)
+    if is_land is not None:
+        mismatch = (is_sea & (land_pref > ocean_pref + 0.3)) | (is_land & (ocean_pref > land_pref + 0.3))
+        habitat_mortality = np.where(mismatch, 0.55, 0.0)
+
+    total_mortality = (
+        temp_mortality * 0.25
+        + humidity_mortality * 0.10
+        + competition_mortality * 0.20
+        + resource_mortality * 0.20
+        + external_mortality
+        + suit_mortality * 0.35
+        + habitat_mortality
+        + np.float32(base_mortality)
+    )
+    gen_factor = np.minimum(1.6, 1.0 + (scale - 1.0) * 0.35)
+    total_mortality = np.where(
+        (suit < 0.25) | (habitat_mortality > 0), total_mortality * gen_factor, total_mortality
+    )
+    total_mortality = total_mortality * _era_factor(era_scaling, 0.80)
+
+    return np.where(pop > 0, np.clip(total_mortality, 0.02, 0.95), 0.0)
+
+
+def kernel_trait_mortality_v2(
+    pop, env, species_traits, suitability, pressure_overlay, mortality_scale,
+    result, base_mortality, era_scaling,
+):
+    """基于特质的死亡率 v2（预计算 mortality_scale）- NumPy 向量化"""
+    C_env = env.shape[0]
+    external = _external_mortality(pressure_overlay)
+    result[...] = _trait_mortality(
+        species_traits[:, :, None, None],
+        mortality_scale[:, None, None],
+        pop,
+        pop.sum(axis=0)[None],
+        suitability,
+        env[0][None],
+        env[1][None] if C_env > 1 else np.float32(0.5),
+        env[3][None] if C_env > 3 else np.float32(100.0),
+        external[None] if np.ndim(external) else external,
+        (env[4] > 0.5)[None] if C_env >= 6 else None,
+        (env[5] > 0.5)[None] if C_env >= 6 else None,
+        base_mortality,
+        era_scaling,
+    )
+
+
+# ============================================================================
+# 融合步进辅助内核
+# ============================================================================
+
+def kernel_clamp(values, lo, hi, result):
+    """逐元素钳制到 [lo, hi]（result 可与 values 为同一数组）"""
+    np.clip(values, np.float32(lo), np.float32(hi), out=result)
+
+
+def kernel_overcapacity_clamp(pop, overcapacity, clamp, result):
+    """超容量地块（overcapacity > 0）的净增长乘以 clamp（原地修改 result）"""
+    over = (overcapacity > 0)[None]
+    result[...] = np.where(over, np.maximum(0.0, pop + (result - pop) * np.float32(clamp)), result)
+
+
+def kernel_clamp_net_change(pop, new_pop, max_growth_ratio, max_decline_ratio, result):
+    """净变化钳制：new_pop - pop 限制在 [-pop·decline, pop·growth]，结果非负"""
+    change = np.clip(new_pop - pop, -pop * np.float32(max_decline_ratio), pop * np.float32(max_growth_ratio))
+    result[...] = np.maximum(0.0, pop + change)
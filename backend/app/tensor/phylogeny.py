@@ -0,0 +1,281 @@
+"""
+谱系索引 - 父节点数组 + 欧拉序稀疏表，O(1) 最近公共祖先（LCA）查询
+
+亲缘关系原本在各服务中由 lineage_code 字符串反复推导（祖先链集合求交、
+逐字符前缀比较），n 个物种两两比较为 O(n²) 次 Python 字符串操作。
+本模块维护一棵共享的谱系树：
+- 父节点数组 + 深度：物种分化/杂交时增量登记，不重复解析字符串
+- 欧拉序 + 稀疏表：预处理 O(N log N)，单次 LCA 查询 O(1)，可整批向量化
+- kinship_matrix / generation_distance_matrix / related_matrix：
+  一次得到 n×n 矩阵，2000 物种为毫秒级
+
+所有属的根（如 A1、B1）挂在虚拟根 ROOT 之下；LCA 为 ROOT 表示无共同祖先。
+登记时优先使用 Species.parent_code，缺失时按编码推断父代（去掉末尾的
+"字母+数字" 段，每个字母是一代：A1a2 → A1，A1B2 → A1，A1aab → A1aa，A1 为根）。
+"""
+
+from __future__ import annotations
+
+import re
+import threading
+from typing import TYPE_CHECKING, Iterable, Sequence
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from ..models.species import Species
+
+# 虚拟根节点编号
+ROOT = 0
+# 无共同祖先时的亲缘代数（与 KinCompetitionCalculator 约定一致）
+NO_KINSHIP = 999
+
+# 末尾一段为单个字母 + 可选数字（同名子代的序号）；前缀需保留属根的数字（A1 为根）
+_SEGMENT_PATTERN = re.compile(r"^(.*\d.*)([A-Za-z]\d*)$")
+
+
+def infer_parent_code(code: str) -> str | None:
+    """按编码推断父代编码（根编码返回 None）"""
+    match = _SEGMENT_PATTERN.match(code)
+    return match.group(1) if match else None
+
+
+class PhylogenyIndex:
+    """共享谱系树索引
+
+    结构变化（新增节点/父节点变更）只标记失效，下一次查询时重建欧拉序与稀疏表；
+    节点已登记且父节点不变时登记为空操作，稳态回合不触发重建。
+    """
+
+    def __init__(self) -> None:
+        self._ids: dict[str, int] = {"": ROOT}
+        self._codes: list[str] = [""]
+        self._parent: list[int] = [-1]
+        self._explicit: list[bool] = [True]   # 父节点是否来自 parent_code（推断的可被覆盖）
+        self._lock = threading.RLock()
+        self._dirty = True
+        self._depth = np.zeros(1, dtype=np.int32)
+        self._first = np.zeros(1, dtype=np.int32)
+        self._euler = np.zeros(1, dtype=np.int32)
+        self._euler_depth = np.zeros(1, dtype=np.int32)
+        self._table = np.zeros((1, 1), dtype=np.int32)
+        self._log2 = np.zeros(2, dtype=np.int32)
+
+    def __len__(self) -> int:
+        return len(self._codes) - 1
+
+    def __contains__(self, code: str) -> bool:
+        return bool(code) and code in self._ids
+
+    # ------------------------------------------------------------------
+    # 登记
+    # ------------------------------------------------------------------
+
+    def add(self, code: str, parent_code: str | None = None) -> int:
+        """登记谱系，返回节点编号
+
+        parent_code 为空时按编码推断；显式 parent_code 会覆盖先前推断的父节点。
+        """
+        with self._lock:
+            explicit = bool(parent_code) and parent_code != code
+            if not explicit:
+                parent_code = infer_parent_code(code)
+            parent = self.add(parent_code) if parent_code else ROOT
+
+            node = self._ids.get(code)
+            if node is None:
+                node = len(self._codes)
+                self._ids[code] = node
+                self._codes.append(code)
+                self._parent.append(parent)
+                self._explicit.append(explicit)
+                self._dirty = True
+            elif (
+                explicit
+                and self._parent[node] != parent
+                and not self._is_ancestor(node, parent)
+            ):
+                self._parent[node] = parent
+                self._explicit[node] = True
+                self._dirty = True
+            return node
+
+    def add_species(self, species_list: Iterable[Species]) -> None:
+        """按物种的 lineage_code / parent_code 批量登记"""
+        with self._lock:
+            for sp in species_list:
+                self.add(sp.lineage_code, getattr(sp, "parent_code", None))
+
+    def ids(self, codes: Sequence[str]) -> np.ndarray:
+        """编码 → 节点编号（未登记的编码按推断父代登记）"""
+        with self._lock:
+            lookup = self._ids
+            return np.fromiter(
+                (lookup[c] if c in lookup else self.add(c) for c in codes),
+                dtype=np.int32,
+                count=len(codes),
+            )
+
+    def _is_ancestor(self, node: int, other: int) -> bool:
+        """node 是否为 other 的祖先（或本身）"""
+        while other != -1:
+            if other == node:
+                return True
+            other = self._parent[other]
+        return False
+
+    # ------------------------------------------------------------------
+    # 欧拉序 + 稀疏表
+    # ------------------------------------------------------------------
+
+    def _ensure_built(self) -> None:
+        if not self._dirty:
+            return
+        parent = np.asarray(self._parent, dtype=np.int32)
+        n = parent.shape[0]
+
+        # 子节点列表（CSR）：按父节点稳定排序
+        order = np.argsort(parent[1:], kind="stable").astype(np.int32) + 1
+        child_counts = np.bincount(parent[1:], minlength=n)
+        child_start = np.concatenate(([0], np.cumsum(child_counts))).tolist()
+        children = order.tolist()
+
+        depth = [0] * n
+        first = [0] * n
+        euler: list[int] = []
+        # 迭代 DFS：栈元素为 (节点, 下一个子节点位置)
+        stack = [(ROOT, child_start[ROOT])]
+        first[ROOT] = 0
+        euler.append(ROOT)
+        while stack:
+            node, pos = stack[-1]
+            if pos < child_start[node + 1]:
+                stack[-1] = (node, pos + 1)
+                child = children[pos]
+                depth[child] = depth[node] + 1
+                first[child] = len(euler)
+                euler.append(child)
+                stack.append((child, child_start[child]))
+            else:
+                stack.pop()
+                if stack:
+                    euler.append(stack[-1][0])
+
+        depth_arr = np.asarray(depth, dtype=np.int32)
+        euler_arr = np.asarray(euler, dtype=np.int32)
+        euler_depth = depth_arr[euler_arr]
+        m = euler_arr.shape[0]
+
+        # table[k, i]：欧拉序区间 [i, i + 2^k) 中深度最小的位置
+        levels = max(1, int(m).bit_length())
+        table = np.zeros((levels, m), dtype=np.int32)
+        table[0] = np.arange(m, dtype=np.int32)
+        for k in range(1, levels):
+            half = 1 << (k - 1)
+            span = m - (1 << k) + 1
+            left = table[k - 1, :span]
+            right = table[k - 1, half:half + span]
+            table[k, :span] = np.where(euler_depth[left] <= euler_depth[right], left, right)
+
+        log2 = np.zeros(m + 1, dtype=np.int32)
+        if m >= 2:
+            log2[2:] = np.floor(np.log2(np.arange(2, m + 1))).astype(np.int32)
+
+        self._depth = depth_arr
+        self._first = np.asarray(first, dtype=np.int32)
+        self._euler = euler_arr
+        self._euler_depth = euler_depth
+        self._table = table
+        self._log2 = log2
+        self._dirty = False
+
+    def lca(self, u: np.ndarray, v: np.ndarray) -> np.ndarray:
+        """节点编号 → LCA 节点编号（支持广播）"""
+        with self._lock:
+            self._ensure_built()
+            fu = self._first[u]
+            fv = self._first[v]
+            lo = np.minimum(fu, fv)
+            hi = np.maximum(fu, fv)
+            k = self._log2[hi - lo + 1]
+            a = self._table[k, lo]
+            b = self._table[k, hi - (1 << k) + 1]
+            depth = self._euler_depth
+            return self._euler[np.where(depth[a] <= depth[b], a, b)]
+
+    def depths(self, ids: np.ndarray) -> np.ndarray:
+        with self._lock:
+            self._ensure_built()
+            return self._depth[ids]
+
+    # ------------------------------------------------------------------
+    # 单对查询
+    # ------------------------------------------------------------------
+
+    def lca_code(self, code1: str, code2: str) -> str:
+        """最近公共祖先编码，无共同祖先返回空字符串"""
+        ids = self.ids([code1, code2])
+        return self._codes[int(self.lca(ids[0], ids[1]))]
+
+    def kinship(self, code1: str, code2: str) -> int:
+        """亲缘代数：max(各自到 LCA 的代数)，无共同祖先为 NO_KINSHIP"""
+        return int(self.kinship_matrix([code1, code2])[0, 1])
+
+    def ancestors(self, code: str) -> list[str]:
+        """祖先链 [self, parent, grandparent, ...]（不含虚拟根）"""
+        with self._lock:
+            node = int(self.ids([code])[0])
+            chain = []
+            while node != ROOT:
+                chain.append(self._codes[node])
+                node = self._parent[node]
+            return chain
+
+    # ------------------------------------------------------------------
+    # 矩阵查询
+    # ------------------------------------------------------------------
+
+    def _pairwise(self, codes: Sequence[str]) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """返回 (各物种深度, 两两 LCA 深度, 两两 LCA 节点)"""
+        with self._lock:
+            ids = self.ids(codes)
+            lca = self.lca(ids[:, None], ids[None, :])
+            return self._depth[ids], self._depth[lca], lca
+
+    def kinship_matrix(self, codes: Sequence[str]) -> np.ndarray:
+        """(n, n) int32 亲缘代数矩阵
+
+        0=同一物种，1=父子，2=祖孙或兄弟……，无共同祖先为 NO_KINSHIP。
+        """
+        depth, lca_depth, lca = self._pairwise(codes)
+        generations = np.maximum(depth[:, None] - lca_depth, depth[None, :] - lca_depth)
+        return np.where(lca == ROOT, NO_KINSHIP, generations).astype(np.int32)
+
+    def generation_distance_matrix(self, codes: Sequence[str]) -> np.ndarray:
+        """(n, n) int32 谱系树上的代数距离（经 LCA 的路径长度），无共同祖先为 NO_KINSHIP"""
+        depth, lca_depth, lca = self._pairwise(codes)
+        distance = depth[:, None] + depth[None, :] - 2 * lca_depth
+        return np.where(lca == ROOT, NO_KINSHIP, distance).astype(np.int32)
+
+    def related_matrix(self, codes: Sequence[str]) -> np.ndarray:
+        """(n, n) bool，两物种是否有共同祖先（同一属）"""
+        with self._lock:
+            ids = self.ids(codes)
+            return self.lca(ids[:, None], ids[None, :]) != ROOT
+
+
+_global_index: PhylogenyIndex | None = None
+
+
+def get_phylogeny_index() -> PhylogenyIndex:
+    """获取全局谱系索引"""
+    global _global_index
+    if _global_index is None:
+        _global_index = PhylogenyIndex()
+    return _global_index
+
+
+def reset_phylogeny_index() -> None:
+    """重置全局谱系索引（切换存档时调用）"""
+    global _global_index
+    _global_index = None
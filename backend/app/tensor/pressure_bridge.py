@@ -14,11 +14,14 @@
 from __future__ import annotations
 
 import logging
+from collections import OrderedDict
 from dataclasses import dataclass, field
 from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
 
 import numpy as np
 
+from .regions import hex_distance_transform
+
 if TYPE_CHECKING:
     from ..models.species import Species
     from ..simulation.environment import ParsedPressure
@@ -183,7 +186,7 @@ class PressureToTensorBridge:
     特性：
     1. 全局压力：从 modifiers 字典映射到对应通道
     2. 区域压力：使用 affected_tiles 生成空间掩码
-    3. 强度衰减：区域压力中心强、边缘弱（高斯衰减）
+    3. 强度衰减：区域压力中心强、边缘弱（按六边形步数高斯衰减）
     4. 叠加效应：多个相同类型压力累加
     
     Example:
@@ -199,14 +202,20 @@ class PressureToTensorBridge:
         self,
         decay_sigma: float = 2.0,
         max_decay_distance: float = 4.0,
+        mask_cache_size: int = 64,
     ):
         """
         Args:
             decay_sigma: 高斯衰减的标准差（格子数）
-            max_decay_distance: 最大衰减距离（超出则为0）
+            max_decay_distance: 最大衰减距离（以 sigma 为单位，超出则为0）
+            mask_cache_size: 空间掩码 LRU 缓存容量
         """
         self.decay_sigma = decay_sigma
         self.max_decay_distance = max_decay_distance
+        self.mask_cache_size = mask_cache_size
+        self._mask_cache: "OrderedDict[tuple, np.ndarray]" = OrderedDict()
+        self.mask_cache_hits = 0
+        self.mask_cache_misses = 0
     
     def convert(
         self,
@@ -259,6 +268,7 @@ class PressureToTensorBridge:
                         pressure.affected_tiles,
                         map_shape,
                         map_width,
+                        map_height,
                     )
                 else:
                     spatial_mask = np.ones((H, W), dtype=np.float32)
@@ -290,50 +300,79 @@ class PressureToTensorBridge:
         affected_tiles: List[int],
         map_shape: Tuple[int, int],
         map_width: int,
+        map_height: Optional[int] = None,
     ) -> np.ndarray:
-        """创建带衰减的空间掩码
+        """创建带衰减的空间掩码（按地块集合 LRU 缓存）
+        
+        同一压力持续多回合、或压力模板重复出现时直接复用掩码。
+        返回的数组为只读，调用方不得原地修改。
         
         Args:
             affected_tiles: 受影响的地块索引列表
             map_shape: 张量形状 (H, W)
             map_width: 地图宽度
+            map_height: 地图高度（缺省时按张量高度）
         
         Returns:
             (H, W) 空间掩码，中心为1，边缘衰减
         """
         H, W = map_shape
-        mask = np.zeros((H, W), dtype=np.float32)
-        
-        # 将地块索引转换为坐标
-        centers = []
-        for tile_idx in affected_tiles:
-            ty = tile_idx // map_width
-            tx = tile_idx % map_width
-            # 映射到张量坐标
-            tensor_y = int(ty * H / max(1, (max(affected_tiles) // map_width + 1)))
-            tensor_x = int(tx * W / map_width)
-            centers.append((tensor_y, tensor_x))
-        
-        if not centers:
-            return np.ones((H, W), dtype=np.float32)
+        map_height = map_height or H
+        key = (
+            frozenset(affected_tiles),
+            self.decay_sigma,
+            self.max_decay_distance,
+            (H, W),
+            map_width,
+            map_height,
+        )
+        mask = self._mask_cache.get(key)
+        if mask is not None:
+            self._mask_cache.move_to_end(key)
+            self.mask_cache_hits += 1
+            return mask
+        
+        self.mask_cache_misses += 1
+        mask = self._build_spatial_mask(key[0], (H, W), map_width, map_height)
+        mask.flags.writeable = False
+        self._mask_cache[key] = mask
+        while len(self._mask_cache) > self.mask_cache_size:
+            self._mask_cache.popitem(last=False)
+        return mask
+    
+    def _build_spatial_mask(
+        self,
+        affected_tiles: frozenset,
+        map_shape: Tuple[int, int],
+        map_width: int,
+        map_height: int,
+    ) -> np.ndarray:
+        """六边形距离变换 + 高斯衰减（x 方向环绕，与地图邻接一致）"""
+        H, W = map_shape
         
-        # 计算到最近受影响点的距离，应用高斯衰减
-        for y in range(H):
-            for x in range(W):
-                min_dist = float('inf')
-                for cy, cx in centers:
-                    dist = np.sqrt((y - cy) ** 2 + (x - cx) ** 2)
-                    min_dist = min(min_dist, dist)
-                
-                if min_dist <= self.max_decay_distance * self.decay_sigma:
-                    mask[y, x] = np.exp(-0.5 * (min_dist / self.decay_sigma) ** 2)
+        # 将地块索引转换为张量坐标
+        tiles = np.fromiter(affected_tiles, dtype=np.int64, count=len(affected_tiles))
+        ty, tx = np.divmod(tiles, max(1, map_width))
+        cy = ty * H // max(1, map_height)
+        cx = tx * W // max(1, map_width)
+        inside = (tiles >= 0) & (cy < H) & (cx < W)
+        centers = cy[inside] * W + cx[inside]
         
-        # 确保中心点为满强度
-        for cy, cx in centers:
-            if 0 <= cy < H and 0 <= cx < W:
-                mask[cy, cx] = 1.0
+        if centers.size == 0:
+            return np.ones((H, W), dtype=np.float32)
         
-        return mask
+        # 到最近受影响地块的六边形步数，超出最大衰减距离为 -1
+        sigma = self.decay_sigma
+        max_steps = int(self.max_decay_distance * sigma) if sigma > 0 else 0
+        dist = hex_distance_transform(centers, (H, W), max_steps)
+        
+        steps = np.arange(max_steps + 1, dtype=np.float32)
+        falloff = np.exp(-0.5 * (steps / sigma) ** 2) if sigma > 0 else np.ones(1, np.float32)
+        return np.where(dist >= 0, falloff[dist], 0.0).astype(np.float32)
+    
+    def clear_cache(self) -> None:
+        """清空空间掩码缓存"""
+        self._mask_cache.clear()
 
 
 # ============================================================================
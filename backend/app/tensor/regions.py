@@ -0,0 +1,250 @@
+"""
+批量连通区域标记 - 一次完成所有物种分布的连通分量划分
+
+地理隔离检测需要知道每个物种的分布被分成了几块。逐物种调用
+scipy.ndimage.label 需要 S 次标记，且按区域返回 H×W 布尔掩码会占用
+O(区域数·H·W) 内存。本模块把所有物种的 (物种, 地块) 占用格子作为图节点、
+同物种的相邻格子作为边，一次 connected_components 得到全部区域：
+- 邻接与 MapStateManager._neighbor_ids 一致：六边形列偏移（奇偶列方向不同），
+  x 方向环绕，y 方向不环绕
+- 结果为每个物种一张 int32 标签图（0=无分布，1..k 为物种内区域编号，
+  按光栅顺序首次出现编号）+ 每个区域的格子数/种群统计
+- hex_distance_transform: 同一邻接上的多源步数距离变换（区域压力衰减掩码共用）
+
+地块下标：cell = y * W + x，即 (H, W) 网格按 C 顺序展开后的下标。
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Iterable
+
+import numpy as np
+from scipy.sparse import coo_matrix, csr_matrix
+from scipy.sparse.csgraph import connected_components
+
+# 六边形邻居 (dx, dy)，与 MapStateManager._neighbor_ids 相同
+HEX_EVEN_COLUMN = ((-1, 0), (0, -1), (1, -1), (1, 0), (1, 1), (0, 1))
+HEX_ODD_COLUMN = ((-1, 0), (-1, -1), (0, -1), (1, 0), (0, 1), (-1, 1))
+
+
+@lru_cache(maxsize=8)
+def hex_edges(H: int, W: int, wrap_x: bool = True) -> tuple[np.ndarray, np.ndarray]:
+    """地图上全部无向邻接对 (cell_a, cell_b)，cell_a < cell_b（按地图尺寸缓存）"""
+    ys, xs = np.divmod(np.arange(H * W, dtype=np.int64), W)
+    odd = (xs & 1).astype(bool)
+    sources, targets = [], []
+    for (edx, edy), (odx, ody) in zip(HEX_EVEN_COLUMN, HEX_ODD_COLUMN):
+        nx = xs + np.where(odd, odx, edx)
+        ny = ys + np.where(odd, ody, edy)
+        valid = (ny >= 0) & (ny < H)
+        if wrap_x:
+            nx = nx % W
+        else:
+            valid &= (nx >= 0) & (nx < W)
+        sources.append((ys * W + xs)[valid])
+        targets.append((ny * W + nx)[valid])
+    a = np.concatenate(sources)
+    b = np.concatenate(targets)
+    pairs = np.unique(np.stack([np.minimum(a, b), np.maximum(a, b)], axis=1), axis=0)
+    pairs = pairs[pairs[:, 0] != pairs[:, 1]]
+    a, b = np.ascontiguousarray(pairs[:, 0]), np.ascontiguousarray(pairs[:, 1])
+    a.flags.writeable = False
+    b.flags.writeable = False
+    return a, b
+
+
+@lru_cache(maxsize=8)
+def hex_adjacency(H: int, W: int, wrap_x: bool = True) -> csr_matrix:
+    """对称的地块邻接矩阵 (H*W, H*W)，由 hex_edges 构建（按地图尺寸缓存）"""
+    a, b = hex_edges(H, W, wrap_x)
+    n = H * W
+    ones = np.ones(2 * a.size, dtype=np.int8)
+    return coo_matrix((ones, (np.concatenate([a, b]), np.concatenate([b, a]))), shape=(n, n)).tocsr()
+
+
+def hex_distance_transform(
+    sources: np.ndarray,
+    shape: tuple[int, int],
+    max_steps: int,
+    wrap_x: bool = True,
+) -> np.ndarray:
+    """多源六边形距离变换：每个地块到最近源地块的步数
+
+    按层向量化 BFS，只展开 max_steps 层，超出范围的地块为 -1。
+
+    Args:
+        sources: 源地块下标 y * W + x
+        shape: 地图尺寸 (H, W)
+        max_steps: 最大展开步数
+        wrap_x: x 方向是否环绕
+
+    Returns:
+        (H, W) int32 距离图
+    """
+    H, W = shape
+    adjacency = hex_adjacency(H, W, wrap_x)
+    dist = np.full(H * W, -1, dtype=np.int32)
+    frontier = np.unique(np.asarray(sources, dtype=np.int64))
+    dist[frontier] = 0
+    for step in range(1, max_steps + 1):
+        if frontier.size == 0:
+            break
+        candidates = adjacency[frontier].indices
+        frontier = np.unique(candidates[dist[candidates] < 0])
+        dist[frontier] = step
+    return dist.reshape(H, W)
+
+
+def _split_cells(labels: np.ndarray, count: int) -> list[np.ndarray]:
+    """单物种标签图 → 各区域的地块下标（按区域编号顺序）"""
+    flat = labels.ravel()
+    cells = np.flatnonzero(flat)
+    cells = cells[np.argsort(flat[cells], kind="stable")]
+    sizes = np.bincount(flat[cells], minlength=count + 1)[1:]
+    return np.split(cells, np.cumsum(sizes)[:-1]) if count else []
+
+
+@dataclass
+class SpeciesRegions:
+    """单个物种的连通区域（RegionLabels 的视图）"""
+    labels: np.ndarray          # (H, W) int32，0=无分布，1..k 为区域编号
+    sizes: np.ndarray           # (k,) 各区域格子数
+    population: np.ndarray | None = None  # (k,) 各区域种群总量
+
+    def __len__(self) -> int:
+        return int(self.sizes.shape[0])
+
+    def cells(self) -> list[np.ndarray]:
+        """各区域的地块下标 y * W + x"""
+        return _split_cells(self.labels, len(self))
+
+    def masks(self) -> list[np.ndarray]:
+        """各区域的 (H, W) 布尔掩码（按需展开，区域多时内存开销大）"""
+        return [self.labels == r for r in range(1, len(self) + 1)]
+
+    def tile_clusters(self, tile_ids: np.ndarray) -> list[set[int]]:
+        """各区域的地块 ID 集合（tile_ids 为 (H, W) 地块 ID 网格，负值表示无地块）"""
+        flat_ids = tile_ids.ravel()
+        clusters: list[set[int]] = []
+        for cells in self.cells():
+            ids = flat_ids[cells]
+            ids = ids[ids >= 0]
+            if ids.size:
+                clusters.append(set(ids.tolist()))
+        return clusters
+
+
+@dataclass
+class RegionLabels:
+    """所有物种的连通区域标记结果
+
+    区域全局编号按 (物种, 物种内编号) 排列：物种 s 的第 r 个区域（r 从 1 开始）
+    对应全局下标 offsets[s] + r - 1。
+    """
+    labels: np.ndarray              # (S, H, W) int32，物种内区域编号
+    num_regions: np.ndarray         # (S,) 每个物种的区域数
+    region_species: np.ndarray      # (R,) 区域所属物种
+    region_sizes: np.ndarray        # (R,) 区域格子数
+    region_population: np.ndarray | None = None  # (R,) 区域种群总量（给定 weights 时）
+
+    @property
+    def offsets(self) -> np.ndarray:
+        """(S,) 各物种第一个区域的全局下标"""
+        return np.cumsum(self.num_regions) - self.num_regions
+
+    def species(self, s: int) -> SpeciesRegions:
+        start = int(self.offsets[s])
+        stop = start + int(self.num_regions[s])
+        return SpeciesRegions(
+            labels=self.labels[s],
+            sizes=self.region_sizes[start:stop],
+            population=None if self.region_population is None else self.region_population[start:stop],
+        )
+
+
+def label_regions(
+    presence: np.ndarray,
+    weights: np.ndarray | None = None,
+    wrap_x: bool = True,
+) -> RegionLabels:
+    """一次标记所有物种分布的六边形连通区域
+
+    Args:
+        presence: (S, H, W) 布尔分布掩码
+        weights: (S, H, W) 可选，按区域累加（通常为种群张量）
+        wrap_x: x 方向是否环绕（与地图东西边界相连一致）
+    """
+    S, H, W = presence.shape
+    HW = H * W
+    flat = presence.reshape(S, HW)
+    species, cells = np.nonzero(flat)
+    keys = species.astype(np.int64) * HW + cells
+    n = keys.size
+
+    labels = np.zeros((S, H, W), dtype=np.int32)
+    if n == 0:
+        empty = np.zeros(0, dtype=np.int64)
+        return RegionLabels(
+            labels=labels,
+            num_regions=np.zeros(S, dtype=np.int64),
+            region_species=empty,
+            region_sizes=empty,
+            region_population=None if weights is None else np.zeros(0, dtype=np.float64),
+        )
+
+    # 同物种、两端都有分布的邻接对 → 图的边（keys 已排序，searchsorted 即节点编号）
+    a, b = hex_edges(H, W, wrap_x)
+    edge_species, edge_idx = np.nonzero(flat[:, a] & flat[:, b])
+    base = edge_species.astype(np.int64) * HW
+    u = np.searchsorted(keys, base + a[edge_idx])
+    v = np.searchsorted(keys, base + b[edge_idx])
+    graph = coo_matrix((np.ones(u.size, dtype=np.int8), (u, v)), shape=(n, n))
+    num_components, component = connected_components(graph, directed=False)
+
+    # 按首个节点重新编号：区域按 (物种, 光栅顺序) 排列
+    first = np.full(num_components, n, dtype=np.int64)
+    np.minimum.at(first, component, np.arange(n))
+    order = np.argsort(first)
+    rank = np.empty(num_components, dtype=np.int64)
+    rank[order] = np.arange(num_components)
+    component = rank[component]
+
+    region_species = species[first[order]].astype(np.int64)
+    num_regions = np.bincount(region_species, minlength=S)
+    offsets = np.cumsum(num_regions) - num_regions
+    labels.reshape(S, HW)[species, cells] = component - offsets[species] + 1
+
+    region_population = None
+    if weights is not None:
+        region_population = np.bincount(
+            component, weights=weights.reshape(S, HW)[species, cells], minlength=num_components
+        )
+
+    return RegionLabels(
+        labels=labels,
+        num_regions=num_regions,
+        region_species=region_species,
+        region_sizes=np.bincount(component, minlength=num_components),
+        region_population=region_population,
+    )
+
+
+def tile_clusters(
+    tile_ids: np.ndarray,
+    occupied: Iterable[int],
+    wrap_x: bool = True,
+) -> list[set[int]]:
+    """地块 ID 集合 → 连通地块群
+
+    Args:
+        tile_ids: (H, W) 地块 ID 网格，负值表示无地块
+        occupied: 占据的地块 ID
+
+    网格中不存在的地块 ID 被忽略。
+    """
+    occupied_ids = np.fromiter(occupied, dtype=np.int64)
+    presence = np.isin(tile_ids, occupied_ids) & (tile_ids >= 0)
+    regions = label_regions(presence[None], wrap_x=wrap_x)
+    return regions.species(0).tile_clusters(tile_ids)
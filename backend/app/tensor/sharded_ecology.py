@@ -0,0 +1,222 @@
+"""
+多进程物种分片 - CPU 节点上把生态计算的物种块分发到进程池
+
+NumPy/Taichi CPU 后端下一个回合的生态计算只占用一个 Python 进程。
+分片执行复用 chunked_ecology 的阶段函数，把物种块交给进程池并行计算：
+- pop / env / 物种参数 / 中间结果全部放在 multiprocessing.shared_memory 中，
+  任务只传递数组描述（共享内存名、形状、dtype）与标量参数，不序列化数组
+- 工作进程按共享内存名缓存映射，同一块共享内存跨回合只映射一次
+- 阶段之间只交换跨物种归约：各块返回地块种群部分和（H, W）与逐物种统计，
+  主进程汇总后写回共享的 total_pop；猎物密度与竞争直接读取共享的全物种数组
+- 共享内存按名称复用，容量不足时按 1.25 倍余量重建（与 BufferArena 相同）
+
+工作进程以 spawn 方式启动（父进程可能已初始化 Taichi/线程池，fork 不安全）。
+ShardedEcologyExecutor 与 chunked_ecology.BlockRunner 接口一致，
+由 TensorEcologyEngine._process_ecology_chunked 驱动。
+"""
+
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import os
+import sys
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from .buffers import GROWTH_FACTOR
+
+logger = logging.getLogger(__name__)
+
+# 每个工作进程分到的物种块数（块越多负载越均衡，块间同步开销越大）
+BLOCKS_PER_WORKER = 2
+
+
+@dataclass(frozen=True)
+class SharedArraySpec:
+    """共享内存数组描述（跨进程传递）"""
+    shm_name: str
+    shape: tuple[int, ...]
+    dtype: str
+
+    def view(self, shm: shared_memory.SharedMemory) -> np.ndarray:
+        return np.ndarray(self.shape, dtype=np.dtype(self.dtype), buffer=shm.buf)
+
+
+def shard_block_size(S: int, workers: int, chunk: int | None = None) -> int:
+    """分片块大小：每个工作进程约 BLOCKS_PER_WORKER 块，且不超过内存预算给出的块大小"""
+    block = max(1, -(-S // max(1, workers * BLOCKS_PER_WORKER)))
+    return min(block, chunk) if chunk else block
+
+
+class SharedArrays:
+    """按名称复用的共享内存数组（主进程持有并负责释放）"""
+
+    def __init__(self) -> None:
+        self._blocks: dict[str, shared_memory.SharedMemory] = {}
+        self._finalizer = weakref.finalize(self, _release, self._blocks)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(shm.size for shm in self._blocks.values())
+
+    def empty(self, name: str, shape: tuple[int, ...], dtype=np.float32) -> tuple[np.ndarray, SharedArraySpec]:
+        """取名为 name 的共享数组（内容未初始化）及其描述"""
+        dtype = np.dtype(dtype)
+        nbytes = max(1, int(np.prod(shape)) * dtype.itemsize)
+        shm = self._blocks.get(name)
+        if shm is None or shm.size < nbytes:
+            capacity = nbytes if shm is None else max(nbytes, int(shm.size * GROWTH_FACTOR))
+            if shm is not None:
+                _close(shm, unlink=True)
+            shm = shared_memory.SharedMemory(create=True, size=capacity)
+            self._blocks[name] = shm
+        spec = SharedArraySpec(shm.name, tuple(int(s) for s in shape), dtype.str)
+        return spec.view(shm), spec
+
+    def close(self) -> None:
+        """释放全部共享内存"""
+        _release(self._blocks)
+
+
+class ShardedEcologyExecutor:
+    """进程池 + 共享内存的物种分片执行器（接口与 BlockRunner 一致）"""
+
+    def __init__(self, workers: int):
+        self.workers = max(1, int(workers))
+        self._shared = SharedArrays()
+        self._pool: ProcessPoolExecutor | None = None
+        self.arrays: dict[str, np.ndarray] = {}
+        self._specs: dict[str, SharedArraySpec] = {}
+
+    def begin(self) -> None:
+        """开始新回合：清空数组登记（共享内存保留复用）"""
+        self.arrays.clear()
+        self._specs.clear()
+
+    def _register(self, key: str, shape: tuple[int, ...], dtype) -> np.ndarray:
+        array, spec = self._shared.empty(key, shape, dtype)
+        self.arrays[key] = array
+        self._specs[key] = spec
+        return array
+
+    def put(self, key: str, value: np.ndarray) -> np.ndarray:
+        """把主进程数组复制到共享内存"""
+        value = np.asarray(value)
+        array = self._register(key, value.shape, value.dtype)
+        array[...] = value
+        return array
+
+    def zeros(self, key: str, shape: tuple[int, ...], dtype=np.float32) -> np.ndarray:
+        array = self._register(key, shape, dtype)
+        array.fill(0)
+        return array
+
+    def output(self, key: str, shape: tuple[int, ...], dtype=np.float32) -> np.ndarray:
+        return self._register(key, shape, dtype)
+
+    def alias(self, key: str, existing: str) -> np.ndarray:
+        self.arrays[key] = self.arrays[existing]
+        self._specs[key] = self._specs[existing]
+        return self.arrays[key]
+
+    def result(self, key: str) -> np.ndarray:
+        """结果数组的主进程副本（共享内存下一回合会被覆盖）"""
+        return self.arrays[key].copy()
+
+    def run(self, phase, params: dict, chunks: list[slice]) -> list:
+        """在进程池中按块执行阶段函数，结果按块顺序返回"""
+        pool = self._ensure_pool()
+        specs = dict(self._specs)
+        futures = [pool.submit(_run_block, phase, specs, params, sl.start, sl.stop) for sl in chunks]
+        return [future.result() for future in futures]
+
+    def _ensure_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            logger.info(f"[分片生态] 启动 {self.workers} 个工作进程")
+        return self._pool
+
+    def close(self) -> None:
+        """关闭进程池并释放共享内存"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+        self.begin()
+        self._shared.close()
+
+
+# ============================================================================
+# 共享内存工具
+# ============================================================================
+
+def _close(shm: shared_memory.SharedMemory, unlink: bool = False) -> None:
+    try:
+        shm.close()
+    except BufferError:
+        # 仍有数组视图引用映射：随视图回收释放
+        pass
+    if unlink:
+        try:
+            shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def _release(blocks: dict[str, shared_memory.SharedMemory]) -> None:
+    for shm in blocks.values():
+        _close(shm, unlink=True)
+    blocks.clear()
+
+
+# ============================================================================
+# 工作进程
+# ============================================================================
+
+# 工作进程内的共享内存映射缓存：共享内存名 → SharedMemory
+_attached: dict[str, shared_memory.SharedMemory] = {}
+
+
+def _attach(shm_name: str) -> shared_memory.SharedMemory:
+    """映射主进程创建的共享内存（释放由创建并 unlink 它的主进程负责）
+
+    spawn 出的工作进程与主进程共用同一个 resource_tracker，且登记是按名称去重的集合：
+    3.13 以下映射时的重复登记无害，但在这里 unregister 会删掉主进程自己的登记，
+    主进程 unlink 时 resource_tracker 会为每块共享内存打印 KeyError。
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=shm_name, track=False)
+    return shared_memory.SharedMemory(name=shm_name)
+
+
+def _resolve(specs: dict[str, SharedArraySpec]) -> dict[str, np.ndarray]:
+    """数组描述 → 共享内存视图；主进程已重建的旧映射在此关闭"""
+    live = {spec.shm_name for spec in specs.values()}
+    for name in [name for name in _attached if name not in live]:
+        _close(_attached.pop(name))
+    arrays = {}
+    for key, spec in specs.items():
+        shm = _attached.get(spec.shm_name)
+        if shm is None:
+            shm = _attached[spec.shm_name] = _attach(spec.shm_name)
+        arrays[key] = spec.view(shm)
+    return arrays
+
+
+def _run_block(phase, specs: dict[str, SharedArraySpec], params: dict, start: int, stop: int):
+    return phase(_resolve(specs), params, slice(start, stop))
+
+
+def default_workers() -> int:
+    """默认工作进程数：可用 CPU 数"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
@@ -0,0 +1,284 @@
+"""
+张量快照发布 - 回合结束时把 TensorState 发布为不可变、带版本号的内存映射文件
+
+地图/热力图等 API 视图原本每次请求都要重新查询 SQLite（地块、栖息地、物种表），
+耗时随栖息地表增长。引擎内存中的 ctx.tensor_state 已经包含同样的数据，
+本模块在每回合结束时把 pop / env / tile_ids / species_map 写成一个版本目录：
+
+    <root>/
+      CURRENT                 # 当前版本目录名（原子替换）
+      v000012/
+        manifest.json         # 版本号、回合、形状、species_map、env_version
+        pop.npy               # (S, H, W) float32
+        env.npy               # (C, H, W) float32（环境未变化时硬链接上一版本）
+        tile_ids.npy          # (H, W) int32，无地块为 -1
+
+- 发布：先写临时目录，os.replace 成版本目录，最后原子替换 CURRENT；
+  读者永远看不到写了一半的快照
+- 读取：np.load(mmap_mode="r") 零拷贝映射为只读数组，同一版本只映射一次；
+  其他工作进程只需知道根目录即可读取
+- 只保留最近 keep_versions 个版本；POSIX 下已映射的旧版本在删除后仍然有效
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from dataclasses import dataclass, field
+from functools import cached_property
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from .state import TensorState
+
+logger = logging.getLogger(__name__)
+
+CURRENT_FILE = "CURRENT"
+MANIFEST_FILE = "manifest.json"
+_ARRAYS = ("pop", "env", "tile_ids")
+
+
+@dataclass(frozen=True)
+class TensorSnapshot:
+    """已发布的张量快照（数组为只读内存映射）"""
+    version: int
+    turn_index: int
+    pop: np.ndarray                   # (S, H, W)
+    env: np.ndarray                   # (C, H, W)
+    tile_ids: np.ndarray              # (H, W)，无地块为 -1
+    species_map: Dict[str, int] = field(default_factory=dict)
+    env_version: int = 0
+    published_at: float = 0.0
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        return self.tile_ids.shape
+
+    def population_slice(self, lineage_code: str) -> np.ndarray | None:
+        """根据谱系编码获取种群切片 (H, W)"""
+        idx = self.species_map.get(lineage_code)
+        if idx is None or idx >= self.pop.shape[0]:
+            return None
+        return self.pop[idx]
+
+    @cached_property
+    def tile_cells(self) -> np.ndarray:
+        """按地块 ID 升序排列的展平格子下标"""
+        flat = self.tile_ids.ravel()
+        cells = np.flatnonzero(flat >= 0)
+        return cells[np.argsort(flat[cells], kind="stable")]
+
+    @cached_property
+    def total_population(self) -> np.ndarray:
+        """(H, W) 所有物种种群总和（同一版本只计算一次）"""
+        return self.pop.sum(axis=0, dtype=np.float64).astype(np.float32)
+
+    @cached_property
+    def richness(self) -> np.ndarray:
+        """(H, W) 物种丰富度（种群 > 0 的物种数）"""
+        return (self.pop > 0).sum(axis=0).astype(np.int32)
+
+    def per_tile(self, grid: np.ndarray) -> np.ndarray:
+        """(H, W) 网格 → 按地块 ID 升序的逐地块数组（与 /render/heightmap 顺序一致）"""
+        return np.asarray(grid).ravel()[self.tile_cells]
+
+
+class TensorSnapshotPublisher:
+    """把 TensorState 发布为版本化快照目录"""
+
+    def __init__(self, root: str | Path, keep_versions: int = 2):
+        self.root = Path(root)
+        self.keep_versions = max(1, keep_versions)
+        self._lock = threading.Lock()
+        self._version = _latest_version(self.root)
+        self._last_env_version: int | None = None
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def publish(self, tensor_state: "TensorState", turn_index: int | None = None) -> int:
+        """发布一个新版本，返回版本号"""
+        tile_ids = (tensor_state.masks or {}).get("tile_ids")
+        pop = np.asarray(tensor_state.pop, dtype=np.float32)
+        H, W = pop.shape[1:]
+        if not isinstance(tile_ids, np.ndarray) or tile_ids.shape != (H, W):
+            tile_ids = np.full((H, W), -1, dtype=np.int32)
+
+        with self._lock:
+            self.root.mkdir(parents=True, exist_ok=True)
+            version = self._version + 1
+            name = _version_dir(version)
+            tmp = self.root / f".{name}.tmp"
+            if tmp.exists():
+                shutil.rmtree(tmp)
+            tmp.mkdir()
+
+            np.save(tmp / "pop.npy", pop)
+            np.save(tmp / "tile_ids.npy", np.asarray(tile_ids, dtype=np.int32))
+            env_version = int(getattr(tensor_state, "env_version", 0))
+            if not self._link_previous_env(tmp, env_version):
+                np.save(tmp / "env.npy", np.asarray(tensor_state.env, dtype=np.float32))
+
+            manifest = {
+                "version": version,
+                "turn_index": int(tensor_state.turn_index if turn_index is None else turn_index),
+                "env_version": env_version,
+                "species_map": {code: int(idx) for code, idx in tensor_state.species_map.items()},
+                "shape": [int(s) for s in pop.shape],
+                "published_at": time.time(),
+            }
+            (tmp / MANIFEST_FILE).write_text(json.dumps(manifest, ensure_ascii=False), encoding="utf-8")
+
+            target = self.root / name
+            if target.exists():
+                shutil.rmtree(target)
+            os.replace(tmp, target)
+            _write_atomic(self.root / CURRENT_FILE, name)
+
+            self._version = version
+            self._last_env_version = env_version
+            self._prune()
+        return version
+
+    def clear(self) -> None:
+        """撤销当前快照（新游戏/读档后调用），读者在下次发布前得到 None"""
+        with self._lock:
+            try:
+                (self.root / CURRENT_FILE).unlink()
+            except FileNotFoundError:
+                pass
+            self._last_env_version = None
+
+    def _link_previous_env(self, tmp: Path, env_version: int) -> bool:
+        """环境版本未变化时复用上一版本的 env.npy（硬链接，失败则重新写入）"""
+        if self._last_env_version != env_version or self._version <= 0:
+            return False
+        previous = self.root / _version_dir(self._version) / "env.npy"
+        try:
+            os.link(previous, tmp / "env.npy")
+            return True
+        except OSError:
+            return False
+
+    def _prune(self) -> None:
+        versions = sorted(p for p in self.root.glob("v*") if p.is_dir())
+        for stale in versions[:-self.keep_versions]:
+            shutil.rmtree(stale, ignore_errors=True)
+
+
+class TensorSnapshotReader:
+    """读取最新快照（零拷贝内存映射，按版本缓存）"""
+
+    def __init__(self, root: str | Path):
+        self.root = Path(root)
+        self._lock = threading.Lock()
+        self._cached: TensorSnapshot | None = None
+        self._cached_name: str | None = None
+
+    def latest(self) -> TensorSnapshot | None:
+        """当前版本快照；尚未发布过时返回 None"""
+        try:
+            name = (self.root / CURRENT_FILE).read_text(encoding="utf-8").strip()
+        except OSError:
+            return None
+        with self._lock:
+            if name != self._cached_name:
+                try:
+                    self._cached = _load_snapshot(self.root / name)
+                    self._cached_name = name
+                except (OSError, ValueError) as e:
+                    # 读到被清理的旧版本：保留已缓存的快照
+                    logger.debug(f"[张量快照] 加载 {name} 失败: {e}")
+            return self._cached
+
+
+def _version_dir(version: int) -> str:
+    return f"v{version:06d}"
+
+
+def _latest_version(root: Path) -> int:
+    """磁盘上已有的最大版本号（版本号单调递增，读者按目录名缓存不会混淆）"""
+    versions = [0]
+    for path in root.glob("v*"):
+        try:
+            versions.append(int(path.name[1:]))
+        except ValueError:
+            continue
+    return max(versions)
+
+
+def _write_atomic(path: Path, text: str) -> None:
+    tmp = path.with_name(f".{path.name}.tmp")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _load_array(path: Path) -> np.ndarray:
+    """只读内存映射；空数组无法映射时直接读入"""
+    try:
+        return np.load(path, mmap_mode="r")
+    except ValueError:
+        array = np.load(path)
+        array.flags.writeable = False
+        return array
+
+
+def _load_snapshot(directory: Path) -> TensorSnapshot:
+    manifest = json.loads((directory / MANIFEST_FILE).read_text(encoding="utf-8"))
+    arrays = {name: _load_array(directory / f"{name}.npy") for name in _ARRAYS}
+    return TensorSnapshot(
+        version=int(manifest["version"]),
+        turn_index=int(manifest["turn_index"]),
+        species_map=dict(manifest["species_map"]),
+        env_version=int(manifest.get("env_version", 0)),
+        published_at=float(manifest.get("published_at", 0.0)),
+        **arrays,
+    )
+
+
+# ============================================================================
+# 全局实例
+# ============================================================================
+
+_publisher: TensorSnapshotPublisher | None = None
+_reader: TensorSnapshotReader | None = None
+
+
+def default_snapshot_root() -> Path:
+    """快照根目录：TENSOR_SNAPSHOT_DIR 环境变量，否则为 <cache_dir>/tensor_snapshot"""
+    env_value = os.environ.get("TENSOR_SNAPSHOT_DIR")
+    if env_value:
+        return Path(env_value)
+    from ..core.config import get_settings
+    return Path(get_settings().cache_dir) / "tensor_snapshot"
+
+
+def get_snapshot_publisher() -> TensorSnapshotPublisher:
+    """获取全局快照发布器"""
+    global _publisher
+    if _publisher is None:
+        _publisher = TensorSnapshotPublisher(default_snapshot_root())
+    return _publisher
+
+
+def get_snapshot_reader() -> TensorSnapshotReader:
+    """获取全局快照读取器"""
+    global _reader
+    if _reader is None:
+        _reader = TensorSnapshotReader(default_snapshot_root())
+    return _reader
+
+
+def reset_snapshot_store() -> None:
+    """重置全局发布器/读取器（不删除磁盘上的快照）"""
+    global _publisher, _reader
+    _publisher = None
+    _reader = None
@@ -0,0 +1,442 @@
+"""
+稀疏生态内核 - 只在占用格子（及其可达邻域）上计算生态阶段
+
+与 numpy_kernels 共用逐元素公式（_trait_suitability / _trait_mortality /
+_trait_diffusion / _migration_decision_v2 / _reproduction_v2 / ...），
+区别仅在于输入是 SparseDomain 上按键对齐的一维数组：
+- 物种参数按键的物种下标 gather
+- 环境按键的地块下标 gather
+- 4 邻域通过 SparseDomain.neighbor() 查找（不在定义域内视为 0 种群）
+- 同一地块上的跨物种求和/配对按地块分组（cell_sum / cell_pairs）
+
+调用方负责保证定义域覆盖所有可能非零的格子
+（见 TensorEcologyEngine._process_ecology_sparse）。
+"""
+
+from __future__ import annotations
+
+import numpy as np
+
+from . import numpy_kernels as nk
+from .sparse_pop import NEIGHBOR_OFFSETS, SparseDomain, cell_pairs
+
+
+def _flat_env(env7: np.ndarray) -> np.ndarray:
+    return env7.reshape(env7.shape[0], -1)
+
+
+def _habitat_types_at(species_traits: np.ndarray, species: np.ndarray):
+    """按键的 (陆生, 水生, 两栖) 类型"""
+    is_terrestrial, is_aquatic, is_amphibious = nk._habitat_types(species_traits)
+    return (
+        is_terrestrial[:, 0, 0][species],
+        is_aquatic[:, 0, 0][species],
+        is_amphibious[:, 0, 0][species],
+    )
+
+
+def _neighbor_map(grid: np.ndarray, valid: np.ndarray, cells: np.ndarray, fill=0):
+    """邻居地块处的地图值，越界时为 fill（与稠密平移补 0 一致）"""
+    return np.where(valid, grid[cells], fill)
+
+
+# ============================================================================
+# 宜居度 / 死亡率
+# ============================================================================
+
+def trait_suitability(
+    domain: SparseDomain,
+    env7: np.ndarray,
+    species_traits: np.ndarray,
+    positions: np.ndarray | None = None,
+) -> np.ndarray:
+    """定义域（或其中 positions 子集）上的特质宜居度"""
+    species, cells = domain.species, domain.cells
+    if positions is not None:
+        species, cells = species[positions], cells[positions]
+    flat = _flat_env(env7)
+    suit = nk._trait_suitability(
+        species_traits[species],
+        flat[0][cells], flat[1][cells], flat[3][cells],
+        flat[4][cells], flat[5][cells], flat[6][cells],
+    )
+    return suit.astype(np.float32)
+
+
+def trait_mortality(
+    domain: SparseDomain,
+    pop: np.ndarray,
+    suitability: np.ndarray,
+    env7: np.ndarray,
+    species_traits: np.ndarray,
+    pressure_overlay: np.ndarray,
+    mortality_scale: np.ndarray,
+    base_mortality: float,
+    era_scaling: float,
+) -> np.ndarray:
+    """特质死亡率（已钳制到 [0.01, 0.95]，与稠密包装层一致）"""
+    s, c = domain.species, domain.cells
+    flat = _flat_env(env7)
+    cell_total = domain.cell_sum(pop)
+    external_mortality = nk._external_mortality(pressure_overlay)
+    if np.ndim(external_mortality):
+        external_mortality = external_mortality.reshape(-1)[c]
+    mortality = nk._trait_mortality(
+        species_traits[s],
+        mortality_scale[s],
+        pop,
+        cell_total[c],
+        suitability,
+        flat[0][c],
+        flat[1][c],
+        flat[3][c],
+        external_mortality,
+        flat[4][c] > 0.5,
+        flat[5][c] > 0.5,
+        base_mortality,
+        era_scaling,
+    )
+    return np.clip(mortality.astype(np.float32), 0.01, 0.95).astype(np.float32)
+
+
+def extend(values: np.ndarray, positions: np.ndarray, size: int) -> np.ndarray:
+    """把旧定义域上的字段搬到扩展后的定义域（新增键为 0）"""
+    out = np.zeros(size, dtype=values.dtype)
+    out[positions] = values
+    return out
+
+
+def mortality_stats(
+    domain: SparseDomain,
+    mortality: np.ndarray,
+    occupied_count: np.ndarray,
+    tile_count: int,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """每个物种在整张地图上的 (最大死亡率, 最小死亡率, 高死亡格子占比)
+
+    定义域外格子的死亡率按稠密实现视为 0.01。
+    """
+    S = domain.shape[0]
+    death_max = np.full(S, -np.inf, dtype=np.float32)
+    death_min = np.full(S, np.inf, dtype=np.float32)
+    np.maximum.at(death_max, domain.species, mortality)
+    np.minimum.at(death_min, domain.species, mortality)
+    partial = occupied_count < tile_count
+    floor = np.float32(0.01)
+    death_max = np.where(partial, np.maximum(death_max, floor), death_max)
+    death_min = np.where(partial, np.minimum(death_min, floor), death_min)
+    critical_ratio = domain.species_count(mortality >= 0.50) / tile_count
+    return death_max, death_min, critical_ratio
+
+
+# ============================================================================
+# 扩散
+# ============================================================================
+
+def trait_diffusion(
+    domain: SparseDomain,
+    pop: np.ndarray,
+    suitability: np.ndarray,
+    env7: np.ndarray,
+    species_traits: np.ndarray,
+    diffusion_scale: np.ndarray,
+    base_rate: float,
+    background_rate: float,
+    density_threshold: float,
+    escape_threshold: float,
+) -> np.ndarray:
+    """基于特质的扩散（一轮）
+
+    定义域需包含所有有种群格子的 4 邻域，流入格子才不会丢失。
+    """
+    s, c = domain.species, domain.cells
+    flat = _flat_env(env7)
+    land, ocean, coast = flat[4], flat[5], flat[6]
+    is_terrestrial, is_aquatic, is_amphibious = _habitat_types_at(species_traits, s)
+
+    def neighbors():
+        for di, dj in NEIGHBOR_OFFSETS:
+            valid, _, cells = domain.neighbor(di, dj)
+            yield (
+                valid,
+                domain.gather_neighbor(suitability, di, dj),
+                domain.gather_neighbor(pop, di, dj),
+                _neighbor_map(land, valid, cells),
+                _neighbor_map(ocean, valid, cells),
+                _neighbor_map(coast, valid, cells),
+            )
+
+    new_pop = nk._trait_diffusion(
+        pop, suitability,
+        species_traits[s, 7],
+        species_traits[s, 6],
+        diffusion_scale[s],
+        is_terrestrial & ~is_amphibious,
+        is_aquatic & ~is_amphibious,
+        land[c], ocean[c],
+        neighbors(),
+        0.5 + 0.5 * nk._coord_noise_at(s, domain.rows, domain.cols, 13, 17, 7),
+        base_rate, background_rate, density_threshold, escape_threshold,
+    )
+    return new_pop.astype(np.float32)
+
+
+# ============================================================================
+# 迁徙
+# ============================================================================
+
+def species_centroids(domain: SparseDomain, pop: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """每个物种的 (总种群, 质心行, 质心列)，均为 (S,) float32"""
+    positive = np.where(pop > 0, pop, 0.0)
+    total = domain.species_sum(positive)
+    safe_total = np.where(total > 0, total, 1.0)
+    center_i = domain.species_sum(positive * domain.rows) / safe_total
+    center_j = domain.species_sum(positive * domain.cols) / safe_total
+    return total.astype(np.float32), center_i.astype(np.float32), center_j.astype(np.float32)
+
+
+def reach_keys(
+    shape: tuple[int, int, int],
+    total: np.ndarray,
+    center_i: np.ndarray,
+    center_j: np.ndarray,
+    max_distance: float,
+) -> np.ndarray:
+    """距质心曼哈顿距离 <= max_distance 的格子键（即距离权重 > 0 的长跳目标）"""
+    S, H, W = shape
+    species = np.flatnonzero(total > 0)
+    if species.size == 0:
+        return np.zeros(0, dtype=np.int64)
+    radius = int(np.ceil(max_distance)) + 1
+    offsets = np.arange(-radius, radius + 1, dtype=np.int64)
+    oi, oj = np.meshgrid(offsets, offsets, indexing="ij")
+    ci, cj = center_i[species][:, None], center_j[species][:, None]
+    ii = np.floor(ci).astype(np.int64) + oi.reshape(1, -1)
+    jj = np.floor(cj).astype(np.int64) + oj.reshape(1, -1)
+    dist = np.abs(ii.astype(np.float32) - ci) + np.abs(jj.astype(np.float32) - cj)
+    keep = (ii >= 0) & (ii < H) & (jj >= 0) & (jj < W) & (dist <= np.float32(max_distance))
+    return (species[:, None] * (H * W) + ii * W + jj)[keep]
+
+
+def distance_weights(
+    domain: SparseDomain,
+    total: np.ndarray,
+    center_i: np.ndarray,
+    center_j: np.ndarray,
+    max_distance: float,
+) -> np.ndarray:
+    """到种群质心的距离权重（对应 kernel_compute_distance_weights）"""
+    s = domain.species
+    dist = (
+        np.abs(domain.rows.astype(np.float32) - center_i[s])
+        + np.abs(domain.cols.astype(np.float32) - center_j[s])
+    )
+    max_d = np.float32(max_distance)
+    weights = np.where(dist <= max_d, np.exp(-dist / max_d), 0.0)
+    return np.where(total[s] > 0, weights, 0.0).astype(np.float32)
+
+
+def prey_density(
+    domain: SparseDomain,
+    pop: np.ndarray,
+    prey_matrix: np.ndarray,
+    trophic_levels: np.ndarray,
+) -> np.ndarray:
+    """猎物密度（对应 TensorEcologyEngine._compute_prey_density_tensor）
+
+    只对消费者（营养级 >= 2）按地块配对累加猎物种群，其余为 1.0。
+    """
+    s, c = domain.species, domain.cells
+    result = np.ones(domain.size, dtype=np.float32)
+    consumers = np.flatnonzero(trophic_levels[s] >= 2.0)
+    if consumers.size == 0:
+        return result
+    occupied = np.flatnonzero(pop > 0)
+    left, right = cell_pairs(c[consumers], c[occupied])
+    prey_pop = np.zeros(consumers.size, dtype=np.float32)
+    contrib = prey_matrix[s[consumers][left], s[occupied][right]] * pop[occupied][right]
+    np.add.at(prey_pop, left, contrib.astype(np.float32))
+    total = domain.cell_sum(pop)[c[consumers]] + 1e-6
+    result[consumers] = prey_pop / total
+    return result
+
+
+def _source_neighbors(domain: SparseDomain, pop, land_ok, ocean_ok, suitability=None):
+    for di, dj in NEIGHBOR_OFFSETS:
+        valid, _, cells = domain.neighbor(di, dj)
+        yield (
+            valid,
+            domain.gather_neighbor(pop, di, dj),
+            _neighbor_map(land_ok, valid, cells, False),
+            _neighbor_map(ocean_ok, valid, cells, False),
+            domain.gather_neighbor(suitability, di, dj) if suitability is not None else None,
+        )
+
+
+def _habitat_context(domain: SparseDomain, env7: np.ndarray, species_traits: np.ndarray):
+    flat = _flat_env(env7)
+    land, ocean, coast = flat[4], flat[5], flat[6]
+    land_ok = (land > 0.3) | (coast > 0.3)
+    ocean_ok = (ocean > 0.3) | (coast > 0.3)
+    types = _habitat_types_at(species_traits, domain.species)
+    return land, ocean, coast, land_ok, ocean_ok, types
+
+
+def migration_scores(
+    domain: SparseDomain,
+    pop: np.ndarray,
+    suitability: np.ndarray,
+    distance_weights: np.ndarray,
+    death_rates: np.ndarray,
+    resource_pressure: np.ndarray,
+    prey: np.ndarray,
+    trophic_levels: np.ndarray,
+    species_traits: np.ndarray,
+    env7: np.ndarray,
+    pressure_threshold: float,
+    saturation_threshold: float,
+    oversaturation_threshold: float,
+    prey_scarcity_threshold: float,
+    prey_weight: float,
+    oversat_bonus: float,
+    consumer_trophic_threshold: float,
+) -> np.ndarray:
+    """迁徙决策分数（对应 kernel_migration_decision_v2）"""
+    s, c = domain.species, domain.cells
+    land, ocean, coast, land_ok, ocean_ok, types = _habitat_context(domain, env7, species_traits)
+    is_terrestrial, is_aquatic, is_amphibious = types
+    habitat_ok = nk._target_habitat_ok(
+        is_terrestrial, is_aquatic, is_amphibious, land[c], ocean[c], coast[c]
+    )
+    adj_count, adj_suit, has_low = nk._accumulate_sources(
+        _source_neighbors(domain, pop, land_ok, ocean_ok, suitability),
+        is_terrestrial, is_aquatic, land_ok[c], ocean_ok[c],
+        (domain.size,), True, 0.25,
+    )
+    scores = nk._migration_decision_v2(
+        pop, suitability, distance_weights,
+        death_rates[s], resource_pressure[s], trophic_levels[s],
+        prey, adj_count, adj_suit, has_low, habitat_ok,
+        0.9 + 0.2 * nk._coord_noise_at(s, domain.rows, domain.cols, 17, 31, 11),
+        pressure_threshold, saturation_threshold, oversaturation_threshold,
+        prey_scarcity_threshold, prey_weight, oversat_bonus, consumer_trophic_threshold,
+    )
+    return scores.astype(np.float32)
+
+
+def execute_migration(
+    domain: SparseDomain,
+    pop: np.ndarray,
+    scores: np.ndarray,
+    distance_weights: np.ndarray,
+    species_traits: np.ndarray,
+    env7: np.ndarray,
+    migration_rates: np.ndarray,
+    score_threshold: float,
+    long_jump_prob: float,
+) -> np.ndarray:
+    """执行迁徙（对应 kernel_execute_migration）
+
+    定义域需包含有种群格子的 4 邻域与质心 max_distance 范围，
+    二者之外的格子在稠密实现中也不会接收迁入。
+    """
+    s, c = domain.species, domain.cells
+    land, ocean, coast, land_ok, ocean_ok, types = _habitat_context(domain, env7, species_traits)
+    is_terrestrial, is_aquatic, is_amphibious = types
+    habitat_ok = nk._target_habitat_ok(
+        is_terrestrial, is_aquatic, is_amphibious, land[c], ocean[c], coast[c]
+    )
+    adj_count, _, _ = nk._accumulate_sources(
+        _source_neighbors(domain, pop, land_ok, ocean_ok),
+        is_terrestrial, is_aquatic, land_ok[c], ocean_ok[c],
+        (domain.size,), False, 0.25,
+    )
+
+    occupied = pop > 0
+    total_pop = domain.species_sum(np.where(occupied, pop, 0.0)).astype(np.float32)
+    has_land_pop = domain.species_count(occupied & (land[c] > 0.5)) > 0
+    has_ocean_pop = domain.species_count(occupied & (ocean[c] > 0.5)) > 0
+    long_jump_ok = nk._long_jump_ok(
+        is_terrestrial, is_aquatic, is_amphibious, has_land_pop[s], has_ocean_pop[s],
+        land[c], ocean[c], coast[c],
+    )
+
+    counted, receivable = nk._migration_targets(
+        occupied, scores, habitat_ok, adj_count > 0, distance_weights, long_jump_ok,
+        0.5 + 0.5 * nk._coord_noise_at(s, domain.rows, domain.cols, 13, 17, 19),
+        0.5 + 0.5 * nk._coord_noise_at(s, domain.rows, domain.cols, 23, 29, 31, offset=1),
+        score_threshold, long_jump_prob,
+    )
+    total_score = domain.species_sum(np.where(counted, scores, 0.0)).astype(np.float32)
+
+    migrate_amount = (total_pop * migration_rates)[s]
+    receive = receivable & (total_score > 0)[s]
+    safe_total = np.where(total_score > 0, total_score, 1.0)[s]
+    arrivals = np.where(receive, migrate_amount * (scores / safe_total), 0.0)
+    return np.where(occupied, pop * (1.0 - migration_rates[s]), arrivals).astype(np.float32)
+
+
+# ============================================================================
+# 繁殖 / 竞争
+# ============================================================================
+
+def reproduction(
+    domain: SparseDomain,
+    pop: np.ndarray,
+    suitability: np.ndarray,
+    capacity: np.ndarray,
+    birth_scale: np.ndarray,
+    birth_rate: float,
+    overcapacity_threshold: float,
+    overcapacity_clamp: float,
+) -> np.ndarray:
+    """繁殖 v2 + 超容量钳制（对应 TensorEcologyEngine._compute_reproduction_tensor）"""
+    s, c = domain.species, domain.cells
+    cell_total = domain.cell_sum(pop)
+    capacity = capacity.reshape(-1)
+    result = nk._reproduction_v2(
+        pop, suitability, cell_total[c], capacity[c], birth_scale[s], birth_rate
+    ).astype(np.float32)
+
+    # 超容量格子的繁殖结果额外钳制
+    overcapacity = cell_total > capacity * overcapacity_threshold
+    if overcapacity.any():
+        clamp_factor = np.where(overcapacity[c], overcapacity_clamp, 1.0)
+        result = np.maximum(0.0, pop + (result - pop) * clamp_factor)
+    return result
+
+
+def trait_competition(
+    domain: SparseDomain,
+    pop: np.ndarray,
+    suitability: np.ndarray,
+    species_traits: np.ndarray,
+    strength: float,
+) -> np.ndarray:
+    """基于特质的竞争（对应 kernel_compute_local_fitness + kernel_apply_trait_competition）
+
+    只对同一地块上共存的物种对计算竞争压力，配对数与占用格子相关而非 S²·H·W。
+    """
+    s = domain.species
+    niche_overlap = np.zeros((species_traits.shape[0],) * 2, dtype=np.float32)
+    nk.kernel_compute_niche_overlap_matrix(species_traits, niche_overlap)
+    fitness = nk._local_fitness(suitability, species_traits[s], pop).astype(np.float32)
+
+    occupied = np.flatnonzero(pop > 0)
+    occ_species = s[occupied]
+    occ_pop = pop[occupied]
+    occ_fitness = fitness[occupied]
+    left, right = cell_pairs(domain.cells[occupied], domain.cells[occupied])
+
+    overlap = niche_overlap[occ_species[left], occ_species[right]]
+    active = (overlap >= 0.3) & (occ_species[left] != occ_species[right])
+    contrib = nk._trait_competition_contrib(
+        overlap, occ_fitness[right] - occ_fitness[left], occ_pop[right], np.float32(strength)
+    )
+    pressure = np.zeros(occupied.size, dtype=np.float32)
+    np.add.at(pressure, left, np.where(active, contrib, 0.0).astype(np.float32))
+
+    loss_ratio = np.minimum(0.5, pressure / (occ_pop + 100.0))
+    result = np.zeros_like(pop)
+    result[occupied] = occ_pop * (1.0 - loss_ratio)
+    return result
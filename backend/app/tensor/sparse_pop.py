@@ -0,0 +1,240 @@
+"""
+稀疏种群表示 - 按占用格子列表存储 (S, H, W) 种群张量
+
+大多数物种只占据少量地块（TensorStateInitStage 初始只播种 top-k 3~4 个地块），
+稠密 (S, H, W) 张量中绝大部分是 0。本模块提供：
+- SparseDomain：排序后的 (物种, 地块) 扁平键集合 + 4 邻域查找，稀疏内核按键计算
+- SparsePopulation：占用列表（键 + 种群值），可与稠密张量互转
+- select_layout()：按占用率自动选择 dense / sparse 计算布局
+
+键编码：key = s * H * W + i * W + j，即稠密张量按 C 顺序展开后的下标。
+按键排序等价于"物种优先、再按行列"，与稠密布尔索引的遍历顺序一致，
+因此按键顺序做的逐物种/逐地块累加与稠密实现的累加顺序相同。
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+
+import numpy as np
+
+# 4 邻域偏移（与 numpy_kernels / Taichi 内核中的 neighbors 顺序一致）
+NEIGHBOR_OFFSETS = ((-1, 0), (1, 0), (0, -1), (0, 1))
+
+# 计算布局
+LAYOUT_DENSE = "dense"
+LAYOUT_SPARSE = "sparse"
+LAYOUT_AUTO = "auto"
+
+
+@dataclass
+class SparseDomain:
+    """稀疏计算定义域：排序去重的 (物种, 地块) 扁平键
+
+    稀疏内核的所有字段（种群、宜居度、死亡率……）都是与 keys 对齐的一维数组。
+    """
+    shape: tuple[int, int, int]
+    keys: np.ndarray
+    species: np.ndarray = field(init=False, repr=False)
+    cells: np.ndarray = field(init=False, repr=False)
+    rows: np.ndarray = field(init=False, repr=False)
+    cols: np.ndarray = field(init=False, repr=False)
+    _neighbors: dict = field(init=False, default_factory=dict, repr=False)
+
+    def __post_init__(self) -> None:
+        S, H, W = self.shape
+        self.keys = np.asarray(self.keys, dtype=np.int64)
+        self.species, self.cells = np.divmod(self.keys, H * W)
+        self.rows, self.cols = np.divmod(self.cells, W)
+
+    @classmethod
+    def from_keys(cls, shape: tuple[int, int, int], keys: np.ndarray) -> "SparseDomain":
+        """由任意（可重复、无序）键构建定义域"""
+        return cls(shape, np.unique(np.asarray(keys, dtype=np.int64)))
+
+    @property
+    def size(self) -> int:
+        return int(self.keys.shape[0])
+
+    def lookup(self, keys: np.ndarray) -> np.ndarray:
+        """键 → 定义域内位置，不在定义域内为 -1"""
+        keys = np.asarray(keys, dtype=np.int64)
+        if self.size == 0:
+            return np.full(keys.shape, -1, dtype=np.int64)
+        pos = np.minimum(np.searchsorted(self.keys, keys), self.size - 1)
+        return np.where(self.keys[pos] == keys, pos, -1)
+
+    def neighbor(self, di: int, dj: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """邻居 (i+di, j+dj) 的查找结果（结果缓存）
+
+        Returns:
+            (valid, positions, cells)：邻居是否在地图内（边界不环绕）、
+            邻居在定义域内的位置（不在定义域内为 -1）、邻居地块下标（越界时为 0）
+        """
+        cached = self._neighbors.get((di, dj))
+        if cached is not None:
+            return cached
+        S, H, W = self.shape
+        ni = self.rows + di
+        nj = self.cols + dj
+        valid = (ni >= 0) & (ni < H) & (nj >= 0) & (nj < W)
+        cells = np.where(valid, ni * W + nj, 0)
+        positions = np.where(valid, self.lookup(self.species * (H * W) + cells), -1)
+        cached = (valid, positions, cells)
+        self._neighbors[(di, dj)] = cached
+        return cached
+
+    def gather_neighbor(self, values: np.ndarray, di: int, dj: int) -> np.ndarray:
+        """邻居处的字段值，邻居越界或不在定义域内时为 0（与稠密平移补 0 一致）"""
+        _, positions, _ = self.neighbor(di, dj)
+        found = positions >= 0
+        return np.where(found, values[np.where(found, positions, 0)], 0).astype(values.dtype, copy=False)
+
+    def gather(self, dense: np.ndarray) -> np.ndarray:
+        """从稠密张量取值：(S, H, W) 按键取，(H, W) 按地块取"""
+        if dense.ndim == 3:
+            return dense[self.species, self.rows, self.cols]
+        return dense.reshape(-1)[self.cells]
+
+    def scatter(self, values: np.ndarray, fill: float = 0.0) -> np.ndarray:
+        """写回稠密 (S, H, W) 张量，定义域外填 fill"""
+        out = np.full(int(np.prod(self.shape)), fill, dtype=np.float32)
+        out[self.keys] = values
+        return out.reshape(self.shape)
+
+    def species_sum(self, values: np.ndarray) -> np.ndarray:
+        """逐物种求和 (S,)"""
+        return np.bincount(self.species, weights=values, minlength=self.shape[0])
+
+    def species_count(self, mask: np.ndarray) -> np.ndarray:
+        """逐物种计数 (S,)"""
+        return np.bincount(self.species[mask], minlength=self.shape[0])
+
+    def cell_sum(self, values: np.ndarray) -> np.ndarray:
+        """逐地块跨物种求和，返回 (H*W,) float32
+
+        按键顺序（物种升序）逐个累加，与稠密 pop.sum(axis=0) 的累加顺序一致。
+        """
+        S, H, W = self.shape
+        total = np.zeros(H * W, dtype=np.float32)
+        np.add.at(total, self.cells, values.astype(np.float32, copy=False))
+        return total
+
+    def dilate(self, steps: int = 1) -> "SparseDomain":
+        """4 邻域膨胀 steps 次（同一物种内，边界不环绕）"""
+        S, H, W = self.shape
+        keys = self.keys
+        frontier = self
+        for _ in range(steps):
+            grown = [keys]
+            for di, dj in NEIGHBOR_OFFSETS:
+                valid, _, cells = frontier.neighbor(di, dj)
+                grown.append(frontier.species[valid] * (H * W) + cells[valid])
+            new_keys = np.unique(np.concatenate(grown))
+            if new_keys.shape[0] == keys.shape[0]:
+                break
+            # 下一轮只需从新增的键向外扩
+            frontier = SparseDomain(self.shape, np.setdiff1d(new_keys, keys, assume_unique=True))
+            keys = new_keys
+        return SparseDomain(self.shape, keys)
+
+    def union(self, keys: np.ndarray) -> tuple["SparseDomain", np.ndarray]:
+        """并入新键
+
+        Returns:
+            (新定义域, 原定义域各键在新定义域中的位置)
+        """
+        merged = SparseDomain(self.shape, np.union1d(self.keys, np.asarray(keys, dtype=np.int64)))
+        return merged, np.searchsorted(merged.keys, self.keys)
+
+
+def cell_pairs(left_cells: np.ndarray, right_cells: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """同一地块上的 (左, 右) 元素配对
+
+    对每个左元素，按右元素原有顺序（键顺序即物种升序）列出同地块的全部右元素。
+    配对数为 Σ(每个地块的左元素数 × 右元素数)，只与占用格子相关。
+
+    Returns:
+        (left_index, right_index)
+    """
+    order = np.argsort(right_cells, kind="stable")
+    sorted_cells = right_cells[order]
+    start = np.searchsorted(sorted_cells, left_cells, side="left")
+    end = np.searchsorted(sorted_cells, left_cells, side="right")
+    counts = end - start
+    total = int(counts.sum())
+    left = np.repeat(np.arange(left_cells.shape[0]), counts)
+    offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    right = order[np.repeat(start, counts) + offsets]
+    return left, right
+
+
+@dataclass
+class SparsePopulation:
+    """占用列表形式的种群张量
+
+    domain 只包含种群 > 0 的格子，values 为对应种群数量（float32）。
+    """
+    domain: SparseDomain
+    values: np.ndarray
+
+    @classmethod
+    def from_dense(cls, pop: np.ndarray) -> "SparsePopulation":
+        flat = np.ascontiguousarray(pop, dtype=np.float32).reshape(-1)
+        keys = np.flatnonzero(flat > 0)
+        return cls(SparseDomain(tuple(pop.shape), keys), flat[keys])
+
+    @property
+    def shape(self) -> tuple[int, int, int]:
+        return self.domain.shape
+
+    @property
+    def nnz(self) -> int:
+        return self.domain.size
+
+    @property
+    def occupancy_ratio(self) -> float:
+        total = int(np.prod(self.shape))
+        return self.nnz / total if total else 0.0
+
+    def to_dense(self) -> np.ndarray:
+        return self.domain.scatter(self.values)
+
+    def species_totals(self) -> np.ndarray:
+        """每个物种的总种群 (S,) float32"""
+        return self.domain.species_sum(self.values).astype(np.float32)
+
+    def species_tiles(self, species_idx: int) -> np.ndarray:
+        """某物种的占用地块扁平下标 (i * W + j)"""
+        return self.domain.cells[self.domain.species == species_idx]
+
+
+def occupancy_ratio(pop: np.ndarray | SparsePopulation) -> float:
+    """占用率：种群 > 0 的格子数 / (S·H·W)"""
+    if isinstance(pop, SparsePopulation):
+        return pop.occupancy_ratio
+    if pop.size == 0:
+        return 0.0
+    return float(np.count_nonzero(pop > 0)) / pop.size
+
+
+def normalize_layout(layout: str | None) -> str:
+    """规范化布局名，未知值回退 auto"""
+    value = (layout or LAYOUT_AUTO).strip().lower()
+    return value if value in (LAYOUT_DENSE, LAYOUT_SPARSE, LAYOUT_AUTO) else LAYOUT_AUTO
+
+
+def select_layout(
+    pop: np.ndarray | SparsePopulation,
+    mode: str | None = LAYOUT_AUTO,
+    threshold: float = 0.03,
+) -> str:
+    """按占用率选择计算布局
+
+    - dense / sparse：强制指定
+    - auto：占用率 <= threshold 时使用 sparse，否则 dense
+    """
+    mode = normalize_layout(mode)
+    if mode != LAYOUT_AUTO:
+        return mode
+    return LAYOUT_SPARSE if occupancy_ratio(pop) <= threshold else LAYOUT_DENSE
@@ -4,8 +4,8 @@ from dataclasses import dataclass
 from typing import Dict, List
 
 import numpy as np
-from scipy.ndimage import label
 
+from .regions import RegionLabels, SpeciesRegions, label_regions
 from .state import TensorState
 
 
@@ -15,7 +15,7 @@ class SpeciationTrigger:
 
     lineage_code: str
     type: str
-    regions: List[np.ndarray] | None = None
+    regions: SpeciesRegions | None = None
     divergence_score: float | None = None
     num_regions: int | None = None
 
@@ -29,14 +29,20 @@ class SpeciationMonitor:
     def detect_isolation(
         self,
         pop_tensor: np.ndarray,  # (S, H, W)
-    ) -> Dict[str, List[np.ndarray]]:
-        """检测地理隔离（异域分化）。"""
-        isolation_regions: Dict[str, List[np.ndarray]] = {}
+        regions: RegionLabels | None = None,
+    ) -> Dict[str, SpeciesRegions]:
+        """检测地理隔离（异域分化）。
+
+        所有物种一次批量标记（六边形邻接、x 方向环绕），
+        返回区域数 >= 2 的物种的区域标签图与区域统计。
+        调用方已对同一种群张量标记过时可传入 regions 复用。
+        """
+        if regions is None:
+            regions = label_regions(pop_tensor > 0, weights=pop_tensor)
+        isolation_regions: Dict[str, SpeciesRegions] = {}
         for s_idx, lineage in enumerate(self.species_map.keys()):
-            presence = pop_tensor[s_idx] > 0
-            labeled, num_regions = label(presence)
-            if num_regions >= 2:
-                isolation_regions[lineage] = [labeled == r for r in range(1, num_regions + 1)]
+            if regions.num_regions[s_idx] >= 2:
+                isolation_regions[lineage] = regions.species(s_idx)
         return isolation_regions
 
     def detect_divergence(
@@ -59,11 +65,12 @@ class SpeciationMonitor:
         self,
         tensor_state: TensorState,
         threshold: float = 0.5,
+        regions: RegionLabels | None = None,
     ) -> List[SpeciationTrigger]:
         """汇总所有分化触发信号。"""
         triggers: List[SpeciationTrigger] = []
 
-        isolation = self.detect_isolation(tensor_state.pop)
+        isolation = self.detect_isolation(tensor_state.pop, regions)
         for lineage, regions in isolation.items():
             triggers.append(
                 SpeciationTrigger(
@@ -1,10 +1,96 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, field
-from typing import Dict
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict, Sequence
 
 import numpy as np
 
+from .buffers import GROWTH_FACTOR
+
+if TYPE_CHECKING:
+    from ..models.environment import MapTile
+
+
+# 环境张量通道：[温度, 湿度, 海拔, 资源, 陆地, 海洋, 海岸]
+ENV_CHANNELS = 7
+
+_SEA_KEYWORDS = ("ocean", "sea", "deep_ocean", "marsh", "lagoon", "bay", "海", "海洋", "深海", "浅海", "大洋")
+_FRESHWATER_KEYWORDS = ("lake", "river", "freshwater", "wetland", "bog", "pond", "湖", "河", "淡水", "湿地")
+_COAST_KEYWORDS = ("coast", "coastal", "shore", "beach", "岸", "海岸", "沿海")
+
+
+@lru_cache(maxsize=512)
+def classify_biome(biome: str | None) -> tuple[float, float, float]:
+    """地形关键词 → (陆地, 海洋, 海岸) 标记
+
+    biome 取值很少，按字符串缓存，避免每回合对每个地块做关键词匹配。
+    """
+    b = (biome or "land").lower()
+    is_sea = any(k in b for k in _SEA_KEYWORDS) or any(k in b for k in _FRESHWATER_KEYWORDS)
+    is_coast = any(k in b for k in _COAST_KEYWORDS)
+
+    # 沿岸区域视作陆地+海岸，但保持海洋为0以限制纯水生上岸
+    is_land = not is_sea or is_coast or ("land" in b)
+    return (
+        1.0 if is_land else 0.0,
+        1.0 if is_sea else 0.0,
+        1.0 if is_coast else 0.0,
+    )
+
+
+def _tile_columns(
+    tiles: Sequence["MapTile"], H: int, W: int,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """一次遍历抽取地块属性列（越界地块丢弃）
+
+    Returns:
+        (行, 列, 地块 ID（无 ID 为 -1）, 环境通道值 (7, K))
+    """
+    columns = [
+        (
+            t.y, t.x, t.id,
+            getattr(t, "temperature", 20.0),
+            getattr(t, "humidity", 0.5),
+            getattr(t, "elevation", 0.0),
+            getattr(t, "resources", 100.0),
+            getattr(t, "biome", "land"),
+        )
+        for t in tiles
+    ]
+    rows, cols, ids, temp, humidity, elevation, resources, biomes = zip(*columns)
+    r = np.asarray(rows, dtype=np.int64)
+    c = np.asarray(cols, dtype=np.int64)
+    inside = (r >= 0) & (r < H) & (c >= 0) & (c < W)
+
+    values = np.empty((ENV_CHANNELS, len(columns)), dtype=np.float32)
+    values[0] = np.asarray(temp, dtype=np.float32) / 50.0  # 归一化
+    values[1] = np.asarray(humidity, dtype=np.float32)
+    values[2] = np.asarray(elevation, dtype=np.float32) / 1000.0
+    values[3] = np.asarray(resources, dtype=np.float32) / 100.0
+    values[4:7] = np.asarray([classify_biome(b) for b in biomes], dtype=np.float32).T
+    tile_ids = np.asarray([-1 if i is None else i for i in ids], dtype=np.int64)
+    return r[inside], c[inside], tile_ids[inside], values[:, inside]
+
+
+def build_env_tensor(tiles: Sequence["MapTile"], H: int, W: int) -> tuple[np.ndarray, np.ndarray]:
+    """从地块列表构建环境张量和地块 ID 网格
+
+    一次遍历抽取各属性列，其余全部向量化写入。
+
+    Returns:
+        (env (7, H, W), tile_id_grid (H, W)，无地块处为 -1)
+    """
+    env = np.zeros((ENV_CHANNELS, H, W), dtype=np.float32)
+    tile_id_grid = np.full((H, W), -1, dtype=np.int32)
+    if not tiles:
+        return env, tile_id_grid
+
+    r, c, ids, values = _tile_columns(tiles, H, W)
+    env[:, r, c] = values
+    tile_id_grid[r, c] = ids
+    return env, tile_id_grid
+
 
 @dataclass
 class TensorState:
@@ -15,6 +101,14 @@ class TensorState:
     species_params: 物种参数矩阵 (S, F)
     masks: 辅助掩码 (H, W) 集合
     species_map: 谱系编码到张量索引的映射
+    turn_index: 状态对应的回合（跨回合复用时用于连续性检查）
+    env_version: 环境张量版本号，每次 patch_env / patch_tiles 有变化时 +1
+
+    跨回合复用时：
+    - pop 是按 GROWTH_FACTOR 预留余量的后备数组的前 S 行，add_species 只写入新行，
+      余量用完才整体扩容（摊销 O(新增行)）；set_population 把新的种群数组拷回后备数组
+    - 逐物种种群总数缓存在 species_totals() 中，由写入种群的调用方随之更新；
+      pop 被直接替换（未经 set_population）时下次读取才重新求和
     """
 
     env: np.ndarray
@@ -22,6 +116,11 @@ class TensorState:
     species_params: np.ndarray
     masks: Dict[str, np.ndarray] = field(default_factory=dict)
     species_map: Dict[str, int] = field(default_factory=dict)
+    turn_index: int = -1
+    env_version: int = 0
+    _pop_buffer: np.ndarray | None = field(default=None, init=False, repr=False)
+    _totals: np.ndarray | None = field(default=None, init=False, repr=False)
+    _totals_pop: np.ndarray | None = field(default=None, init=False, repr=False)
 
     def population_slice(self, lineage_code: str) -> np.ndarray | None:
         """根据谱系编码获取对应的种群切片。"""
@@ -39,11 +138,171 @@ class TensorState:
         if self.species_params.ndim != 2:
             raise ValueError("species_params must be 2D (S, F)")
 
+    # ------------------------------------------------------------------
+    # 增量更新（跨回合保持状态）
+    # ------------------------------------------------------------------
+
+    def species_totals(self) -> np.ndarray:
+        """逐物种种群总数 (S,) float64（缓存；pop 被直接替换后重新求和）"""
+        if self._totals is None or self._totals_pop is not self.pop:
+            self._set_totals(self.pop.sum(axis=(1, 2), dtype=np.float64))
+        return self._totals
+
+    def _set_totals(self, totals: np.ndarray) -> None:
+        self._totals = np.asarray(totals, dtype=np.float64).reshape(self.pop.shape[0])
+        self._totals_pop = self.pop
+
+    def set_population(self, pop: np.ndarray, totals: np.ndarray | None = None) -> None:
+        """写入整个种群张量（生态/种群更新阶段的结果）
+
+        形状不变时拷入后备数组（保留 add_species 的余量），否则直接采用新数组。
+
+        Args:
+            pop: 新的种群张量 (S, H, W)
+            totals: 已知的逐物种总数（None = 下次读取时重新求和）
+        """
+        if pop is not self.pop:
+            if self._owns_pop() and pop.shape == self.pop.shape:
+                np.copyto(self.pop, pop, casting="same_kind")
+            else:
+                self.pop = pop
+                self._pop_buffer = None
+        if totals is None:
+            self._totals = None
+        else:
+            self._set_totals(totals)
+
+    def set_species_row(self, index: int, row: np.ndarray) -> None:
+        """写入单个物种的分布并更新其总数"""
+        totals = self.species_totals()
+        self.pop[index] = row
+        totals[index] = float(self.pop[index].sum(dtype=np.float64))
+
+    def rescale_species(self, indices: np.ndarray, targets: np.ndarray) -> np.ndarray:
+        """把指定物种行按比例缩放到目标总数（只触碰这些行）
+
+        Returns:
+            当前总数为 0、无法按比例缩放的物种索引（调用方重新播种）
+        """
+        totals = self.species_totals()
+        indices = np.asarray(indices, dtype=np.int64)
+        targets = np.asarray(targets, dtype=np.float64)
+        current = totals[indices]
+        scalable = current > 0
+        for idx, factor in zip(indices[scalable], targets[scalable] / current[scalable]):
+            self.pop[idx] *= np.float32(factor)
+        totals[indices[scalable]] = targets[scalable]
+        return indices[~scalable]
+
+    def _owns_pop(self) -> bool:
+        return self._pop_buffer is not None and self.pop.base is self._pop_buffer
 
+    def add_species(self, lineage_codes: Sequence[str], rows: np.ndarray) -> None:
+        """追加物种行（分化产生的新物种）
 
+        后备数组有余量时只写入新行；否则按 GROWTH_FACTOR 预留余量后整体搬迁一次。
 
+        Args:
+            lineage_codes: 新物种谱系编码（不得已存在）
+            rows: 对应的种群分布 (K, H, W)
+        """
+        if not lineage_codes:
+            return
+        start = self.pop.shape[0]
+        count = len(lineage_codes)
+        size = start + count
+        rows = np.asarray(rows, dtype=self.pop.dtype).reshape((count,) + self.pop.shape[1:])
+        totals = self.species_totals()
 
+        if not self._owns_pop() or self._pop_buffer.shape[0] < size:
+            capacity = max(size, int(size * GROWTH_FACTOR))
+            buffer = np.empty((capacity,) + self.pop.shape[1:], dtype=self.pop.dtype)
+            buffer[:start] = self.pop
+            self._pop_buffer = buffer
+        self._pop_buffer[start:size] = rows
+        self.pop = self._pop_buffer[:size]
+        self._set_totals(np.concatenate([totals, rows.sum(axis=(1, 2), dtype=np.float64)]))
 
+        if self.species_params.shape[0] == start:
+            pad = np.zeros((count, self.species_params.shape[1]), dtype=self.species_params.dtype)
+            self.species_params = np.concatenate([self.species_params, pad], axis=0)
+        for offset, code in enumerate(lineage_codes):
+            self.species_map[code] = start + offset
 
+    def remove_species(self, lineage_codes: Sequence[str]) -> None:
+        """删除物种行（灭绝或不再参与计算）
 
+        用末尾的行填补空位（swap-remove），只移动 O(删除数) 行，
+        其余物种的索引保持不变。
+        """
+        to_remove = {self.species_map[c] for c in lineage_codes if c in self.species_map}
+        if not to_remove:
+            return
+        totals = self.species_totals()
+        for code in lineage_codes:
+            self.species_map.pop(code, None)
+
+        new_size = self.pop.shape[0] - len(to_remove)
+        index_to_code = {idx: code for code, idx in self.species_map.items()}
+        holes = sorted(i for i in to_remove if i < new_size)
+        movers = sorted(i for i in index_to_code if i >= new_size)
+        for hole, mover in zip(holes, movers):
+            self.pop[hole] = self.pop[mover]
+            totals[hole] = totals[mover]
+            if self.species_params.shape[0] > mover:
+                self.species_params[hole] = self.species_params[mover]
+            self.species_map[index_to_code[mover]] = hole
+
+        self.pop = self.pop[:new_size]
+        self.species_params = self.species_params[:new_size]
+        self._set_totals(totals[:new_size])
+
+    def patch_env(self, new_env: np.ndarray) -> int:
+        """只写入与当前环境不同的地块（需要完整的新环境张量，O(C·H·W)）
+
+        变化地块记录在 masks["env_dirty"] 中，供下游按需重算。
+
+        Returns:
+            发生变化的地块数
+        """
+        dirty = np.any(self.env != new_env, axis=0)
+        changed = int(np.count_nonzero(dirty))
+        if changed:
+            rr, cc = np.nonzero(dirty)
+            self.env[:, rr, cc] = new_env[:, rr, cc]
+            self.env_version += 1
+        self.masks["env_dirty"] = dirty
+        return changed
+
+    def patch_tiles(self, tiles: Sequence["MapTile"]) -> int | None:
+        """只写入给定地块（地图阶段本回合写回的地块），O(变化地块数)
+
+        变化地块记录在 masks["env_dirty"] 中。
+
+        Returns:
+            发生变化的地块数；地块不在 tile_ids 网格的原位置（新地块、坐标变化、越界）时
+            返回 None 且不做任何修改，调用方应全量重建
+        """
+        _, H, W = self.env.shape
+        dirty = self.masks.get("env_dirty")
+        if dirty is None or dirty.shape != (H, W):
+            dirty = np.zeros((H, W), dtype=bool)
+        else:
+            dirty.fill(False)
+        self.masks["env_dirty"] = dirty
+        if not tiles:
+            return 0
+
+        tile_id_grid = self.masks.get("tile_ids")
+        r, c, ids, values = _tile_columns(tiles, H, W)
+        if tile_id_grid is None or len(ids) != len(tiles) or not np.array_equal(tile_id_grid[r, c], ids):
+            return None
 
+        changed = np.any(self.env[:, r, c] != values, axis=0)
+        count = int(np.count_nonzero(changed))
+        if count:
+            rr, cc = r[changed], c[changed]
+            self.env[:, rr, cc] = values[:, changed]
+            dirty[rr, cc] = True
+            self.env_version += 1
+        return count
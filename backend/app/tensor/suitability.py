@@ -8,6 +8,9 @@
 5. 多维环境约束 - 深度、盐度、光照等
 6. 历史适应惩罚 - 新环境降低适宜度
 
+增量模式（默认）：基础适宜度按物种特质行/地块环境列复用，生态位相似度只重算
+变化物种的行列，拥挤/资源分割只更新存在状态变化的地块（见 suitability_cache）。
+
 依赖：
 - Taichi GPU 内核
 - Embedding 引擎缓存
@@ -16,6 +19,7 @@
 
 from __future__ import annotations
 
+import importlib.util
 import logging
 import time
 from dataclasses import dataclass, field
@@ -23,6 +27,10 @@ from typing import TYPE_CHECKING, Sequence
 
 import numpy as np
 
+from . import suitability_cache
+from .compute_backend import get_taichi_kernels
+from .kernel_metrics import instrument_kernels
+
 if TYPE_CHECKING:
     from ..models.species import Species
     from ..models.environment import MapTile
@@ -49,6 +57,10 @@ class SuitabilityMetrics:
     avg_suitability: float = 0.0
     min_suitability: float = 0.0
     max_suitability: float = 0.0
+    # 增量模式的复用情况
+    cache_hit_ratio: float = 0.0      # 本次复用的基础适宜度单元比例
+    recomputed_rows: int = 0          # 重算的物种行
+    recomputed_cols: int = 0          # 环境变化而重算的地块列
 
 
 @dataclass
@@ -80,6 +92,9 @@ class TensorSuitabilityCalculator:
     使用方法：
         calc = TensorSuitabilityCalculator(config)
         result = calc.compute_all(species_list, tiles, env_tensor, pop_tensor)
+    
+    incremental=True（默认）时跨调用复用未变化的物种行/地块列，在主机上计算；
+    False 时每次调用一体化 Taichi 内核整体计算。
     """
     
     # 特质名称到索引的映射
@@ -104,15 +119,16 @@ class TensorSuitabilityCalculator:
         "coastal": 8,
     }
     
-    def __init__(self, config: "SuitabilityConfig | None" = None):
+    def __init__(self, config: "SuitabilityConfig | None" = None, incremental: bool = True):
         """初始化计算器
         
         Args:
             config: 适宜度配置，如果为 None 使用默认值
+            incremental: 是否按物种行/地块列增量复用上次结果
         """
         self._config = config
         self._taichi_available = False
-        self._kernels = None
+        self._kernel_module = None
         
         # 缓存
         self._species_traits_cache: dict[str, np.ndarray] = {}
@@ -120,16 +136,29 @@ class TensorSuitabilityCalculator:
         self._niche_similarity_codes: list[str] = []
         self._specialization_cache: dict[str, float] = {}
         self._historical_presence_cache: np.ndarray | None = None
+        self._incremental = (
+            suitability_cache.IncrementalSuitability(self.ENV_CHANNELS) if incremental else None
+        )
         
         # 尝试加载 Taichi 内核
         self._init_taichi()
     
     def _init_taichi(self) -> None:
-        """初始化 Taichi 内核 - GPU-only 模式"""
-        from . import taichi_hybrid_kernels as _kernels
-        self._taichi_available = True
-        self._kernels = _kernels
-        logger.debug("[TensorSuitability] Taichi GPU 内核加载成功")
+        """检查 Taichi 内核可用性 - GPU-only 模式
+        
+        只检查 taichi 是否已安装；内核模块在首次计算时才导入并初始化设备。
+        """
+        self._taichi_available = importlib.util.find_spec("taichi") is not None
+        logger.debug(f"[TensorSuitability] Taichi 可用: {self._taichi_available}")
+    
+    @property
+    def _kernels(self):
+        """Taichi 内核模块（首次访问时初始化 Taichi）"""
+        if self._kernel_module is None:
+            kernels = get_taichi_kernels()
+            self._kernel_module = instrument_kernels(kernels, kernels.get_taichi_backend())
+            logger.debug("[TensorSuitability] Taichi 内核加载成功")
+        return self._kernel_module
     
     def reload_config(self, config: "SuitabilityConfig") -> None:
         """重新加载配置"""
@@ -142,6 +171,14 @@ class TensorSuitabilityCalculator:
         self._niche_similarity_codes = []
         self._specialization_cache.clear()
         self._historical_presence_cache = None
+        if self._incremental is not None:
+            self._incremental.clear()
+    
+    def cache_stats(self) -> dict:
+        """增量模式的累计复用统计（含命中率 hit_ratio）"""
+        if self._incremental is None:
+            return {}
+        return self._incremental.stats.to_dict()
     
     # ========================================================================
     # 栖息地掩码生成 (GPU 兼容)
@@ -259,6 +296,12 @@ class TensorSuitabilityCalculator:
         # 1. 提取物种特质矩阵
         species_traits = self._extract_species_traits(species_list)
         
+        if self._incremental is not None:
+            return self._compute_incremental(
+                species_list, species_traits, env_tensor, pop_tensor, habitat_mask,
+                historical_presence, auto_generate_mask, cfg, metrics, start_time,
+            )
+        
         # 2. 计算专化度
         t0 = time.perf_counter()
         specialization = self._compute_specialization(species_traits, S)
@@ -301,17 +344,28 @@ class TensorSuitabilityCalculator:
                 result, historical_presence, cfg
             )
         
-        # 统计
+        return self._finish(result, specialization, niche_similarity, metrics, start_time)
+    
+    def _finish(
+        self,
+        result: np.ndarray,
+        specialization: np.ndarray,
+        niche_similarity: np.ndarray,
+        metrics: SuitabilityMetrics,
+        start_time: float,
+    ) -> EnhancedSuitabilityResult:
+        """统计并打包结果"""
         metrics.total_time_ms = (time.perf_counter() - start_time) * 1000
         metrics.avg_suitability = float(np.mean(result))
         metrics.min_suitability = float(np.min(result))
         metrics.max_suitability = float(np.max(result))
         
         logger.info(
-            f"[TensorSuitability] S={S}, tiles={H}x{W}, "
+            f"[TensorSuitability] S={metrics.species_count}, tiles={metrics.tile_count}, "
             f"avg={metrics.avg_suitability:.3f}, "
             f"range=[{metrics.min_suitability:.3f}, {metrics.max_suitability:.3f}], "
-            f"time={metrics.total_time_ms:.1f}ms ({metrics.backend})"
+            f"time={metrics.total_time_ms:.1f}ms ({metrics.backend}), "
+            f"复用={metrics.cache_hit_ratio:.0%}"
         )
         
         return EnhancedSuitabilityResult(
@@ -321,6 +375,57 @@ class TensorSuitabilityCalculator:
             metrics=metrics,
         )
     
+    def _compute_incremental(
+        self,
+        species_list: Sequence["Species"],
+        species_traits: np.ndarray,
+        env_tensor: np.ndarray,
+        pop_tensor: np.ndarray,
+        habitat_mask: np.ndarray | None,
+        historical_presence: np.ndarray | None,
+        auto_generate_mask: bool,
+        cfg: dict,
+        metrics: SuitabilityMetrics,
+        start_time: float,
+    ) -> EnhancedSuitabilityResult:
+        """增量计算：复用特质未变化的物种行与环境未变化的地块列"""
+        S = len(species_list)
+        _, H, W = env_tensor.shape
+        metrics.backend = "numpy"
+        
+        specialization = suitability_cache.specialization(species_traits)
+        species_traits_ext = np.concatenate(
+            [species_traits, specialization.reshape(-1, 1)], axis=1
+        ).astype(np.float32)
+        trophic_levels = np.array([sp.trophic_level for sp in species_list], dtype=np.float32)
+        features = self._niche_features(species_list, species_traits)
+        
+        if habitat_mask is None:
+            if auto_generate_mask:
+                habitat_mask = self.compute_habitat_mask(species_list, env_tensor)
+            else:
+                habitat_mask = np.ones((S, H, W), dtype=np.float32)
+        
+        t0 = time.perf_counter()
+        result, niche_similarity, update = self._incremental.compute(
+            [sp.lineage_code for sp in species_list],
+            species_traits_ext, features, trophic_levels,
+            env_tensor, pop_tensor, habitat_mask, cfg,
+        )
+        metrics.env_suitability_time_ms = (time.perf_counter() - t0) * 1000
+        metrics.cache_hit_ratio = update.cells_reused / result.size if result.size else 0.0
+        metrics.recomputed_rows = update.rows_recomputed
+        metrics.recomputed_cols = update.cols_recomputed
+        
+        if historical_presence is not None:
+            result = suitability_cache.historical_penalty(
+                result, historical_presence,
+                float(cfg.get("novelty_penalty", 0.8)),
+                float(cfg.get("adaptation_bonus", 1.1)),
+            )
+        
+        return self._finish(result, specialization, niche_similarity, metrics, start_time)
+    
     # ========================================================================
     # Taichi GPU 计算
     # ========================================================================
@@ -393,18 +498,17 @@ class TensorSuitabilityCalculator:
     # ========================================================================
     
     def _extract_species_traits(self, species_list: Sequence["Species"]) -> np.ndarray:
-        """提取物种特质矩阵"""
+        """提取物种特质矩阵
+        
+        每次都读取物种当前特质（特质会随演化变化，按谱系编码缓存会读到旧值）；
+        增量模式据此判断物种行是否需要重算。
+        """
         S = len(species_list)
         traits = np.zeros((S, 5), dtype=np.float32)
         
         for i, sp in enumerate(species_list):
             code = sp.lineage_code
             
-            # 检查缓存
-            if code in self._species_traits_cache:
-                traits[i] = self._species_traits_cache[code]
-                continue
-            
             # 提取特质
             abs_traits = sp.abstract_traits or {}
             sp_traits = np.array([
@@ -447,7 +551,30 @@ class TensorSuitabilityCalculator:
             self._niche_similarity_codes == codes):
             return self._niche_similarity_cache
         
-        # 构建特征矩阵（使用特质 + 营养级 + 栖息地类型）
+        features = self._niche_features(species_list, traits)
+        weights = suitability_cache.NICHE_FEATURE_WEIGHTS
+        
+        # 计算相似度矩阵 [GPU-only]
+        import taichi as ti
+        similarity = np.zeros((S, S), dtype=np.float32)
+        self._kernels.kernel_compute_niche_similarity(
+            features, similarity, weights
+        )
+        ti.sync()
+        
+        # 缓存
+        self._niche_similarity_cache = similarity
+        self._niche_similarity_codes = codes
+        
+        return similarity
+    
+    def _niche_features(
+        self,
+        species_list: Sequence["Species"],
+        traits: np.ndarray,
+    ) -> np.ndarray:
+        """生态位特征矩阵 (S, 8)：特质 + 营养级 + 栖息地类型 + 食性"""
+        S = len(species_list)
         features = np.zeros((S, 8), dtype=np.float32)
         
         for i, sp in enumerate(species_list):
@@ -470,28 +597,7 @@ class TensorSuitabilityCalculator:
                 "carnivore": 0.8, "detritivore": 0.2
             }
             features[i, 7] = diet_codes.get(diet_type, 0.3)
-        
-        # 特征权重
-        weights = np.array([
-            0.10, 0.10, 0.10, 0.10, 0.05,  # 特质权重
-            0.25,  # 营养级权重（重要！）
-            0.20,  # 栖息地权重
-            0.10,  # 食性权重
-        ], dtype=np.float32)
-        
-        # 计算相似度矩阵 [GPU-only]
-        import taichi as ti
-        similarity = np.zeros((S, S), dtype=np.float32)
-        self._kernels.kernel_compute_niche_similarity(
-            features, similarity, weights
-        )
-        ti.sync()
-        
-        # 缓存
-        self._niche_similarity_cache = similarity
-        self._niche_similarity_codes = codes
-        
-        return similarity
+        return features
     
     def _apply_historical_penalty(
         self,
@@ -0,0 +1,379 @@
+"""
+增量增强适宜度 - 按物种行/地块列版本复用 TensorSuitabilityCalculator 的中间结果
+
+kernel_combined_suitability 每次都重算全部 S×T 单元，但各项的依赖很窄：
+- 基础适宜度（环境五项 + 专化度权衡）只依赖物种特质行与地块环境列
+- 生态位相似度 (S, S) 只依赖物种特征向量（特质 + 营养级 + 栖息地 + 食性）
+- 拥挤/资源分割只依赖同营养级矩阵、相似度矩阵与地块上的物种存在 (pop > 0)
+
+本模块缓存这三部分，按变化范围更新：
+- 基础适宜度：物种特质向量（含专化度）按谱系编码比较，未变化的行直接复用；
+  环境列逐列比较，只对变化的列重算；新物种/特质变化的行整行重算
+- 相似度矩阵：特征向量变化或新增的物种只重算其行与列
+- 竞争项 X = A @ P - P（A 为同营养级或相似度矩阵，P 为存在矩阵）：
+  A 的第 K 行/列变化时只重算 K 行并对其余行做秩 |K| 修正，存在变化的列单独重算；
+  变化范围超过一半或每 FULL_REFRESH_INTERVAL 次调用整体重算（避免增量累积误差）
+
+公式与 kernel_combined_suitability / kernel_compute_specialization /
+kernel_compute_niche_similarity / kernel_historical_adaptation_penalty 逐项一致，
+在主机上用 NumPy 计算（跨物种求和为矩阵乘法）。
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+# 增量更新的竞争项每隔多少次调用整体重算一次
+FULL_REFRESH_INTERVAL = 50
+
+# 生态位相似度特征权重：5 个特质、营养级、栖息地、食性
+NICHE_FEATURE_WEIGHTS = np.array([0.10, 0.10, 0.10, 0.10, 0.05, 0.25, 0.20, 0.10], dtype=np.float32)
+
+# 环境通道：温度、湿度、资源、盐度、光照（与 TensorSuitabilityCalculator.ENV_CHANNELS 一致）
+_ENV_KEYS = ("temperature", "humidity", "resources", "salinity", "light")
+
+
+@dataclass
+class SuitabilityCacheStats:
+    """增量适宜度的累计命中统计"""
+    calls: int = 0
+    cells_total: int = 0
+    cells_reused: int = 0             # 直接复用的基础适宜度单元数
+    rows_total: int = 0
+    rows_reused: int = 0              # 特质未变化的物种行
+    cols_recomputed: int = 0          # 环境变化而重算的地块列
+    similarity_rows_recomputed: int = 0
+    presence_cols_updated: int = 0    # 存在状态变化而重算竞争项的地块列
+    full_refreshes: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        """基础适宜度单元复用比例"""
+        return self.cells_reused / self.cells_total if self.cells_total else 0.0
+
+    @property
+    def row_hit_ratio(self) -> float:
+        return self.rows_reused / self.rows_total if self.rows_total else 0.0
+
+    def to_dict(self) -> Dict[str, float | int]:
+        return {
+            "calls": self.calls,
+            "hit_ratio": round(self.hit_ratio, 4),
+            "row_hit_ratio": round(self.row_hit_ratio, 4),
+            "cells_total": self.cells_total,
+            "cells_reused": self.cells_reused,
+            "cols_recomputed": self.cols_recomputed,
+            "similarity_rows_recomputed": self.similarity_rows_recomputed,
+            "presence_cols_updated": self.presence_cols_updated,
+            "full_refreshes": self.full_refreshes,
+        }
+
+
+@dataclass
+class IncrementalUpdate:
+    """单次调用的更新范围"""
+    rows_recomputed: int = 0
+    cols_recomputed: int = 0
+    cells_reused: int = 0
+    similarity_rows_recomputed: int = 0
+    presence_cols_updated: int = 0
+    full_refresh: bool = False
+
+
+class IncrementalSuitability:
+    """按谱系编码对齐的适宜度中间结果缓存"""
+
+    def __init__(self, env_channels: Dict[str, int]):
+        self._channels = [env_channels[key] for key in _ENV_KEYS]
+        self.stats = SuitabilityCacheStats()
+        self.clear()
+
+    def clear(self) -> None:
+        self._cfg_key: tuple | None = None
+        self._codes: List[str] = []
+        self._row_keys: List[bytes] = []
+        self._env: np.ndarray | None = None          # (5, T) 使用到的环境通道
+        self._base: np.ndarray | None = None         # (S, T) 基础适宜度
+        self._features: np.ndarray | None = None     # (S, 8) 生态位特征
+        self._similarity: np.ndarray | None = None   # (S, S)
+        self._similarity_prev: np.ndarray | None = None
+        self._trophic: np.ndarray | None = None      # (S,)
+        self._presence: np.ndarray | None = None     # (S, T) float64 0/1
+        self._competitors: np.ndarray | None = None  # (S, T) 同营养级竞争者数
+        self._overlap: np.ndarray | None = None      # (S, T) 生态位重叠和
+        self._calls_since_refresh = 0
+
+    # ========================================================================
+    # 主接口
+    # ========================================================================
+
+    def compute(
+        self,
+        codes: Sequence[str],
+        traits_ext: np.ndarray,
+        features: np.ndarray,
+        trophic_levels: np.ndarray,
+        env_tensor: np.ndarray,
+        pop_tensor: np.ndarray,
+        habitat_mask: np.ndarray,
+        cfg: dict,
+    ) -> tuple[np.ndarray, np.ndarray, IncrementalUpdate]:
+        """计算增强适宜度 (S, H, W)，返回 (适宜度, 生态位相似度, 更新范围)"""
+        codes = list(codes)
+        S = len(codes)
+        _, H, W = env_tensor.shape
+        T = H * W
+        update = IncrementalUpdate()
+
+        cfg_key = tuple(sorted((k, v) for k, v in cfg.items()))
+        if cfg_key != self._cfg_key or self._env is None or self._env.shape[1] != T:
+            self.clear()
+            self._cfg_key = cfg_key
+        refresh_due = self._calls_since_refresh >= FULL_REFRESH_INTERVAL
+        self._calls_since_refresh += 1
+
+        env = env_tensor[self._channels].reshape(5, T).astype(np.float32)
+        old_index = {code: i for i, code in enumerate(self._codes)}
+        same_order = codes == self._codes
+
+        base = self._update_base(codes, old_index, traits_ext, env, cfg, update)
+        similarity, changed = self._update_similarity(codes, old_index, features, update)
+        if same_order and self._trophic is not None:
+            changed = changed | (self._trophic != trophic_levels)
+
+        presence = (pop_tensor.reshape(S, T) > 0).astype(np.float64)
+        same_trophic = (
+            np.abs(trophic_levels[:, None] - trophic_levels[None, :]) <= cfg["trophic_tolerance"]
+        ).astype(np.float64)
+        incremental = same_order and not refresh_due and self._presence is not None
+        if incremental:
+            moved = np.flatnonzero((presence != self._presence).any(axis=0))
+            K = np.flatnonzero(changed)
+            incremental = K.size * 2 <= S and moved.size * 2 <= T
+        if incremental:
+            old_same_trophic = (
+                np.abs(self._trophic[:, None] - self._trophic[None, :]) <= cfg["trophic_tolerance"]
+            ).astype(np.float64)
+            competitors = _update_pair_sum(self._competitors, old_same_trophic, same_trophic, self._presence, presence, K, moved)
+            overlap = _update_pair_sum(self._overlap, self._similarity_prev, similarity, self._presence, presence, K, moved)
+            update.presence_cols_updated = int(moved.size)
+        else:
+            competitors = same_trophic @ presence - presence
+            overlap = similarity.astype(np.float64) @ presence - presence
+            update.presence_cols_updated = T
+            update.full_refresh = self._presence is not None
+            self._calls_since_refresh = 0
+
+        crowding = np.maximum(
+            1.0 - cfg["max_crowding_penalty"],
+            1.0 / (1.0 + competitors * cfg["crowding_penalty_per_species"]),
+        )
+        split = np.maximum(cfg["min_split_factor"], 1.0 / (1.0 + overlap * cfg["split_coefficient"]))
+        result = np.clip(base * crowding * split, 0.0, 1.0).astype(np.float32)
+        result[habitat_mask.reshape(S, T) < 0.5] = 0.0
+
+        self._codes = codes
+        self._trophic = trophic_levels.copy()
+        self._presence = presence
+        self._competitors = competitors
+        self._overlap = overlap
+        self._record(update, S, T)
+        return result.reshape(S, H, W), similarity, update
+
+    # ========================================================================
+    # 基础适宜度：按行（物种特质）/列（地块环境）复用
+    # ========================================================================
+
+    def _update_base(
+        self,
+        codes: List[str],
+        old_index: Dict[str, int],
+        traits_ext: np.ndarray,
+        env: np.ndarray,
+        cfg: dict,
+        update: IncrementalUpdate,
+    ) -> np.ndarray:
+        S, T = len(codes), env.shape[1]
+        keys = [row.tobytes() for row in traits_ext]
+        base = np.empty((S, T), dtype=np.float32)
+
+        src = np.full(S, -1, dtype=np.int64)
+        if self._base is not None:
+            for i, (code, key) in enumerate(zip(codes, keys)):
+                j = old_index.get(code)
+                if j is not None and self._row_keys[j] == key:
+                    src[i] = j
+        hit = np.flatnonzero(src >= 0)
+        miss = np.flatnonzero(src < 0)
+
+        if hit.size:
+            base[hit] = self._base[src[hit]]
+            cols = np.flatnonzero((env != self._env).any(axis=0))
+            if cols.size:
+                base[np.ix_(hit, cols)] = base_suitability(traits_ext[hit], env[:, cols], cfg)
+            update.cols_recomputed = int(cols.size)
+            update.cells_reused = int(hit.size * (T - cols.size))
+        if miss.size:
+            base[miss] = base_suitability(traits_ext[miss], env, cfg)
+        update.rows_recomputed = int(miss.size)
+
+        self._base = base
+        self._row_keys = keys
+        self._env = env
+        return base
+
+    # ========================================================================
+    # 生态位相似度：只重算特征变化的行/列
+    # ========================================================================
+
+    def _update_similarity(
+        self,
+        codes: List[str],
+        old_index: Dict[str, int],
+        features: np.ndarray,
+        update: IncrementalUpdate,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """返回 (相似度矩阵, 行是否变化)"""
+        S = len(codes)
+        src = np.full(S, -1, dtype=np.int64)
+        if self._similarity is not None:
+            for i, code in enumerate(codes):
+                j = old_index.get(code)
+                if j is not None and np.array_equal(self._features[j], features[i]):
+                    src[i] = j
+        keep = np.flatnonzero(src >= 0)
+        redo = np.flatnonzero(src < 0)
+
+        similarity = np.empty((S, S), dtype=np.float32)
+        if keep.size:
+            similarity[np.ix_(keep, keep)] = self._similarity[np.ix_(src[keep], src[keep])]
+        if redo.size:
+            rows = niche_similarity_rows(features[redo], features)
+            similarity[redo] = rows
+            similarity[:, redo] = rows.T
+            similarity[redo, redo] = 1.0
+        update.similarity_rows_recomputed = int(redo.size)
+
+        # 竞争项的增量修正需要上一轮（按当前物种顺序对齐的）相似度矩阵
+        self._similarity_prev = self._similarity if self._similarity is not None and codes == self._codes else None
+        self._similarity = similarity
+        self._features = features.copy()
+        return similarity, src < 0
+
+    def _record(self, update: IncrementalUpdate, S: int, T: int) -> None:
+        stats = self.stats
+        stats.calls += 1
+        stats.cells_total += S * T
+        stats.cells_reused += update.cells_reused
+        stats.rows_total += S
+        stats.rows_reused += S - update.rows_recomputed
+        stats.cols_recomputed += update.cols_recomputed
+        stats.similarity_rows_recomputed += update.similarity_rows_recomputed
+        stats.presence_cols_updated += update.presence_cols_updated
+        stats.full_refreshes += int(update.full_refresh)
+
+
+# ============================================================================
+# 逐项公式（与 Taichi 内核一致）
+# ============================================================================
+
+def base_suitability(traits_ext: np.ndarray, env: np.ndarray, cfg: dict) -> np.ndarray:
+    """环境五项加权 + 专化度权衡 (S', T')
+
+    Args:
+        traits_ext: (S', 6) 耐寒、耐热、耐旱、耐盐、光照需求、专化度
+        env: (5, T') 温度、湿度、资源、盐度、光照
+    """
+    cold, heat, drought, salt, light_req, specialization = (traits_ext[:, k, None] for k in range(6))
+    temp, humidity, resource, salinity, light = env
+
+    optimal_temp = ((15.0 + (heat - cold) * 2.0) - 10.0) / 40.0
+    tolerance = (cold + heat) * cfg["temp_tolerance_coef"] / 80.0
+    temp_diff = np.abs(temp - optimal_temp)
+    temp_score = np.where(
+        temp_diff <= tolerance,
+        1.0,
+        np.maximum(0.0, 1.0 - (temp_diff - tolerance) * cfg["temp_penalty_rate"] * 10.0),
+    )
+    humidity_score = np.maximum(0.0, 1.0 - np.abs(humidity - (1.0 - drought * 0.08)) * cfg["humidity_penalty_rate"])
+    salinity_score = np.maximum(0.0, 1.0 - np.abs(salinity - salt * 0.1) * cfg["salinity_penalty_rate"])
+    light_score = np.maximum(0.0, 1.0 - np.abs(light - light_req * 0.1) * cfg["light_penalty_rate"])
+    resource_score = np.minimum(1.0, resource / cfg["resource_threshold"])
+
+    base = (
+        temp_score * cfg["weight_temperature"]
+        + humidity_score * cfg["weight_humidity"]
+        + salinity_score * cfg["weight_salinity"]
+        + light_score * cfg["weight_light"]
+        + resource_score * cfg["weight_resources"]
+    )
+    threshold = cfg["generalist_threshold"]
+    penalty_base = cfg["generalist_penalty_base"]
+    penalty = np.where(
+        specialization < threshold,
+        penalty_base + (1.0 - penalty_base) * (specialization / threshold),
+        1.0,
+    )
+    return (base * penalty).astype(np.float32)
+
+
+def specialization(traits: np.ndarray, trait_count: int = 5) -> np.ndarray:
+    """专化度：前 trait_count 个特质的方差 → 1 - exp(-var / 8)"""
+    variance = traits[:, :trait_count].astype(np.float32).var(axis=1)
+    return np.clip(1.0 - np.exp(-variance / 8.0), 0.0, 1.0).astype(np.float32)
+
+
+def niche_similarity_rows(rows: np.ndarray, features: np.ndarray) -> np.ndarray:
+    """rows 中各物种与全部物种的生态位相似度 (R, S)：加权欧氏距离的高斯核"""
+    diff = rows[:, None, :] - features[None, :, :]
+    sq_dist = (diff * diff * NICHE_FEATURE_WEIGHTS).sum(axis=2)
+    return np.exp(-sq_dist / 0.5).astype(np.float32)
+
+
+def historical_penalty(
+    suitability: np.ndarray,
+    historical_presence: np.ndarray,
+    novelty_penalty: float,
+    adaptation_bonus: float,
+) -> np.ndarray:
+    """历史适应惩罚：新环境打折、老环境加成"""
+    history = historical_presence.astype(np.float32)
+    adjustment = np.where(
+        history < 0.1,
+        novelty_penalty,
+        np.where(history > 0.8, adaptation_bonus, novelty_penalty + (adaptation_bonus - novelty_penalty) * history),
+    )
+    adjusted = np.clip(suitability * adjustment, 0.0, 1.0)
+    return np.where(suitability <= 0.01, 0.0, adjusted).astype(np.float32)
+
+
+def _update_pair_sum(
+    previous: np.ndarray,
+    old_pairs: np.ndarray | None,
+    new_pairs: np.ndarray,
+    old_presence: np.ndarray,
+    presence: np.ndarray,
+    K: np.ndarray,
+    moved: np.ndarray,
+) -> np.ndarray:
+    """增量更新 X = A @ P - P（A 对角为 1）
+
+    1. A 的第 K 行/列变化（P 仍为上一轮）：K 行整行重算，其余行加 (ΔA[:, K]) @ P[K]
+    2. P 的 moved 列变化：这些列整列重算
+    """
+    result = previous.copy()
+    if K.size:
+        if old_pairs is None:
+            result = new_pairs.astype(np.float64) @ old_presence - old_presence
+        else:
+            others = np.setdiff1d(np.arange(result.shape[0]), K, assume_unique=True)
+            delta = new_pairs[np.ix_(others, K)].astype(np.float64) - old_pairs[np.ix_(others, K)]
+            result[others] += delta @ old_presence[K]
+            result[K] = new_pairs[K].astype(np.float64) @ old_presence - old_presence[K]
+    if moved.size:
+        cols = presence[:, moved]
+        result[:, moved] = new_pairs.astype(np.float64) @ cols - cols
+    return result
@@ -1,82 +1,139 @@
 """
 Taichi 内核定义模块
 
-此模块在导入时初始化 Taichi 并定义所有内核。
-支持多种 GPU 后端：
+此模块定义所有 Taichi 内核；导入时不会初始化设备。
+设备初始化延迟到 _ensure_taichi_init()（由 compute_backend.load_kernels /
+get_taichi_kernels 在首次使用时调用），预编译由 compute_backend.start_kernel_warmup
+在后台线程执行。
+支持多种后端：
 - NVIDIA: CUDA (首选)
 - AMD: Vulkan
 - Intel: Vulkan
 - Apple: Metal (macOS)
+- CPU: ti.cpu（无 GPU 的批处理/CI 节点，多核 LLVM 并行）
+
+后端偏好由 compute_backend 模块解析（TENSOR_COMPUTE_BACKEND / tensor_balance.yaml）。
+纯 NumPy 实现见 numpy_kernels.py（函数名与参数顺序与本模块一致）。
 
 如果 Taichi 不可用，则此模块的导入会失败。
 """
 
 import logging
+import threading
+
 import taichi as ti
 
+from .kernel_metrics import taichi_profiler_enabled
+
 logger = logging.getLogger(__name__)
 
-# 初始化 Taichi（在模块级别，但只初始化一次）
+# Taichi 运行时状态（首次使用时初始化，只初始化一次）
+_taichi_init_lock = threading.RLock()
 _taichi_initialized = False
 _taichi_backend = None
+_taichi_init_error: Exception | None = None
 
-def _ensure_taichi_init():
-    """确保 Taichi 只初始化一次，支持多 GPU 厂商
+# GPU 后端按优先级排列
+_GPU_BACKENDS = [
+    ("cuda", "cuda", "NVIDIA CUDA"),
+    ("vulkan", "vulkan", "Vulkan (AMD/Intel/NVIDIA)"),
+    ("metal", "metal", "Apple Metal"),
+    ("opengl", "opengl", "OpenGL"),
+]
+_CPU_BACKEND = ("cpu", "cpu", "CPU (LLVM)")
+
+
+def _ensure_taichi_init(arch: str | None = None):
+    """确保 Taichi 只初始化一次，支持多 GPU 厂商及 CPU 后端
     
-    尝试顺序：
+    尝试顺序（arch="auto"）：
     1. CUDA (NVIDIA 最优)
     2. Vulkan (AMD/Intel/NVIDIA 通用)
     3. Metal (macOS)
     4. OpenGL (兼容层)
     5. CPU (最后回退)
+    
+    Args:
+        arch: auto/gpu/cpu，None 时读取默认计算后端配置；
+              numpy 视为 auto（有调用方直接使用 Taichi 内核时仍需初始化）
+    
+    Returns:
+        实际使用的后端名称（cuda/vulkan/metal/opengl/cpu）
     """
-    global _taichi_initialized, _taichi_backend
+    from .compute_backend import normalize_compute_backend, get_default_compute_backend
+    preference = normalize_compute_backend(arch) if arch else get_default_compute_backend()
+    
+    with _taichi_init_lock:
+        return _init_taichi_locked(preference)
+
+
+def _init_taichi_locked(preference: str) -> str:
+    """在 _taichi_init_lock 内执行实际初始化"""
+    global _taichi_initialized, _taichi_backend, _taichi_init_error
     
     if _taichi_initialized:
+        if _taichi_backend is None:
+            raise RuntimeError(f"Taichi 初始化失败: {_taichi_init_error}")
+        if preference == "gpu" and _taichi_backend == "cpu":
+            raise RuntimeError("Taichi 已在 CPU 后端初始化，无法切换到 GPU")
         return _taichi_backend
     
-    # 按优先级尝试各后端
-    backends = [
-        ("cuda", ti.cuda, "NVIDIA CUDA"),
-        ("vulkan", ti.vulkan, "Vulkan (AMD/Intel/NVIDIA)"),
-        ("metal", ti.metal, "Apple Metal"),
-        ("opengl", ti.opengl, "OpenGL"),
-    ]
+    if preference == "cpu":
+        candidates = [_CPU_BACKEND]
+    elif preference == "gpu":
+        candidates = list(_GPU_BACKENDS)
+    else:
+        candidates = list(_GPU_BACKENDS) + [_CPU_BACKEND]
     
-    for backend_name, backend_arch, backend_desc in backends:
+    for backend_name, arch_attr, backend_desc in candidates:
+        backend_arch = getattr(ti, arch_attr, None)
+        if backend_arch is None:
+            continue
         try:
-            ti.init(
-                arch=backend_arch, 
-                default_fp=ti.f32, 
+            init_kwargs = dict(
+                arch=backend_arch,
+                default_fp=ti.f32,
                 offline_cache=True,
-                # 对于 Vulkan，设置更宽松的内存限制
-                device_memory_fraction=0.7 if backend_name == "vulkan" else 0.8,
             )
+            if taichi_profiler_enabled():
+                init_kwargs["kernel_profiler"] = True
+            if backend_name != "cpu":
+                # 对于 Vulkan，设置更宽松的内存限制
+                init_kwargs["device_memory_fraction"] = 0.7 if backend_name == "vulkan" else 0.8
+            ti.init(**init_kwargs)
+            actual = ti.lang.impl.current_cfg().arch
+            # Taichi 在 GPU 不可用时会静默回退到 CPU，这里按实际架构记录
+            if backend_name != "cpu" and actual in (ti.x64, ti.arm64):
+                if preference == "gpu":
+                    logger.debug(f"[Taichi] {backend_desc} 不可用（已回退到 CPU）")
+                    continue
+                backend_name, backend_desc = _CPU_BACKEND[0], _CPU_BACKEND[2]
             _taichi_initialized = True
             _taichi_backend = backend_name
             logger.info(f"[Taichi] 初始化成功: {backend_desc}")
             return backend_name
         except Exception as e:
+            _taichi_init_error = e
             logger.debug(f"[Taichi] {backend_desc} 初始化失败: {e}")
             continue
     
-    # 所有 GPU 后端失败，抛出错误（GPU-only 模式）
     _taichi_initialized = True  # 防止重复尝试
     _taichi_backend = None
-    raise RuntimeError(
-        "Taichi GPU 初始化失败。支持的 GPU:\n"
-        "  - NVIDIA: 需要 CUDA 驱动\n"
-        "  - AMD: 需要 Vulkan 驱动 (AMD Software/ROCm)\n"
-        "  - Intel: 需要 Vulkan 驱动 (Intel Graphics Driver)\n"
-        "请确保已安装对应的 GPU 驱动程序。"
-    )
+    if preference == "gpu":
+        _taichi_init_error = RuntimeError("无可用 GPU 后端")
+        raise RuntimeError(
+            "Taichi GPU 初始化失败。支持的 GPU:\n"
+            "  - NVIDIA: 需要 CUDA 驱动\n"
+            "  - AMD: 需要 Vulkan 驱动 (AMD Software/ROCm)\n"
+            "  - Intel: 需要 Vulkan 驱动 (Intel Graphics Driver)\n"
+            "请确保已安装对应的 GPU 驱动程序，或设置 TENSOR_COMPUTE_BACKEND=cpu/numpy。"
+        )
+    raise RuntimeError(f"Taichi 初始化失败（含 CPU 后端）: {_taichi_init_error}")
 
 def get_taichi_backend() -> str | None:
-    """获取当前 Taichi 后端名称"""
+    """获取当前 Taichi 后端名称（未初始化时为 None）"""
     return _taichi_backend
 
-_ensure_taichi_init()
-
 
 @ti.kernel
 def kernel_mortality(
@@ -1929,19 +1986,21 @@ def kernel_trait_diffusion(
 
 
 # ============================================================================
-# 预编译所有内核（在主线程中）
+# 预编译所有内核
 # ============================================================================
 
 def _precompile_all_kernels():
-    """在模块加载时预编译所有 Taichi 内核
-    
-    Taichi 内核在首次调用时才会编译，如果首次调用发生在非主线程，
-    会触发 "Assertion failure: std::this_thread::get_id() == main_thread_id_" 错误。
+    """预编译所有生态内核
     
-    通过在模块加载时（主线程）用小数组调用所有内核，可以提前完成编译。
+    Taichi 内核在首次调用时才会编译。由 compute_backend.start_kernel_warmup
+    在后台预热线程中调用（与 _ensure_taichi_init 同一线程，持有初始化锁，
+    其他线程的首次初始化会等待预编译完成），用小数组调用所有内核以提前完成编译。
     """
-    global _taichi_backend
-    
+    with _taichi_init_lock:
+        _precompile_all_kernels_locked()
+
+
+def _precompile_all_kernels_locked():
     if _taichi_backend is None:
         logger.warning("[Taichi] 跳过预编译：GPU 后端未初始化")
         return
@@ -2026,6 +2085,11 @@ def _precompile_all_kernels():
         )
         kernel_trait_mortality_v2(pop, env, traits, suitability, pressure, scale_arr, result_3d, 0.05, 1.0)
         
+        # 融合步进辅助内核
+        kernel_clamp(result_3d, 0.01, 0.95, result_3d)
+        kernel_overcapacity_clamp(pop, capacity, 0.5, result_3d)
+        kernel_clamp_net_change(pop, suitability, 0.6, 0.6, result_3d)
+        
         # 同步 Taichi 运行时
         ti.sync()
         
@@ -2035,10 +2099,6 @@ def _precompile_all_kernels():
         logger.warning(f"[Taichi] 内核预编译失败（将在首次使用时编译）: {e}")
 
 
-# 在模块加载时预编译
-_precompile_all_kernels()
-
-
 # ============================================================================
 # 竞争计算内核 - GPU 加速的亲缘竞争计算
 # ============================================================================
@@ -3386,3 +3446,46 @@ def kernel_trait_mortality_v2(
         result[s, i, j] = ti.max(0.02, ti.min(0.95, total_mortality))
 
 
+# ============================================================================
+# 融合步进辅助内核 - 阶段之间的逐元素后处理，使数组在回合内常驻设备
+# ============================================================================
+
+@ti.kernel
+def kernel_clamp(
+    values: ti.types.ndarray(dtype=ti.f32, ndim=3),
+    lo: ti.f32,
+    hi: ti.f32,
+    result: ti.types.ndarray(dtype=ti.f32, ndim=3),
+):
+    """逐元素钳制到 [lo, hi]（result 可与 values 为同一数组）"""
+    for s, i, j in ti.ndrange(values.shape[0], values.shape[1], values.shape[2]):
+        result[s, i, j] = ti.max(lo, ti.min(hi, values[s, i, j]))
+
+
+@ti.kernel
+def kernel_overcapacity_clamp(
+    pop: ti.types.ndarray(dtype=ti.f32, ndim=3),
+    overcapacity: ti.types.ndarray(dtype=ti.f32, ndim=2),
+    clamp: ti.f32,
+    result: ti.types.ndarray(dtype=ti.f32, ndim=3),
+):
+    """超容量地块（overcapacity > 0）的净增长乘以 clamp（原地修改 result）"""
+    for s, i, j in ti.ndrange(pop.shape[0], pop.shape[1], pop.shape[2]):
+        if overcapacity[i, j] > 0:
+            p = pop[s, i, j]
+            result[s, i, j] = ti.max(0.0, p + (result[s, i, j] - p) * clamp)
+
+
+@ti.kernel
+def kernel_clamp_net_change(
+    pop: ti.types.ndarray(dtype=ti.f32, ndim=3),
+    new_pop: ti.types.ndarray(dtype=ti.f32, ndim=3),
+    max_growth_ratio: ti.f32,
+    max_decline_ratio: ti.f32,
+    result: ti.types.ndarray(dtype=ti.f32, ndim=3),
+):
+    """净变化钳制：new_pop - pop 限制在 [-pop·decline, pop·growth]，结果非负"""
+    for s, i, j in ti.ndrange(pop.shape[0], pop.shape[1], pop.shape[2]):
+        p = pop[s, i, j]
+        change = ti.max(-p * max_decline_ratio, ti.min(p * max_growth_ratio, new_pop[s, i, j] - p))
+        result[s, i, j] = ti.max(0.0, p + change)
@@ -0,0 +1,98 @@
+"""
+缓冲区复用测试
+
+- BufferArena 的复用/扩容/零拷贝透传
+- TensorEcologyEngine 稳态回合不再分配中间缓冲区，且复用不影响结果
+"""
+
+import numpy as np
+import pytest
+
+from ..buffers import BufferArena
+from ..ecology import EcologyConfig, TensorEcologyEngine
+
+S, H, W = 5, 16, 20
+
+
+@pytest.fixture
+def rng() -> np.random.Generator:
+    return np.random.default_rng(20240615)
+
+
+class TestBufferArena:
+    def test_reuse_and_growth(self):
+        arena = BufferArena()
+        a = arena.zeros("x", (4, 3, 3))
+        b = arena.zeros("x", (3, 3, 3))  # 物种减少：复用
+        assert arena.stats.allocations == 1
+        assert arena.stats.reuses == 1
+        assert np.shares_memory(a, b)
+        assert b.flags.c_contiguous and not b.any()
+
+        arena.empty("x", (5, 3, 3))  # 物种增加：按余量扩容
+        assert arena.stats.allocations == 2
+        arena.empty("x", (6, 3, 3))  # 仍在余量内
+        assert arena.stats.allocations == 2
+
+    def test_as_float32_zero_copy(self):
+        arena = BufferArena()
+        src = np.ones((2, 3), dtype=np.float32)
+        assert arena.as_float32(src) is src
+        assert arena.stats.input_copies == 0
+
+        converted = arena.as_float32(np.ones((2, 3), dtype=np.float64))
+        assert converted.dtype == np.float32
+        assert arena.as_float32(src.T).flags.c_contiguous
+        assert arena.stats.input_copies == 2
+
+
+class TestEngineArena:
+    @pytest.mark.parametrize("layout", ["dense", "sparse"])
+    def test_steady_state_allocates_nothing(self, rng, layout):
+        pop = (rng.random((S, H, W)) * 150).astype(np.float32)
+        pop[rng.random((S, H, W)) < (0.5 if layout == "dense" else 0.98)] = 0
+        env = rng.random((7, H, W)).astype(np.float32)
+        params = (rng.random((S, 8)) * 10).astype(np.float32)
+        prefs = rng.random((S, 7)).astype(np.float32)
+        traits = rng.uniform(1, 10, (S, 14)).astype(np.float32)
+        traits[:, 8:11] = rng.random((S, 3))
+        traits[:, 12:] = rng.random((S, 2))
+        kwargs = dict(turn_index=60, trophic_levels=np.ones(S, dtype=np.float32), species_traits=traits)
+
+        engine = TensorEcologyEngine(EcologyConfig(layout=layout), backend="numpy")
+        first = engine.process_ecology(pop, env, params, prefs, **kwargs)
+        first_pop = first.pop.copy()
+        first_mortality = first.mortality_rates.copy()
+        second = engine.process_ecology(pop, env, params, prefs, **kwargs)
+
+        assert second.metrics.buffer_allocations == 0
+        # 只允许 (S,) 级别的派生量转换，不得拷贝整张量输入
+        assert second.metrics.input_bytes_copied < pop.nbytes
+        if layout == "dense":
+            assert first.metrics.buffer_allocations > 0
+            assert second.metrics.buffer_reuses > 0
+        # 复用的缓冲区不得泄漏到结果中
+        np.testing.assert_array_equal(first.pop, first_pop)
+        np.testing.assert_array_equal(second.pop, first_pop)
+        np.testing.assert_array_equal(first.mortality_rates, first_mortality)
+        assert not np.shares_memory(first.mortality_rates, second.mortality_rates)
+
+        fresh = TensorEcologyEngine(EcologyConfig(layout=layout), backend="numpy").process_ecology(
+            pop, env, params, prefs, **kwargs
+        )
+        np.testing.assert_array_equal(second.pop, fresh.pop)
+
+    def test_species_count_change(self, rng):
+        """物种数减少时复用，结果与新引擎一致"""
+        env = rng.random((7, H, W)).astype(np.float32)
+        engine = TensorEcologyEngine(EcologyConfig(layout="dense"), backend="numpy")
+        for s in (S, S - 2):
+            pop = (rng.random((s, H, W)) * 150).astype(np.float32)
+            params = (rng.random((s, 8)) * 10).astype(np.float32)
+            prefs = rng.random((s, 7)).astype(np.float32)
+            result = engine.process_ecology(pop, env, params, prefs, turn_index=60)
+            fresh = TensorEcologyEngine(EcologyConfig(layout="dense"), backend="numpy").process_ecology(
+                pop, env, params, prefs, turn_index=60
+            )
+            np.testing.assert_array_equal(result.pop, fresh.pop)
+        assert result.metrics.buffer_allocations == 0
@@ -0,0 +1,98 @@
+"""
+物种分块测试
+
+- chunking="on" 与整体计算（staged）结果一致：块大小整除/不整除物种数、早期多轮扩散
+- 按内存预算自动选择块大小；预算充足时 auto 不分块
+- 无特质矩阵时回退为整体计算
+"""
+
+import numpy as np
+import pytest
+
+from .. import chunked_ecology
+from ..ecology import (
+    CHUNKING_AUTO,
+    CHUNKING_OFF,
+    CHUNKING_ON,
+    STEPPING_FUSED,
+    EcologyConfig,
+    TensorEcologyEngine,
+)
+
+S, H, W = 7, 12, 16
+RTOL = 1e-4
+ATOL = 1e-3
+
+
+@pytest.fixture
+def world():
+    rng = np.random.default_rng(20240905)
+    pop = (rng.random((S, H, W)) * 150).astype(np.float32)
+    pop[rng.random((S, H, W)) < 0.5] = 0
+    env = rng.random((7, H, W)).astype(np.float32)
+    params = (rng.random((S, 8)) * 10).astype(np.float32)
+    prefs = rng.random((S, 7)).astype(np.float32)
+    traits = rng.uniform(1, 10, (S, 14)).astype(np.float32)
+    traits[:, 8:11] = rng.random((S, 3))
+    traits[:, 12:] = rng.random((S, 2))
+    trophic = np.array([1.0, 1.0, 2.0, 2.0, 3.0, 1.5, 2.5], dtype=np.float32)
+    overlay = rng.random((2, H, W)).astype(np.float32)
+    return pop, env, params, prefs, traits, trophic, overlay
+
+
+def _run(world, turn_index, use_traits=True, **config):
+    pop, env, params, prefs, traits, trophic, overlay = world
+    engine = TensorEcologyEngine(EcologyConfig(layout="dense", **config), backend="numpy")
+    kwargs = {"species_traits": traits} if use_traits else {}
+    return engine.process_ecology(
+        pop, env, params, prefs, turn_index=turn_index, trophic_levels=trophic,
+        pressure_overlay=overlay, decline_streaks=np.arange(S) % 3, **kwargs,
+    )
+
+
+class TestChunkedParity:
+    @pytest.mark.parametrize("chunk", [1, 3, S])
+    @pytest.mark.parametrize("turn_index", [5, 80])  # 早期多轮扩散 / 后期单轮
+    def test_matches_dense(self, world, chunk, turn_index):
+        dense = _run(world, turn_index, chunking=CHUNKING_OFF)
+        chunked = _run(world, turn_index, chunking=CHUNKING_ON, chunk_species=chunk)
+
+        assert dense.metrics.chunks == 0
+        assert chunked.metrics.chunks == -(-S // chunk) and chunked.metrics.chunk_species == chunk
+        np.testing.assert_allclose(chunked.pop, dense.pop, rtol=RTOL, atol=ATOL)
+        np.testing.assert_allclose(chunked.mortality_rates, dense.mortality_rates, rtol=RTOL, atol=ATOL)
+        np.testing.assert_allclose(chunked.death_counts, dense.death_counts, atol=1)
+        assert chunked.migrated_species == dense.migrated_species
+        assert chunked.metrics.avg_mortality_rate == pytest.approx(dense.metrics.avg_mortality_rate, rel=1e-4)
+
+    def test_precedes_fused_and_not_aliased(self, world):
+        first = _run(world, 60, chunking=CHUNKING_ON, chunk_species=2, stepping=STEPPING_FUSED)
+        assert first.metrics.chunks == 4
+        snapshot = first.pop.copy()
+        _run(world, 60, chunking=CHUNKING_ON, chunk_species=2)
+        np.testing.assert_array_equal(first.pop, snapshot)
+
+
+class TestChunkSelection:
+    def test_choose_chunk_size(self):
+        plane = H * W * 4
+        resident = S * plane * chunked_ecology.RESIDENT_PLANES_PER_SPECIES
+        per_species = plane * chunked_ecology.WORKING_PLANES_PER_SPECIES
+        assert chunked_ecology.choose_chunk_size(S, H, W, resident + 3 * per_species) == 3
+        assert chunked_ecology.choose_chunk_size(S, H, W, resident + 100 * per_species) == S
+        # 预算连常驻数组都不够：退化为最小块
+        assert chunked_ecology.choose_chunk_size(S, H, W, 0, min_chunk=2) == 2
+        assert [(c.start, c.stop) for c in chunked_ecology.species_chunks(S, 3)] == [(0, 3), (3, 6), (6, 7)]
+
+    def test_auto_uses_budget(self, world):
+        roomy = _run(world, 80, chunking=CHUNKING_AUTO, chunk_memory_budget_bytes=1 << 40)
+        assert roomy.metrics.chunks == 0 and roomy.metrics.memory_budget_bytes == 1 << 40
+
+        budget = chunked_ecology.chunked_working_set(S, H, W, 2)
+        tight = _run(world, 80, chunking=CHUNKING_AUTO, chunk_memory_budget_bytes=budget)
+        assert tight.metrics.chunk_species == 2 and tight.metrics.backend == "numpy"
+        np.testing.assert_allclose(tight.pop, roomy.pop, rtol=RTOL, atol=ATOL)
+
+    def test_legacy_path_not_chunked(self, world):
+        result = _run(world, 80, use_traits=False, chunking=CHUNKING_ON, chunk_species=2)
+        assert result.metrics.chunks == 0
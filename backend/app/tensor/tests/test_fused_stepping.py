@@ -0,0 +1,127 @@
+"""
+融合步进测试
+
+- stepping="fused" 与 staged 路径结果一致（特质/偏好两条路径，早期多轮扩散）
+- NumPy 后端下设备数组即主机数组，无传输
+- Taichi CPU 后端下只在回合开始/迁徙/结束时传输
+- TENSOR_ECOLOGY_STEPPING 配置经 get_ecology_engine 选中融合路径
+"""
+
+import numpy as np
+import pytest
+
+from .. import numpy_kernels
+from ..buffers import DeviceArena
+from ..ecology import (
+    STEPPING_FUSED,
+    STEPPING_STAGED,
+    EcologyConfig,
+    TensorEcologyEngine,
+    get_ecology_engine,
+    reset_ecology_engine,
+)
+
+S, H, W = 6, 14, 18
+RTOL = 1e-4
+ATOL = 1e-3
+
+
+@pytest.fixture
+def world():
+    rng = np.random.default_rng(20240621)
+    pop = (rng.random((S, H, W)) * 150).astype(np.float32)
+    pop[rng.random((S, H, W)) < 0.5] = 0
+    env = rng.random((7, H, W)).astype(np.float32)
+    params = (rng.random((S, 8)) * 10).astype(np.float32)
+    prefs = rng.random((S, 7)).astype(np.float32)
+    traits = rng.uniform(1, 10, (S, 14)).astype(np.float32)
+    traits[:, 8:11] = rng.random((S, 3))
+    traits[:, 12:] = rng.random((S, 2))
+    trophic = np.array([1.0, 1.0, 2.0, 2.0, 3.0, 1.5], dtype=np.float32)
+    return pop, env, params, prefs, traits, trophic
+
+
+def _run(backend, stepping, world, use_traits, turn_index):
+    pop, env, params, prefs, traits, trophic = world
+    engine = TensorEcologyEngine(EcologyConfig(layout="dense", stepping=stepping), backend=backend)
+    kwargs = {"species_traits": traits} if use_traits else {}
+    return engine.process_ecology(
+        pop, env, params, prefs, turn_index=turn_index, trophic_levels=trophic, **kwargs
+    )
+
+
+def _assert_same(fused, staged):
+    np.testing.assert_allclose(fused.pop, staged.pop, rtol=RTOL, atol=ATOL)
+    np.testing.assert_allclose(fused.mortality_rates, staged.mortality_rates, rtol=RTOL, atol=ATOL)
+    np.testing.assert_allclose(fused.death_counts, staged.death_counts, atol=1)
+    assert fused.migrated_species == staged.migrated_species
+
+
+class TestFusedNumpy:
+    @pytest.mark.parametrize("use_traits", [False, True])
+    @pytest.mark.parametrize("turn_index", [5, 80])  # 早期多轮扩散 / 后期单轮
+    def test_matches_staged(self, world, use_traits, turn_index):
+        staged = _run("numpy", STEPPING_STAGED, world, use_traits, turn_index)
+        fused = _run("numpy", STEPPING_FUSED, world, use_traits, turn_index)
+        _assert_same(fused, staged)
+        assert fused.metrics.stepping == STEPPING_FUSED
+        assert staged.metrics.stepping == STEPPING_STAGED
+        assert fused.metrics.device_bytes_transferred == 0
+
+    def test_result_not_aliased(self, world):
+        pop, env, params, prefs, traits, trophic = world
+        engine = TensorEcologyEngine(EcologyConfig(layout="dense", stepping=STEPPING_FUSED), backend="numpy")
+        first = engine.process_ecology(pop, env, params, prefs, turn_index=60, species_traits=traits)
+        snapshot = first.pop.copy()
+        engine.process_ecology(pop * 0.5, env, params, prefs, turn_index=60, species_traits=traits)
+        np.testing.assert_array_equal(first.pop, snapshot)
+
+    def test_device_arena_passthrough(self):
+        arena = DeviceArena(numpy_kernels)
+        assert not arena.on_device
+        src = np.ones((2, 3, 4), dtype=np.float32)
+        assert arena.upload("x", src) is src
+        out = arena.download(src)
+        assert out is not src and np.array_equal(out, src)
+        assert arena.stats.uploads == 0
+
+
+class TestSteppingSetting:
+    @pytest.fixture(autouse=True)
+    def _reset_engine(self, monkeypatch):
+        monkeypatch.setenv("TENSOR_COMPUTE_BACKEND", "numpy")
+        reset_ecology_engine()
+        yield
+        reset_ecology_engine()
+
+    def test_setting_selects_fused(self, world, monkeypatch):
+        monkeypatch.setenv("TENSOR_ECOLOGY_STEPPING", "fused")
+        pop, env, params, prefs, traits, trophic = world
+        engine = get_ecology_engine()
+        result = engine.process_ecology(pop, env, params, prefs, turn_index=60, trophic_levels=trophic)
+        assert engine.config.stepping == STEPPING_FUSED
+        assert result.metrics.stepping == STEPPING_FUSED
+
+    @pytest.mark.parametrize("value", [None, "bogus"])
+    def test_default_and_unknown_stay_staged(self, monkeypatch, value):
+        if value is None:
+            monkeypatch.delenv("TENSOR_ECOLOGY_STEPPING", raising=False)
+        else:
+            monkeypatch.setenv("TENSOR_ECOLOGY_STEPPING", value)
+        assert get_ecology_engine().config.stepping == STEPPING_STAGED
+
+
+class TestFusedTaichi:
+    @pytest.fixture(autouse=True)
+    def _taichi(self):
+        tk = pytest.importorskip("app.tensor.taichi_hybrid_kernels")
+        tk._ensure_taichi_init("cpu")
+
+    @pytest.mark.parametrize("use_traits", [False, True])
+    def test_matches_staged(self, world, use_traits):
+        staged = _run("cpu", STEPPING_STAGED, world, use_traits, 5)
+        fused = _run("cpu", STEPPING_FUSED, world, use_traits, 5)
+        _assert_same(fused, staged)
+        # 下载：死亡率、扩散后种群、宜居度、最终种群
+        assert fused.metrics.device_downloads == 4
+        assert fused.metrics.device_bytes_transferred > 0
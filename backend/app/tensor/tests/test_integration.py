@@ -93,9 +93,10 @@ class TestTensorSystemIntegration:
         
         pop = np.zeros((2, 10, 10), dtype=np.float32)
         # SP001: 被山脉分成两部分
-        pop[0, :, :4] = 100.0  # 西侧
-        pop[0, :, 6:] = 100.0  # 东侧
+        pop[0, :, 1:4] = 100.0  # 西侧
+        pop[0, :, 6:9] = 100.0  # 东侧
         # 注意：中间 4:6 列没有种群（山脉阻隔）
+        # 地图东西边界相连，0 与 9 列也留空，避免两侧经边界连通
         
         species_params = np.array([
             [5.0, 5.0, 5.0, 5.0, 5.0],
@@ -0,0 +1,83 @@
+"""
+内核基准测试工具的测试（NumPy 后端，小尺寸）
+
+- 每个用例的参数都能被内核接受
+- NumPy 模块未实现的 v1 内核记为 unavailable，超出工作量上限记为跳过
+- JSON 往返与基线回归检测
+"""
+
+import json
+
+import numpy as np
+import pytest
+
+from ..kernel_bench import (
+    KERNEL_CASES,
+    BenchmarkReport,
+    SyntheticWorld,
+    compare_reports,
+    main,
+    run_benchmarks,
+    select_cases,
+)
+
+
+@pytest.fixture(scope="module")
+def report() -> BenchmarkReport:
+    return run_benchmarks(species=(3, 5), maps=((6, 10),), backend="numpy", repeat=2)
+
+
+class TestRunBenchmarks:
+    def test_every_case_measured(self, report):
+        assert len(report.results) == 2 * len(KERNEL_CASES)
+        assert report.backend == "numpy"
+        for r in report.results:
+            if r.skipped:
+                assert r.skipped == "unavailable"
+                continue
+            assert r.wall_ms > 0 and r.min_ms <= r.wall_ms
+            assert r.cells_per_s == pytest.approx(r.cells / (r.wall_ms / 1000))
+            assert r.peak_bytes >= 0 and r.input_bytes > 0
+        timed = {r.kernel for r in report.results if r.wall_ms is not None}
+        assert "kernel_advanced_diffusion_v2" in timed
+
+    def test_comparisons(self, report):
+        groups = {c["group"] for c in report.comparisons()}
+        # NumPy 模块同时实现了 v1/v2 的对照组
+        assert {"advanced_diffusion", "reproduction", "migration_decision"} <= groups
+
+    def test_work_budget(self):
+        cases = select_cases(["distance_weights"])
+        report = run_benchmarks(species=(4,), maps=((20, 30),), cases=cases, backend="numpy", max_work=1e5)
+        assert [r.skipped for r in report.results] == ["work budget"]
+
+    def test_world_deterministic(self):
+        a, b = SyntheticWorld(4, 6, 8), SyntheticWorld(4, 6, 8)
+        _ = b.suitability  # 生成顺序不影响取值
+        np.testing.assert_array_equal(a.pop, b.pop)
+        np.testing.assert_array_equal(a.suitability, b.suitability)
+
+
+class TestBaseline:
+    def test_roundtrip_and_regression(self, report, tmp_path):
+        path = tmp_path / "baseline.json"
+        report.save(path)
+        loaded = BenchmarkReport.load(path)
+        assert compare_reports(report, loaded, tolerance=0.0) == []
+
+        faster = BenchmarkReport.load(path)
+        target = next(r for r in faster.results if r.wall_ms is not None)
+        target.wall_ms /= 10
+        regressions = compare_reports(report, faster, tolerance=0.5)
+        assert [(r.key, r.metric) for r in regressions] == [(target.key, "wall_ms")]
+
+    def test_cli(self, tmp_path):
+        out = tmp_path / "bench.json"
+        baseline = tmp_path / "baseline.json"
+        argv = ["--backend", "numpy", "--species", "3", "--maps", "10x6", "--repeat", "1",
+                "--kernels", "*reproduction*", "--output", str(out)]
+        assert main(argv + ["--baseline", str(baseline), "--update-baseline"]) == 0
+        data = json.loads(out.read_text(encoding="utf-8"))
+        assert {r["kernel"] for r in data["results"]} == {"kernel_reproduction", "kernel_reproduction_v2"}
+        assert data["results"][0]["H"] == 6 and data["results"][0]["W"] == 10
+        assert main(argv + ["--baseline", str(baseline), "--tolerance", "1000"]) == 0
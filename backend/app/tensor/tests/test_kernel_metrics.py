@@ -0,0 +1,99 @@
+"""
+内核级计量测试
+
+- 代理只计量 kernel_* 调用，其他属性透传
+- GPU 设备按 NumPy 参数字节计传输，CPU/NumPy 后端不计
+- end_turn 归档回合、累计总计；Prometheus 文本与 JSON 历史
+- 生态引擎通过代理调用内核
+"""
+
+import types
+
+import numpy as np
+import pytest
+
+from ..ecology import CHUNKING_OFF, EcologyConfig, EcologyMetrics, TensorEcologyEngine
+from ..kernel_metrics import KernelProfiler, ProfiledKernels, get_kernel_profiler, reset_kernel_profiler
+
+
+def _fake_kernels():
+    def kernel_scale(src, out, factor):
+        out[:] = src * factor
+
+    return types.SimpleNamespace(kernel_scale=kernel_scale, helper=lambda: "helper", ti=None)
+
+
+@pytest.fixture
+def profiler():
+    return KernelProfiler(device_profiler=False)
+
+
+class TestProfiledKernels:
+    def test_counts_kernel_calls(self, profiler):
+        kernels = profiler.instrument(_fake_kernels(), "numpy")
+        src = np.ones((2, 3, 4), dtype=np.float32)
+        out = np.empty_like(src)
+        kernels.kernel_scale(src, out, 2.0)
+        kernels.kernel_scale(src, out, 3.0)
+
+        assert (out == 3.0).all()
+        assert kernels.helper() == "helper" and kernels.ti is None
+        assert profiler.instrument(kernels, "numpy") is kernels
+
+        profile = profiler.end_turn(7)
+        stats = profile.kernels["kernel_scale"]
+        assert stats.launches == 2 and stats.cells == 2 * 24
+        assert stats.bytes_transferred == 0
+        assert profile.turn_index == 7 and profile.launches == 2
+
+    def test_gpu_transfer_bytes(self, profiler):
+        kernels = profiler.instrument(_fake_kernels(), "cuda")
+        src = np.ones((5, 6), dtype=np.float32)
+        kernels.kernel_scale(src, np.empty_like(src), 1.0)
+        stats = profiler.end_turn().kernels["kernel_scale"]
+        # 两个 NumPy 数组参数各上传 + 回写一次
+        assert stats.bytes_transferred == 2 * 2 * src.nbytes
+
+    def test_turns_totals_and_export(self, profiler):
+        kernels = profiler.instrument(_fake_kernels(), "cpu")
+        src = np.ones((4, 4), dtype=np.float32)
+        for turn in range(3):
+            kernels.kernel_scale(src, np.empty_like(src), 1.0)
+            profiler.record_ecology(EcologyMetrics(mortality_time_ms=2.0, total_time_ms=5.0, backend="numpy"))
+            profiler.end_turn(turn)
+
+        assert profiler.turns == 3 and profiler.totals["kernel_scale"].launches == 3
+        history = profiler.get_history(limit=2)
+        assert [h["turn_index"] for h in history] == [1, 2]
+        assert history[-1]["ecology_stages_ms"]["mortality"] == 2.0
+        assert history[-1]["kernels"]["kernel_scale"]["cells"] == 16
+
+        text = profiler.to_prometheus()
+        assert "# TYPE tensor_kernel_launches_total counter" in text
+        assert 'tensor_kernel_launches_total{kernel="kernel_scale"} 3' in text
+        assert 'tensor_ecology_stage_seconds{stage="total"} 0.005' in text
+        assert text.endswith("\n")
+
+    def test_empty_export(self, profiler):
+        text = profiler.to_prometheus()
+        assert "tensor_turns_total 0" in text and "cells_per_second" not in text
+
+
+class TestEngineInstrumentation:
+    def test_ecology_engine_records_launches(self):
+        reset_kernel_profiler()
+        engine = TensorEcologyEngine(EcologyConfig(layout="dense", chunking=CHUNKING_OFF), backend="numpy")
+        rng = np.random.default_rng(3)
+        S, H, W = 3, 8, 8
+        engine.process_ecology(
+            (rng.random((S, H, W)) * 100).astype(np.float32),
+            rng.random((7, H, W)).astype(np.float32),
+            (rng.random((S, 8)) * 10).astype(np.float32),
+            rng.random((S, 7)).astype(np.float32),
+            turn_index=50,
+        )
+        assert isinstance(engine._kernels, ProfiledKernels)
+        profile = get_kernel_profiler().end_turn(50)
+        assert profile.launches > 0
+        assert all(name.startswith("kernel_") for name in profile.kernels)
+        reset_kernel_profiler()
@@ -0,0 +1,90 @@
+"""
+延迟初始化与后台预热测试
+
+验证：
+1. 导入 app.tensor 不会导入 Taichi
+2. 引擎构造不加载内核，首次使用时才加载
+3. start_kernel_warmup 在后台线程完成初始化，get_kernel_status 报告就绪
+"""
+
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from ..compute_backend import (
+    get_kernel_status,
+    reset_kernel_warmup,
+    set_default_compute_backend,
+    start_kernel_warmup,
+)
+
+BACKEND_ROOT = Path(__file__).resolve().parents[3]
+
+
+@pytest.fixture(autouse=True)
+def _reset_warmup():
+    reset_kernel_warmup()
+    yield
+    reset_kernel_warmup()
+    set_default_compute_backend(None)
+
+
+class TestLazyImport:
+    """导入期不触发 Taichi"""
+
+    def test_import_tensor_package_skips_taichi(self):
+        code = (
+            "import sys, app.tensor; "
+            "print('taichi' in sys.modules, 'app.tensor.taichi_hybrid_kernels' in sys.modules)"
+        )
+        out = subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=BACKEND_ROOT, capture_output=True, text=True, check=True,
+        )
+        assert out.stdout.strip().splitlines()[-1] == "False False"
+
+    def test_engine_loads_kernels_on_first_use(self):
+        from ..ecology import TensorEcologyEngine
+        from ..hybrid import HybridCompute
+
+        engine = TensorEcologyEngine(backend="numpy")
+        compute = HybridCompute(arch="numpy")
+        assert engine._kernel_module is None
+        assert compute._kernel_module is None
+
+        assert engine.device == "numpy"
+        assert compute.backend == "numpy"
+        assert engine._kernel_module is not None
+        assert compute._kernel_module is not None
+
+
+class TestKernelWarmup:
+    """后台预热"""
+
+    def test_status_before_warmup(self):
+        status = get_kernel_status()
+        assert status["warmup"] == "idle"
+        assert status["error"] is None
+
+    def test_numpy_warmup_ready(self):
+        set_default_compute_backend("numpy")
+        start_kernel_warmup().join(timeout=30)
+        status = get_kernel_status()
+        assert status["ready"] is True
+        assert status["warmup"] == "ready"
+        assert status["device"] == "numpy"
+
+    def test_taichi_cpu_warmup(self):
+        pytest.importorskip("taichi")
+        set_default_compute_backend("cpu")
+        thread = start_kernel_warmup()
+        assert start_kernel_warmup() is thread  # 幂等
+        thread.join(timeout=300)
+        status = get_kernel_status()
+        assert status["warmup"] == "ready", status["error"]
+        assert status["ready"] is True
+        assert status["taichi_loaded"] is True
+        assert status["device"] == "cpu"
+        assert status["warmup_seconds"] is not None
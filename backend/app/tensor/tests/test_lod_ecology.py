@@ -0,0 +1,144 @@
+"""
+细节层次（LOD）测试
+
+- 块聚合 / 再分配逐块质量守恒（尺寸不整除倍数时补齐格不分配种群）
+- 背景物种在降采样网格上计算，总量与粗网格结果一致，计算单元按 1/f² 减少
+- 全分辨率物种结果与单独计算该子集一致
+- lod_factor=1 或掩码全 False 时与不传掩码一致
+- TENSOR_ECOLOGY_LOD_FACTOR 配置经 get_ecology_engine 启用降采样
+"""
+
+import numpy as np
+import pytest
+
+from ..ecology import (
+    CHUNKING_OFF,
+    EcologyConfig,
+    TensorEcologyEngine,
+    get_ecology_engine,
+    reset_ecology_engine,
+)
+from ..lod_ecology import INTRA_BLOCK_MIX, LodGrid
+
+S, H, W = 6, 13, 18
+FACTOR = 4
+
+
+@pytest.fixture
+def world():
+    rng = np.random.default_rng(20240920)
+    pop = (rng.random((S, H, W)) * 120).astype(np.float32)
+    pop[rng.random((S, H, W)) < 0.5] = 0
+    env = rng.random((7, H, W)).astype(np.float32)
+    params = (rng.random((S, 8)) * 10).astype(np.float32)
+    prefs = rng.random((S, 7)).astype(np.float32)
+    traits = rng.uniform(1, 10, (S, 14)).astype(np.float32)
+    traits[:, 8:11] = rng.random((S, 3))
+    traits[:, 12:] = rng.random((S, 2))
+    trophic = np.array([1.0, 2.0, 1.0, 3.0, 1.5, 2.0], dtype=np.float32)
+    return pop, env, params, prefs, traits, trophic
+
+
+def _engine(lod_factor=FACTOR):
+    return TensorEcologyEngine(
+        EcologyConfig(layout="dense", chunking=CHUNKING_OFF, lod_factor=lod_factor), backend="numpy",
+    )
+
+
+def _run(engine, world, idx=None, **kwargs):
+    pop, env, params, prefs, traits, trophic = world
+    if idx is not None:
+        pop, params, prefs, traits, trophic = pop[idx], params[idx], prefs[idx], traits[idx], trophic[idx]
+    return engine.process_ecology(
+        pop, env, params, prefs, turn_index=80, trophic_levels=trophic,
+        species_traits=traits, **kwargs,
+    )
+
+
+class TestLodGrid:
+    def test_shape_and_counts(self):
+        grid = LodGrid(FACTOR, H, W)
+        assert (grid.h, grid.w) == (4, 5)
+        counts = grid.counts()
+        assert counts.sum() == H * W
+        assert counts[0, 0] == FACTOR * FACTOR and counts[-1, -1] == 1 * 2
+
+    def test_redistribute_conserves_mass(self, world):
+        grid = LodGrid(FACTOR, H, W)
+        pop = world[0]
+        density = grid.block_mean(pop)
+        np.testing.assert_allclose(grid.mass(density).sum(axis=(1, 2)), pop.sum(axis=(1, 2)), rtol=1e-5)
+
+        # 粗格种群变化后再分配：逐块总量 = 粗格总量
+        new_density = density * 1.5 + 0.5
+        fine = grid.redistribute(new_density, pop)
+        assert fine.shape == pop.shape
+        np.testing.assert_allclose(grid.block_sum(fine), grid.mass(new_density), rtol=1e-5)
+
+    def test_redistribute_weights(self):
+        grid = LodGrid(2, 2, 2)
+        previous = np.array([[[4.0, 0.0], [0.0, 0.0]], [[0.0, 0.0], [0.0, 0.0]]], dtype=np.float32)
+        fine = grid.redistribute(np.full((2, 1, 1), 2.0, dtype=np.float32), previous)
+        # 块内质量 8：有分布的物种按上回合占比 + 均匀混合，空块均匀分配
+        mix = INTRA_BLOCK_MIX * 8 / 4
+        np.testing.assert_allclose(fine[0], [[8 * (1 - INTRA_BLOCK_MIX) + mix, mix], [mix, mix]], rtol=1e-6)
+        np.testing.assert_allclose(fine[1], np.full((2, 2), 2.0))
+
+
+class TestLodEngine:
+    def test_background_species_downsampled(self, world):
+        lod_mask = np.array([False, True, False, True, True, False])
+        engine = _engine()
+        result = _run(engine, world, lod_mask=lod_mask)
+
+        grid = LodGrid(FACTOR, H, W)
+        metrics = result.metrics
+        assert metrics.lod_species == 3 and metrics.lod_factor == FACTOR
+        assert metrics.computed_cells == 3 * H * W + 3 * grid.cells < S * H * W
+        assert result.pop.shape == (S, H, W) and result.mortality_rates.shape == (S, H, W)
+
+        # 全分辨率物种与单独计算该子集一致
+        fine = np.flatnonzero(~lod_mask)
+        alone = _run(_engine(), world, idx=fine)
+        np.testing.assert_allclose(result.pop[fine], alone.pop, rtol=1e-5, atol=1e-4)
+
+        # 背景物种总量等于粗网格结果的质量
+        coarse = np.flatnonzero(lod_mask)
+        pop, env, params, prefs, traits, trophic = world
+        coarse_result = engine._lod_engine.process_ecology(
+            grid.block_mean(pop[coarse]), grid.block_mean(env), params[coarse], prefs[coarse],
+            turn_index=80, trophic_levels=trophic[coarse], species_traits=traits[coarse],
+        )
+        np.testing.assert_allclose(
+            result.pop[coarse].sum(axis=(1, 2)),
+            grid.mass(coarse_result.pop).sum(axis=(1, 2)),
+            rtol=1e-4,
+        )
+        assert np.isclose(metrics.total_population_after, result.pop.sum(), rtol=1e-5)
+        engine.clear_cache()
+        assert engine._lod_child is None
+
+    @pytest.mark.parametrize("lod_factor,lod_mask", [(1, [True] * S), (FACTOR, [False] * S)])
+    def test_disabled(self, world, lod_factor, lod_mask):
+        plain = _run(_engine(lod_factor), world)
+        masked = _run(_engine(lod_factor), world, lod_mask=np.array(lod_mask))
+        np.testing.assert_array_equal(masked.pop, plain.pop)
+        assert masked.metrics.lod_species == 0
+
+    def test_all_background(self, world):
+        result = _run(_engine(), world, lod_mask=np.ones(S, dtype=bool))
+        assert result.metrics.lod_species == S
+        assert result.metrics.computed_cells == S * LodGrid(FACTOR, H, W).cells
+        assert (result.pop >= 0).all()
+
+    def test_setting_enables_lod(self, world, monkeypatch):
+        monkeypatch.setenv("TENSOR_COMPUTE_BACKEND", "numpy")
+        monkeypatch.setenv("TENSOR_ECOLOGY_LOD_FACTOR", str(FACTOR))
+        reset_ecology_engine()
+        try:
+            engine = get_ecology_engine()
+            assert engine.config.lod_factor == FACTOR
+            result = _run(engine, world, lod_mask=np.array([False, True, False, True, True, False]))
+            assert result.metrics.lod_factor == FACTOR and result.metrics.lod_species == 3
+        finally:
+            reset_ecology_engine()
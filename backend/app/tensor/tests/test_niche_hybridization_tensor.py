@@ -99,7 +99,7 @@ class TestNicheTensorCompute:
         )
     
     def test_compute_lineage_bonus_matrix(self):
-        """测试谱系前缀bonus矩阵"""
+        """测试同属谱系bonus矩阵"""
         from ..niche_tensor import NicheTensorCompute
         
         compute = NicheTensorCompute()
@@ -114,13 +114,13 @@ class TestNicheTensorCompute:
         # 对角线为0
         np.testing.assert_array_almost_equal(np.diag(bonus_matrix), [0, 0, 0, 0])
         
-        # A1a 和 A1b 共享前缀 "A1"，应有bonus
+        # A1a 和 A1b 共同祖先 A1，应有bonus
         assert bonus_matrix[0, 1] == 0.15
         
-        # A1a 和 A2a 共享前缀 "A"，但长度<2，无bonus
+        # A1a 和 A2a 属根不同（A1/A2），无bonus
         assert bonus_matrix[0, 2] == 0.0
         
-        # A1a 和 B1a 无共同前缀
+        # A1a 和 B1a 无共同祖先
         assert bonus_matrix[0, 3] == 0.0
         
         # 对称性
@@ -150,6 +150,69 @@ class TestNicheTensorCompute:
         
         # 不兼容栖息地
         assert bonus_matrix[0, 2] == 0.0   # marine-terrestrial
+    
+    @staticmethod
+    def _dense_overlap(species_ids, habitat_cache, min_overlap_factor=0.1):
+        """逐元素构建稠密物种×地块矩阵的参考实现"""
+        tiles = sorted(set().union(*(habitat_cache.get(i, set()) for i in species_ids if i is not None)))
+        col = {t: k for k, t in enumerate(tiles)}
+        m = np.zeros((len(species_ids), len(tiles)))
+        for r, sp_id in enumerate(species_ids):
+            for t in habitat_cache.get(sp_id, ()) if sp_id is not None else ():
+                m[r, col[t]] = 1.0
+        inter = m @ m.T
+        counts = m.sum(axis=1)
+        union = counts[:, None] + counts[None, :] - inter
+        expected = np.where(inter > 0, inter / np.where(union > 0, union, 1), min_overlap_factor)
+        np.fill_diagonal(expected, 1.0)
+        return expected
+    
+    def test_tile_overlap_incremental_matches_dense(self):
+        """测试跨回合增量更新与逐回合重建结果一致"""
+        from ..niche_tensor import NicheTensorCompute
+        
+        compute = NicheTensorCompute()
+        rng = np.random.default_rng(7)
+        habitat_cache = {
+            i: set(rng.choice(60, size=rng.integers(0, 12), replace=False).tolist())
+            for i in range(40)
+        }
+        species_ids = list(range(40)) + [None]
+        
+        for turn in range(6):
+            moved = rng.choice(40, size=3, replace=False)
+            for sp_id in moved:
+                habitat_cache[int(sp_id)] = set(rng.choice(80, size=rng.integers(1, 10), replace=False).tolist())
+            if turn == 3:
+                # 新物种分化、旧物种灭绝，列表顺序变化
+                habitat_cache[100] = set(habitat_cache[5])
+                species_ids = [100] + [i for i in species_ids if i != 7][::-1]
+            
+            overlap, metrics = compute.compute_tile_overlap_matrix(species_ids, habitat_cache)
+            np.testing.assert_allclose(overlap, self._dense_overlap(species_ids, habitat_cache))
+            assert overlap.dtype == np.float64
+            if turn == 0:
+                assert metrics.changed_rows == len(species_ids)
+            elif turn != 3:
+                assert metrics.changed_rows <= 3
+        
+        # 分布未变化时不重算任何行
+        _, metrics = compute.compute_tile_overlap_matrix(species_ids, habitat_cache)
+        assert metrics.changed_rows == 0
+    
+    def test_tile_overlap_index_compaction(self):
+        """测试不再出现的物种行被压缩回收"""
+        from ..niche_tensor import NicheTensorCompute
+        
+        compute = NicheTensorCompute()
+        habitat_cache = {i: {i, i + 1} for i in range(200)}
+        compute.compute_tile_overlap_matrix(list(range(200)), habitat_cache)
+        
+        species_ids = [3, 4, 150]
+        for _ in range(2):
+            overlap, _ = compute.compute_tile_overlap_matrix(species_ids, habitat_cache)
+        assert compute._tile_index.num_rows == 3
+        np.testing.assert_allclose(overlap, self._dense_overlap(species_ids, habitat_cache))
 
 
 class TestHybridizationTensorCompute:
@@ -336,6 +399,63 @@ class TestHybridizationTensorCompute:
         
         assert len(candidates) == 0
         assert metrics.species_count == 1
+    
+    def test_find_hybrid_candidates_matches_dense(self):
+        """测试稀疏同域路径与稠密矩阵筛选结果一致"""
+        from ..hybridization_tensor import HybridizationTensorCompute
+        
+        compute = HybridizationTensorCompute()
+        rng = np.random.default_rng(11)
+        species_list = self.create_mock_species(40)
+        habitats = [
+            MockHabitatPopulation(species_id=sp.id, tile_id=int(t))
+            for sp in species_list
+            for t in rng.choice(120, size=int(rng.integers(1, 8)))  # 允许重复条目
+        ]
+        
+        candidates, metrics = compute.find_hybrid_candidates(
+            species_list, habitats, min_population=0, max_candidates=15,
+        )
+        
+        shared, total, ratio = compute.build_sympatry_matrix(species_list, habitats)
+        distance = compute.build_genetic_distance_matrix(species_list)
+        fertility = compute.compute_fertility(distance)
+        score = ratio * fertility * (1 - distance)
+        valid = np.triu(shared >= 1, k=1) & (distance <= 0.70) & (fertility > 0)
+        
+        assert metrics.sympatric_pairs == int(np.triu(shared >= 1, k=1).sum())
+        assert metrics.candidate_pairs == int(valid.sum())
+        expected = np.sort(score[valid])[::-1][:15]
+        np.testing.assert_allclose([c.hybrid_score for c in candidates], expected)
+        for c in candidates:
+            i, j = c.species1_idx, c.species2_idx
+            assert c.shared_tiles == shared[i, j] and c.total_tiles == total[i, j]
+            assert c.genetic_distance == pytest.approx(distance[i, j])
+            assert c.fertility == pytest.approx(fertility[i, j])
+    
+    def test_build_sympatric_pairs_only_colocated(self):
+        """测试只生成共享地块的物种对"""
+        from ..hybridization_tensor import HybridizationTensorCompute
+        
+        compute = HybridizationTensorCompute()
+        species_list = self.create_mock_species(4)
+        habitats = [
+            MockHabitatPopulation(species_id=1, tile_id=5),
+            MockHabitatPopulation(species_id=2, tile_id=5),
+            MockHabitatPopulation(species_id=2, tile_id=6),
+            MockHabitatPopulation(species_id=3, tile_id=6),
+            MockHabitatPopulation(species_id=3, tile_id=6),
+            MockHabitatPopulation(species_id=4, tile_id=9),
+            MockHabitatPopulation(species_id=99, tile_id=5),  # 不在列表中
+        ]
+        
+        pair_i, pair_j, shared, counts = compute.build_sympatric_pairs(species_list, habitats)
+        assert list(zip(pair_i.tolist(), pair_j.tolist())) == [(0, 1), (1, 2)]
+        assert shared.tolist() == [1, 1]
+        assert counts.tolist() == [1, 2, 1, 1]
+        
+        pair_i, _, _, _ = compute.build_sympatric_pairs(species_list, habitats, min_shared_tiles=2)
+        assert pair_i.size == 0
 
 
 class TestPerformanceScaling:
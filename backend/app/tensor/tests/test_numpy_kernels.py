@@ -0,0 +1,336 @@
+"""
+NumPy 内核与 Taichi 内核对照测试
+
+逐个内核比较 numpy_kernels 与 taichi_hybrid_kernels（CPU 后端即可运行）
+的输出，确保 CPU/NumPy 后端与 GPU 后端数值一致。
+"""
+
+import numpy as np
+import pytest
+
+from .. import numpy_kernels as nk
+from ..compute_backend import load_kernels, normalize_compute_backend, resolve_compute_backend
+
+tk = pytest.importorskip("app.tensor.taichi_hybrid_kernels")
+
+
+@pytest.fixture(scope="module", autouse=True)
+def _taichi_runtime():
+    """Taichi 内核模块导入时不再初始化设备，直接调用内核前显式初始化"""
+    tk._ensure_taichi_init()
+
+S, H, W = 6, 18, 22
+RTOL = 1e-4
+ATOL = 1e-3
+
+
+def _run_both(name: str, out_shape: tuple, *args, out_pos: int, **kwargs) -> tuple[np.ndarray, np.ndarray]:
+    """用两种实现运行同名内核，返回 (taichi 输出, numpy 输出)"""
+    outputs = []
+    for module in (tk, nk):
+        out = np.zeros(out_shape, dtype=np.float32)
+        call_args = list(args)
+        call_args.insert(out_pos, out)
+        getattr(module, name)(*call_args, **kwargs)
+        outputs.append(out)
+    return outputs[0], outputs[1]
+
+
+def _assert_parity(name: str, out_shape: tuple, *args, out_pos: int):
+    expected, actual = _run_both(name, out_shape, *args, out_pos=out_pos)
+    np.testing.assert_allclose(actual, expected, rtol=RTOL, atol=ATOL, err_msg=name)
+
+
+@pytest.fixture
+def rng() -> np.random.Generator:
+    return np.random.default_rng(20240607)
+
+
+@pytest.fixture
+def pop(rng) -> np.ndarray:
+    """稀疏种群（约 45% 空格）"""
+    p = (rng.random((S, H, W)) * 180).astype(np.float32)
+    p[rng.random((S, H, W)) < 0.45] = 0
+    return p
+
+
+@pytest.fixture
+def env(rng) -> np.ndarray:
+    """7 通道环境：[温度, 湿度, 海拔, 资源, 陆地, 海洋, 海岸]"""
+    e = np.zeros((7, H, W), dtype=np.float32)
+    e[0] = rng.uniform(-1, 1, (H, W))
+    e[1] = rng.random((H, W))
+    e[2] = rng.random((H, W))
+    e[3] = rng.random((H, W))
+    ocean = rng.random((H, W)) < 0.35
+    coast = ~ocean & (rng.random((H, W)) < 0.2)
+    e[4] = (~ocean & ~coast).astype(np.float32)
+    e[5] = ocean.astype(np.float32)
+    e[6] = coast.astype(np.float32)
+    return e
+
+
+@pytest.fixture
+def traits(rng) -> np.ndarray:
+    """物种特质 (S, 14)，覆盖陆生/水生/两栖"""
+    t = np.zeros((S, 14), dtype=np.float32)
+    t[:, 0:8] = rng.uniform(1, 10, (S, 8))
+    habitat = np.array([
+        [1.0, 0.0, 0.1],
+        [0.0, 1.0, 0.1],
+        [0.5, 0.5, 0.6],
+        [0.9, 0.1, 0.0],
+        [0.1, 0.9, 0.2],
+        [0.4, 0.4, 0.2],
+    ], dtype=np.float32)
+    t[:, 8:11] = habitat[:S]
+    t[:, 11] = rng.uniform(1, 4, S)
+    t[:, 12] = rng.integers(0, 40, S)
+    t[:, 13] = rng.random(S)
+    return t
+
+
+@pytest.fixture
+def suitability(rng) -> np.ndarray:
+    return rng.random((S, H, W)).astype(np.float32)
+
+
+class TestBackendSelection:
+    """后端选择测试"""
+
+    def test_normalize_aliases(self):
+        assert normalize_compute_backend(None) == "auto"
+        assert normalize_compute_backend("CUDA") == "gpu"
+        assert normalize_compute_backend("x64") == "cpu"
+        assert normalize_compute_backend("numpy") == "numpy"
+        assert normalize_compute_backend("bogus") == "auto"
+
+    def test_explicit_backend_wins(self):
+        assert resolve_compute_backend("numpy") == "numpy"
+
+    def test_load_numpy_kernels(self):
+        module, name = load_kernels("numpy")
+        assert module is nk
+        assert name == "numpy"
+
+    def test_kernel_names_match(self):
+        """NumPy 模块覆盖 HybridCompute/TensorEcologyEngine 使用的全部内核"""
+        for attr in dir(nk):
+            if attr.startswith("kernel_"):
+                assert hasattr(tk, attr), attr
+
+
+class TestBasicKernelParity:
+    """基础内核对照"""
+
+    def test_mortality(self, pop):
+        env = np.random.default_rng(1).uniform(-10, 35, (3, H, W)).astype(np.float32)
+        params = np.ones((S, 4), dtype=np.float32)
+        _assert_parity("kernel_mortality", pop.shape, pop, env, params, 1, 20.0, 15.0, out_pos=3)
+
+    def test_diffusion(self, pop):
+        _assert_parity("kernel_diffusion", pop.shape, pop, 0.2, out_pos=1)
+
+    def test_apply_mortality(self, pop, suitability):
+        _assert_parity("kernel_apply_mortality", pop.shape, pop, suitability, out_pos=2)
+
+    def test_reproduction(self, pop, suitability, rng):
+        capacity = (rng.random((H, W)) * 400).astype(np.float32)
+        capacity[0, :] = 0
+        _assert_parity("kernel_reproduction", pop.shape, pop, suitability, capacity, 0.15, out_pos=4)
+
+    def test_competition(self, pop, suitability):
+        fitness = suitability.copy()
+        fitness[0] = 0
+        _assert_parity("kernel_competition", pop.shape, pop, fitness, 0.01, out_pos=2)
+
+    def test_redistribute(self, pop):
+        pop = pop.copy()
+        pop[1] = 0
+        current = pop.sum(axis=(1, 2)).astype(np.float32)
+        new_totals = (current * 1.3).astype(np.float32)
+        new_totals[2] = 0
+        _assert_parity(
+            "kernel_redistribute_population", pop.shape,
+            pop, current, new_totals, H * W, out_pos=3,
+        )
+
+
+class TestSuitabilityParity:
+    """适宜度内核对照"""
+
+    def test_compute_suitability(self, env, rng):
+        prefs = rng.random((S, 7)).astype(np.float32)
+        prefs[:, 0] = rng.uniform(-1, 1, S)
+        mask = (rng.random((S, H, W)) > 0.2).astype(np.float32)
+        _assert_parity("kernel_compute_suitability", (S, H, W), env, prefs, mask, out_pos=3)
+
+    def test_trait_suitability(self, env, traits):
+        _assert_parity("kernel_compute_trait_suitability", (S, H, W), env, traits, out_pos=2)
+
+    def test_trait_suitability_missing_channels(self, env, traits):
+        _assert_parity("kernel_compute_trait_suitability", (S, H, W), env[:4].copy(), traits, out_pos=2)
+
+
+class TestCompetitionParity:
+    """竞争内核对照"""
+
+    def test_local_fitness(self, suitability, traits, pop):
+        _assert_parity("kernel_compute_local_fitness", (S, H, W), suitability, traits, pop, out_pos=3)
+
+    def test_niche_overlap(self, traits):
+        _assert_parity("kernel_compute_niche_overlap_matrix", (S, S), traits, out_pos=1)
+
+    def test_trait_competition(self, pop, suitability, traits):
+        overlap = np.zeros((S, S), dtype=np.float32)
+        tk.kernel_compute_niche_overlap_matrix(traits, overlap)
+        overlap[0, 1] = overlap[1, 0] = 0.95
+        _assert_parity(
+            "kernel_apply_trait_competition", pop.shape,
+            pop, suitability, overlap, 0.05, out_pos=3,
+        )
+
+
+class TestMortalityParity:
+    """v2 死亡率内核对照"""
+
+    @pytest.mark.parametrize("era_scaling", [1.0, 3.0])
+    def test_multifactor_v2(self, pop, env, rng, era_scaling):
+        prefs = rng.random((S, 7)).astype(np.float32)
+        prefs[:, 0] = rng.uniform(-1, 1, S)
+        params = (rng.random((S, 8)) * 20).astype(np.float32)
+        trophic = np.array([1.0, 1.5, 2.0, 2.5, 3.0, 1.0], dtype=np.float32)
+        pressure = (rng.random((2, H, W)) * 2).astype(np.float32)
+        scale = rng.uniform(1.0, 2.5, S).astype(np.float32)
+        _assert_parity(
+            "kernel_multifactor_mortality_v2", pop.shape,
+            pop, env, prefs, params, trophic, pressure, scale,
+            0.06, 0.25, 0.2, 0.25, 100.0, era_scaling,
+            out_pos=7,
+        )
+
+    @pytest.mark.parametrize("era_scaling", [1.0, 4.0])
+    def test_trait_mortality_v2(self, pop, env, traits, suitability, rng, era_scaling):
+        pressure = (rng.random((1, H, W)) * 3).astype(np.float32)
+        scale = rng.uniform(1.0, 2.5, S).astype(np.float32)
+        _assert_parity(
+            "kernel_trait_mortality_v2", pop.shape,
+            pop, env, traits, suitability, pressure, scale, 0.06, era_scaling,
+            out_pos=6,
+        )
+
+
+class TestDiffusionParity:
+    """扩散内核对照"""
+
+    def test_advanced_diffusion(self, pop, suitability):
+        _assert_parity("kernel_advanced_diffusion", pop.shape, pop, suitability, 0.15, out_pos=2)
+
+    def test_advanced_diffusion_v2(self, pop, suitability, rng):
+        scale = rng.uniform(1.0, 2.5, S).astype(np.float32)
+        _assert_parity(
+            "kernel_advanced_diffusion_v2", pop.shape,
+            pop, suitability, scale, 0.18, 0.08, 15.0, 0.22, out_pos=3,
+        )
+
+    def test_trait_diffusion_v2(self, pop, suitability, traits, env, rng):
+        scale = rng.uniform(1.0, 2.5, S).astype(np.float32)
+        _assert_parity(
+            "kernel_trait_diffusion_v2", pop.shape,
+            pop, suitability, traits, env, scale, 0.18, 0.08, 15.0, 0.22, out_pos=5,
+        )
+
+    def test_reproduction_v2(self, pop, suitability, rng):
+        capacity = (rng.random((H, W)) * 600).astype(np.float32)
+        scale = rng.uniform(1.0, 3.0, S).astype(np.float32)
+        _assert_parity(
+            "kernel_reproduction_v2", pop.shape,
+            pop, suitability, capacity, scale, 0.12, out_pos=5,
+        )
+
+
+class TestMigrationParity:
+    """迁徙内核对照"""
+
+    def test_distance_weights(self, pop):
+        pop = pop.copy()
+        pop[3] = 0
+        _assert_parity("kernel_compute_distance_weights", pop.shape, pop, 6.0, out_pos=1)
+
+    def test_migration_decision(self, pop, suitability, rng):
+        dist = rng.random((S, H, W)).astype(np.float32)
+        death = np.array([0.05, 0.3, 0.1, 0.5, 0.0, 0.2], dtype=np.float32)
+        _assert_parity(
+            "kernel_migration_decision", pop.shape,
+            pop, suitability, dist, death, 0.12, 0.6, out_pos=4,
+        )
+
+    def test_migration_decision_v2(self, pop, suitability, traits, env, rng):
+        dist = rng.random((S, H, W)).astype(np.float32)
+        death = np.array([0.05, 0.3, 0.1, 0.5, 0.0, 0.2], dtype=np.float32)
+        res_pressure = np.array([0.2, 0.6, 0.9, 0.1, 0.7, 0.0], dtype=np.float32)
+        prey = (rng.random((S, H, W)) * 0.3).astype(np.float32)
+        trophic = np.array([1.0, 2.0, 3.0, 2.5, 1.5, 2.0], dtype=np.float32)
+        _assert_parity(
+            "kernel_migration_decision_v2", pop.shape,
+            pop, suitability, dist, death, res_pressure, prey, trophic, traits, env,
+            0.08, 0.5, 0.8, 0.1, 0.4, 0.12, 2.0,
+            out_pos=9,
+        )
+
+    @pytest.mark.parametrize("long_jump_prob", [0.0, 0.2])
+    def test_execute_migration(self, pop, suitability, traits, env, rng, long_jump_prob):
+        dist = rng.random((S, H, W)).astype(np.float32)
+        scores = (rng.random((S, H, W)) * 0.6).astype(np.float32)
+        rates = rng.uniform(0.05, 0.3, S).astype(np.float32)
+        _assert_parity(
+            "kernel_execute_migration", pop.shape,
+            pop, scores, dist, traits, env, rates, 0.15, long_jump_prob,
+            out_pos=5,
+        )
+
+
+class TestFusedHelperParity:
+    """融合步进辅助内核对照"""
+
+    def test_clamp(self, suitability):
+        values = (suitability * 2 - 0.5).astype(np.float32)
+        _assert_parity("kernel_clamp", values.shape, values, 0.01, 0.95, out_pos=3)
+
+    def test_overcapacity_clamp(self, pop, rng):
+        grown = (pop * rng.uniform(0.8, 1.6, pop.shape)).astype(np.float32)
+        over = (rng.random((H, W)) < 0.4).astype(np.float32)
+        expected, actual = grown.copy(), grown.copy()
+        tk.kernel_overcapacity_clamp(pop, over, 0.5, expected)
+        nk.kernel_overcapacity_clamp(pop, over, 0.5, actual)
+        np.testing.assert_allclose(actual, expected, rtol=RTOL, atol=ATOL)
+
+    def test_clamp_net_change(self, pop, rng):
+        new_pop = (pop * rng.uniform(0.0, 3.0, pop.shape)).astype(np.float32)
+        _assert_parity("kernel_clamp_net_change", pop.shape, pop, new_pop, 0.6, 0.6, out_pos=4)
+
+
+class TestEcologyEngineParity:
+    """TensorEcologyEngine 端到端对照（Taichi CPU vs NumPy）"""
+
+    @pytest.mark.parametrize("use_traits", [False, True])
+    def test_process_ecology(self, pop, env, traits, rng, use_traits):
+        from ..ecology import TensorEcologyEngine
+
+        params = (rng.random((S, 8)) * 10).astype(np.float32)
+        prefs = rng.random((S, 7)).astype(np.float32)
+        trophic = np.array([1.0, 1.0, 2.0, 2.0, 3.0, 1.5], dtype=np.float32)
+        kwargs = {"species_traits": traits} if use_traits else {}
+
+        results = [
+            TensorEcologyEngine(backend=backend).process_ecology(
+                pop, env, params, prefs, turn_index=5, trophic_levels=trophic, **kwargs
+            )
+            for backend in ("cpu", "numpy")
+        ]
+        assert results[0].metrics.backend == "taichi"
+        assert results[1].metrics.backend == "numpy"
+        np.testing.assert_allclose(results[1].pop, results[0].pop, rtol=RTOL, atol=ATOL)
+        np.testing.assert_allclose(
+            results[1].mortality_rates, results[0].mortality_rates, rtol=RTOL, atol=ATOL
+        )
@@ -0,0 +1,129 @@
+"""
+谱系索引测试
+
+- 编码推断父代
+- 欧拉序稀疏表 LCA 与逐级回溯一致
+- 亲缘代数 / 代数距离矩阵语义
+- 增量登记与显式 parent_code 覆盖推断
+"""
+
+import numpy as np
+import pytest
+
+from ..phylogeny import NO_KINSHIP, PhylogenyIndex, infer_parent_code
+
+
+@pytest.mark.parametrize("code,parent", [
+    ("A1", None),
+    ("S12", None),
+    ("A1a", "A1"),
+    ("A1a1", "A1"),
+    ("A1a1b2", "A1a1"),
+    ("A1h3", "A1"),
+    ("A1B2C1", "A1B2"),
+    ("A1aa", "A1a"),
+    ("A1ab1", "A1a"),
+    ("A1aab", "A1aa"),
+])
+def test_infer_parent_code(code, parent):
+    assert infer_parent_code(code) == parent
+
+
+def _naive_lca(parents: dict[str, str | None], a: str, b: str) -> str:
+    chain = []
+    while a:
+        chain.append(a)
+        a = parents[a]
+    while b:
+        if b in chain:
+            return b
+        b = parents[b]
+    return ""
+
+
+class TestPhylogenyIndex:
+    def test_lca_matches_naive(self):
+        rng = np.random.default_rng(20240620)
+        index = PhylogenyIndex()
+        parents: dict[str, str | None] = {}
+        codes = []
+        for root in ("A1", "B1", "C1"):
+            parents[root] = None
+            codes.append(root)
+        for i in range(300):
+            parent = codes[int(rng.integers(len(codes)))]
+            code = f"X{i}"  # 无法按编码推断，全部依赖显式 parent_code
+            parents[code] = parent
+            codes.append(code)
+        for code in codes:
+            index.add(code, parents[code])
+
+        sample = [codes[i] for i in rng.integers(len(codes), size=60)]
+        ids = index.ids(sample)
+        lca = index.lca(ids[:, None], ids[None, :])
+        for i, a in enumerate(sample):
+            for j, b in enumerate(sample):
+                assert index._codes[lca[i, j]] == _naive_lca(parents, a, b)
+
+    def test_kinship_and_distance(self):
+        index = PhylogenyIndex()
+        codes = ["A1", "A1a", "A1b", "A1a1b", "B1"]
+        kinship = index.kinship_matrix(codes)
+        distance = index.generation_distance_matrix(codes)
+
+        assert kinship.dtype == np.int32
+        np.testing.assert_array_equal(np.diag(kinship), 0)
+        assert kinship[0, 1] == 1                # 父子
+        assert kinship[1, 2] == 1                # 兄弟
+        assert kinship[2, 3] == 2                # A1b 与 A1a1 的子代
+        assert distance[2, 3] == 3
+        assert kinship[0, 4] == NO_KINSHIP       # 不同属
+        assert distance[0, 4] == NO_KINSHIP
+        np.testing.assert_array_equal(kinship, kinship.T)
+        assert index.lca_code("A1a1b", "A1b") == "A1"
+        assert index.lca_code("A1", "B1") == ""
+        assert index.ancestors("A1a1b") == ["A1a1b", "A1a1", "A1"]
+
+    def test_incremental_and_explicit_parent(self):
+        index = PhylogenyIndex()
+        index.add("A1a1")  # 推断父代为 A1
+        assert index.kinship("A1a1", "A1a") == 1
+        index.kinship_matrix(["A1a1"])
+        assert not index._dirty
+
+        # 已登记且父节点不变：不触发重建
+        index.add("A1a1")
+        assert not index._dirty
+
+        # 显式 parent_code 覆盖推断
+        index.add("A1a1", "A1a")
+        assert index.ancestors("A1a1") == ["A1a1", "A1a", "A1"]
+        assert index.kinship("A1a1", "A1a") == 1
+        assert index.kinship("A1a1", "A1") == 2
+
+        # 拒绝形成环
+        index.add("A1", "A1a1")
+        assert index.ancestors("A1") == ["A1"]
+
+    def test_multi_letter_codes_without_parents(self):
+        """多子代分化生成的连续字母编码，父代未登记（读档后）也能还原谱系"""
+        from ... import simulation  # noqa: F401  先加载 simulation 包，避免与 speciation 循环导入
+        from ...services.species.speciation import SpeciationService
+
+        generate = SpeciationService._generate_multiple_lineage_codes
+        children = generate(None, "A1a", set(), 2)
+        grandchildren = generate(None, children[0], set(), 2)
+        great = generate(None, children[1], set(), 3)
+        assert children == ["A1aa", "A1ab"] and grandchildren[1] == "A1aab" and great[2] == "A1abc"
+
+        index = PhylogenyIndex()
+        assert index.kinship("A1aab", "A1abc") == 2      # 堂兄弟
+        assert index.lca_code("A1aab", "A1abc") == "A1a"
+        assert index.kinship("A1aa", "A1ab") == 1        # 兄弟
+        assert index.related_matrix(["A1aab", "A1abc", "B1a"])[0, 1]
+
+    def test_related_matrix(self):
+        index = PhylogenyIndex()
+        related = index.related_matrix(["A1a", "A1b", "A2a", "B1a"])
+        assert related[0, 1] and not related[0, 2] and not related[0, 3]
+        assert related.diagonal().all()
@@ -140,6 +140,52 @@ class TestPressureToTensorBridge:
         assert "volcanic_eruption" in overlay.active_pressures
         assert overlay.total_intensity == 8
     
+    def test_spatial_mask_falloff(self, bridge: PressureToTensorBridge):
+        """测试空间掩码：中心为1、按六边形步数高斯衰减、超出截断为0"""
+        mask = bridge._create_spatial_mask([3 * 16 + 5], (16, 16), map_width=16, map_height=16)
+        
+        assert mask.dtype == np.float32
+        assert mask[3, 5] == 1.0
+        # (x=5, y=2) 为正上方邻居，1 步
+        assert mask[2, 5] == pytest.approx(np.exp(-0.5 * (1 / 2.0) ** 2))
+        # 截断距离 max_decay_distance * sigma = 8 步
+        assert mask[15, 5] == 0.0
+        assert (mask > 0).sum() < 16 * 16
+    
+    def test_spatial_mask_wraps_and_scales(self, bridge: PressureToTensorBridge):
+        """测试东西边界环绕与地块→张量坐标缩放"""
+        mask = bridge._create_spatial_mask([0], (8, 8), map_width=8, map_height=8)
+        assert mask[0, 7] > 0.8
+        
+        # 8x8 地块映射到 16x16 张量：地块 (x=1, y=1) → 张量 (2, 2)
+        scaled = bridge._create_spatial_mask([9], (16, 16), map_width=8, map_height=8)
+        assert scaled[2, 2] == 1.0
+        
+        # 越界地块被忽略，全部越界时退化为全局均匀
+        np.testing.assert_array_equal(
+            bridge._create_spatial_mask([999], (8, 8), map_width=8, map_height=8),
+            np.ones((8, 8), dtype=np.float32),
+        )
+    
+    def test_spatial_mask_cache(self):
+        """测试掩码按地块集合缓存与 LRU 淘汰"""
+        bridge = PressureToTensorBridge(mask_cache_size=2)
+        a = bridge._create_spatial_mask([0, 1, 8], (8, 8), 8, 8)
+        assert bridge._create_spatial_mask([8, 1, 0, 0], (8, 8), 8, 8) is a
+        assert bridge.mask_cache_hits == 1 and bridge.mask_cache_misses == 1
+        assert not a.flags.writeable
+        
+        b = bridge._create_spatial_mask([5], (8, 8), 8, 8)
+        bridge._create_spatial_mask([0, 1, 8], (8, 8), 8, 8)  # 刷新 a
+        bridge._create_spatial_mask([20], (8, 8), 8, 8)        # 淘汰 b
+        assert bridge._create_spatial_mask([0, 1, 8], (8, 8), 8, 8) is a
+        assert bridge._create_spatial_mask([5], (8, 8), 8, 8) is not b
+        
+        # 不同地图尺寸不共用
+        assert bridge._create_spatial_mask([0, 1, 8], (16, 16), 8, 8).shape == (16, 16)
+        bridge.clear_cache()
+        assert bridge._create_spatial_mask([0, 1, 8], (8, 8), 8, 8) is not a
+    
     def test_modifier_channel_map_coverage(self):
         """测试修改器映射覆盖常见类型"""
         expected_modifiers = [
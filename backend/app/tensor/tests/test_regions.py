@@ -0,0 +1,132 @@
+"""
+批量连通区域标记测试
+
+- 与逐格 BFS（MapStateManager._neighbor_ids 同款六边形邻接）结果一致
+- 地块 ID 网格 → 连通地块群
+- 多源六边形距离变换与逐格 BFS 一致
+"""
+
+import numpy as np
+import pytest
+
+from ..regions import (
+    HEX_EVEN_COLUMN,
+    HEX_ODD_COLUMN,
+    hex_distance_transform,
+    hex_edges,
+    label_regions,
+    tile_clusters,
+)
+
+
+def _reference_adjacency(H: int, W: int, wrap_x: bool) -> dict[tuple[int, int], set[tuple[int, int]]]:
+    """逐格构建无向六边形邻接 {(x, y): {(nx, ny), ...}}"""
+    adjacency: dict[tuple[int, int], set[tuple[int, int]]] = {}
+    for y in range(H):
+        for x in range(W):
+            for dx, dy in HEX_ODD_COLUMN if x & 1 else HEX_EVEN_COLUMN:
+                nx, ny = x + dx, y + dy
+                if wrap_x:
+                    nx %= W
+                if 0 <= ny < H and 0 <= nx < W:
+                    adjacency.setdefault((x, y), set()).add((nx, ny))
+                    adjacency.setdefault((nx, ny), set()).add((x, y))
+    return adjacency
+
+
+def _reference_labels(presence: np.ndarray, wrap_x: bool) -> np.ndarray:
+    """逐格 BFS，按光栅顺序首次出现编号（邻接按无向处理）"""
+    H, W = presence.shape
+    adjacency = _reference_adjacency(H, W, wrap_x)
+    labels = np.zeros((H, W), dtype=np.int32)
+    current = 0
+    for y in range(H):
+        for x in range(W):
+            if not presence[y, x] or labels[y, x]:
+                continue
+            current += 1
+            labels[y, x] = current
+            stack = [(x, y)]
+            while stack:
+                cx, cy = stack.pop()
+                for nx, ny in adjacency.get((cx, cy), ()):
+                    if presence[ny, nx] and not labels[ny, nx]:
+                        labels[ny, nx] = current
+                        stack.append((nx, ny))
+    return labels
+
+
+class TestLabelRegions:
+    @pytest.mark.parametrize("wrap_x", [True, False])
+    @pytest.mark.parametrize("shape", [(4, 9, 12), (3, 7, 11)])
+    def test_matches_reference(self, shape, wrap_x):
+        rng = np.random.default_rng(20240618)
+        presence = rng.random(shape) < 0.35
+        presence[-1] = False  # 空物种
+        weights = rng.random(shape).astype(np.float32)
+
+        regions = label_regions(presence, weights=weights, wrap_x=wrap_x)
+
+        for s in range(shape[0]):
+            expected = _reference_labels(presence[s], wrap_x)
+            np.testing.assert_array_equal(regions.labels[s], expected)
+            view = regions.species(s)
+            assert len(view) == expected.max()
+            np.testing.assert_array_equal(view.sizes, np.bincount(expected.ravel())[1:])
+            np.testing.assert_allclose(
+                view.population,
+                np.bincount(expected.ravel(), weights=weights[s].ravel())[1:],
+                rtol=1e-6,
+            )
+        assert regions.num_regions[-1] == 0
+        assert regions.region_sizes.sum() == presence.sum()
+
+    def test_empty(self):
+        regions = label_regions(np.zeros((2, 4, 5), dtype=bool))
+        assert regions.num_regions.tolist() == [0, 0]
+        assert len(regions.species(1)) == 0
+        assert regions.species(1).cells() == []
+
+    def test_edges_symmetric_and_cached(self):
+        a, b = hex_edges(6, 8)
+        assert (a < b).all()
+        assert hex_edges(6, 8)[0] is a
+
+
+class TestTileClusters:
+    def test_clusters_and_missing_tiles(self):
+        H, W = 5, 6
+        tile_ids = np.arange(H * W).reshape(H, W)
+        tile_ids[4, 5] = -1
+        # (x=0, y=0)/(x=5, y=0) 经东西边界相连；(x=3, y=3) 独立
+        clusters = tile_clusters(tile_ids, {0, 5, 21, 999})
+        assert sorted(map(sorted, clusters)) == [[0, 5], [21]]
+
+
+class TestHexDistanceTransform:
+    @pytest.mark.parametrize("wrap_x", [True, False])
+    @pytest.mark.parametrize("H,W", [(7, 10), (6, 9)])
+    def test_matches_bfs(self, H, W, wrap_x):
+        rng = np.random.default_rng(H * W)
+        sources = rng.choice(H * W, size=3, replace=False)
+        dist = hex_distance_transform(sources, (H, W), max_steps=4, wrap_x=wrap_x)
+
+        adjacency = _reference_adjacency(H, W, wrap_x)
+        expected = np.full((H, W), -1, dtype=np.int32)
+        queue = [(int(c % W), int(c // W)) for c in sources]
+        for x, y in queue:
+            expected[y, x] = 0
+        while queue:
+            x, y = queue.pop(0)
+            if expected[y, x] == 4:
+                continue
+            for nx, ny in adjacency.get((x, y), ()):
+                if expected[ny, nx] < 0:
+                    expected[ny, nx] = expected[y, x] + 1
+                    queue.append((nx, ny))
+        np.testing.assert_array_equal(dist, expected)
+
+    def test_wraps_across_east_west_edge(self):
+        dist = hex_distance_transform(np.array([0]), (4, 8), max_steps=2)
+        assert dist[0, 7] == 1
+        assert hex_distance_transform(np.array([0]), (4, 8), max_steps=2, wrap_x=False)[0, 7] == -1
@@ -0,0 +1,162 @@
+"""
+多进程物种分片测试
+
+- shard_workers=2 与同样块大小的进程内分块计算结果一致
+- 共享内存按名称复用，容量不足时扩容，close() 后全部释放
+- 分片块大小按进程数细分且不超过内存预算块大小
+- 分片运行结束后 resource_tracker 不输出任何错误（工作进程不动主进程的登记）
+- TENSOR_ECOLOGY_SHARD_WORKERS 配置经 get_ecology_engine 启用分片
+"""
+
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from ..ecology import (
+    CHUNKING_ON,
+    EcologyConfig,
+    TensorEcologyEngine,
+    get_ecology_engine,
+    reset_ecology_engine,
+)
+from ..sharded_ecology import BLOCKS_PER_WORKER, SharedArrays, shard_block_size
+
+BACKEND_ROOT = Path(__file__).resolve().parents[3]
+
+S, H, W = 7, 12, 16
+RTOL = 1e-5
+ATOL = 1e-4
+
+
+@pytest.fixture
+def world():
+    rng = np.random.default_rng(20240911)
+    pop = (rng.random((S, H, W)) * 150).astype(np.float32)
+    pop[rng.random((S, H, W)) < 0.5] = 0
+    env = rng.random((7, H, W)).astype(np.float32)
+    params = (rng.random((S, 8)) * 10).astype(np.float32)
+    prefs = rng.random((S, 7)).astype(np.float32)
+    traits = rng.uniform(1, 10, (S, 14)).astype(np.float32)
+    traits[:, 8:11] = rng.random((S, 3))
+    traits[:, 12:] = rng.random((S, 2))
+    trophic = np.array([1.0, 1.0, 2.0, 2.0, 3.0, 1.5, 2.5], dtype=np.float32)
+    overlay = rng.random((2, H, W)).astype(np.float32)
+    return pop, env, params, prefs, traits, trophic, overlay
+
+
+def _run(engine, world, turn_index):
+    pop, env, params, prefs, traits, trophic, overlay = world
+    return engine.process_ecology(
+        pop, env, params, prefs, turn_index=turn_index, trophic_levels=trophic,
+        species_traits=traits, pressure_overlay=overlay, decline_streaks=np.arange(S) % 3,
+    )
+
+
+@pytest.fixture
+def sharded_engine():
+    engine = TensorEcologyEngine(
+        EcologyConfig(layout="dense", chunking=CHUNKING_ON, chunk_species=3, shard_workers=2),
+        backend="numpy",
+    )
+    yield engine
+    engine.clear_cache()
+
+
+class TestShardedParity:
+    @pytest.mark.parametrize("turn_index", [5, 80])
+    def test_matches_in_process(self, world, sharded_engine, turn_index):
+        serial = _run(
+            TensorEcologyEngine(EcologyConfig(layout="dense", chunking=CHUNKING_ON, chunk_species=2), backend="numpy"),
+            world, turn_index,
+        )
+        sharded = _run(sharded_engine, world, turn_index)
+
+        assert serial.metrics.shard_workers == 0
+        assert sharded.metrics.shard_workers == 2
+        # 块大小按进程数细分：min(ceil(7 / 4), 3) = 2
+        assert sharded.metrics.chunk_species == 2 and sharded.metrics.chunks == 4
+        np.testing.assert_allclose(sharded.pop, serial.pop, rtol=RTOL, atol=ATOL)
+        np.testing.assert_allclose(sharded.mortality_rates, serial.mortality_rates, rtol=RTOL, atol=ATOL)
+        np.testing.assert_allclose(sharded.death_counts, serial.death_counts, atol=1)
+        assert sharded.migrated_species == serial.migrated_species
+
+    def test_results_survive_next_turn(self, world, sharded_engine):
+        first = _run(sharded_engine, world, 60)
+        snapshot = first.pop.copy()
+        _run(sharded_engine, world, 61)
+        # 结果是主进程副本，下一回合覆盖共享内存不影响
+        np.testing.assert_array_equal(first.pop, snapshot)
+
+    def test_single_worker_not_sharded(self, world):
+        engine = TensorEcologyEngine(
+            EcologyConfig(layout="dense", chunking=CHUNKING_ON, chunk_species=3, shard_workers=1),
+            backend="numpy",
+        )
+        result = _run(engine, world, 80)
+        assert result.metrics.shard_workers == 0 and result.metrics.chunk_species == 3
+
+
+    def test_tracker_stderr_clean(self):
+        # resource_tracker 的错误打印在子进程 stderr 上，pytest 捕获不到主进程之外的输出
+        code = (
+            "import numpy as np\n"
+            "from app.tensor.ecology import CHUNKING_ON, EcologyConfig, TensorEcologyEngine\n"
+            "rng = np.random.default_rng(0)\n"
+            "S, H, W = 7, 12, 16\n"
+            "engine = TensorEcologyEngine(EcologyConfig(layout='dense', chunking=CHUNKING_ON, "
+            "chunk_species=3, shard_workers=2), backend='numpy')\n"
+            "for turn in range(2):\n"
+            "    result = engine.process_ecology(\n"
+            "        (rng.random((S, H, W)) * 150).astype(np.float32), rng.random((7, H, W)).astype(np.float32),\n"
+            "        (rng.random((S, 8)) * 10).astype(np.float32), rng.random((S, 7)).astype(np.float32),\n"
+            "        turn_index=turn, trophic_levels=np.ones(S, dtype=np.float32),\n"
+            "        species_traits=rng.uniform(1, 10, (S, 14)).astype(np.float32))\n"
+            "engine.clear_cache()\n"
+            "print(result.metrics.shard_workers)\n"
+        )
+        out = subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=BACKEND_ROOT, capture_output=True, text=True, timeout=120,
+        )
+        assert out.returncode == 0, out.stderr
+        assert out.stdout.strip().splitlines()[-1] == "2"
+        assert "Traceback" not in out.stderr and "KeyError" not in out.stderr, out.stderr
+
+
+    def test_setting_enables_sharding(self, world, monkeypatch):
+        monkeypatch.setenv("TENSOR_COMPUTE_BACKEND", "numpy")
+        monkeypatch.setenv("TENSOR_ECOLOGY_SHARD_WORKERS", "2")
+        reset_ecology_engine()
+        try:
+            engine = get_ecology_engine()
+            assert engine.config.shard_workers == 2
+            result = _run(engine, world, 80)
+            assert result.metrics.shard_workers == 2
+        finally:
+            reset_ecology_engine()
+
+
+class TestSharedArrays:
+    def test_reuse_grow_close(self):
+        shared = SharedArrays()
+        try:
+            a, spec_a = shared.empty("pop", (4, 5))
+            a[:] = 1.0
+            b, spec_b = shared.empty("pop", (2, 5))
+            assert spec_b.shm_name == spec_a.shm_name
+            assert (b == 1.0).all()
+
+            size = shared.nbytes
+            _, spec_c = shared.empty("pop", (8, 5))
+            assert spec_c.shm_name != spec_a.shm_name and shared.nbytes >= 8 * 5 * 4 > size
+        finally:
+            shared.close()
+        assert shared.nbytes == 0
+
+    def test_shard_block_size(self):
+        assert shard_block_size(100, 4) == -(-100 // (4 * BLOCKS_PER_WORKER))
+        assert shard_block_size(100, 4, chunk=5) == 5
+        assert shard_block_size(3, 8) == 1
@@ -0,0 +1,110 @@
+"""
+张量快照发布/读取测试
+
+- 发布后读取为只读内存映射，内容与 TensorState 一致
+- 版本号单调递增，读者按版本缓存
+- 环境未变化时复用上一版本 env.npy，旧版本按保留数清理
+- clear() 撤销当前快照
+"""
+
+import numpy as np
+import pytest
+
+from ..snapshot import TensorSnapshotPublisher, TensorSnapshotReader
+from ..state import TensorState
+
+
+def _state(S: int = 3, H: int = 4, W: int = 5, seed: int = 0) -> TensorState:
+    rng = np.random.default_rng(seed)
+    pop = rng.random((S, H, W)).astype(np.float32)
+    pop[pop < 0.5] = 0.0
+    tile_ids = np.arange(H * W, dtype=np.int32)[::-1].reshape(H, W).copy()
+    tile_ids[0, 0] = -1
+    return TensorState(
+        env=rng.random((7, H, W)).astype(np.float32),
+        pop=pop,
+        species_params=np.zeros((S, 4), dtype=np.float32),
+        masks={"tile_ids": tile_ids},
+        species_map={f"A{i}": i for i in range(S)},
+        turn_index=7,
+    )
+
+
+@pytest.fixture
+def store(tmp_path):
+    return TensorSnapshotPublisher(tmp_path, keep_versions=2), TensorSnapshotReader(tmp_path)
+
+
+class TestTensorSnapshot:
+    def test_roundtrip_readonly(self, store):
+        publisher, reader = store
+        assert reader.latest() is None
+
+        state = _state()
+        assert publisher.publish(state) == 1
+        snap = reader.latest()
+
+        assert snap.version == 1 and snap.turn_index == 7
+        np.testing.assert_array_equal(snap.pop, state.pop)
+        np.testing.assert_array_equal(snap.env, state.env)
+        np.testing.assert_array_equal(snap.tile_ids, state.masks["tile_ids"])
+        assert isinstance(snap.pop, np.memmap) and not snap.pop.flags.writeable
+        np.testing.assert_array_equal(snap.population_slice("A1"), state.pop[1])
+        assert snap.population_slice("Z9") is None
+
+        # 发布后修改引擎状态不影响已发布快照
+        state.pop[:] = 0
+        assert snap.pop.any()
+
+    def test_per_tile_order_and_aggregates(self, store):
+        publisher, reader = store
+        state = _state()
+        publisher.publish(state)
+        snap = reader.latest()
+
+        tile_ids = state.masks["tile_ids"]
+        valid = tile_ids >= 0
+        order = np.argsort(tile_ids[valid])
+        np.testing.assert_allclose(snap.per_tile(snap.total_population), state.pop.sum(axis=0)[valid][order], rtol=1e-6)
+        np.testing.assert_array_equal(snap.per_tile(snap.richness), (state.pop > 0).sum(axis=0)[valid][order])
+
+    def test_versions_cache_and_prune(self, store, tmp_path):
+        publisher, reader = store
+        state = _state()
+        publisher.publish(state)
+        first = reader.latest()
+        assert reader.latest() is first
+
+        state.pop[0] += 1
+        publisher.publish(state, turn_index=8)
+        second = reader.latest()
+        assert second is not first and second.version == 2 and second.turn_index == 8
+        # 环境版本未变：env.npy 与上一版本共用
+        assert (tmp_path / "v000002" / "env.npy").samefile(tmp_path / "v000001" / "env.npy")
+
+        state.env_version += 1
+        publisher.publish(state)
+        assert not (tmp_path / "v000003" / "env.npy").samefile(tmp_path / "v000002" / "env.npy")
+        assert sorted(p.name for p in tmp_path.glob("v*")) == ["v000002", "v000003"]
+        # 已映射的旧快照仍可读
+        assert first.pop.shape == state.pop.shape
+
+    def test_clear_and_restart(self, store, tmp_path):
+        publisher, reader = store
+        publisher.publish(_state())
+        publisher.clear()
+        assert reader.latest() is None
+
+        # 新进程的发布器接着已有版本号编号，读者不会误用旧缓存
+        restarted = TensorSnapshotPublisher(tmp_path)
+        assert restarted.publish(_state(seed=1)) == 2
+        np.testing.assert_array_equal(reader.latest().pop, _state(seed=1).pop)
+
+    def test_missing_tile_ids(self, store):
+        publisher, reader = store
+        state = _state()
+        state.masks = {}
+        publisher.publish(state)
+        snap = reader.latest()
+        assert (snap.tile_ids == -1).all()
+        assert snap.per_tile(snap.richness).size == 0
@@ -0,0 +1,191 @@
+"""
+稀疏种群布局测试
+
+- SparseDomain / SparsePopulation 的基本操作
+- 稀疏生态计算与稠密 NumPy 路径的数值一致性
+"""
+
+import numpy as np
+import pytest
+
+from ..ecology import EcologyConfig, TensorEcologyEngine
+from ..sparse_pop import (
+    SparseDomain,
+    SparsePopulation,
+    cell_pairs,
+    occupancy_ratio,
+    select_layout,
+)
+
+S, H, W = 6, 18, 22
+RTOL = 1e-4
+ATOL = 1e-3
+
+
+@pytest.fixture
+def rng() -> np.random.Generator:
+    return np.random.default_rng(20240611)
+
+
+def _sparse_pop(rng, empty_ratio: float) -> np.ndarray:
+    p = (rng.random((S, H, W)) * 180).astype(np.float32)
+    p[rng.random((S, H, W)) < empty_ratio] = 0
+    return p
+
+
+@pytest.fixture
+def env(rng) -> np.ndarray:
+    """7 通道环境：[温度, 湿度, 海拔, 资源, 陆地, 海洋, 海岸]"""
+    e = np.zeros((7, H, W), dtype=np.float32)
+    e[0] = rng.uniform(-1, 1, (H, W))
+    e[1] = rng.random((H, W))
+    e[2] = rng.random((H, W))
+    e[3] = rng.random((H, W))
+    ocean = rng.random((H, W)) < 0.35
+    coast = ~ocean & (rng.random((H, W)) < 0.2)
+    e[4] = (~ocean & ~coast).astype(np.float32)
+    e[5] = ocean.astype(np.float32)
+    e[6] = coast.astype(np.float32)
+    return e
+
+
+@pytest.fixture
+def traits(rng) -> np.ndarray:
+    """物种特质 (S, 14)，覆盖陆生/水生/两栖"""
+    t = np.zeros((S, 14), dtype=np.float32)
+    t[:, 0:8] = rng.uniform(1, 10, (S, 8))
+    t[:, 8:11] = np.array([
+        [1.0, 0.0, 0.1],
+        [0.0, 1.0, 0.1],
+        [0.5, 0.5, 0.6],
+        [0.9, 0.1, 0.0],
+        [0.1, 0.9, 0.2],
+        [0.4, 0.4, 0.2],
+    ], dtype=np.float32)
+    t[:, 11] = rng.uniform(1, 4, S)
+    t[:, 12] = rng.integers(0, 40, S)
+    t[:, 13] = rng.random(S)
+    return t
+
+
+class TestSparseDomain:
+    """SparseDomain / SparsePopulation 测试"""
+
+    def test_round_trip(self, rng):
+        """稠密 → 稀疏 → 稠密 无损"""
+        pop = _sparse_pop(rng, 0.9)
+        sparse = SparsePopulation.from_dense(pop)
+
+        assert sparse.nnz == np.count_nonzero(pop)
+        np.testing.assert_array_equal(sparse.to_dense(), pop)
+        np.testing.assert_allclose(sparse.species_totals(), pop.sum(axis=(1, 2)), rtol=1e-5)
+
+    def test_lookup_and_neighbor(self):
+        """键查找与邻居查找（边界不环绕）"""
+        shape = (2, 3, 4)
+        domain = SparseDomain.from_keys(shape, [12 + 5, 12 + 6, 0])
+
+        np.testing.assert_array_equal(domain.lookup([17, 18, 1]), [1, 2, -1])
+        valid, positions, _ = domain.neighbor(0, 1)
+        # (0,0,0) 右邻 (0,0,1) 不在定义域；(1,1,1) 右邻 (1,1,2) 在定义域
+        np.testing.assert_array_equal(valid, [True, True, True])
+        np.testing.assert_array_equal(positions, [-1, 2, -1])
+        valid, _, _ = domain.neighbor(-1, 0)
+        np.testing.assert_array_equal(valid, [False, True, True])
+
+    def test_dilate_matches_dense(self, rng):
+        """膨胀结果与稠密 4 邻域膨胀一致"""
+        pop = _sparse_pop(rng, 0.97)
+        mask = pop > 0
+        for _ in range(2):
+            grown = mask.copy()
+            grown[:, 1:, :] |= mask[:, :-1, :]
+            grown[:, :-1, :] |= mask[:, 1:, :]
+            grown[:, :, 1:] |= mask[:, :, :-1]
+            grown[:, :, :-1] |= mask[:, :, 1:]
+            mask = grown
+
+        domain = SparsePopulation.from_dense(pop).domain.dilate(2)
+        np.testing.assert_array_equal(domain.keys, np.flatnonzero(mask))
+
+    def test_cell_sum_matches_dense(self, rng):
+        """逐地块求和与稠密 pop.sum(axis=0) 完全一致"""
+        pop = _sparse_pop(rng, 0.8)
+        sparse = SparsePopulation.from_dense(pop)
+        np.testing.assert_array_equal(
+            sparse.domain.cell_sum(sparse.values).reshape(H, W), pop.sum(axis=0)
+        )
+
+    def test_cell_pairs(self):
+        """同地块配对按右侧原顺序列出"""
+        left, right = cell_pairs(np.array([3, 5, 3]), np.array([5, 3, 3, 7]))
+
+        pairs = sorted(zip(left.tolist(), right.tolist()))
+        assert pairs == [(0, 1), (0, 2), (1, 0), (2, 1), (2, 2)]
+
+    def test_select_layout(self, rng):
+        """按占用率自动选择布局"""
+        dense_pop = _sparse_pop(rng, 0.5)
+        sparse_pop = _sparse_pop(rng, 0.995)
+
+        assert occupancy_ratio(dense_pop) > 0.3
+        assert select_layout(dense_pop) == "dense"
+        assert select_layout(sparse_pop) == "sparse"
+        assert select_layout(sparse_pop, "dense") == "dense"
+        assert select_layout(dense_pop, "SPARSE") == "sparse"
+        assert select_layout(dense_pop, "unknown") == "dense"
+
+
+class TestSparseEcologyParity:
+    """稀疏布局与稠密 NumPy 路径对照"""
+
+    @pytest.mark.parametrize("turn_index", [5, 40])
+    @pytest.mark.parametrize("empty_ratio", [0.6, 0.98])
+    def test_process_ecology(self, rng, env, traits, turn_index, empty_ratio):
+        pop = _sparse_pop(rng, empty_ratio)
+        params = (rng.random((S, 8)) * 10).astype(np.float32)
+        prefs = rng.random((S, 7)).astype(np.float32)
+        trophic = np.array([1.0, 1.0, 2.0, 2.0, 3.0, 1.5], dtype=np.float32)
+        kwargs = dict(
+            turn_index=turn_index,
+            trophic_levels=trophic,
+            pressure_overlay=rng.random((2, H, W)).astype(np.float32),
+            external_bonus=np.broadcast_to((rng.random((H, W)) * 0.2).astype(np.float32), (S, H, W)),
+            cooldown_mask=np.array([True, True, False, True, True, True]),
+            decline_streaks=np.array([0, 2, 0, 3, 1, 0], dtype=np.int32),
+            species_traits=traits,
+        )
+
+        dense, sparse = (
+            TensorEcologyEngine(EcologyConfig(layout=layout), backend="numpy").process_ecology(
+                pop, env, params, prefs, **kwargs
+            )
+            for layout in ("dense", "sparse")
+        )
+
+        assert dense.metrics.layout == "dense"
+        assert sparse.metrics.layout == "sparse"
+        np.testing.assert_allclose(sparse.pop, dense.pop, rtol=RTOL, atol=ATOL)
+        np.testing.assert_allclose(sparse.mortality_rates, dense.mortality_rates, rtol=RTOL, atol=ATOL)
+        np.testing.assert_allclose(sparse.survivor_counts, dense.survivor_counts, atol=1)
+        assert sparse.migrated_species == dense.migrated_species
+        np.testing.assert_array_equal(sparse.sparse_pop.to_dense(), sparse.pop)
+
+    def test_sparse_input_and_legacy_fallback(self, rng, env, traits):
+        """SparsePopulation 可直接作为输入；无特质矩阵时回退稠密"""
+        pop = _sparse_pop(rng, 0.99)
+        params = (rng.random((S, 8)) * 10).astype(np.float32)
+        prefs = rng.random((S, 7)).astype(np.float32)
+        engine = TensorEcologyEngine(backend="numpy")
+
+        from_dense = engine.process_ecology(pop, env, params, prefs, species_traits=traits)
+        from_sparse = engine.process_ecology(
+            SparsePopulation.from_dense(pop), env, params, prefs, species_traits=traits
+        )
+        assert from_dense.metrics.layout == "sparse"
+        np.testing.assert_array_equal(from_sparse.pop, from_dense.pop)
+
+        legacy = engine.process_ecology(SparsePopulation.from_dense(pop), env, params, prefs)
+        assert legacy.metrics.layout == "dense"
+        assert legacy.sparse_pop is None
+        assert legacy.pop.shape == (S, H, W)
@@ -54,19 +54,47 @@ class TestDetectIsolation:
         assert "SP001" in isolation
         assert len(isolation["SP001"]) == 2
     
-    def test_diagonal_not_connected(self, monitor: SpeciationMonitor):
-        """测试对角线不视为连通"""
+    def test_hex_adjacency(self, monitor: SpeciationMonitor):
+        """测试六边形邻接：偶数列向右的对角格相邻，奇数列向右的对角格不相邻"""
         pop_tensor = np.zeros((2, 10, 10), dtype=np.float32)
         
-        # 物种0: 对角线相邻（但不直接连通）
-        pop_tensor[0, 2, 2] = 100.0
+        # 物种0: x=3 为奇数列，(x=4, y=4) 不是 (x=3, y=3) 的邻居
         pop_tensor[0, 3, 3] = 100.0
+        pop_tensor[0, 4, 4] = 100.0
+        # 物种1: x=2 为偶数列，(x=3, y=3) 是 (x=2, y=2) 的邻居
+        pop_tensor[1, 2, 2] = 100.0
+        pop_tensor[1, 3, 3] = 100.0
         
         isolation = monitor.detect_isolation(pop_tensor)
         
-        # scipy.ndimage.label 默认使用4连通，对角线不连通
         assert "SP001" in isolation
         assert len(isolation["SP001"]) == 2
+        assert "SP002" not in isolation
+    
+    def test_wraps_east_west(self, monitor: SpeciationMonitor):
+        """测试东西边界环绕：首尾两列相连"""
+        pop_tensor = np.zeros((2, 10, 10), dtype=np.float32)
+        pop_tensor[0, :, 0] = 100.0
+        pop_tensor[0, :, 9] = 100.0
+        
+        isolation = monitor.detect_isolation(pop_tensor)
+        
+        assert "SP001" not in isolation
+    
+    def test_region_statistics(self, monitor: SpeciationMonitor):
+        """测试区域统计：格子数与种群总量按光栅顺序编号"""
+        pop_tensor = np.zeros((2, 10, 10), dtype=np.float32)
+        pop_tensor[0, 1:3, 1:3] = 100.0
+        pop_tensor[0, 7:9, 6:9] = 50.0
+        
+        regions = monitor.detect_isolation(pop_tensor)["SP001"]
+        
+        np.testing.assert_array_equal(regions.sizes, [4, 6])
+        np.testing.assert_allclose(regions.population, [400.0, 300.0])
+        assert regions.labels.dtype == np.int32
+        assert regions.labels[1, 1] == 1 and regions.labels[8, 8] == 2
+        masks = regions.masks()
+        assert masks[1].sum() == 6 and masks[1][7, 6]
     
     def test_multiple_species(self, monitor: SpeciationMonitor):
         """测试多物种同时检测"""
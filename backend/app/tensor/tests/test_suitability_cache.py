@@ -0,0 +1,159 @@
+"""
+增量适宜度测试
+
+- 跨回合特质 / 环境列 / 存在状态变化时，增量结果与每次整体重算一致
+- 未变化的行列直接复用，命中率统计正确
+- 生态位相似度只重算特征变化的物种
+- TensorSuitabilityCalculator 增量模式读取最新特质（不再按谱系编码缓存旧值）
+"""
+
+import types
+
+import numpy as np
+import pytest
+
+from ..suitability import TensorSuitabilityCalculator
+from ..suitability_cache import (
+    IncrementalSuitability,
+    niche_similarity_rows,
+    specialization,
+)
+
+S, H, W = 6, 5, 7
+ATOL = 1e-5
+
+
+def _cfg():
+    return TensorSuitabilityCalculator(incremental=False)._get_config()
+
+
+def _world(rng):
+    traits = rng.uniform(1, 10, (S, 5)).astype(np.float32)
+    trophic = np.array([1.0, 1.0, 2.0, 2.2, 3.0, 1.0], dtype=np.float32)
+    env = rng.random((7, H, W)).astype(np.float32)
+    pop = (rng.random((S, H, W)) * 10).astype(np.float32)
+    pop[rng.random((S, H, W)) < 0.4] = 0
+    mask = (rng.random((S, H, W)) > 0.1).astype(np.float32)
+    return traits, trophic, env, pop, mask
+
+
+def _inputs(traits, trophic):
+    traits_ext = np.concatenate([traits, specialization(traits)[:, None]], axis=1)
+    features = np.concatenate([traits / 10.0, trophic[:, None] / 5.0, np.full((len(traits), 2), 0.5)], axis=1)
+    return traits_ext.astype(np.float32), features.astype(np.float32)
+
+
+def _compute(cache, codes, traits, trophic, env, pop, mask, cfg):
+    traits_ext, features = _inputs(traits, trophic)
+    return cache.compute(codes, traits_ext, features, trophic, env, pop, mask, cfg)
+
+
+@pytest.fixture
+def channels():
+    return TensorSuitabilityCalculator.ENV_CHANNELS
+
+
+class TestIncrementalParity:
+    def test_matches_full_recompute(self, channels):
+        rng = np.random.default_rng(11)
+        cfg = _cfg()
+        traits, trophic, env, pop, mask = _world(rng)
+        codes = [f"A{i}" for i in range(S)]
+        cache = IncrementalSuitability(channels)
+
+        for turn in range(6):
+            if turn == 1:
+                traits[2] += 1.5                      # 单个物种特质变化
+            elif turn == 2:
+                env[0, 1:3, 2:4] += 0.2               # 少量地块环境变化
+            elif turn == 3:
+                pop[:, 0, :] = np.where(pop[:, 0, :] > 0, 0, 3)   # 一行地块存在状态翻转
+            elif turn == 4:
+                trophic[5] = 2.0                      # 营养级变化影响拥挤
+            elif turn == 5:
+                codes = codes[1:] + ["B0"]            # 物种灭绝 + 新物种
+                traits, trophic = np.roll(traits, -1, axis=0), np.roll(trophic, -1)
+                traits[-1] = rng.uniform(1, 10, 5)
+            got, sim, _ = _compute(cache, codes, traits, trophic, env, pop, mask, cfg)
+            want, want_sim, _ = _compute(IncrementalSuitability(channels), codes, traits, trophic, env, pop, mask, cfg)
+            np.testing.assert_allclose(got, want, atol=ATOL)
+            np.testing.assert_allclose(sim, want_sim, atol=ATOL)
+
+    def test_masked_cells_zero(self, channels):
+        traits, trophic, env, pop, mask = _world(np.random.default_rng(2))
+        result, _, _ = _compute(IncrementalSuitability(channels), [str(i) for i in range(S)],
+                                traits, trophic, env, pop, mask, _cfg())
+        assert (result[mask < 0.5] == 0).all()
+        assert result.min() >= 0 and result.max() <= 1
+
+
+class TestReuse:
+    def test_hit_ratio_and_scope(self, channels):
+        rng = np.random.default_rng(5)
+        cfg = _cfg()
+        traits, trophic, env, pop, mask = _world(rng)
+        codes = [f"A{i}" for i in range(S)]
+        cache = IncrementalSuitability(channels)
+
+        _, _, first = _compute(cache, codes, traits, trophic, env, pop, mask, cfg)
+        assert first.rows_recomputed == S and first.cells_reused == 0
+
+        _, _, same = _compute(cache, codes, traits, trophic, env, pop, mask, cfg)
+        assert same.rows_recomputed == 0 and same.cols_recomputed == 0
+        assert same.cells_reused == S * H * W
+        assert same.similarity_rows_recomputed == 0 and same.presence_cols_updated == 0
+
+        traits[3] += 2.0
+        env[1, 0, 0] += 0.3
+        _, _, changed = _compute(cache, codes, traits, trophic, env, pop, mask, cfg)
+        assert changed.rows_recomputed == 1 and changed.cols_recomputed == 1
+        assert changed.similarity_rows_recomputed == 1
+        assert changed.cells_reused == (S - 1) * (H * W - 1)
+
+        stats = cache.stats.to_dict()
+        assert stats["calls"] == 3
+        expected = (S * H * W + (S - 1) * (H * W - 1)) / (3 * S * H * W)
+        assert stats["hit_ratio"] == pytest.approx(expected, abs=1e-4)
+
+    def test_config_change_resets(self, channels):
+        traits, trophic, env, pop, mask = _world(np.random.default_rng(9))
+        codes = [str(i) for i in range(S)]
+        cache = IncrementalSuitability(channels)
+        cfg = _cfg()
+        _compute(cache, codes, traits, trophic, env, pop, mask, cfg)
+        cfg["weight_temperature"] = 0.5
+        _, _, update = _compute(cache, codes, traits, trophic, env, pop, mask, cfg)
+        assert update.rows_recomputed == S and update.cells_reused == 0
+
+    def test_similarity_rows(self):
+        features = np.random.default_rng(1).random((4, 8)).astype(np.float32)
+        sim = niche_similarity_rows(features, features)
+        np.testing.assert_allclose(np.diag(sim), 1.0)
+        np.testing.assert_allclose(sim, sim.T, atol=1e-6)
+
+
+class TestCalculatorIncremental:
+    def test_reads_current_traits(self):
+        calc = TensorSuitabilityCalculator()
+        rng = np.random.default_rng(4)
+        _, _, env, pop, mask = _world(rng)
+        species = [
+            types.SimpleNamespace(
+                lineage_code=f"S{i}", trophic_level=1.0 + i % 3, habitat_type="terrestrial",
+                diet_type="herbivore", abstract_traits={"耐寒性": 2.0 + i, "耐热性": 6.0},
+            )
+            for i in range(S)
+        ]
+        first = calc.compute_all(species, env, pop, habitat_mask=mask)
+        species[0].abstract_traits = {"耐寒性": 9.0, "耐热性": 1.0}
+        second = calc.compute_all(species, env, pop, habitat_mask=mask)
+
+        assert second.metrics.backend == "numpy"
+        assert second.metrics.recomputed_rows == 1
+        assert not np.allclose(first.suitability[0], second.suitability[0])
+        assert calc.cache_stats()["calls"] == 2
+
+        calc.clear_cache()
+        third = calc.compute_all(species, env, pop, habitat_mask=mask)
+        assert third.metrics.recomputed_rows == S
+        np.testing.assert_allclose(third.suitability, second.suitability, atol=ATOL)
@@ -8,7 +8,7 @@ import numpy as np
 import pytest
 
 from ..config import TensorConfig
-from ..state import TensorState
+from ..state import TensorState, build_env_tensor, classify_biome
 
 
 class TestTensorState:
@@ -87,6 +87,169 @@ class TestTensorState:
         assert basic_state.species_map["SP003"] == 2
 
 
+class TestTensorStateIncremental:
+    """TensorState 增量更新测试"""
+    
+    @pytest.fixture
+    def state(self) -> TensorState:
+        pop = np.zeros((3, 4, 5), dtype=np.float32)
+        for i in range(3):
+            pop[i] = i + 1
+        return TensorState(
+            env=np.zeros((7, 4, 5), dtype=np.float32),
+            pop=pop,
+            species_params=np.arange(12, dtype=np.float32).reshape(3, 4),
+            species_map={"A1": 0, "B1": 1, "C1": 2},
+        )
+    
+    def test_add_species(self, state: TensorState):
+        """追加行不改变已有物种索引"""
+        state.add_species(["D1"], np.full((1, 4, 5), 9.0, dtype=np.float32))
+        
+        assert state.pop.shape == (4, 4, 5)
+        assert state.species_params.shape == (4, 4)
+        assert state.species_map["D1"] == 3
+        assert state.population_slice("D1")[0, 0] == 9.0
+        assert state.population_slice("A1")[0, 0] == 1.0
+    
+    def test_remove_species_swaps_last_row(self, state: TensorState):
+        """删除中间行时由末尾行填补"""
+        state.remove_species(["A1"])
+        
+        assert state.pop.shape == (2, 4, 5)
+        assert set(state.species_map) == {"B1", "C1"}
+        assert state.species_map["C1"] == 0
+        assert state.population_slice("C1")[0, 0] == 3.0
+        assert state.population_slice("B1")[0, 0] == 2.0
+        assert state.species_params[0, 0] == 8.0
+    
+    def test_remove_tail_and_unknown(self, state: TensorState):
+        """删除末尾行与未知编码"""
+        state.remove_species(["C1", "ZZZ"])
+        
+        assert state.pop.shape == (2, 4, 5)
+        assert state.species_map == {"A1": 0, "B1": 1}
+    
+    def test_patch_env_only_changed_cells(self, state: TensorState):
+        """只写入变化地块并记录脏掩码"""
+        env_ref = state.env
+        new_env = state.env.copy()
+        new_env[0, 1, 2] = 0.5
+        new_env[5, 3, 4] = 1.0
+        
+        changed = state.patch_env(new_env)
+        
+        assert changed == 2
+        assert state.env is env_ref
+        assert state.env_version == 1
+        assert state.masks["env_dirty"].sum() == 2
+        np.testing.assert_array_equal(state.env, new_env)
+        assert state.patch_env(new_env) == 0
+        assert state.env_version == 1
+    
+    def test_add_species_reserves_capacity(self, state: TensorState):
+        """追加行预留余量，后续追加不再搬迁已有行"""
+        state.add_species(["D1"], np.full((1, 4, 5), 9.0, dtype=np.float32))
+        buffer = state.pop.base
+        assert buffer is not None and buffer.shape[0] > 4
+        
+        state.add_species(["E1"], np.full((1, 4, 5), 5.0, dtype=np.float32))
+        
+        assert state.pop.base is buffer
+        assert state.pop.shape == (5, 4, 5)
+        assert state.population_slice("A1")[0, 0] == 1.0
+        assert state.population_slice("E1")[0, 0] == 5.0
+        np.testing.assert_allclose(state.species_totals(), [20, 40, 60, 180, 100])
+    
+    def test_species_totals_follow_writes(self, state: TensorState):
+        """总数缓存随 set_population / remove_species 更新，直接替换 pop 时重新求和"""
+        np.testing.assert_allclose(state.species_totals(), [20, 40, 60])
+        
+        new_pop = np.zeros_like(state.pop)
+        new_pop[1, 0, 0] = 7.0
+        state.set_population(new_pop, totals=np.array([0.0, 7.0, 0.0]))
+        np.testing.assert_allclose(state.species_totals(), [0, 7, 0])
+        
+        state.remove_species(["A1"])
+        assert state.species_totals()[state.species_map["B1"]] == 7.0
+        
+        state.pop = np.ones((2, 4, 5), dtype=np.float32)
+        np.testing.assert_allclose(state.species_totals(), [20, 20])
+    
+    def test_set_population_keeps_buffer(self, state: TensorState):
+        """形状不变时拷回后备数组，保留追加余量"""
+        state.add_species(["D1"], np.zeros((1, 4, 5), dtype=np.float32))
+        pop_ref = state.pop
+        
+        state.set_population(np.full((4, 4, 5), 2.0, dtype=np.float32))
+        
+        assert state.pop is pop_ref
+        np.testing.assert_allclose(state.species_totals(), [40, 40, 40, 40])
+    
+    def test_rescale_species(self, state: TensorState):
+        """只缩放指定行，总数为 0 的行交给调用方"""
+        state.pop[2] = 0
+        
+        empty = state.rescale_species(np.array([0, 2]), np.array([10.0, 5.0]))
+        
+        assert empty.tolist() == [2]
+        assert state.population_slice("A1").sum() == pytest.approx(10.0)
+        assert state.population_slice("B1")[0, 0] == 2.0
+        assert state.species_totals()[0] == pytest.approx(10.0)
+    
+    def test_patch_tiles_only_given_tiles(self, state: TensorState):
+        """只写入给定地块；地块不在原位置时不做修改并返回 None"""
+        from types import SimpleNamespace
+        
+        state.masks["tile_ids"] = np.arange(20, dtype=np.int32).reshape(4, 5)
+        env_ref = state.env
+        tile = SimpleNamespace(id=7, x=2, y=1, temperature=25.0, humidity=0.4,
+                               elevation=0.0, resources=0.0, biome="land")
+        
+        assert state.patch_tiles([tile]) == 1
+        assert state.env is env_ref
+        assert state.env[0, 1, 2] == pytest.approx(0.5)
+        assert state.masks["env_dirty"].sum() == 1
+        assert state.env_version == 1
+        
+        assert state.patch_tiles([tile]) == 0
+        assert state.masks["env_dirty"].sum() == 0
+        
+        moved = SimpleNamespace(**{**vars(tile), "x": 3, "temperature": 40.0})
+        assert state.patch_tiles([moved]) is None
+        assert state.env[0, 1, 3] == 0.0
+        assert state.env_version == 1
+
+
+class TestBuildEnvTensor:
+    """环境张量构建测试"""
+    
+    def test_classify_biome(self):
+        assert classify_biome("深海") == (0.0, 1.0, 0.0)
+        assert classify_biome("Coastal Plain") == (1.0, 0.0, 1.0)
+        assert classify_biome("temperate forest") == (1.0, 0.0, 0.0)
+        assert classify_biome(None) == (1.0, 0.0, 0.0)
+    
+    def test_build_env_tensor(self):
+        from types import SimpleNamespace
+        
+        tiles = [
+            SimpleNamespace(id=7, x=1, y=0, temperature=25.0, humidity=0.4,
+                            elevation=500.0, resources=200.0, biome="ocean"),
+            SimpleNamespace(id=8, x=2, y=1, temperature=10.0, humidity=0.9,
+                            elevation=1000.0, resources=50.0, biome="grassland"),
+            SimpleNamespace(id=9, x=99, y=99, temperature=0.0, humidity=0.0,
+                            elevation=0.0, resources=0.0, biome="land"),  # 越界
+        ]
+        env, ids = build_env_tensor(tiles, 2, 3)
+        
+        assert env.shape == (7, 2, 3)
+        assert ids[0, 1] == 7 and ids[1, 2] == 8
+        assert (ids >= 0).sum() == 2
+        np.testing.assert_allclose(env[:, 0, 1], [0.5, 0.4, 0.5, 2.0, 0.0, 1.0, 0.0])
+        np.testing.assert_allclose(env[:, 1, 2], [0.2, 0.9, 1.0, 0.5, 1.0, 0.0, 0.0])
+
+
 class TestTensorConfig:
     """TensorConfig 测试套件"""
     